@@ -10,6 +10,8 @@ import {
   AuthenticateResponse,
   Conversation,
   ResultSet,
+  FileTreeResponse,
+  FileChangesEvent,
 } from "./open-hands.types";
 import { openHands } from "./open-hands-axios";
 import { ApiSettings } from "#/services/settings";
@@ -67,6 +69,69 @@ class OpenHands {
     return data;
   }
 
+  /**
+   * Retrieve a directory of the workspace and its subdirectories at once
+   * @param path Directory to list. If path is not provided, it lists the workspace root
+   * @param maxDepth How many levels to descend. If not provided, there is no limit
+   * @returns The tree version, to be passed to `streamFileChanges`, and the files below the path
+   */
+  static async getFileTree(
+    conversationId: string,
+    path?: string,
+    maxDepth?: number,
+  ): Promise<FileTreeResponse> {
+    const url = `/api/conversations/${conversationId}/file-tree`;
+    const { data } = await openHands.get<FileTreeResponse>(url, {
+      params: { path, max_depth: maxDepth },
+    });
+    return data;
+  }
+
+  /**
+   * Listen to changes of the workspace, until the signal is aborted
+   * @param since Tree version to report changes after
+   * @param onChange Called with the new version and the changed directories, relative to the workspace
+   */
+  static async streamFileChanges(
+    conversationId: string,
+    since: number,
+    onChange: (event: FileChangesEvent) => void,
+    signal: AbortSignal,
+  ): Promise<void> {
+    // EventSource cannot send the auth headers, so read the stream with fetch
+    const url = `/api/conversations/${conversationId}/file-changes?since=${since}`;
+    const headers: Record<string, string> = {};
+    Object.entries(openHands.defaults.headers.common).forEach(
+      ([key, value]) => {
+        if (typeof value === "string") headers[key] = value;
+      },
+    );
+    const response = await fetch(url, { headers, signal });
+    if (!response.ok || !response.body) return;
+
+    const reader = response.body
+      .pipeThrough(new TextDecoderStream())
+      .getReader();
+    let buffer = "";
+    for (;;) {
+      // eslint-disable-next-line no-await-in-loop
+      const { value, done } = await reader.read();
+      if (done) return;
+      buffer += value.replace(/\r\n?/g, "\n");
+      const messages = buffer.split("\n\n");
+      buffer = messages.pop() ?? "";
+      messages.forEach((message) => {
+        const lines = message.split("\n");
+        const isChange = lines.includes("event: change");
+        const data = lines
+          .filter((line) => line.startsWith("data:"))
+          .map((line) => line.slice(5).trim())
+          .join("\n");
+        if (isChange && data) onChange(JSON.parse(data));
+      });
+    }
+  }
+
   /**
    * Retrieve the content of a file
    * @param path Full path of the file to retrieve
@@ -69,6 +69,16 @@ export interface Conversation {
   status: ProjectStatus;
 }
 
+export interface FileTreeResponse {
+  version: number;
+  files: string[];
+}
+
+export interface FileChangesEvent {
+  version: number;
+  changed: string[];
+}
+
 export interface ResultSet<T> {
   results: T[];
   next_page_id: string | null;
@@ -9,7 +9,7 @@ export function BrowserPanel() {
   );
 
   const imgSrc =
-    screenshotSrc && screenshotSrc.startsWith("data:image/png;base64,")
+    screenshotSrc && screenshotSrc.startsWith("data:image/")
       ? screenshotSrc
       : `data:image/png;base64,${screenshotSrc || ""}`;
 
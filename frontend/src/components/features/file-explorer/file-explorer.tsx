@@ -7,6 +7,7 @@ import toast from "#/utils/toast";
 import { RootState } from "#/store";
 import { I18nKey } from "#/i18n/declaration";
 import { useListFiles } from "#/hooks/query/use-list-files";
+import { useFileChanges } from "#/hooks/use-file-changes";
 import { cn } from "#/utils/utils";
 import { FileExplorerHeader } from "./file-explorer-header";
 import { useVSCodeUrl } from "#/hooks/query/use-vscode-url";
@@ -23,6 +24,7 @@ export function FileExplorer({ isOpen, onToggle }: FileExplorerProps) {
   const { curAgentState } = useSelector((state: RootState) => state.agent);
 
   const { data: paths, refetch, error } = useListFiles();
+  useFileChanges(!RUNTIME_INACTIVE_STATES.includes(curAgentState));
   const { data: vscodeUrl } = useVSCodeUrl({
     enabled: !RUNTIME_INACTIVE_STATES.includes(curAgentState),
   });
@@ -109,6 +109,7 @@ export function WsClientProvider({
   );
   const [events, setEvents] = React.useState<Record<string, unknown>[]>([]);
   const lastEventRef = React.useRef<Record<string, unknown> | null>(null);
+  const replayQueueRef = React.useRef<Promise<void>>(Promise.resolve());
 
   const messageRateHandler = useRate({ threshold: 250 });
 
@@ -136,6 +137,41 @@ export function WsClientProvider({
     handleAssistantMessage(event);
   }
 
+  async function decodeEventBatch(data: ArrayBuffer) {
+    const stream = new Blob([data])
+      .stream()
+      .pipeThrough(new DecompressionStream("deflate"));
+    const text = await new Response(stream).text();
+    return JSON.parse(text) as Record<string, unknown>[];
+  }
+
+  function handleEventBatch(
+    batch: {
+      data?: ArrayBuffer;
+      events?: Record<string, unknown>[];
+      cursor?: number;
+      done?: boolean;
+    },
+    ack?: () => void,
+  ) {
+    // Decoding is asynchronous; keep the batches in order
+    replayQueueRef.current = replayQueueRef.current
+      .then(async () => {
+        const batchEvents =
+          batch.events ?? (batch.data ? await decodeEventBatch(batch.data) : []);
+        batchEvents.forEach(handleMessage);
+      })
+      .catch((error) => EventLogger.error(String(error)))
+      .finally(() => ack?.());
+  }
+
+  function handleQueuedMessage(event: Record<string, unknown>) {
+    // Stay behind batches that are still being decoded
+    replayQueueRef.current = replayQueueRef.current
+      .then(() => handleMessage(event))
+      .catch((error) => EventLogger.error(String(error)));
+  }
+
   function handleDisconnect(data: unknown) {
     setStatus(WsClientProviderStatus.DISCONNECTED);
     const sio = sioRef.current;
@@ -168,6 +204,7 @@ export function WsClientProvider({
     const query = {
       latest_event_id: lastEvent?.id ?? -1,
       conversation_id: conversationId,
+      replay_batches: 1,
     };
 
     const baseUrl =
@@ -178,7 +215,8 @@ export function WsClientProvider({
       query,
     });
     sio.on("connect", handleConnect);
-    sio.on("oh_event", handleMessage);
+    sio.on("oh_event", handleQueuedMessage);
+    sio.on("oh_event_batch", handleEventBatch);
     sio.on("connect_error", handleError);
     sio.on("connect_failed", handleError);
     sio.on("disconnect", handleDisconnect);
@@ -187,7 +225,8 @@ export function WsClientProvider({
 
     return () => {
       sio.off("connect", handleConnect);
-      sio.off("oh_event", handleMessage);
+      sio.off("oh_event", handleQueuedMessage);
+      sio.off("oh_event_batch", handleEventBatch);
       sio.off("connect_error", handleError);
       sio.off("connect_failed", handleError);
       sio.off("disconnect", handleDisconnect);
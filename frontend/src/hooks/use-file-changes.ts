@@ -0,0 +1,70 @@
+import React from "react";
+import { useQueryClient } from "@tanstack/react-query";
+import { AxiosError } from "axios";
+import OpenHands from "#/api/open-hands";
+import { useConversation } from "#/context/conversation-context";
+
+// Seconds to wait before listening again after the stream ends or fails
+const RECONNECT_DELAY = 5;
+
+/**
+ * Refetch the listings of workspace directories when they change, as pushed
+ * by the server, instead of polling the whole tree
+ */
+export const useFileChanges = (enabled: boolean) => {
+  const { conversationId } = useConversation();
+  const queryClient = useQueryClient();
+
+  React.useEffect(() => {
+    if (!enabled) return undefined;
+    const controller = new AbortController();
+
+    const listen = async () => {
+      let version: number | undefined;
+      while (!controller.signal.aborted) {
+        try {
+          if (version === undefined) {
+            // eslint-disable-next-line no-await-in-loop
+            ({ version } = await OpenHands.getFileTree(
+              conversationId,
+              undefined,
+              1,
+            ));
+          }
+          // eslint-disable-next-line no-await-in-loop
+          await OpenHands.streamFileChanges(
+            conversationId,
+            version,
+            (event) => {
+              version = event.version;
+              event.changed.forEach((directory) => {
+                queryClient.invalidateQueries({
+                  queryKey: [
+                    "files",
+                    conversationId,
+                    directory === "." ? undefined : `${directory}/`,
+                  ],
+                  exact: true,
+                });
+              });
+            },
+            controller.signal,
+          );
+        } catch (error) {
+          // The runtime does not support file trees
+          if (error instanceof AxiosError && error.response?.status === 501) {
+            return;
+          }
+          // Otherwise it may have gone away; listen again later
+        }
+        // eslint-disable-next-line no-await-in-loop
+        await new Promise((resolve) => {
+          setTimeout(resolve, RECONNECT_DELAY * 1000);
+        });
+      }
+    };
+    listen();
+
+    return () => controller.abort();
+  }, [conversationId, enabled]);
+};
@@ -8,6 +8,7 @@ import omninexus
 import omninexus.agenthub.codeact_agent.function_calling as codeact_function_calling
 from omninexus.controller.agent import Agent
 from omninexus.controller.state.state import State
+from omninexus.core import tracing
 from omninexus.core.config import AgentConfig
 from omninexus.core.logger import omninexus_logger as logger
 from omninexus.core.message import ImageContent, Message, TextContent
@@ -102,6 +103,7 @@ class CodeActAgent(Agent):
             codeact_enable_browsing=self.config.codeact_enable_browsing,
             codeact_enable_jupyter=self.config.codeact_enable_jupyter,
             codeact_enable_llm_editor=self.config.codeact_enable_llm_editor,
+            codeact_enable_parallel_delegation=self.config.codeact_enable_parallel_delegation,
         )
         logger.debug(
             f'TOOLS loaded for CodeActAgent: {json.dumps(self.tools, indent=2, ensure_ascii=False).replace("\\n", "\n")}'
@@ -366,6 +368,7 @@ class CodeActAgent(Agent):
         - CmdRunAction(command) - bash command to run
         - IPythonRunCellAction(code) - IPython code to run
         - AgentDelegateAction(agent, inputs) - delegate action for (sub)task
+        - AgentDelegateParallelAction(delegates) - subtasks for delegates running at the same time
         - MessageAction(content) - Message action to run (e.g. ask for clarification)
         - AgentFinishAction() - end the interaction
         """
@@ -379,7 +382,9 @@ class CodeActAgent(Agent):
             return AgentFinishAction()
 
         # prepare what we want to send to the LLM
-        messages = self._get_messages(state)
+        with tracing.span('Agent._get_messages') as span:
+            messages = self._get_messages(state)
+            span.set(messages=len(messages))
         params: dict = {
             'messages': self.llm.format_messages_for_llm(messages),
         }
@@ -448,6 +453,12 @@ class CodeActAgent(Agent):
                 )
             )
 
+        # A delegate gets its task with its inputs, not as a message in its history
+        if state.inputs.get('task'):
+            messages.append(
+                Message(role='user', content=[TextContent(text=state.inputs['task'])])
+            )
+
         pending_tool_call_action_messages: dict[str, Message] = {}
         tool_call_id_to_message: dict[str, Message] = {}
 
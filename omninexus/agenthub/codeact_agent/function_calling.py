@@ -17,6 +17,7 @@ from omninexus.core.logger import omninexus_logger as logger
 from omninexus.events.action import (
     Action,
     AgentDelegateAction,
+    AgentDelegateParallelAction,
     AgentFinishAction,
     BrowseInteractiveAction,
     BrowseURLAction,
@@ -445,6 +446,31 @@ BrowserTool = ChatCompletionToolParam(
     ),
 )
 
+_DELEGATE_PARALLEL_DESCRIPTION = """Work on several independent subtasks at the same time, each by a delegate of its own.
+* Each delegate only gets its subtask: describe it completely, with the files and commands involved.
+* The delegates share the workspace, but each runs its commands in a terminal of its own. Only split the work into subtasks that do not edit the same files.
+* Once all delegates are done, their results are returned together.
+"""
+
+DelegateParallelTool = ChatCompletionToolParam(
+    type='function',
+    function=ChatCompletionToolParamFunctionChunk(
+        name='delegate_parallel',
+        description=_DELEGATE_PARALLEL_DESCRIPTION,
+        parameters={
+            'type': 'object',
+            'properties': {
+                'tasks': {
+                    'type': 'array',
+                    'items': {'type': 'string'},
+                    'description': 'The subtasks, one for each delegate.',
+                },
+            },
+            'required': ['tasks'],
+        },
+    ),
+)
+
 _FINISH_DESCRIPTION = """Finish the interaction when the task is complete OR if the assistant cannot proceed further with the task."""
 
 FinishTool = ChatCompletionToolParam(
@@ -496,6 +522,13 @@ def response_to_actions(response: ModelResponse) -> list[Action]:
                     agent='BrowsingAgent',
                     inputs=arguments,
                 )
+            elif tool_call.function.name == 'delegate_parallel':
+                action = AgentDelegateParallelAction(
+                    delegates=[
+                        {'agent': 'CodeActAgent', 'inputs': {'task': task}}
+                        for task in arguments['tasks']
+                    ],
+                )
             elif tool_call.function.name == 'finish':
                 action = AgentFinishAction()
             elif tool_call.function.name == 'edit_file':
@@ -554,6 +587,7 @@ def get_tools(
     codeact_enable_browsing: bool = False,
     codeact_enable_llm_editor: bool = False,
     codeact_enable_jupyter: bool = False,
+    codeact_enable_parallel_delegation: bool = False,
 ) -> list[ChatCompletionToolParam]:
     tools = [CmdRunTool, FinishTool]
     if codeact_enable_browsing:
@@ -565,4 +599,6 @@ def get_tools(
         tools.append(LLMBasedFileEditTool)
     else:
         tools.append(StrReplaceEditorTool)
+    if codeact_enable_parallel_delegation:
+        tools.append(DelegateParallelTool)
     return tools
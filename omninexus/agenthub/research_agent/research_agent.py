@@ -8,6 +8,7 @@ import omninexus
 import omninexus.agenthub.codeact_agent.function_calling as codeact_function_calling
 from omninexus.controller.agent import Agent
 from omninexus.controller.state.state import State
+from omninexus.core import tracing
 from omninexus.core.config import AgentConfig
 from omninexus.core.logger import omninexus_logger as logger
 from omninexus.core.message import ImageContent, Message, TextContent
@@ -427,7 +428,9 @@ class ResearchAgent(Agent):
             return AgentFinishAction()
 
         # prepare what we want to send to the LLM
-        messages = self._get_messages(state)
+        with tracing.span('Agent._get_messages') as span:
+            messages = self._get_messages(state)
+            span.set(messages=len(messages))
         params: dict = {
             'messages': self.llm.format_messages_for_llm(messages),
         }
@@ -1,8 +1,9 @@
 import asyncio
 import copy
 import os
+import threading
 import traceback
-from typing import Callable, ClassVar, Type
+from typing import Callable, ClassVar, Iterable, Iterator, Type
 
 import litellm
 from litellm.exceptions import (
@@ -12,8 +13,14 @@ from litellm.exceptions import (
 )
 
 from omninexus.controller.agent import Agent
+from omninexus.controller.parallel_delegation import (
+    ParallelDelegation,
+    ScopedEventStream,
+)
+from omninexus.controller.state.history import History
 from omninexus.controller.state.state import State, TrafficControlState
 from omninexus.controller.stuck import StuckDetector
+from omninexus.core import tracing
 from omninexus.core.config import AgentConfig, LLMConfig
 from omninexus.core.exceptions import (
     AgentStuckInLoopError,
@@ -31,6 +38,7 @@ from omninexus.events.action import (
     Action,
     ActionConfirmationStatus,
     AgentDelegateAction,
+    AgentDelegateParallelAction,
     AgentFinishAction,
     AgentRejectAction,
     ChangeAgentStateAction,
@@ -67,6 +75,8 @@ class AgentController:
     agent_configs: dict[str, AgentConfig]
     parent: 'AgentController | None' = None
     delegate: 'AgentController | None' = None
+    # delegates started by an AgentDelegateParallelAction, still running
+    parallel_delegation: ParallelDelegation | None = None
     _pending_action: Action | None = None
     _closed: bool = False
     filter_out: ClassVar[tuple[type[Event], ...]] = (
@@ -90,6 +100,7 @@ class AgentController:
         is_delegate: bool = False,
         headless_mode: bool = True,
         status_callback: Callable | None = None,
+        parallel_group: ParallelDelegation | None = None,
     ):
         """Initializes a new instance of the AgentController class.
 
@@ -108,10 +119,12 @@ class AgentController:
             is_delegate: Whether this controller is a delegate.
             headless_mode: Whether the agent is run in headless mode.
             status_callback: Optional callback function to handle status updates.
+            parallel_group: The parallel delegation this controller is a delegate of, if any.
         """
         self.id = sid
         self.agent = agent
         self.headless_mode = headless_mode
+        self.parallel_group = parallel_group
 
         # subscribe to the event stream
         self.event_stream = event_stream
@@ -142,6 +155,11 @@ class AgentController:
         """
         await self.set_agent_state_to(AgentState.STOPPED)
 
+        if self.parallel_delegation is not None:
+            delegation, self.parallel_delegation = self.parallel_delegation, None
+            for delegate in delegation.delegates:
+                await delegate.close()
+
         # we made history, now is the time to rewrite it!
         # the final state.history will be used by external scripts like evals, tests, etc.
         # history will need to be complete WITH delegates events
@@ -154,14 +172,14 @@ class AgentController:
             if self.state.end_id >= 0
             else self.event_stream.get_latest_event_id()
         )
-        self.state.history = list(
+        self.state.history = self._new_history(
             self.event_stream.get_events(
                 start_id=start_id,
                 end_id=end_id,
                 reverse=False,
                 filter_out_type=self.filter_out,
                 filter_hidden=True,
-            )
+            ),
         )
 
         # unsubscribe from the event stream
@@ -187,6 +205,13 @@ class AgentController:
         # update metrics especially for cost. Use deepcopy to avoid it being modified by agent._reset()
         self.state.local_metrics = copy.deepcopy(self.agent.llm.metrics)
 
+    def _merge_local_metrics(self) -> None:
+        # parallel delegates merge into the shared metrics from their own threads
+        if self.parallel_group is not None:
+            self.parallel_group.merge_metrics(self)
+        else:
+            self.state.metrics.merge(self.state.local_metrics)
+
     async def _react_to_exception(
         self,
         e: Exception,
@@ -207,7 +232,14 @@ class AgentController:
 
     async def _step_with_exception_handling(self):
         try:
-            await self._step()
+            # every step is a trace of its own, following from what triggered it
+            with tracing.span(
+                'AgentController._step',
+                root=True,
+                controller=self.id,
+                iteration=self.state.iteration,
+            ):
+                await self._step()
         except Exception as e:
             self.log(
                 'error',
@@ -249,6 +281,9 @@ class AgentController:
     async def _on_event(self, event: Event) -> None:
         if hasattr(event, 'hidden') and event.hidden:
             return
+        # streamed output, the complete output follows in a regular observation
+        if getattr(event, 'partial', False):
+            return
 
         # if the event is not filtered out, add it to the history
         if not any(isinstance(event, filter_type) for filter_type in self.filter_out):
@@ -274,14 +309,16 @@ class AgentController:
             await self._handle_message_action(action)
         elif isinstance(action, AgentDelegateAction):
             await self.start_delegate(action)
+        elif isinstance(action, AgentDelegateParallelAction):
+            await self.start_parallel_delegation(action)
 
         elif isinstance(action, AgentFinishAction):
             self.state.outputs = action.outputs
-            self.state.metrics.merge(self.state.local_metrics)
+            self._merge_local_metrics()
             await self.set_agent_state_to(AgentState.FINISHED)
         elif isinstance(action, AgentRejectAction):
             self.state.outputs = action.outputs
-            self.state.metrics.merge(self.state.local_metrics)
+            self._merge_local_metrics()
             await self.set_agent_state_to(AgentState.REJECTED)
 
     async def _handle_observation(self, observation: Observation) -> None:
@@ -315,7 +352,7 @@ class AgentController:
             return
         elif isinstance(observation, ErrorObservation):
             if self.state.agent_state == AgentState.ERROR:
-                self.state.metrics.merge(self.state.local_metrics)
+                self._merge_local_metrics()
 
     async def _handle_message_action(self, action: MessageAction) -> None:
         """Handles message actions from the event stream.
@@ -396,7 +433,7 @@ class AgentController:
         if new_state in (AgentState.STOPPED, AgentState.ERROR):
             # sync existing metrics BEFORE resetting the agent
             await self.update_state_after_step()
-            self.state.metrics.merge(self.state.local_metrics)
+            self._merge_local_metrics()
             self._reset()
         elif (
             new_state == AgentState.RUNNING
@@ -446,6 +483,28 @@ class AgentController:
             await self.set_agent_state_to(self.state.resume_state)
             self.state.resume_state = None
 
+        # the last of several parallel delegates to stop hands control back to the parent;
+        # no user can answer a parallel delegate, so waiting for one ends it as well
+        if (
+            self.parallel_group is not None
+            and new_state
+            in (
+                AgentState.FINISHED,
+                AgentState.REJECTED,
+                AgentState.ERROR,
+                AgentState.STOPPED,
+                AgentState.AWAITING_USER_INPUT,
+            )
+            and self.parallel_group.mark_finished(self)
+        ):
+            # not in this delegate's thread, which closing the delegates has to wait for
+            threading.Thread(
+                target=asyncio.run,
+                args=(self.parallel_group.parent._end_parallel_delegation(),),
+                name=f'end-delegation-{self.parallel_group.parent.id}',
+                daemon=True,
+            ).start()
+
     def get_agent_state(self) -> AgentState:
         """Returns the current state of the agent.
 
@@ -470,11 +529,7 @@ class AgentController:
         Args:
             action (AgentDelegateAction): The action containing information about the delegate agent to start.
         """
-        agent_cls: Type[Agent] = Agent.get_cls(action.agent)
-        agent_config = self.agent_configs.get(action.agent, self.agent.config)
-        llm_config = self.agent_to_llm_config.get(action.agent, self.agent.llm.config)
-        llm = LLM(config=llm_config)
-        delegate_agent = agent_cls(llm=llm, config=agent_config)
+        delegate_agent = self._create_delegate_agent(action.agent)
         state = State(
             inputs=action.inputs or {},
             local_iteration=0,
@@ -488,7 +543,7 @@ class AgentController:
         )
         self.log(
             'debug',
-            f'start delegate, creating agent {delegate_agent.name} using LLM {llm}',
+            f'start delegate, creating agent {delegate_agent.name} using LLM {delegate_agent.llm}',
         )
 
         self.event_stream.unsubscribe(EventStreamSubscriber.AGENT_CONTROLLER, self.id)
@@ -506,6 +561,118 @@ class AgentController:
         )
         await self.delegate.set_agent_state_to(AgentState.RUNNING)
 
+    def _create_delegate_agent(self, agent_name: str) -> Agent:
+        agent_cls: Type[Agent] = Agent.get_cls(agent_name)
+        agent_config = self.agent_configs.get(agent_name, self.agent.config)
+        llm_config = self.agent_to_llm_config.get(agent_name, self.agent.llm.config)
+        llm = LLM(config=llm_config)
+        return agent_cls(llm=llm, config=agent_config)
+
+    async def start_parallel_delegation(
+        self, action: AgentDelegateParallelAction
+    ) -> None:
+        """Start one delegate per subtask, all running at the same time.
+
+        The delegates share the event stream and the runtime, each seeing only its own
+        events and running its commands in a bash session of its own, and share the
+        iteration and task budgets. Once the last of them stopped, the parent gets one
+        AgentDelegateObservation with the outputs of all of them.
+
+        Args:
+            action (AgentDelegateParallelAction): The subtasks, with the agent for each.
+        """
+        if not action.delegates:
+            self.event_stream.add_event(
+                AgentDelegateObservation(
+                    outputs={'results': []},
+                    content='There were no subtasks to delegate.',
+                ),
+                EventSource.AGENT,
+            )
+            return
+
+        delegation = ParallelDelegation(self, self.state.iteration)
+        start_id = self.event_stream.get_latest_event_id() + 1
+        for i, subtask in enumerate(action.delegates):
+            sid = f'{self.id}-delegate-{i}'
+            delegate_agent = self._create_delegate_agent(subtask['agent'])
+            state = State(
+                inputs=subtask.get('inputs') or {},
+                local_iteration=0,
+                iteration=self.state.iteration,
+                max_iterations=self.state.max_iterations,
+                delegate_level=self.state.delegate_level + 1,
+                # global metrics should be shared between parent and children
+                metrics=self.state.metrics,
+                start_id=start_id,
+            )
+            delegation.delegates.append(
+                AgentController(
+                    sid=sid,
+                    agent=delegate_agent,
+                    event_stream=ScopedEventStream(self.event_stream, sid),  # type: ignore[arg-type]
+                    max_iterations=self.state.max_iterations,
+                    max_budget_per_task=self.max_budget_per_task,
+                    agent_to_llm_config=self.agent_to_llm_config,
+                    agent_configs=self.agent_configs,
+                    initial_state=state,
+                    is_delegate=True,
+                    headless_mode=self.headless_mode,
+                    parallel_group=delegation,
+                )
+            )
+        self.log(
+            'debug',
+            f'start {len(delegation.delegates)} parallel delegates: '
+            + ', '.join(d.agent.name for d in delegation.delegates),
+        )
+
+        self.event_stream.unsubscribe(EventStreamSubscriber.AGENT_CONTROLLER, self.id)
+        self.parallel_delegation = delegation
+        for delegate in delegation.delegates:
+            await delegate.set_agent_state_to(AgentState.RUNNING)
+        # later steps are triggered by each delegate's own observations, in its own thread;
+        # the first ones get a thread each, so the delegates start thinking at the same time
+        for delegate in delegation.delegates:
+            threading.Thread(
+                target=asyncio.run,
+                args=(delegate._step_with_exception_handling(),),
+                name=f'delegate-{delegate.id}',
+                daemon=True,
+            ).start()
+
+    async def _end_parallel_delegation(self) -> None:
+        """Collect the results of the parallel delegates and resume the parent."""
+        delegation, self.parallel_delegation = self.parallel_delegation, None
+        if delegation is None:
+            return
+        # update iteration that shall be shared across agents
+        self.state.iteration = delegation.total_iteration()
+
+        results = [
+            {
+                'agent': delegate.agent.name,
+                'state': delegate.get_agent_state().value,
+                'outputs': delegate.state.outputs,
+            }
+            for delegate in delegation.delegates
+        ]
+        # close delegate controllers: we must close them before adding new events
+        for delegate in delegation.delegates:
+            await delegate.close()
+
+        # resubscribe parent when the delegates are finished
+        self.event_stream.subscribe(
+            EventStreamSubscriber.AGENT_CONTROLLER, self.on_event, self.id
+        )
+        content = '\n'.join(
+            f'{result["agent"]} ({result["state"]}): '
+            + ', '.join(f'{key}: {value}' for key, value in result['outputs'].items())
+            for result in results
+        )
+        obs = AgentDelegateObservation(outputs={'results': results}, content=content)
+        self.event_stream.add_event(obs, EventSource.AGENT)
+
     async def _step(self) -> None:
         """Executes a single step of the parent or delegate agent. Detects stuck agents and limits on the number of iterations and the task budget."""
         if self.get_agent_state() != AgentState.RUNNING:
@@ -522,6 +689,10 @@ class AgentController:
                 await self._delegate_step()
             return
 
+        if self.parallel_delegation is not None:
+            # the parallel delegates hand control back once all of them stopped
+            return
+
         self.log(
             'info',
             f'LEVEL {self.state.delegate_level} LOCAL STEP {self.state.local_iteration} GLOBAL STEP {self.state.iteration}',
@@ -529,12 +700,22 @@ class AgentController:
         )
 
         stop_step = False
-        if self.state.iteration >= self.state.max_iterations:
+        # parallel delegates count the iterations of all of them
+        iteration = (
+            self.parallel_group.total_iteration()
+            if self.parallel_group is not None
+            else self.state.iteration
+        )
+        if iteration >= self.state.max_iterations:
             stop_step = await self._handle_traffic_control(
-                'iteration', self.state.iteration, self.state.max_iterations
+                'iteration', iteration, self.state.max_iterations
             )
         if self.max_budget_per_task is not None:
-            current_cost = self.state.metrics.accumulated_cost
+            current_cost = (
+                self.parallel_group.accumulated_cost()
+                if self.parallel_group is not None
+                else self.state.metrics.accumulated_cost
+            )
             if current_cost > self.max_budget_per_task:
                 stop_step = await self._handle_traffic_control(
                     'budget', current_cost, self.max_budget_per_task
@@ -552,7 +733,9 @@ class AgentController:
         self.update_state_before_step()
         action: Action = NullAction()
         try:
-            action = self.agent.step(self.state)
+            with tracing.span('Agent.step', agent=self.agent.name) as span:
+                action = self.agent.step(self.state)
+                span.set(action=type(action).__name__)
             if action is None:
                 raise LLMNoActionError('No action was returned')
         except (
@@ -579,7 +762,9 @@ class AgentController:
                 or isinstance(e, ContextWindowExceededError)
             ):
                 # When context window is exceeded, keep roughly half of agent interactions
-                self.state.history = self._apply_conversation_window(self.state.history)
+                self.state.history = self._new_history(
+                    self._apply_conversation_window(self.state.history)
+                )
 
                 # Save the ID of the first event in our truncated history for future reloading
                 if self.state.history:
@@ -768,6 +953,18 @@ class AgentController:
         # Always load from the event stream to avoid losing history
         self._init_history()
 
+    def _new_history(self, events: Iterable[Event] = ()) -> History:
+        """A history that pages out old events, unless the agent reads all of them.
+
+        An agent whose condenser reads the whole history every step would
+        otherwise read the paged-out events back from the stream on every step.
+        """
+        # Condenser.reads_history_tail; agents without a condenser read it all
+        condenser = getattr(self.agent, 'condenser', None)
+        if getattr(condenser, 'reads_history_tail', False):
+            return History(self.event_stream, events)
+        return History(self.event_stream, events, window=None)
+
     def _init_history(self) -> None:
         """Initializes the agent's history from the event stream.
 
@@ -800,7 +997,7 @@ class AgentController:
                 'warning',
                 f'start_id {start_id} is greater than end_id + 1 ({end_id + 1}). History will be empty.',
             )
-            self.state.history = []
+            self.state.history = self._new_history()
             return
 
         events: list[Event] = []
@@ -828,72 +1025,68 @@ class AgentController:
             # the rest of the events are from the truncation point
             start_id = self.state.truncation_id
 
-        # Get rest of history
-        events_to_add = list(
-            self.event_stream.get_events(
-                start_id=start_id,
-                end_id=end_id,
-                reverse=False,
-                filter_out_type=self.filter_out,
-                filter_hidden=True,
+        # Get rest of history, without the events of delegates
+        history = self._new_history(events)
+        history.extend(
+            self._filter_delegate_events(
+                self.event_stream.get_events(
+                    start_id=start_id,
+                    end_id=end_id,
+                    reverse=False,
+                    filter_out_type=self.filter_out,
+                    filter_hidden=True,
+                )
             )
         )
-        events.extend(events_to_add)
-
-        # Find all delegate action/observation pairs
-        delegate_ranges: list[tuple[int, int]] = []
-        delegate_action_ids: list[int] = []  # stack of unmatched delegate action IDs
-
-        for event in events:
-            if isinstance(event, AgentDelegateAction):
-                delegate_action_ids.append(event.id)
-                # Note: we can get agent=event.agent and task=event.inputs.get('task','')
-                # if we need to track these in the future
-
-            elif isinstance(event, AgentDelegateObservation):
-                # Match with most recent unmatched delegate action
-                if not delegate_action_ids:
-                    self.log(
-                        'warning',
-                        f'Found AgentDelegateObservation without matching action at id={event.id}',
-                    )
-                    continue
+        self.state.history = history
 
-                action_id = delegate_action_ids.pop()
-                delegate_ranges.append((action_id, event.id))
-
-        # Filter out events between delegate action/observation pairs
-        if delegate_ranges:
-            filtered_events: list[Event] = []
-            current_idx = 0
-
-            for start_id, end_id in sorted(delegate_ranges):
-                # Add events before delegate range
-                filtered_events.extend(
-                    event for event in events[current_idx:] if event.id < start_id
-                )
+        # make sure history is in sync
+        self.state.start_id = start_id
 
-                # Add delegate action and observation
-                filtered_events.extend(
-                    event for event in events if event.id in (start_id, end_id)
-                )
+    def _filter_delegate_events(self, events: Iterable[Event]) -> Iterator[Event]:
+        """Drops the events between delegate action/observation pairs, in one pass.
 
-                # Update index to after delegate range
-                current_idx = next(
-                    (i for i, e in enumerate(events) if e.id > end_id), len(events)
+        Every AgentDelegateObservation is matched with the most recent unmatched
+        AgentDelegateAction or AgentDelegateParallelAction. The action and observation of the outermost pairs are
+        kept; everything between them, including nested delegations, is dropped.
+        Events after a delegate action that is never matched are held back until
+        the end of `events`, and then kept as if the action were a regular event.
+        """
+        # Unmatched delegate actions, by their position in `held`
+        open_actions: list[int] = []
+        # Events since the outermost unmatched delegate action, starting with
+        # it, without those inside pairs matched meanwhile. Every event is
+        # appended and removed at most once, so this stays linear.
+        held: list[Event] = []
+        for event in events:
+            if isinstance(event, (AgentDelegateAction, AgentDelegateParallelAction)):
+                open_actions.append(len(held))
+                held.append(event)
+            elif isinstance(event, AgentDelegateObservation) and not open_actions:
+                self.log(
+                    'warning',
+                    f'Found AgentDelegateObservation without matching action at id={event.id}',
                 )
+                yield event
+            elif isinstance(event, AgentDelegateObservation):
+                position = open_actions.pop()
+                if open_actions:
+                    del held[position + 1 :]
+                    held.append(event)
+                else:
+                    yield held[0]
+                    yield event
+                    held = []
+            elif open_actions:
+                held.append(event)
+            else:
+                yield event
+        # the remaining actions were never matched
+        yield from held
 
-            # Add any remaining events after last delegate range
-            filtered_events.extend(events[current_idx:])
-
-            self.state.history = filtered_events
-        else:
-            self.state.history = events
-
-        # make sure history is in sync
-        self.state.start_id = start_id
-
-    def _apply_conversation_window(self, events: list[Event]) -> list[Event]:
+    def _apply_conversation_window(
+        self, events: list[Event] | History
+    ) -> list[Event] | History:
         """Cuts history roughly in half when context window is exceeded, preserving action-observation pairs
         and ensuring the first user message is always included.
 
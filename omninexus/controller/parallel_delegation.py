@@ -0,0 +1,128 @@
+"""Support for delegates that run side by side on one event stream.
+
+Every delegate of an `AgentDelegateParallelAction` sees the shared event
+stream through a `ScopedEventStream`, which only passes on the events the
+delegate (or its own delegates) added and the observations caused by them.
+Their agents think at the same time. The commands of each delegate run in a
+bash session of its own, side by side with those of the other delegates;
+their other actions (file edits, IPython cells, ...) are executed by the
+session's runtime one at a time, like any other.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from omninexus.events.action.commands import CmdRunAction
+from omninexus.events.event import Event, EventSource
+from omninexus.events.observation.observation import Observation
+from omninexus.events.stream import EventStream
+
+if TYPE_CHECKING:
+    from omninexus.controller.agent_controller import AgentController
+
+
+class ScopedEventStream:
+    """One delegate's view of a shared event stream.
+
+    Adding events goes to the shared stream. Subscribers and `get_events`
+    only see the events added through this view and the observations caused
+    by them. Everything else is forwarded to the shared stream.
+
+    Args:
+        event_stream: The shared event stream.
+        bash_session: The runtime's bash session for the commands added through this view.
+    """
+
+    def __init__(self, event_stream: EventStream, bash_session: str):
+        self._event_stream = event_stream
+        self.bash_session = bash_session
+        self._own_ids: set[int] = set()
+        # Held while adding, so subscribers never see an event before it is owned
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        return getattr(self._event_stream, name)
+
+    def owns(self, event: Event) -> bool:
+        with self._lock:
+            if event.id in self._own_ids:
+                return True
+            return isinstance(event, Observation) and event.cause in self._own_ids
+
+    def add_event(self, event: Event, source: EventSource) -> None:
+        # a nested view's delegate already named its own session
+        if isinstance(event, CmdRunAction) and not event.bash_session:
+            event.bash_session = self.bash_session
+        with self._lock:
+            self._event_stream.add_event(event, source)
+            self._own_ids.add(event.id)
+
+    def subscribe(self, subscriber_id, callback: Callable, callback_id: str) -> None:
+        def scoped_callback(event: Event) -> None:
+            if self.owns(event):
+                callback(event)
+
+        self._event_stream.subscribe(subscriber_id, scoped_callback, callback_id)
+
+    def get_events(self, *args, **kwargs) -> Iterable[Event]:
+        return (
+            event
+            for event in self._event_stream.get_events(*args, **kwargs)
+            if self.owns(event)
+        )
+
+
+class ParallelDelegation:
+    """The delegates started by one `AgentDelegateParallelAction`.
+
+    The delegates share one iteration budget: each of them counts the
+    iterations of all of them against `max_iterations`. Their metrics are
+    merged into the parent's, so they share the task budget as single
+    delegates do, counting what the others spent so far.
+
+    Args:
+        parent: The controller that started the delegates.
+        start_iteration: The parent's iteration when the delegates started.
+    """
+
+    def __init__(self, parent: 'AgentController', start_iteration: int):
+        self.parent = parent
+        self.start_iteration = start_iteration
+        self.delegates: list['AgentController'] = []
+        self._finished: set[int] = set()
+        self._ended = False
+        self._lock = threading.Lock()
+        # The delegates merge into the parent's metrics from their own threads
+        self._metrics_lock = threading.Lock()
+        self._merged: set[int] = set()
+
+    def total_iteration(self) -> int:
+        """The global iteration, counting the steps of all delegates."""
+        return self.start_iteration + sum(
+            delegate.state.iteration - self.start_iteration
+            for delegate in self.delegates
+        )
+
+    def mark_finished(self, delegate: 'AgentController') -> bool:
+        """Record that a delegate stopped; True for the call that finishes the last one."""
+        with self._lock:
+            self._finished.add(id(delegate))
+            if self._ended or len(self._finished) < len(self.delegates):
+                return False
+            self._ended = True
+            return True
+
+    def merge_metrics(self, delegate: 'AgentController') -> None:
+        """Merge a delegate's local metrics into the shared ones."""
+        with self._metrics_lock:
+            self.parent.state.metrics.merge(delegate.state.local_metrics)
+            self._merged.add(id(delegate))
+
+    def accumulated_cost(self) -> float:
+        """The task's cost so far, with what the running delegates spent."""
+        with self._metrics_lock:
+            return self.parent.state.metrics.accumulated_cost + sum(
+                delegate.agent.llm.metrics.accumulated_cost
+                for delegate in self.delegates
+                if id(delegate) not in self._merged
+            )
@@ -0,0 +1,172 @@
+"""Agent history that keeps only its recent events in memory.
+
+`History` behaves like the list of events it replaces, but older events
+are dropped from memory and read back from the event stream when they are
+accessed, through a small LRU cache. Only the event ids of the whole
+history are kept.
+"""
+
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, MutableSequence
+from typing import overload
+
+from omninexus.events.event import Event
+from omninexus.events.stream import EventStream
+
+# Number of most recent events kept in memory
+HISTORY_WINDOW = 1000
+# Number of older events kept after they have been read back
+HISTORY_CACHE_SIZE = 500
+
+
+class History(MutableSequence[Event]):
+    """A list of events, paged in from the event stream.
+
+    Appending is O(1) and so is reading the recent events. Reading an older
+    event reads it from the event stream unless it is cached. Inserting or
+    removing anywhere but at the end rebuilds the history, like a list
+    would move all following items.
+
+    Events that can not be read back, i.e. without an id or without an
+    event stream, always stay in memory.
+
+    Args:
+        event_stream: The stream the events come from.
+        events: The initial events.
+        window: Number of most recent events kept in memory. None keeps all
+            of them, for agents that read the whole history every step.
+        cache_size: Number of older events kept after they have been read.
+    """
+
+    def __init__(
+        self,
+        event_stream: EventStream | None,
+        events: Iterable[Event] = (),
+        window: int | None = HISTORY_WINDOW,
+        cache_size: int = HISTORY_CACHE_SIZE,
+    ):
+        self.event_stream = event_stream
+        self.window = window
+        self.cache_size = cache_size
+        self._ids: list[int] = []
+        # The events from position _recent_start on, up to twice the window
+        self._recent: list[Event] = []
+        self._recent_start = 0
+        # Older events that can not be read back, by position
+        self._pinned: dict[int, Event] = {}
+        self._cache: OrderedDict[int, Event] = OrderedDict()
+        self.extend(events)
+
+    def _reset(self, events: Iterable[Event]) -> None:
+        events = list(events)
+        self._ids = []
+        self._recent = []
+        self._recent_start = 0
+        self._pinned = {}
+        self.extend(events)
+
+    def _can_page_out(self, event: Event) -> bool:
+        return self.event_stream is not None and event.id >= 0
+
+    def append(self, event: Event) -> None:
+        self._ids.append(event.id)
+        self._recent.append(event)
+        if self.window is not None and len(self._recent) >= 2 * self.window:
+            # Drop the older half at once, so appending stays O(1) amortized
+            drop = len(self._recent) - self.window
+            for offset, old_event in enumerate(self._recent[:drop]):
+                if not self._can_page_out(old_event):
+                    self._pinned[self._recent_start + offset] = old_event
+            del self._recent[:drop]
+            self._recent_start += drop
+
+    def extend(self, events: Iterable[Event]) -> None:
+        for event in events:
+            self.append(event)
+
+    def _get(self, position: int) -> Event:
+        if position >= self._recent_start:
+            return self._recent[position - self._recent_start]
+        pinned = self._pinned.get(position)
+        if pinned is not None:
+            return pinned
+        event_id = self._ids[position]
+        event = self._cache.get(event_id)
+        if event is not None:
+            self._cache.move_to_end(event_id)
+            return event
+        assert self.event_stream is not None
+        event = self.event_stream.get_event(event_id)
+        self._cache[event_id] = event
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return event
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @overload
+    def __getitem__(self, index: int) -> Event: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Event]: ...
+
+    def __getitem__(self, index: int | slice) -> Event | list[Event]:
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self._ids)))]
+        if index < 0:
+            index += len(self._ids)
+        if not 0 <= index < len(self._ids):
+            raise IndexError('history index out of range')
+        return self._get(index)
+
+    def __setitem__(self, index, value) -> None:
+        events = list(self)
+        events[index] = value
+        self._reset(events)
+
+    def __delitem__(self, index) -> None:
+        if index == -1 or index == len(self._ids) - 1:
+            if len(self._recent) > 0:
+                self._ids.pop()
+                self._recent.pop()
+                return
+        events = list(self)
+        del events[index]
+        self._reset(events)
+
+    def insert(self, index: int, value: Event) -> None:
+        if index >= len(self._ids):
+            self.append(value)
+            return
+        events = list(self)
+        events.insert(index, value)
+        self._reset(events)
+
+    def clear(self) -> None:
+        self._reset([])
+
+    def __iter__(self) -> Iterator[Event]:
+        for position in range(len(self._ids)):
+            yield self._get(position)
+
+    def __reversed__(self) -> Iterator[Event]:
+        for position in range(len(self._ids) - 1, -1, -1):
+            yield self._get(position)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (History, list)):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            a == b for a, b in zip(self, other, strict=True)
+        )
+
+    def __repr__(self) -> str:
+        return f'History(len={len(self._ids)}, in_memory={len(self._recent)})'
+
+    def __getstate__(self) -> dict:
+        # Pickled histories are standalone lists of events
+        return {'events': list(self)}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(None, state['events'])  # type: ignore[misc]
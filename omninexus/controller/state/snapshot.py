@@ -0,0 +1,176 @@
+"""Compact, incremental snapshots of the agent state.
+
+A snapshot stores every field of the state pickled on its own, in one
+zlib-compressed binary file:
+
+    MAGIC | version (1 byte) | kind (1 byte) | zlib(pickle(payload))
+
+where the payload holds the id of the base snapshot, a sequence number and
+the pickled fields. A full snapshot (`base.snap`) holds all fields; each
+delta snapshot (`delta-<seq>.snap`) only holds the fields that changed
+since the previous save. Restoring reads the base and applies its deltas in
+order; after `MAX_DELTAS` deltas, or once they grew larger than the base,
+the next save writes a new base instead.
+"""
+
+import hashlib
+import pickle
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from typing import Any
+
+from omninexus.core.logger import omninexus_logger as logger
+from omninexus.storage.files import FileStore
+
+MAGIC = b'ONXS'
+SNAPSHOT_VERSION = 1
+FULL = 0
+DELTA = 1
+# Number of delta snapshots written before the next full one
+MAX_DELTAS = 50
+# Snapshots are written every step, so favor speed over the last few percent of size
+COMPRESSION_LEVEL = 1
+
+
+def get_snapshot_dir(sid: str) -> str:
+    return f'sessions/{sid}/agent_state'
+
+
+def get_base_path(sid: str) -> str:
+    return f'{get_snapshot_dir(sid)}/base.snap'
+
+
+def get_delta_path(sid: str, seq: int) -> str:
+    return f'{get_snapshot_dir(sid)}/delta-{seq:06d}.snap'
+
+
+def encode_snapshot(
+    kind: int, base_id: str, seq: int, fields: dict[str, bytes]
+) -> bytes:
+    payload = pickle.dumps(
+        {'base_id': base_id, 'seq': seq, 'fields': fields},
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    return (
+        MAGIC
+        + bytes([SNAPSHOT_VERSION, kind])
+        + zlib.compress(payload, COMPRESSION_LEVEL)
+    )
+
+
+def decode_snapshot(data: bytes) -> tuple[int, dict[str, Any]]:
+    """Returns the kind and the payload of a snapshot."""
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError('Not an agent state snapshot')
+    version, kind = data[len(MAGIC)], data[len(MAGIC) + 1]
+    if version > SNAPSHOT_VERSION:
+        raise ValueError(f'Unsupported agent state snapshot version {version}')
+    return kind, pickle.loads(zlib.decompress(data[len(MAGIC) + 2 :]))
+
+
+def _digest(pickled: bytes) -> bytes:
+    return hashlib.blake2b(pickled, digest_size=16).digest()
+
+
+@dataclass
+class SnapshotTracker:
+    """What was last written for a state, to tell which fields changed."""
+
+    sid: str
+    file_store: FileStore
+    base_id: str
+    base_size: int
+    seq: int = 0
+    delta_size: int = 0
+    digests: dict[str, bytes] = field(default_factory=dict)
+
+    def needs_full_snapshot(self, sid: str, file_store: FileStore) -> bool:
+        return (
+            sid != self.sid
+            or file_store is not self.file_store
+            or self.seq >= MAX_DELTAS
+            or self.delta_size > self.base_size
+        )
+
+
+def save_snapshot(
+    fields: dict[str, Any],
+    sid: str,
+    file_store: FileStore,
+    tracker: SnapshotTracker | None,
+) -> SnapshotTracker:
+    """Writes a full or delta snapshot of the fields, and returns the new tracker."""
+    pickled = {
+        name: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        for name, value in fields.items()
+    }
+    digests = {name: _digest(value) for name, value in pickled.items()}
+
+    if tracker is None or tracker.needs_full_snapshot(sid, file_store):
+        base_id = uuid.uuid4().hex
+        data = encode_snapshot(FULL, base_id, 0, pickled)
+        file_store.write(get_base_path(sid), data)
+        # deltas of the previous base are ignored from now on, but take space
+        for path in _list_deltas(sid, file_store):
+            file_store.delete(path)
+        return SnapshotTracker(sid, file_store, base_id, len(data), digests=digests)
+
+    changed = {
+        name: value
+        for name, value in pickled.items()
+        if tracker.digests.get(name) != digests[name]
+    }
+    if not changed:
+        return tracker
+    tracker.seq += 1
+    data = encode_snapshot(DELTA, tracker.base_id, tracker.seq, changed)
+    file_store.write(get_delta_path(sid, tracker.seq), data)
+    tracker.delta_size += len(data)
+    tracker.digests = digests
+    return tracker
+
+
+def load_snapshot(
+    sid: str, file_store: FileStore
+) -> tuple[dict[str, Any], SnapshotTracker]:
+    """Reads the base snapshot and its deltas.
+
+    Raises FileNotFoundError if the session has no snapshot.
+    """
+    data = file_store.read_bytes(get_base_path(sid))
+    kind, payload = decode_snapshot(data)
+    if kind != FULL:
+        raise ValueError('Agent state base snapshot is not a full snapshot')
+    base_id = payload['base_id']
+    pickled: dict[str, bytes] = payload['fields']
+    tracker = SnapshotTracker(sid, file_store, base_id, len(data))
+
+    for path in _list_deltas(sid, file_store):
+        delta_data = file_store.read_bytes(path)
+        kind, payload = decode_snapshot(delta_data)
+        if kind != DELTA or payload['base_id'] != base_id:
+            continue
+        if payload['seq'] != tracker.seq + 1:
+            # a delta is missing, the ones after it would not add up
+            logger.warning(
+                f'Agent state snapshot of {sid} stops at delta {tracker.seq}'
+            )
+            break
+        pickled.update(payload['fields'])
+        tracker.seq = payload['seq']
+        tracker.delta_size += len(delta_data)
+
+    tracker.digests = {name: _digest(value) for name, value in pickled.items()}
+    return {name: pickle.loads(value) for name, value in pickled.items()}, tracker
+
+
+def _list_deltas(sid: str, file_store: FileStore) -> list[str]:
+    try:
+        paths = file_store.list(get_snapshot_dir(sid))
+    except FileNotFoundError:
+        return []
+    # zero-padded sequence numbers sort in order
+    return sorted(
+        path for path in paths if path.rsplit('/', 1)[-1].startswith('delta-')
+    )
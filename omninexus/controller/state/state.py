@@ -4,6 +4,12 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any
 
+from omninexus.controller.state.history import History
+from omninexus.controller.state.snapshot import (
+    SnapshotTracker,
+    load_snapshot,
+    save_snapshot,
+)
 from omninexus.controller.state.task import RootTask
 from omninexus.core.logger import omninexus_logger as logger
 from omninexus.core.schema import AgentState
@@ -55,7 +61,7 @@ class State:
 
     - Data for saving and restoring the agent:
       - save to and restore from a session
-      - serialize with pickle and base64
+      - serialize into compressed snapshots, writing only the changed fields
 
     - Save / restore data about message history
       - start and end IDs for events in agent's history
@@ -77,7 +83,8 @@ class State:
     # max number of iterations for the current task
     max_iterations: int = 100
     confirmation_mode: bool = False
-    history: list[Event] = field(default_factory=list)
+    # a History paging in older events from the event stream, once the controller set it up
+    history: list[Event] | History = field(default_factory=list)
     inputs: dict = field(default_factory=dict)
     outputs: dict = field(default_factory=dict)
     agent_state: AgentState = AgentState.LOADING
@@ -100,13 +107,17 @@ class State:
     # evaluation tasks to store extra data needed to track the progress/state of the task.
     extra_data: dict[str, Any] = field(default_factory=dict)
     last_error: str = ''
+    # what was last saved to the session, so the next save only writes the changes
+    _snapshot: SnapshotTracker | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def save_to_session(self, sid: str, file_store: FileStore):
-        pickled = pickle.dumps(self)
         logger.debug(f'Saving state to session {sid}:{self.agent_state}')
-        encoded = base64.b64encode(pickled).decode('utf-8')
         try:
-            file_store.write(f'sessions/{sid}/agent_state.pkl', encoded)
+            self._snapshot = save_snapshot(
+                self.__getstate__(), sid, file_store, self._snapshot
+            )
         except Exception as e:
             logger.error(f'Failed to save state to session: {e}')
             raise e
@@ -114,9 +125,16 @@ class State:
     @staticmethod
     def restore_from_session(sid: str, file_store: FileStore) -> 'State':
         try:
-            encoded = file_store.read(f'sessions/{sid}/agent_state.pkl')
-            pickled = base64.b64decode(encoded)
-            state = pickle.loads(pickled)
+            try:
+                fields, tracker = load_snapshot(sid, file_store)
+                state = State.__new__(State)
+                state.__setstate__(fields)
+                state._snapshot = tracker
+            except FileNotFoundError:
+                # sessions saved before snapshots were introduced
+                encoded = file_store.read(f'sessions/{sid}/agent_state.pkl')
+                pickled = base64.b64decode(encoded)
+                state = pickle.loads(pickled)
         except Exception as e:
             logger.debug(f'Could not restore state from session: {e}')
             raise e
@@ -135,6 +153,8 @@ class State:
         # don't pickle history, it will be restored from the event stream
         state = self.__dict__.copy()
         state['history'] = []
+        # nor what was last saved to the session
+        state.pop('_snapshot', None)
         return state
 
     def __setstate__(self, state):
@@ -1,3 +1,6 @@
+from collections import deque
+from collections.abc import Sequence
+
 from omninexus.controller.state.state import State
 from omninexus.core.logger import omninexus_logger as logger
 from omninexus.events.action.action import Action
@@ -14,6 +17,64 @@ from omninexus.events.observation.error import ErrorObservation
 from omninexus.events.observation.observation import Observation
 
 
+class _HistoryWindow:
+    """The tail of the filtered history that the stuck checks look at.
+
+    Events are fed in one at a time, so keeping it current costs O(1) per
+    event instead of a scan of the whole history per check.
+
+    Args:
+        reset_on_user_message: Start over at every user message, i.e. only
+            look at the history after the last one (interactive mode).
+    """
+
+    # The pattern check needs the most events of each kind
+    MAX_EVENTS = 6
+    MAX_AGENT_MESSAGES = 3
+
+    def __init__(self, reset_on_user_message: bool):
+        self.reset_on_user_message = reset_on_user_message
+        self.reset()
+
+    def reset(self) -> None:
+        # Number of events in the filtered history
+        self.length = 0
+        # Newest last
+        self.actions: deque[Event] = deque(maxlen=self.MAX_EVENTS)
+        self.observations: deque[Event] = deque(maxlen=self.MAX_EVENTS)
+        # (filtered index, index of the last observation before it, message)
+        self.agent_messages: deque[tuple[int, int, Event]] = deque(
+            maxlen=self.MAX_AGENT_MESSAGES
+        )
+        self._last_observation_index = -1
+
+    def add(self, event: Event) -> None:
+        if isinstance(event, MessageAction) and event.source == EventSource.USER:
+            if self.reset_on_user_message:
+                self.reset()
+            return
+        # there might be some NullAction or NullObservation in the history at least for now
+        if isinstance(event, (NullAction, NullObservation)):
+            return
+        index = self.length
+        self.length += 1
+        if isinstance(event, Action):
+            self.actions.append(event)
+            if isinstance(event, MessageAction) and event.source == EventSource.AGENT:
+                self.agent_messages.append((index, self._last_observation_index, event))
+        elif isinstance(event, Observation):
+            self.observations.append(event)
+            self._last_observation_index = index
+
+    def last_actions(self, n: int) -> list[Event]:
+        """Up to the last `n` actions, newest first."""
+        return list(reversed(self.actions))[:n]
+
+    def last_observations(self, n: int) -> list[Event]:
+        """Up to the last `n` observations, newest first."""
+        return list(reversed(self.observations))[:n]
+
+
 class StuckDetector:
     SYNTAX_ERROR_MESSAGES = [
         'SyntaxError: unterminated string literal (detected at line',
@@ -23,6 +84,27 @@ class StuckDetector:
 
     def __init__(self, state: State):
         self.state = state
+        # Whole history (headless) and history after the last user message (interactive)
+        self._windows = {
+            True: _HistoryWindow(reset_on_user_message=False),
+            False: _HistoryWindow(reset_on_user_message=True),
+        }
+        self._history: Sequence[Event] | None = None
+        self._seen = 0
+
+    def _update_windows(self) -> None:
+        """Feed the events appended to the history since the last check."""
+        history = self.state.history
+        if history is not self._history or len(history) < self._seen:
+            # The history was replaced, e.g. truncated; start over
+            for window in self._windows.values():
+                window.reset()
+            self._history = history
+            self._seen = 0
+        for event in history[self._seen :]:
+            for window in self._windows.values():
+                window.add(event)
+        self._seen = len(history)
 
     def is_stuck(self, headless_mode: bool = True):
         """Checks if the agent is stuck in a loop.
@@ -35,54 +117,17 @@ class StuckDetector:
         Returns:
             bool: True if the agent is stuck in a loop, False otherwise.
         """
-        if not headless_mode:
-            # In interactive mode, only look at history after the last user message
-            last_user_msg_idx = -1
-            for i, event in enumerate(reversed(self.state.history)):
-                if (
-                    isinstance(event, MessageAction)
-                    and event.source == EventSource.USER
-                ):
-                    last_user_msg_idx = len(self.state.history) - i - 1
-                    break
-
-            history_to_check = self.state.history[last_user_msg_idx + 1 :]
-        else:
-            # In headless mode, look at all history
-            history_to_check = self.state.history
-
-        # Filter out user messages and null events
-        filtered_history = [
-            event
-            for event in history_to_check
-            if not (
-                # Filter works elegantly in both modes:
-                # - In headless: actively filters out user messages from full history
-                # - In non-headless: no-op since we already sliced after last user message
-                (isinstance(event, MessageAction) and event.source == EventSource.USER)
-                # there might be some NullAction or NullObservation in the history at least for now
-                or isinstance(event, (NullAction, NullObservation))
-            )
-        ]
+        self._update_windows()
+        window = self._windows[headless_mode]
 
         # it takes 3 actions minimum to detect a loop, otherwise nothing to do here
-        if len(filtered_history) < 3:
+        if window.length < 3:
             return False
 
         # the first few scenarios detect 3 or 4 repeated steps
         # prepare the last 4 actions and observations, to check them out
-        last_actions: list[Event] = []
-        last_observations: list[Event] = []
-
-        # retrieve the last four actions and observations starting from the end of history, wherever they are
-        for event in reversed(filtered_history):
-            if isinstance(event, Action) and len(last_actions) < 4:
-                last_actions.append(event)
-            elif isinstance(event, Observation) and len(last_observations) < 4:
-                last_observations.append(event)
-
-            if len(last_actions) == 4 and len(last_observations) == 4:
-                break
+        last_actions = window.last_actions(4)
+        last_observations = window.last_observations(4)
 
         # scenario 1: same action, same observation
         if self._is_stuck_repeating_action_observation(last_actions, last_observations):
@@ -93,13 +138,13 @@ class StuckDetector:
             return True
 
         # scenario 3: monologue
-        if self._is_stuck_monologue(filtered_history):
+        if self._is_stuck_monologue(window):
             return True
 
         # scenario 4: action, observation pattern on the last six steps
-        if len(filtered_history) < 6:
+        if window.length < 6:
             return False
-        if self._is_stuck_action_observation_pattern(filtered_history):
+        if self._is_stuck_action_observation_pattern(window):
             return True
 
         return False
@@ -232,56 +277,37 @@ class StuckDetector:
         # and the 3rd-to-last line is identical across all occurrences
         return len(error_lines) == 3 and len(set(error_lines)) == 1
 
-    def _is_stuck_monologue(self, filtered_history):
+    def _is_stuck_monologue(self, window: _HistoryWindow):
         # scenario 3: monologue
         # check for repeated MessageActions with source=AGENT
         # see if the agent is engaged in a good old monologue, telling itself the same thing over and over
-        agent_message_actions = [
-            (i, event)
-            for i, event in enumerate(filtered_history)
-            if isinstance(event, MessageAction) and event.source == EventSource.AGENT
-        ]
+        agent_message_actions = window.agent_messages
 
         # last three message actions will do for this check
         if len(agent_message_actions) >= 3:
-            last_agent_message_actions = agent_message_actions[-3:]
+            last_agent_message_actions = list(agent_message_actions)[-3:]
 
             if all(
-                (last_agent_message_actions[0][1] == action[1])
+                (last_agent_message_actions[0][2] == action[2])
                 for action in last_agent_message_actions
             ):
                 # check if there are any observations between the repeated MessageActions
                 # then it's not yet a loop, maybe it can recover
                 start_index = last_agent_message_actions[0][0]
-                end_index = last_agent_message_actions[-1][0]
+                last_observation_index = last_agent_message_actions[-1][1]
 
-                has_observation_between = False
-                for event in filtered_history[start_index + 1 : end_index]:
-                    if isinstance(event, Observation):
-                        has_observation_between = True
-                        break
-
-                if not has_observation_between:
+                if last_observation_index <= start_index:
                     logger.warning('Repeated MessageAction with source=AGENT detected')
                     return True
         return False
 
-    def _is_stuck_action_observation_pattern(self, filtered_history):
+    def _is_stuck_action_observation_pattern(self, window: _HistoryWindow):
         # scenario 4: action, observation pattern on the last six steps
         # check if the agent repeats the same (Action, Observation)
         # every other step in the last six steps
-        last_six_actions: list[Event] = []
-        last_six_observations: list[Event] = []
-
         # the end of history is most interesting
-        for event in reversed(filtered_history):
-            if isinstance(event, Action) and len(last_six_actions) < 6:
-                last_six_actions.append(event)
-            elif isinstance(event, Observation) and len(last_six_observations) < 6:
-                last_six_observations.append(event)
-
-            if len(last_six_actions) == 6 and len(last_six_observations) == 6:
-                break
+        last_six_actions = window.last_actions(6)
+        last_six_observations = window.last_observations(6)
 
         # this pattern is every other step, like:
         # (action_1, obs_1), (action_2, obs_2), (action_1, obs_1), (action_2, obs_2),...
@@ -27,6 +27,8 @@ class AppConfig:
         runtime: Runtime environment identifier.
         file_store: Type of file store to use.
         file_store_path: Path to the file store.
+        sqlite_store_path: Path of the database of the SQLite settings and conversation
+            stores. Defaults to `omninexus.db` in `file_store_path`.
         save_trajectory_path: Either a folder path to store trajectories with auto-generated filenames, or a designated trajectory file path.
         workspace_base: Base path for the workspace. Defaults to `./workspace` as absolute path.
         workspace_mount_path: Path to mount the workspace. Defaults to `workspace_base`.
@@ -44,6 +46,10 @@ class AppConfig:
         file_uploads_allowed_extensions: Allowed file extensions. `['.*']` allows all.
         cli_multiline_input: Whether to enable multiline input in CLI. When disabled,
             input is read line by line. When enabled, input continues until /exit command.
+        socket_batch_window_ms: Milliseconds to collect events sent to a conversation
+            before emitting them as one batch frame. `0` sends every event on its own.
+        socket_batch_max_events: Maximum number of events in one batch frame.
+        socket_batch_compression: Whether to zlib-compress batch frames.
     """
 
     llms: dict[str, LLMConfig] = field(default_factory=dict)
@@ -54,6 +60,7 @@ class AppConfig:
     runtime: str = 'docker'
     file_store: str = 'local'
     file_store_path: str = '/tmp/omninexus_file_store'
+    sqlite_store_path: str | None = None
     save_trajectory_path: str | None = None
     workspace_base: str | None = None
     workspace_mount_path: str | None = None
@@ -74,6 +81,9 @@ class AppConfig:
     file_uploads_allowed_extensions: list[str] = field(default_factory=lambda: ['.*'])
     runloop_api_key: str | None = None
     cli_multiline_input: bool = False
+    socket_batch_window_ms: int = 0
+    socket_batch_max_events: int = 100
+    socket_batch_compression: bool = False
 
     defaults_dict: ClassVar[dict] = {}
 
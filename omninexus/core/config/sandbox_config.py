@@ -37,6 +37,38 @@ class SandboxConfig:
         enable_gpu: Whether to enable GPU.
         docker_runtime_kwargs: Additional keyword arguments to pass to the Docker runtime when running containers.
             This should be a JSON string that will be parsed into a dictionary.
+        file_read_max_bytes: Maximum number of bytes a single file read returns. Longer reads are cut
+            at a line boundary and report the line to continue from. Default is None, no cap.
+        copy_archive_format: Archive format used to stream directories into the sandbox with `copy_to`.
+            One of 'zip', 'tar' or 'tar.zst' (requires the zstandard package on both sides).
+        local_runtime_max_warm_servers: Number of idle action execution servers the local runtime keeps
+            running after a conversation ends, to be reused by the next one. 0 disables reuse.
+        local_runtime_use_user_namespace: Whether the local runtime starts the action execution server
+            inside a new user and PID namespace (requires `unshare` from util-linux).
+        runtime_pool_size: Number of connected runtimes the server keeps ready for each runtime
+            configuration, handed out to new conversations. 0 disables the pool.
+        jupyter_kernel_mode: How the action execution server runs the IPython kernel. 'gateway' (the
+            default) goes through a Jupyter kernel gateway, 'direct' starts it with a kernel manager and
+            talks to it over ZMQ. Direct mode falls back to the gateway if the kernel cannot be started.
+        stream_ipython_output: Whether IPython output is added to the event stream while the cell runs,
+            as partial observations shown to the user. Large images only appear once the cell finishes.
+        browser_observation_profile: How browser observations are produced. 'full' sends everything on every
+            step, 'diff' sends the DOM and AXTree as changes against the previous step, 'slim' does the same
+            and only takes a screenshot when the page changed.
+        browser_screenshot_format: Image format of browser screenshots: 'png', 'jpeg' or 'webp'.
+        browser_screenshot_quality: Quality of JPEG and WebP browser screenshots, from 1 to 100.
+        browser_pool_size: Number of separate browser contexts BrowseURLActions run in, in parallel with
+            each other and with other actions. They then no longer navigate the browser used by
+            interactive browsing. 0 runs them in that browser, one at a time.
+        browser_pool_max_memory_mb: Memory cap of all pooled browser contexts together. None disables it.
+        browse_fetch_mode: 'browser' opens every BrowseURLAction in the browser. 'auto' first fetches the URL
+            over plain HTTP and uses the text of static pages directly, falling back to the browser for
+            pages that need JavaScript. It only applies with a browser pool (browser_pool_size > 0); the
+            single browser always navigates, since interactive browsing continues from its page.
+        http_cache_max_mb: Size of the on-disk HTTP cache used by the 'auto' fetch mode, shared by all
+            runtimes on a machine (see OMNINEXUS_HTTP_CACHE_DIR). 0 disables the cache.
+        lazy_plugins: Whether the Jupyter and VSCode plugins are started when first used (e.g. by the first
+            IPython cell) instead of when the runtime starts.
     """
 
     remote_runtime_api_url: str = 'http://localhost:8000'
@@ -64,6 +96,21 @@ class SandboxConfig:
     remote_runtime_resource_factor: int = 1
     enable_gpu: bool = False
     docker_runtime_kwargs: str | None = None
+    file_read_max_bytes: int | None = None
+    copy_archive_format: str = 'tar'
+    local_runtime_max_warm_servers: int = 2
+    local_runtime_use_user_namespace: bool = False
+    runtime_pool_size: int = 0
+    jupyter_kernel_mode: str = 'gateway'
+    stream_ipython_output: bool = False
+    browser_observation_profile: str = 'full'
+    browser_screenshot_format: str = 'png'
+    browser_screenshot_quality: int = 75
+    browser_pool_size: int = 0
+    browser_pool_max_memory_mb: int | None = None
+    browse_fetch_mode: str = 'browser'
+    http_cache_max_mb: int = 256
+    lazy_plugins: bool = False
 
     def defaults_to_dict(self) -> dict:
         """Serialize fields to a dict for the frontend, including type hints, defaults, and whether it's optional."""
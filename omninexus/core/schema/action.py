@@ -48,6 +48,10 @@ class ActionTypeSchema(BaseModel):
     """Delegates a task to another agent.
     """
 
+    DELEGATE_PARALLEL: str = Field(default='delegate_parallel')
+    """Delegates independent subtasks to several agents running at the same time.
+    """
+
     FINISH: str = Field(default='finish')
     """If you're absolutely certain that you've completed your task and have tested your work,
     use the finish action to stop working.
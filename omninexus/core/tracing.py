@@ -0,0 +1,296 @@
+"""Lightweight tracing of the agent loop.
+
+Spans measure the stages of a step (condensing, building the messages, the
+LLM call, adding events, running the action in the runtime) with their
+sizes, and are written to a local file in the Chrome trace event format,
+which chrome://tracing and https://ui.perfetto.dev open directly.
+
+Tracing is off unless OMNINEXUS_TRACE_FILE names the file to write, or
+`enable` is called. While it is off, `span` returns a shared no-op span, so
+instrumented code costs one function call and one check per span. Processes
+that inherit the variable, such as a local action execution server, write to
+a file of their own next to it, named with their pid (`trace.<pid>.json`).
+
+The current span is kept in a context variable, so it follows asyncio tasks
+and `call_sync_from_async`; other threads pick it up through `bind`. Across
+HTTP it travels in a W3C `traceparent` header.
+"""
+
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+T = TypeVar('T', bound=Callable)
+
+TRACE_FILE = os.getenv('OMNINEXUS_TRACE_FILE')
+# The pid of the process writing OMNINEXUS_TRACE_FILE itself, for the processes it starts
+TRACE_FILE_PID = 'OMNINEXUS_TRACE_FILE_PID'
+
+_current_span: contextvars.ContextVar['Span | None'] = contextvars.ContextVar(
+    'omninexus_current_span', default=None
+)
+
+
+class TraceExporter:
+    """Appends finished spans to a Chrome trace event file.
+
+    The file is a JSON array written one event per line; the closing bracket
+    is added on close, and may be missing after a crash, which the Chrome
+    trace format allows.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._file = open(path, 'w')
+        self._file.write('[\n')
+        self._first = True
+
+    def export(self, event: dict) -> None:
+        line = json.dumps(event, default=str)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line if self._first else ',\n' + line)
+            self._first = False
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.write('\n]\n')
+                self._file.close()
+
+
+_exporter: TraceExporter | None = None
+
+
+class Span:
+    """A timed stage, exported when it ends.
+
+    Use it as a context manager; `set` adds attributes such as sizes.
+    """
+
+    __slots__ = (
+        'name',
+        'trace_id',
+        'span_id',
+        'parent_id',
+        'attributes',
+        '_start',
+        '_token',
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        attributes: dict[str, Any],
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self._start = 0
+        self._token: contextvars.Token | None = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> 'Span':
+        self._token = _current_span.set(self)
+        self._start = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        end = time.time_ns()
+        if self._token is not None:
+            _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        _export(self.name, self._start, end - self._start, self._args())
+
+    @property
+    def traceparent(self) -> str:
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def _args(self) -> dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            **self.attributes,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def enable(path: str) -> None:
+    """Starts writing spans to `path`, replacing the file."""
+    global _exporter
+    disable()
+    _exporter = TraceExporter(path)
+
+
+def disable() -> None:
+    """Stops tracing and closes the trace file."""
+    global _exporter
+    exporter, _exporter = _exporter, None
+    if exporter is not None:
+        exporter.close()
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def span(
+    name: str,
+    root: bool = False,
+    remote_parent: str | None = None,
+    **attributes: Any,
+) -> Span | _NoopSpan:
+    """A span for a stage, child of the current span.
+
+    Args:
+        name: The name of the stage.
+        root: Start a new trace; the current span is kept as `follows_from`.
+        remote_parent: The W3C traceparent of a parent in another process.
+        **attributes: Attributes exported with the span, e.g. sizes.
+    """
+    if _exporter is None:
+        return NOOP_SPAN
+    remote = parse_traceparent(remote_parent) if remote_parent else None
+    parent = _current_span.get()
+    if remote is not None:
+        trace_id, parent_id = remote
+    elif parent is not None and not root:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        if parent is not None:
+            attributes['follows_from'] = parent.span_id
+    return Span(name, trace_id, parent_id, attributes)
+
+
+def record(name: str, start_ns: int, duration_ns: int, **attributes: Any) -> None:
+    """Exports a stage that was timed elsewhere, as a child of the current span."""
+    parent = _current_span.get()
+    if _exporter is None or parent is None:
+        return
+    args = {
+        'trace_id': parent.trace_id,
+        'span_id': os.urandom(8).hex(),
+        'parent_id': parent.span_id,
+        **attributes,
+    }
+    _export(name, start_ns, duration_ns, args)
+
+
+def bind(fn: T, parent: Span | None = None) -> T:
+    """Returns `fn` running under `parent`, by default the current span.
+
+    Threads do not inherit the context of the code that hands them work, so
+    wrap callables passed to another thread with this.
+    """
+    if _exporter is None:
+        return fn
+    if parent is None:
+        parent = _current_span.get()
+        if parent is None:
+            return fn
+
+    def bound(*args, **kwargs):
+        token = _current_span.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+
+    return bound  # type: ignore[return-value]
+
+
+def traceparent() -> str | None:
+    """The W3C traceparent header value for the current span, if tracing."""
+    parent = _current_span.get() if _exporter is not None else None
+    return parent.traceparent if parent is not None else None
+
+
+def parse_traceparent(header: str) -> tuple[str, str] | None:
+    """Returns the trace id and parent span id of a W3C traceparent header."""
+    parts = header.strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+
+def parse_server_timing(header: str | None) -> dict[str, float]:
+    """Returns the durations in milliseconds of a Server-Timing header."""
+    timings: dict[str, float] = {}
+    for metric in (header or '').split(','):
+        name, _, params = metric.strip().partition(';')
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'dur' and name:
+                try:
+                    timings[name] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+def _export(name: str, start_ns: int, duration_ns: int, args: dict[str, Any]) -> None:
+    exporter = _exporter
+    if exporter is None:
+        return
+    exporter.export(
+        {
+            'name': name,
+            'cat': 'omninexus',
+            'ph': 'X',
+            'ts': start_ns / 1000,
+            'dur': duration_ns / 1000,
+            'pid': exporter.pid,
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+    )
+
+
+def _process_trace_file(path: str) -> str:
+    """The trace file of this process, so that it does not replace its parent's."""
+    pid = str(os.getpid())
+    owner = os.environ.setdefault(TRACE_FILE_PID, pid)
+    if owner == pid:
+        return path
+    root, ext = os.path.splitext(path)
+    return f'{root}.{pid}{ext}'
+
+
+if TRACE_FILE:
+    enable(_process_trace_file(TRACE_FILE))
+atexit.register(disable)
@@ -1,6 +1,7 @@
 from omninexus.events.action.action import Action, ActionConfirmationStatus
 from omninexus.events.action.agent import (
     AgentDelegateAction,
+    AgentDelegateParallelAction,
     AgentFinishAction,
     AgentRejectAction,
     AgentSummarizeAction,
@@ -35,6 +36,7 @@ __all__ = [
     'AgentFinishAction',
     'AgentRejectAction',
     'AgentDelegateAction',
+    'AgentDelegateParallelAction',
     'AgentSummarizeAction',
     'ChangeAgentStateAction',
     'IPythonRunCellAction',
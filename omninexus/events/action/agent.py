@@ -78,3 +78,23 @@ class AgentDelegateAction(Action):
     @property
     def message(self) -> str:
         return f"I'm asking {self.agent} for help with this task."
+
+
+@dataclass
+class AgentDelegateParallelAction(Action):
+    """Runs several delegates at the same time, for independent subtasks.
+
+    Attributes:
+        delegates (list): One `{'agent': ..., 'inputs': {...}}` dict per delegate.
+        thought (str): The agent's explanation of its actions.
+        action (str): The action type, namely ActionType.DELEGATE_PARALLEL.
+    """
+
+    delegates: list[dict[str, Any]] = field(default_factory=list)
+    thought: str = ''
+    action: str = ActionType.DELEGATE_PARALLEL
+
+    @property
+    def message(self) -> str:
+        agents = ', '.join(delegate['agent'] for delegate in self.delegates)
+        return f"I'm asking {agents} for help with parts of this task at the same time."
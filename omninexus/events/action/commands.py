@@ -22,6 +22,9 @@ class CmdRunAction(Action):
     runnable: ClassVar[bool] = True
     confirmation_state: ActionConfirmationStatus = ActionConfirmationStatus.CONFIRMED
     security_risk: ActionSecurityRisk | None = None
+    # Name of a bash session of its own to run in (e.g. one per parallel delegate);
+    # the runtime's main session when empty
+    bash_session: str = ''
 
     @property
     def message(self) -> str:
@@ -164,10 +164,16 @@ class CmdOutputObservation(Observation):
 
 @dataclass
 class IPythonRunCellObservation(Observation):
-    """This data class represents the output of a IPythonRunCellAction."""
+    """This data class represents the output of a IPythonRunCellAction.
+
+    Observations with `partial=True` carry output streamed while the cell is
+    still running. They are shown to the user but not to the agent, which
+    gets the complete output in the final observation.
+    """
 
     code: str
     observation: str = ObservationType.RUN_IPYTHON
+    partial: bool = False
 
     @property
     def error(self) -> bool:
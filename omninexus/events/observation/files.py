@@ -8,18 +8,26 @@ from omninexus.events.observation.observation import Observation
 
 @dataclass
 class FileReadObservation(Observation):
-    """This data class represents the content of a file."""
+    """This data class represents the content of a file.
+
+    If the read was cut short by the runtime's byte cap, `next_start` is the
+    line to pass as `start` in a follow-up FileReadAction to continue reading.
+    """
 
     path: str
     observation: str = ObservationType.READ
     impl_source: FileReadSource = FileReadSource.DEFAULT
+    next_start: int | None = None
 
     @property
     def message(self) -> str:
         return f'I read the file {self.path}.'
 
     def __str__(self) -> str:
-        return f'[Read from {self.path} is successful.]\n' f'{self.content}'
+        ret = f'[Read from {self.path} is successful.]\n' f'{self.content}'
+        if self.next_start is not None:
+            ret += f'\n[Output truncated. Continue reading from line {self.next_start}.]'
+        return ret
 
 
 @dataclass
@@ -2,6 +2,7 @@ from omninexus.core.exceptions import LLMMalformedActionError
 from omninexus.events.action.action import Action
 from omninexus.events.action.agent import (
     AgentDelegateAction,
+    AgentDelegateParallelAction,
     AgentFinishAction,
     AgentRejectAction,
     ChangeAgentStateAction,
@@ -31,6 +32,7 @@ actions = (
     AgentFinishAction,
     AgentRejectAction,
     AgentDelegateAction,
+    AgentDelegateParallelAction,
     ChangeAgentStateAction,
     MessageAction,
 )
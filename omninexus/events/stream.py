@@ -1,12 +1,14 @@
 import asyncio
+import itertools
 import queue
 import threading
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from enum import Enum
 from functools import partial
-from typing import Callable, Iterable
+from typing import Any, AsyncIterator, Callable, Iterable
 
+from omninexus.core import tracing
 from omninexus.core.logger import omninexus_logger as logger
 from omninexus.core.utils import json
 from omninexus.events.event import Event, EventSource
@@ -40,18 +42,46 @@ async def session_exists(sid: str, file_store: FileStore) -> bool:
 
 
 class AsyncEventStreamWrapper:
-    def __init__(self, event_stream, *args, **kwargs):
+    """Iterates `event_stream.get_events(*args, **kwargs)` without blocking the loop.
+
+    Events are read from the file store in a worker thread, `batch_size` at
+    a time.
+    """
+
+    def __init__(self, event_stream, *args, batch_size: int = 100, **kwargs):
         self.event_stream = event_stream
+        self.batch_size = batch_size
         self.args = args
         self.kwargs = kwargs
 
-    async def __aiter__(self):
+    async def batches(
+        self, transform: Callable[[list[Event]], Any] | None = None
+    ) -> AsyncIterator[Any]:
+        """Yield lists of up to `batch_size` events.
+
+        Args:
+            transform: Applied to each batch in the worker thread (e.g. to
+                serialize it), its result is yielded instead of the list.
+        """
         loop = asyncio.get_running_loop()
+        events = iter(self.event_stream.get_events(*self.args, **self.kwargs))
 
-        # Create an async generator that yields events
-        for event in self.event_stream.get_events(*self.args, **self.kwargs):
-            # Run the blocking get_events() in a thread pool
-            yield await loop.run_in_executor(None, lambda e=event: e)  # type: ignore
+        def read_batch():
+            batch = list(itertools.islice(events, self.batch_size))
+            if not batch:
+                return None
+            return transform(batch) if transform is not None else batch
+
+        while True:
+            batch = await loop.run_in_executor(None, read_batch)
+            if batch is None:
+                return
+            yield batch
+
+    async def __aiter__(self):
+        async for batch in self.batches():
+            for event in batch:
+                yield event
 
 
 class EventStream:
@@ -75,6 +105,8 @@ class EventStream:
         self._thread_pools: dict[str, dict[str, ThreadPoolExecutor]] = {}
         self._thread_loops: dict[str, dict[str, asyncio.AbstractEventLoop]] = {}
         self._queue_loop = None
+        # Held while dispatching an event and while (un)subscribing
+        self._subscribers_lock = threading.Lock()
         self._queue_thread = threading.Thread(target=self._run_queue_loop)
         self._queue_thread.daemon = True
         self._queue_thread.start()
@@ -118,12 +150,17 @@ class EventStream:
                 self._clean_up_subscriber(subscriber_id, callback_id)
 
     def _clean_up_subscriber(self, subscriber_id: str, callback_id: str):
-        if subscriber_id not in self._subscribers:
-            logger.warning(f'Subscriber not found during cleanup: {subscriber_id}')
-            return
-        if callback_id not in self._subscribers[subscriber_id]:
-            logger.warning(f'Callback not found during cleanup: {callback_id}')
-            return
+        with self._subscribers_lock:
+            if subscriber_id not in self._subscribers:
+                logger.warning(f'Subscriber not found during cleanup: {subscriber_id}')
+                return
+            if callback_id not in self._subscribers[subscriber_id]:
+                logger.warning(f'Callback not found during cleanup: {callback_id}')
+                return
+            # Removed before its executor shuts down, so that no event being
+            # dispatched meanwhile is submitted to it
+            del self._subscribers[subscriber_id][callback_id]
+            pool = self._thread_pools.get(subscriber_id, {}).pop(callback_id, None)
         if (
             subscriber_id in self._thread_loops
             and callback_id in self._thread_loops[subscriber_id]
@@ -138,15 +175,8 @@ class EventStream:
                 )
             del self._thread_loops[subscriber_id][callback_id]
 
-        if (
-            subscriber_id in self._thread_pools
-            and callback_id in self._thread_pools[subscriber_id]
-        ):
-            pool = self._thread_pools[subscriber_id][callback_id]
+        if pool is not None:
             pool.shutdown()
-            del self._thread_pools[subscriber_id][callback_id]
-
-        del self._subscribers[subscriber_id][callback_id]
 
     def _get_filename_for_id(self, id: int) -> str:
         return get_conversation_event_filename(self.sid, id)
@@ -176,7 +206,8 @@ class EventStream:
             end_id: The ID of the last event to retrieve. Defaults to the last event in the stream.
             reverse: Whether to retrieve events in reverse order. Defaults to False.
             filter_out_type: A tuple of event types to filter out. Typically used to filter out backend events from the agent.
-            filter_hidden: If True, filters out events with the 'hidden' attribute set to True.
+            filter_hidden: If True, filters out events with the 'hidden' attribute set to True
+                and partial (streamed) observations.
 
         Yields:
             Events from the stream that match the criteria.
@@ -185,6 +216,8 @@ class EventStream:
         def should_filter(event: Event):
             if filter_hidden and hasattr(event, 'hidden') and event.hidden:
                 return True
+            if filter_hidden and getattr(event, 'partial', False):
+                return True
             if filter_out_type is not None and isinstance(event, filter_out_type):
                 return True
             return False
@@ -231,17 +264,18 @@ class EventStream:
     ):
         initializer = partial(self._init_thread_loop, subscriber_id, callback_id)
         pool = ThreadPoolExecutor(max_workers=1, initializer=initializer)
-        if subscriber_id not in self._subscribers:
-            self._subscribers[subscriber_id] = {}
-            self._thread_pools[subscriber_id] = {}
-
-        if callback_id in self._subscribers[subscriber_id]:
-            raise ValueError(
-                f'Callback ID on subscriber {subscriber_id} already exists: {callback_id}'
-            )
+        with self._subscribers_lock:
+            if subscriber_id not in self._subscribers:
+                self._subscribers[subscriber_id] = {}
+                self._thread_pools[subscriber_id] = {}
+
+            if callback_id in self._subscribers[subscriber_id]:
+                raise ValueError(
+                    f'Callback ID on subscriber {subscriber_id} already exists: {callback_id}'
+                )
 
-        self._subscribers[subscriber_id][callback_id] = callback
-        self._thread_pools[subscriber_id][callback_id] = pool
+            self._subscribers[subscriber_id][callback_id] = callback
+            self._thread_pools[subscriber_id][callback_id] = pool
 
     def unsubscribe(self, subscriber_id: EventStreamSubscriber, callback_id: str):
         if subscriber_id not in self._subscribers:
@@ -265,9 +299,17 @@ class EventStream:
         logger.debug(f'Adding {type(event).__name__} id={event.id} from {source.name}')
         event._timestamp = datetime.now().isoformat()
         event._source = source  # type: ignore [attr-defined]
-        data = event_to_dict(event)
-        if event.id is not None:
-            self.file_store.write(self._get_filename_for_id(event.id), json.dumps(data))
+        with tracing.span(
+            'EventStream.add_event', event=type(event).__name__, id=event.id
+        ) as span:
+            data = event_to_dict(event)
+            if event.id is not None:
+                contents = json.dumps(data)
+                span.set(bytes=len(contents))
+                self.file_store.write(self._get_filename_for_id(event.id), contents)
+        if tracing.enabled():
+            # subscribers run in their own threads, under the span that added the event
+            event._trace_span = tracing.current_span()  # type: ignore [attr-defined]
         self._queue.put(event)
 
     def _run_queue_loop(self):
@@ -285,13 +327,20 @@ class EventStream:
                 event = self._queue.get(timeout=0.1)
             except queue.Empty:
                 continue
-            for key in sorted(self._subscribers.keys()):
-                callbacks = self._subscribers[key]
-                for callback_id in callbacks:
-                    callback = callbacks[callback_id]
-                    pool = self._thread_pools[key][callback_id]
-                    future = pool.submit(callback, event)
-                    future.add_done_callback(self._make_error_handler(callback_id, key))
+            trace_span = getattr(event, '_trace_span', None)
+            with self._subscribers_lock:
+                for key in sorted(self._subscribers.keys()):
+                    callbacks = self._subscribers[key]
+                    for callback_id in callbacks:
+                        callback = callbacks[callback_id]
+                        pool = self._thread_pools[key][callback_id]
+                        future = pool.submit(tracing.bind(callback, trace_span), event)
+                        future.add_done_callback(
+                            self._make_error_handler(callback_id, key)
+                        )
+            if trace_span is not None:
+                # bound to the callbacks; the event would keep the span alive in the history
+                del event._trace_span  # type: ignore [attr-defined]
 
     def _make_error_handler(self, callback_id: str, subscriber_id: str):
         def _handle_callback_error(fut):
@@ -7,6 +7,7 @@ from typing import Any
 
 import requests
 
+from omninexus.core import tracing
 from omninexus.core.config import LLMConfig
 
 with warnings.catch_warnings():
@@ -215,7 +216,16 @@ class LLM(RetryMixin, DebugMixin):
                 start_time = time.time()
 
                 # we don't support streaming here, thus we get a ModelResponse
-                resp: ModelResponse = self._completion_unwrapped(*args, **kwargs)
+                with tracing.span(
+                    'LLM.completion', model=self.config.model, messages=len(messages)
+                ) as span:
+                    resp: ModelResponse = self._completion_unwrapped(*args, **kwargs)
+                    usage = resp.get('usage')
+                    if usage is not None:
+                        span.set(
+                            prompt_tokens=usage.get('prompt_tokens'),
+                            completion_tokens=usage.get('completion_tokens'),
+                        )
 
                 # Calculate and record latency
                 latency = time.time() - start_time
@@ -564,7 +574,7 @@ class LLM(RetryMixin, DebugMixin):
             boolean: True if executing a local model.
         """
         if self.config.base_url is not None:
-            for substring in ['localhost', '127.0.0.1' '0.0.0.0']:
+            for substring in ['localhost', '127.0.0.1', '0.0.0.0']:
                 if substring in self.config.base_url:
                     return True
         elif self.config.model is not None:
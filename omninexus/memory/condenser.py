@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from contextlib import contextmanager
 from typing import Any
 
@@ -9,6 +10,7 @@ from pydantic import BaseModel
 from typing_extensions import override
 
 from omninexus.controller.state.state import State
+from omninexus.core import tracing
 from omninexus.core.config.condenser_config import (
     AmortizedForgettingCondenserConfig,
     CondenserConfig,
@@ -54,6 +56,9 @@ class Condenser(ABC):
         events = condenser.condensed_history(state)
     """
 
+    reads_history_tail: bool = False
+    """Whether `condensed_history` only reads the latest events of the history (and a few at its start), so older events need not stay in memory."""
+
     def __init__(self):
         self._metadata_batch: dict[str, Any] = {}
 
@@ -91,7 +96,7 @@ class Condenser(ABC):
             self.write_metadata(state)
 
     @abstractmethod
-    def condense(self, events: list[Event]) -> list[Event]:
+    def condense(self, events: Sequence[Event]) -> list[Event]:
         """Condense a sequence of events into a potentially smaller list.
 
         New condenser strategies should override this method to implement their own condensation logic. Call `self.add_metadata` in the implementation to record any relevant per-condensation diagnostic information.
@@ -105,8 +110,15 @@ class Condenser(ABC):
 
     def condensed_history(self, state: State) -> list[Event]:
         """Condense the state's history."""
-        with self.metadata_batch(state):
-            return self.condense(state.history)
+        with tracing.span(
+            'Condenser.condensed_history',
+            condenser=type(self).__name__,
+            events_in=len(state.history),
+        ) as span:
+            with self.metadata_batch(state):
+                events = self.condense(state.history)
+            span.set(events_out=len(events))
+            return events
 
     @classmethod
     def from_config(cls, config: CondenserConfig) -> Condenser:
@@ -167,6 +179,8 @@ class RollingCondenser(Condenser, ABC):
     will result in second call to `condensed_history` passing `condensation + [event4, event5]` to the `condense` method.
     """
 
+    reads_history_tail = True
+
     def __init__(self) -> None:
         self._condensation: list[Event] = []
         self._last_history_length: int = 0
@@ -189,9 +203,9 @@ class RollingCondenser(Condenser, ABC):
 class NoOpCondenser(Condenser):
     """A condenser that does nothing to the event sequence."""
 
-    def condense(self, events: list[Event]) -> list[Event]:
+    def condense(self, events: Sequence[Event]) -> list[Event]:
         """Returns the list of events unchanged."""
-        return events
+        return list(events)
 
 
 class ObservationMaskingCondenser(Condenser):
@@ -202,7 +216,7 @@ class ObservationMaskingCondenser(Condenser):
 
         super().__init__()
 
-    def condense(self, events: list[Event]) -> list[Event]:
+    def condense(self, events: Sequence[Event]) -> list[Event]:
         """Replace the content of observations outside of the attention window with a placeholder."""
         results: list[Event] = []
         for i, event in enumerate(events):
@@ -220,18 +234,20 @@ class ObservationMaskingCondenser(Condenser):
 class RecentEventsCondenser(Condenser):
     """A condenser that only keeps a certain number of the most recent events."""
 
+    reads_history_tail = True
+
     def __init__(self, keep_first: int = 0, max_events: int = 10):
         self.keep_first = keep_first
         self.max_events = max_events
 
         super().__init__()
 
-    def condense(self, events: list[Event]) -> list[Event]:
+    def condense(self, events: Sequence[Event]) -> list[Event]:
         """Keep only the most recent events (up to `max_events`)."""
         head = events[: self.keep_first]
         tail_length = max(0, self.max_events - len(head))
         tail = events[-tail_length:]
-        return head + tail
+        return [*head, *tail]
 
 
 class LLMSummarizingCondenser(Condenser):
@@ -242,7 +258,7 @@ class LLMSummarizingCondenser(Condenser):
 
         super().__init__()
 
-    def condense(self, events: list[Event]) -> list[Event]:
+    def condense(self, events: Sequence[Event]) -> list[Event]:
         """Applies an LLM to summarize the list of events.
 
         Raises:
@@ -299,10 +315,10 @@ class AmortizedForgettingCondenser(RollingCondenser):
 
         super().__init__()
 
-    def condense(self, events: list[Event]) -> list[Event]:
+    def condense(self, events: Sequence[Event]) -> list[Event]:
         """Apply the amortized forgetting strategy to the given list of events."""
         if len(events) <= self.max_size:
-            return events
+            return list(events)
 
         target_size = self.max_size // 2
         head = events[: self.keep_first]
@@ -310,7 +326,7 @@ class AmortizedForgettingCondenser(RollingCondenser):
         events_from_tail = target_size - len(head)
         tail = events[-events_from_tail:]
 
-        return head + tail
+        return [*head, *tail]
 
 
 class ImportantEventSelection(BaseModel):
@@ -347,10 +363,10 @@ class LLMAttentionCondenser(RollingCondenser):
 
         super().__init__()
 
-    def condense(self, events: list[Event]) -> list[Event]:
+    def condense(self, events: Sequence[Event]) -> list[Event]:
         """If the history is too long, use an LLM to select the most important events."""
         if len(events) <= self.max_size:
-            return events
+            return list(events)
 
         target_size = self.max_size // 2
         head = events[: self.keep_first]
@@ -406,4 +422,4 @@ class LLMAttentionCondenser(RollingCondenser):
         # Grab the events associated with the response IDs
         tail = [event for event in events if event.id in response_ids]
 
-        return head + tail
+        return [*head, *tail]
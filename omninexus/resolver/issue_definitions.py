@@ -2,6 +2,7 @@ import json
 import os
 import re
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from typing import Any, ClassVar
 
 import jinja2
@@ -37,7 +38,7 @@ class IssueHandlerInterface(ABC):
 
     @abstractmethod
     def guess_success(
-        self, issue: GithubIssue, history: list[Event], git_patch: str | None = None
+        self, issue: GithubIssue, history: Sequence[Event], git_patch: str | None = None
     ) -> tuple[bool, list[bool] | None, str]:
         """Guess if the issue has been resolved based on the agent's output and git patch."""
         pass
@@ -250,7 +251,7 @@ class IssueHandler(IssueHandlerInterface):
         )
 
     def guess_success(
-        self, issue: GithubIssue, history: list[Event], git_patch: str | None = None
+        self, issue: GithubIssue, history: Sequence[Event], git_patch: str | None = None
     ) -> tuple[bool, None | list[bool], str]:
         """Guess if the issue is fixed based on the history and the issue description.
 
@@ -750,7 +751,7 @@ class PRHandler(IssueHandler):
         return self._check_feedback_with_llm(prompt)
 
     def guess_success(
-        self, issue: GithubIssue, history: list[Event], git_patch: str | None = None
+        self, issue: GithubIssue, history: Sequence[Event], git_patch: str | None = None
     ) -> tuple[bool, None | list[bool], str]:
         """Guess if the issue is fixed based on the history, issue description and git patch."""
         last_message = history[-1].message
@@ -3,6 +3,7 @@ from omninexus.runtime.impl.docker.docker_runtime import (
     DockerRuntime,
 )
 from omninexus.runtime.impl.e2b.sandbox import E2BBox
+from omninexus.runtime.impl.local.local_runtime import LocalRuntime
 from omninexus.runtime.impl.modal.modal_runtime import ModalRuntime
 from omninexus.runtime.impl.remote.remote_runtime import RemoteRuntime
 from omninexus.runtime.impl.runloop.runloop_runtime import RunloopRuntime
@@ -21,6 +22,8 @@ def get_runtime_cls(name: str):
         return ModalRuntime
     elif name == 'runloop':
         return RunloopRuntime
+    elif name == 'local':
+        return LocalRuntime
     else:
         raise ValueError(f'Runtime {name} not supported')
 
@@ -31,5 +34,6 @@ __all__ = [
     'ModalRuntime',
     'RunloopRuntime',
     'DockerRuntime',
+    'LocalRuntime',
     'get_runtime_cls',
 ]
@@ -7,8 +7,8 @@ NOTE: this will be executed inside the docker sandbox.
 
 import argparse
 import asyncio
-import base64
-import io
+import getpass
+import hashlib
 import json
 import mimetypes
 import os
@@ -18,8 +18,9 @@ import tempfile
 import time
 import traceback
 from contextlib import asynccontextmanager
+from functools import partial
 from pathlib import Path
-from zipfile import ZipFile
+from typing import Callable
 
 from fastapi import Depends, FastAPI, HTTPException, Request, UploadFile
 from fastapi.exceptions import RequestValidationError
@@ -30,6 +31,7 @@ from pydantic import BaseModel
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from uvicorn import run
 
+from omninexus.core import tracing
 from omninexus.core.logger import omninexus_logger as logger
 from omninexus.events.action import (
     Action,
@@ -53,11 +55,31 @@ from omninexus.events.observation import (
 from omninexus.events.serialization import event_from_dict, event_to_dict
 from omninexus.runtime.browser import browse
 from omninexus.runtime.browser.browser_env import BrowserEnv
+from omninexus.runtime.browser.fetch import HttpCache, WebFetcher
+from omninexus.runtime.browser.pool import BrowserPool
 from omninexus.runtime.plugins import ALL_PLUGINS, JupyterPlugin, Plugin, VSCodePlugin
+from omninexus.runtime.utils.archive import (
+    ARCHIVE_MEDIA_TYPES,
+    check_archive_format,
+    extract_archive,
+    iter_archive,
+)
 from omninexus.runtime.utils.bash import BashSession
-from omninexus.runtime.utils.files import insert_lines, read_lines
+from omninexus.runtime.utils.file_index import (
+    LineIndexCache,
+    encode_file_base64,
+    read_line_range,
+    splice_lines,
+)
+from omninexus.runtime.utils.file_manifest import (
+    FileHashCache,
+    build_manifest,
+    resolve_member,
+)
+from omninexus.runtime.utils.files import insert_lines
 from omninexus.runtime.utils.runtime_init import init_user_and_working_directory
 from omninexus.runtime.utils.system_stats import get_system_stats
+from omninexus.runtime.utils.workspace_tree import WorkspaceTree
 from omninexus.utils.async_utils import call_sync_from_async, wait_all
 
 
@@ -65,6 +87,19 @@ class ActionRequest(BaseModel):
     action: dict
 
 
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.ogg')
+MEDIA_EXTENSIONS = IMAGE_EXTENSIONS + VIDEO_EXTENSIONS + ('.pdf',)
+
+# Streamed IPython output is sent at most this often, in seconds
+PARTIAL_OUTPUT_INTERVAL = 0.5
+# Longer partial outputs only keep their end
+PARTIAL_OUTPUT_MAX_CHARS = 8192
+
+# Plugins that can be started on first use instead of at startup
+LAZY_PLUGINS = ('jupyter', 'vscode')
+
+
 ROOT_GID = 0
 INIT_COMMANDS = [
     'git config --global user.name "omninexus" && git config --global user.email "omninexus@all-hands.dev" && alias git="git --no-pager"',
@@ -92,21 +127,76 @@ class ActionExecutor:
         username: str,
         user_id: int,
         browsergym_eval_env: str | None,
+        file_read_max_bytes: int | None = None,
+        browser_observation_profile: str = 'full',
+        browser_screenshot_format: str = 'png',
+        browser_screenshot_quality: int = 75,
+        browser_pool_size: int = 0,
+        browser_pool_max_memory_mb: int | None = None,
+        browse_fetch_mode: str = 'browser',
+        http_cache_max_mb: int = 256,
+        lazy_plugins: bool = False,
     ) -> None:
         self.plugins_to_load = plugins_to_load
         self._initial_cwd = work_dir
         self.username = username
         self.user_id = user_id
-        _updated_user_id = init_user_and_working_directory(
-            username=username, user_id=self.user_id, initial_cwd=work_dir
-        )
-        if _updated_user_id is not None:
-            self.user_id = _updated_user_id
+        # A non-root server already running as the requested user (e.g. the
+        # local runtime) can neither create users nor `su` without a password.
+        self._is_current_user = os.getuid() != 0 and username == getpass.getuser()
+        if self._is_current_user:
+            os.makedirs(work_dir, exist_ok=True)
+        else:
+            _updated_user_id = init_user_and_working_directory(
+                username=username, user_id=self.user_id, initial_cwd=work_dir
+            )
+            if _updated_user_id is not None:
+                self.user_id = _updated_user_id
 
         self.bash_session: BashSession | None = None
         self.lock = asyncio.Lock()
+        # Sessions of their own for CmdRunActions that name one, e.g. parallel delegates;
+        # each only waits for the commands run in it
+        self.named_bash_sessions: dict[str, BashSession] = {}
+        self._bash_session_locks: dict[str, asyncio.Lock] = {}
         self.plugins: dict[str, Plugin] = {}
-        self.browser = BrowserEnv(browsergym_eval_env)
+        # Plugins in LAZY_PLUGINS are only started once an action needs them
+        self.lazy_plugins = lazy_plugins
+        self._plugin_locks: dict[str, asyncio.Lock] = {}
+        self.startup_seconds: dict[str, float] = {}
+        self._browser_factory = partial(
+            BrowserEnv,
+            browsergym_eval_env,
+            observation_profile=browser_observation_profile,
+            screenshot_format=browser_screenshot_format,
+            screenshot_quality=browser_screenshot_quality,
+        )
+        self.browser = self._browser_factory()
+        # Separate browser contexts for BrowseURLActions, which can then run in parallel
+        self.browser_pool: BrowserPool | None = None
+        if browser_pool_size > 0:
+            self.browser_pool = BrowserPool(
+                browser_pool_size,
+                factory=lambda: BrowserEnv(
+                    observation_profile=browser_observation_profile,
+                    screenshot_format=browser_screenshot_format,
+                    screenshot_quality=browser_screenshot_quality,
+                ),
+                max_memory_mb=browser_pool_max_memory_mb,
+            )
+        # Static pages can be fetched without the browser, through a cache
+        # shared with other servers on this machine
+        self.web_fetcher: WebFetcher | None = None
+        if browse_fetch_mode == 'auto':
+            self.web_fetcher = WebFetcher(
+                HttpCache(max_bytes=http_cache_max_mb * 2**20)
+                if http_cache_max_mb > 0
+                else None
+            )
+        self.file_read_max_bytes = file_read_max_bytes
+        self.line_index_cache = LineIndexCache()
+        self.file_hash_cache = FileHashCache()
+        self._workspace_tree: WorkspaceTree | None = None
         self.start_time = time.time()
         self.last_execution_time = self.start_time
         self._initialized = False
@@ -115,39 +205,106 @@ class ActionExecutor:
     def initial_cwd(self):
         return self._initial_cwd
 
+    @property
+    def workspace_tree(self) -> WorkspaceTree:
+        # Started on first use so that the watcher only runs when a client needs it
+        if self._workspace_tree is None:
+            self._workspace_tree = WorkspaceTree(self._initial_cwd)
+        return self._workspace_tree
+
     async def ainit(self):
+        start = time.time()
         # bash needs to be initialized first
         self.bash_session = BashSession(
             work_dir=self._initial_cwd,
-            username=self.username,
+            username=None if self._is_current_user else self.username,
         )
-        self.bash_session.initialize()
-        await wait_all(
-            (self._init_plugin(plugin) for plugin in self.plugins_to_load),
-            timeout=30,
+        await call_sync_from_async(self.bash_session.initialize)
+        self.startup_seconds['bash'] = time.time() - start
+
+        eager_plugins = [
+            plugin
+            for plugin in self.plugins_to_load
+            if not (self.lazy_plugins and plugin.name in LAZY_PLUGINS)
+        ]
+        # Plugins start side by side, while the bash init commands run
+        await asyncio.gather(
+            wait_all(
+                (self._init_plugin(plugin) for plugin in eager_plugins),
+                timeout=30,
+            ),
+            self._init_bash_commands(),
         )
-
-        # This is a temporary workaround
-        # TODO: refactor AgentSkills to be part of JupyterPlugin
-        # AFTER ServerRuntime is deprecated
-        if 'agent_skills' in self.plugins and 'jupyter' in self.plugins:
-            obs = await self.run_ipython(
-                IPythonRunCellAction(
-                    code='from omninexus.runtime.plugins.agent_skills.agentskills import *\n'
-                )
-            )
-            logger.debug(f'AgentSkills initialized: {obs}')
-
-        await self._init_bash_commands()
-        logger.debug('Runtime client initialized.')
+        self.startup_seconds['total'] = time.time() - start
+        logger.debug(f'Runtime client initialized: {self.startup_seconds}')
         self._initialized = True
 
     @property
     def initialized(self) -> bool:
         return self._initialized
 
+    async def reset(self):
+        """Start over with a fresh bash session, Jupyter kernel and browser context.
+
+        Used before the server is handed to another session (e.g. a warm
+        local runtime), so that environment variables such as tokens, the
+        working directory, the shell history and the pages and cookies of the
+        previous one are gone.
+        """
+        async with self.lock:
+            assert self.bash_session is not None
+            self.bash_session.close()
+            for bash_session in self.named_bash_sessions.values():
+                bash_session.close()
+            self.named_bash_sessions.clear()
+            self.bash_session = BashSession(
+                work_dir=self._initial_cwd,
+                username=None if self._is_current_user else self.username,
+            )
+            await call_sync_from_async(self.bash_session.initialize)
+            await self._init_bash_commands()
+
+            jupyter_plugin = self.plugins.pop('jupyter', None)
+            if isinstance(jupyter_plugin, JupyterPlugin):
+                await jupyter_plugin.shutdown()
+                self._jupyter_cwd = None
+                if not self.lazy_plugins:
+                    await self._init_plugin(jupyter_plugin)
+
+            if not await call_sync_from_async(self.browser.reset):
+                self.browser.close()
+                self.browser = self._browser_factory()
+            if self.browser_pool is not None:
+                self.browser_pool.clear()
+
+    async def get_plugin(self, name: str) -> Plugin | None:
+        """Return a plugin by name, starting it first if it was deferred.
+
+        Returns None if the plugin was not requested.
+        """
+        if name in self.plugins:
+            return self.plugins[name]
+        plugin = next((p for p in self.plugins_to_load if p.name == name), None)
+        if plugin is None:
+            return None
+        async with self._plugin_locks.setdefault(name, asyncio.Lock()):
+            if name not in self.plugins:
+                logger.debug(f'Starting deferred plugin: {name}')
+                await self._init_plugin(plugin)
+        return self.plugins[name]
+
+    def get_plugin_status(self) -> dict[str, dict]:
+        return {
+            plugin.name: {
+                'status': 'ready' if plugin.name in self.plugins else 'deferred',
+                'startup_seconds': self.startup_seconds.get(f'plugin:{plugin.name}'),
+            }
+            for plugin in self.plugins_to_load
+        }
+
     async def _init_plugin(self, plugin: Plugin):
         assert self.bash_session is not None
+        start = time.time()
         await plugin.initialize(self.username)
         self.plugins[plugin.name] = plugin
         logger.debug(f'Initializing plugin: {plugin.name}')
@@ -158,11 +315,22 @@ class ActionExecutor:
                     code=f'import os; os.chdir("{self.bash_session.cwd}")'
                 )
             )
+            # This is a temporary workaround
+            # TODO: refactor AgentSkills to be part of JupyterPlugin
+            # AFTER ServerRuntime is deprecated
+            if any(p.name == 'agent_skills' for p in self.plugins_to_load):
+                obs = await self.run_ipython(
+                    IPythonRunCellAction(
+                        code='from omninexus.runtime.plugins.agent_skills.agentskills import *\n'
+                    )
+                )
+                logger.debug(f'AgentSkills initialized: {obs}')
+        self.startup_seconds[f'plugin:{plugin.name}'] = time.time() - start
 
-    async def _init_bash_commands(self):
+    async def _init_bash_commands(self, bash_session: str = ''):
         logger.debug(f'Initializing by running {len(INIT_COMMANDS)} bash commands...')
         for command in INIT_COMMANDS:
-            action = CmdRunAction(command=command)
+            action = CmdRunAction(command=command, bash_session=bash_session)
             action.timeout = 300
             logger.debug(f'Executing init command: {command}')
             obs = await self.run(action)
@@ -175,6 +343,20 @@ class ActionExecutor:
         logger.debug('Bash init commands completed')
 
     async def run_action(self, action) -> Observation:
+        if isinstance(action, BrowseURLAction) and self.browser_pool is not None:
+            # Pooled contexts share nothing with the sandbox or each other,
+            # so these do not wait for other actions
+            logger.debug(f'Running action in the browser pool:\n{action}')
+            return await browse(action, self.browser_pool, self.web_fetcher)
+        if isinstance(action, CmdRunAction) and action.bash_session:
+            lock = self._bash_session_locks.setdefault(
+                action.bash_session, asyncio.Lock()
+            )
+            async with lock:
+                logger.debug(
+                    f'Running action in bash session {action.bash_session}:\n{action}'
+                )
+                return await self.run(action)
         async with self.lock:
             action_type = action.action
             logger.debug(f'Running action:\n{action}')
@@ -185,14 +367,45 @@ class ActionExecutor:
     async def run(
         self, action: CmdRunAction
     ) -> CmdOutputObservation | ErrorObservation:
-        assert self.bash_session is not None
-        obs = await call_sync_from_async(self.bash_session.execute, action)
+        if action.bash_session:
+            bash_session = await self._named_bash_session(action.bash_session)
+        else:
+            assert self.bash_session is not None
+            bash_session = self.bash_session
+        obs = await call_sync_from_async(bash_session.execute, action)
         return obs
 
-    async def run_ipython(self, action: IPythonRunCellAction) -> Observation:
+    async def _named_bash_session(self, name: str) -> BashSession:
+        """Return the bash session with this name, starting it on first use."""
+        if name not in self.named_bash_sessions:
+            logger.debug(f'Starting bash session: {name}')
+            bash_session = BashSession(
+                work_dir=self._initial_cwd,
+                username=None if self._is_current_user else self.username,
+            )
+            await call_sync_from_async(bash_session.initialize)
+            self.named_bash_sessions[name] = bash_session
+            await self._init_bash_commands(name)
+        return self.named_bash_sessions[name]
+
+    async def run_action_streaming(
+        self, action: IPythonRunCellAction, on_output: Callable[[str], None]
+    ) -> Observation:
+        """Run an IPython cell, calling `on_output` with its output as it arrives."""
+        async with self.lock:
+            logger.debug(f'Running action with streamed output:\n{action}')
+            observation = await self.run_ipython(action, on_output)
+            logger.debug(f'Action output:\n{observation}')
+            return observation
+
+    async def run_ipython(
+        self,
+        action: IPythonRunCellAction,
+        on_output: Callable[[str], None] | None = None,
+    ) -> Observation:
         assert self.bash_session is not None
-        if 'jupyter' in self.plugins:
-            _jupyter_plugin: JupyterPlugin = self.plugins['jupyter']  # type: ignore
+        _jupyter_plugin = await self.get_plugin('jupyter')
+        if isinstance(_jupyter_plugin, JupyterPlugin):
             # This is used to make AgentSkills in Jupyter aware of the
             # current working directory in Bash
             jupyter_cwd = getattr(self, '_jupyter_cwd', None)
@@ -212,7 +425,9 @@ class ActionExecutor:
                 )
                 self._jupyter_cwd = self.bash_session.cwd
 
-            obs: IPythonRunCellObservation = await _jupyter_plugin.run(action)
+            obs: IPythonRunCellObservation = await _jupyter_plugin.run(
+                action, on_output
+            )
             obs.content = obs.content.rstrip()
             matches = re.findall(
                 r'<oh_aci_output_[0-9a-f]{32}>(.*?)</oh_aci_output_[0-9a-f]{32}>',
@@ -306,35 +521,17 @@ class ActionExecutor:
         working_dir = self.bash_session.cwd
         filepath = self._resolve_path(action.path, working_dir)
         try:
-            if filepath.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
-                with open(filepath, 'rb') as file:
-                    image_data = file.read()
-                    encoded_image = base64.b64encode(image_data).decode('utf-8')
-                    mime_type, _ = mimetypes.guess_type(filepath)
-                    if mime_type is None:
-                        mime_type = 'image/png'  # default to PNG if mime type cannot be determined
-                    encoded_image = f'data:{mime_type};base64,{encoded_image}'
-
-                return FileReadObservation(path=filepath, content=encoded_image)
-            elif filepath.lower().endswith('.pdf'):
-                with open(filepath, 'rb') as file:
-                    pdf_data = file.read()
-                    encoded_pdf = base64.b64encode(pdf_data).decode('utf-8')
-                    encoded_pdf = f'data:application/pdf;base64,{encoded_pdf}'
-                return FileReadObservation(path=filepath, content=encoded_pdf)
-            elif filepath.lower().endswith(('.mp4', '.webm', '.ogg')):
-                with open(filepath, 'rb') as file:
-                    video_data = file.read()
-                    encoded_video = base64.b64encode(video_data).decode('utf-8')
-                    mime_type, _ = mimetypes.guess_type(filepath)
-                    if mime_type is None:
-                        mime_type = 'video/mp4'  # default to MP4 if MIME type cannot be determined
-                    encoded_video = f'data:{mime_type};base64,{encoded_video}'
-
-                return FileReadObservation(path=filepath, content=encoded_video)
-
-            with open(filepath, 'r', encoding='utf-8') as file:
-                lines = read_lines(file.readlines(), action.start, action.end)
+            if filepath.lower().endswith(MEDIA_EXTENSIONS):
+                return await call_sync_from_async(self._read_media, filepath)
+
+            content, next_start = await call_sync_from_async(
+                read_line_range,
+                filepath,
+                action.start,
+                action.end,
+                self.file_read_max_bytes,
+                self.line_index_cache,
+            )
         except FileNotFoundError:
             return ErrorObservation(
                 f'File not found: {filepath}. Your current working directory is {working_dir}.'
@@ -346,8 +543,32 @@ class ActionExecutor:
                 f'Path is a directory: {filepath}. You can only read files'
             )
 
-        code_view = ''.join(lines)
-        return FileReadObservation(path=filepath, content=code_view)
+        return FileReadObservation(
+            path=filepath, content=content, next_start=next_start
+        )
+
+    def _read_media(self, filepath: str) -> Observation:
+        size = os.path.getsize(filepath)
+        if self.file_read_max_bytes is not None and size > self.file_read_max_bytes:
+            return ErrorObservation(
+                f'File is too large to read inline ({size} bytes, limit is '
+                f'{self.file_read_max_bytes} bytes): {filepath}'
+            )
+
+        lower_path = filepath.lower()
+        if lower_path.endswith('.pdf'):
+            mime_type: str | None = 'application/pdf'
+        else:
+            mime_type, _ = mimetypes.guess_type(filepath)
+        if mime_type is None:
+            # default to PNG / MP4 if MIME type cannot be determined
+            mime_type = (
+                'video/mp4' if lower_path.endswith(VIDEO_EXTENSIONS) else 'image/png'
+            )
+        encoded = encode_file_base64(filepath)
+        return FileReadObservation(
+            path=filepath, content=f'data:{mime_type};base64,{encoded}'
+        )
 
     async def write(self, action: FileWriteAction) -> Observation:
         assert self.bash_session is not None
@@ -365,20 +586,33 @@ class ActionExecutor:
             else:
                 file_stat = None
 
-            mode = 'w' if not file_exists else 'r+'
             try:
-                with open(filepath, mode, encoding='utf-8') as file:
-                    if mode != 'w':
-                        all_lines = file.readlines()
+                whole_file = action.start == 0 and action.end == -1
+                valid_range = action.start >= 0 and (
+                    action.end == -1 or action.end >= action.start
+                )
+                if file_exists and not whole_file and valid_range:
+                    # Only rewrite the edited range and whatever follows it
+                    await call_sync_from_async(
+                        splice_lines,
+                        filepath,
+                        insert,
+                        action.start,
+                        action.end,
+                        self.line_index_cache,
+                    )
+                elif file_exists and not whole_file:
+                    with open(filepath, 'r+', encoding='utf-8') as file:
                         new_file = insert_lines(
-                            insert, all_lines, action.start, action.end
+                            insert, file.readlines(), action.start, action.end
                         )
-                    else:
-                        new_file = [i + '\n' for i in insert]
-
-                    file.seek(0)
-                    file.writelines(new_file)
-                    file.truncate()
+                        file.seek(0)
+                        file.writelines(new_file)
+                        file.truncate()
+                else:
+                    # Whole-file writes do not depend on the previous content
+                    with open(filepath, 'w', encoding='utf-8') as file:
+                        file.writelines(i + '\n' for i in insert)
 
                 # Handle file permissions
                 if file_exists:
@@ -406,7 +640,7 @@ class ActionExecutor:
         return FileWriteObservation(content='', path=filepath)
 
     async def browse(self, action: BrowseURLAction) -> Observation:
-        return await browse(action, self.browser)
+        return await browse(action, self.browser, self.web_fetcher)
 
     async def browse_interactive(self, action: BrowseInteractiveAction) -> Observation:
         return await browse(action, self.browser)
@@ -414,7 +648,13 @@ class ActionExecutor:
     def close(self):
         if self.bash_session is not None:
             self.bash_session.close()
+        for bash_session in self.named_bash_sessions.values():
+            bash_session.close()
+        if self._workspace_tree is not None:
+            self._workspace_tree.close()
         self.browser.close()
+        if self.browser_pool is not None:
+            self.browser_pool.close()
 
 
 if __name__ == '__main__':
@@ -432,6 +672,68 @@ if __name__ == '__main__':
         help='BrowserGym environment used for browser evaluation',
         default=None,
     )
+    parser.add_argument(
+        '--file-read-max-bytes',
+        type=int,
+        help='Maximum number of bytes returned by a single file read',
+        default=None,
+    )
+    parser.add_argument(
+        '--browser-observation-profile',
+        type=str,
+        help='How browser observations are produced: full, diff or slim',
+        default='full',
+    )
+    parser.add_argument(
+        '--browser-screenshot-format',
+        type=str,
+        help='Image format of browser screenshots: png, jpeg or webp',
+        default='png',
+    )
+    parser.add_argument(
+        '--browser-screenshot-quality',
+        type=int,
+        help='Quality of JPEG and WebP browser screenshots (1-100)',
+        default=75,
+    )
+    parser.add_argument(
+        '--browser-pool-size',
+        type=int,
+        help='Number of browser contexts that run BrowseURLActions in parallel (0 disables the pool)',
+        default=0,
+    )
+    parser.add_argument(
+        '--browser-pool-max-memory-mb',
+        type=int,
+        help='Memory cap of all pooled browser contexts together',
+        default=None,
+    )
+    parser.add_argument(
+        '--browse-fetch-mode',
+        type=str,
+        help='browser: open every URL in the browser, auto: fetch static pages over plain HTTP',
+        default='browser',
+    )
+    parser.add_argument(
+        '--http-cache-max-mb',
+        type=int,
+        help='Size of the HTTP cache used to fetch static pages (0 disables it)',
+        default=256,
+    )
+    parser.add_argument(
+        '--lazy-plugins',
+        action='store_true',
+        help=f'Start the {", ".join(LAZY_PLUGINS)} plugins when they are first used',
+    )
+    parser.add_argument(
+        '--host', type=str, help='Interface to listen on', default='0.0.0.0'
+    )
+    parser.add_argument(
+        '--jupyter-kernel-mode',
+        type=str,
+        help='How the jupyter plugin runs its kernel: direct or gateway',
+        default='gateway',
+    )
     # example: python client.py 8000 --working-dir /workspace --plugins JupyterRequirement
     args = parser.parse_args()
 
@@ -440,7 +742,12 @@ if __name__ == '__main__':
         for plugin in args.plugins:
             if plugin not in ALL_PLUGINS:
                 raise ValueError(f'Plugin {plugin} not found')
-            plugins_to_load.append(ALL_PLUGINS[plugin]())  # type: ignore
+            if plugin == 'jupyter':
+                plugins_to_load.append(
+                    JupyterPlugin(kernel_mode=args.jupyter_kernel_mode)
+                )
+            else:
+                plugins_to_load.append(ALL_PLUGINS[plugin]())  # type: ignore
 
     client: ActionExecutor | None = None
 
@@ -453,10 +760,22 @@ if __name__ == '__main__':
             username=args.username,
             user_id=args.user_id,
             browsergym_eval_env=args.browsergym_eval_env,
+            file_read_max_bytes=args.file_read_max_bytes,
+            browser_observation_profile=args.browser_observation_profile,
+            browser_screenshot_format=args.browser_screenshot_format,
+            browser_screenshot_quality=args.browser_screenshot_quality,
+            browser_pool_size=args.browser_pool_size,
+            browser_pool_max_memory_mb=args.browser_pool_max_memory_mb,
+            browse_fetch_mode=args.browse_fetch_mode,
+            http_cache_max_mb=args.http_cache_max_mb,
+            lazy_plugins=args.lazy_plugins,
         )
         await client.ainit()
         yield
         # Clean up & release the resources
+        if 'jupyter' in client.plugins:
+            _jupyter_plugin: JupyterPlugin = client.plugins['jupyter']  # type: ignore
+            await _jupyter_plugin.shutdown()
         client.close()
 
     app = FastAPI(lifespan=lifespan)
@@ -486,6 +805,23 @@ if __name__ == '__main__':
             content={'detail': 'Invalid request parameters', 'errors': exc.errors()},
         )
 
+    @app.middleware('http')
+    async def trace_requests(request: Request, call_next):
+        # requests of a tracing client carry its span, and get the time spent here back
+        traceparent = request.headers.get('traceparent')
+        if traceparent is None:
+            return await call_next(request)
+        start = time.perf_counter()
+        with tracing.span(
+            f'action_execution_server {request.url.path}', remote_parent=traceparent
+        ):
+            # for streamed responses, this is the time until the output starts
+            response = await call_next(request)
+        response.headers['Server-Timing'] = (
+            f'app;dur={(time.perf_counter() - start) * 1000:.1f}'
+        )
+        return response
+
     @app.middleware('http')
     async def authenticate_requests(request: Request, call_next):
         if request.url.path != '/alive' and request.url.path != '/server_info':
@@ -507,7 +843,11 @@ if __name__ == '__main__':
             'uptime': uptime,
             'idle_time': idle_time,
             'resources': get_system_stats(),
+            'startup_seconds': client.startup_seconds,
+            'plugins': client.get_plugin_status(),
         }
+        if client.browser_pool is not None:
+            response['browser_pool'] = client.browser_pool.get_stats()
         logger.info('Server info endpoint response: %s', response)
         return response
 
@@ -530,6 +870,56 @@ if __name__ == '__main__':
                 detail=traceback.format_exc(),
             )
 
+    @app.post('/execute_action_stream')
+    async def execute_action_stream(action_request: ActionRequest):
+        """Run an IPython cell and stream its output as newline-delimited JSON.
+
+        Output produced while the cell runs is sent as `{"partial": ...}`
+        lines, the last line is either `{"observation": ...}` with the same
+        observation `/execute_action` would return, or `{"error": ...}`.
+        """
+        assert client is not None
+        action = event_from_dict(action_request.action)
+        if not isinstance(action, IPythonRunCellAction):
+            raise HTTPException(
+                status_code=400,
+                detail='Only IPython cells support streamed output',
+            )
+        client.last_execution_time = time.time()
+        outputs: asyncio.Queue[str] = asyncio.Queue()
+
+        async def stream():
+            task = asyncio.create_task(
+                client.run_action_streaming(action, outputs.put_nowait)
+            )
+            while not task.done():
+                await asyncio.wait({task}, timeout=PARTIAL_OUTPUT_INTERVAL)
+                if task.done():
+                    # The observation carries the complete output
+                    break
+                pieces = []
+                while not outputs.empty():
+                    pieces.append(outputs.get_nowait())
+                if pieces:
+                    partial = ''.join(pieces)
+                    if len(partial) > PARTIAL_OUTPUT_MAX_CHARS:
+                        truncated = len(partial) - PARTIAL_OUTPUT_MAX_CHARS
+                        partial = (
+                            f'[... {truncated} characters truncated ...]\n'
+                            + partial[-PARTIAL_OUTPUT_MAX_CHARS:]
+                        )
+                    yield json.dumps({'partial': partial}) + '\n'
+            try:
+                observation = task.result()
+                yield json.dumps({'observation': event_to_dict(observation)}) + '\n'
+            except Exception:
+                logger.error(
+                    'Error processing streamed command', exc_info=True, stack_info=True
+                )
+                yield json.dumps({'error': traceback.format_exc()}) + '\n'
+
+        return StreamingResponse(stream(), media_type='application/x-ndjson')
+
     @app.post('/upload_file')
     async def upload_file(
         file: UploadFile, destination: str = '/', recursive: bool = False
@@ -584,39 +974,141 @@ if __name__ == '__main__':
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
+    @app.post('/upload_archive')
+    async def upload_archive(request: Request, destination: str, format: str = 'zip'):
+        """Extract an archive streamed in the request body into `destination`.
+
+        The body is spooled to disk chunk by chunk, never held in memory, and
+        the SHA-256 of the received bytes is returned so the sender can verify
+        the transfer.
+        """
+        assert client is not None
+
+        if not os.path.isabs(destination):
+            raise HTTPException(
+                status_code=400, detail='Destination must be an absolute path'
+            )
+        try:
+            check_archive_format(format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        try:
+            os.makedirs(destination, exist_ok=True)
+            sha256 = hashlib.sha256()
+            size = 0
+            with tempfile.NamedTemporaryFile(
+                dir=destination, suffix=f'.{format}'
+            ) as archive:
+                async for chunk in request.stream():
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    archive.write(chunk)
+                archive.flush()
+                await call_sync_from_async(
+                    extract_archive, archive.name, destination, format
+                )
+            logger.debug(f'Extracted {size} bytes of {format} into {destination}')
+            return JSONResponse(
+                content={
+                    'destination': destination,
+                    'format': format,
+                    'size': size,
+                    'sha256': sha256.hexdigest(),
+                },
+                status_code=200,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
     @app.get('/download_files')
-    async def download_file(path: str):
+    async def download_file(path: str, format: str = 'zip'):
         logger.debug('Downloading files')
+        if not os.path.isabs(path):
+            raise HTTPException(status_code=400, detail='Path must be an absolute path')
+
+        if not os.path.exists(path):
+            raise HTTPException(status_code=404, detail='File not found')
+
         try:
-            if not os.path.isabs(path):
-                raise HTTPException(
-                    status_code=400, detail='Path must be an absolute path'
-                )
+            check_archive_format(format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # The archive is generated while it is being sent, so memory usage
+        # does not depend on the size of the directory
+        return StreamingResponse(
+            content=iter_archive(path, format),
+            media_type=ARCHIVE_MEDIA_TYPES[format],
+            headers={'Content-Disposition': f'attachment; filename={path}.{format}'},
+        )
 
-            if not os.path.exists(path):
-                raise HTTPException(status_code=404, detail='File not found')
+    # ================================
+    # Incremental sync operations
+    # ================================
 
-            with tempfile.TemporaryFile() as temp_zip:
-                with ZipFile(temp_zip, 'w') as zipf:
-                    for root, _, files in os.walk(path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            zipf.write(
-                                file_path, arcname=os.path.relpath(file_path, path)
-                            )
-                temp_zip.seek(0)  # Rewind the file to the beginning after writing
-                content = temp_zip.read()
-                # Good for small to medium-sized files. For very large files, streaming directly from the
-                # file chunks may be more memory-efficient.
-                zip_stream = io.BytesIO(content)
-                return StreamingResponse(
-                    content=zip_stream,
-                    media_type='application/zip',
-                    headers={'Content-Disposition': f'attachment; filename={path}.zip'},
-                )
+    @app.post('/file_manifest')
+    async def file_manifest(request: Request):
+        """Return the size, mtime and SHA-256 of every file below a directory.
 
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+        Digests are cached per file and only recomputed when its stat changes.
+        """
+        assert client is not None
+        request_dict = await request.json()
+        path = request_dict.get('path')
+        if not path or not os.path.isabs(path):
+            raise HTTPException(status_code=400, detail='Path must be an absolute path')
+        manifest = await call_sync_from_async(
+            build_manifest, path, client.file_hash_cache
+        )
+        return {'path': path, 'files': manifest}
+
+    @app.post('/download_archive')
+    async def download_archive(request: Request):
+        """Stream an archive holding only the given files of a directory."""
+        request_dict = await request.json()
+        path = request_dict.get('path')
+        archive_format = request_dict.get('format', 'zip')
+        members = request_dict.get('files', [])
+        if not path or not os.path.isabs(path):
+            raise HTTPException(status_code=400, detail='Path must be an absolute path')
+        try:
+            check_archive_format(archive_format)
+            for member in members:
+                resolve_member(path, member)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return StreamingResponse(
+            content=iter_archive(path, archive_format, members=members),
+            media_type=ARCHIVE_MEDIA_TYPES[archive_format],
+        )
+
+    @app.post('/delete_files')
+    async def delete_files(request: Request):
+        """Delete the given files of a directory, e.g. ones removed on the host."""
+        request_dict = await request.json()
+        path = request_dict.get('path')
+        members = request_dict.get('files', [])
+        if not path or not os.path.isabs(path):
+            raise HTTPException(status_code=400, detail='Path must be an absolute path')
+        deleted = 0
+        try:
+            for member in members:
+                file_path = resolve_member(path, member)
+                if os.path.isfile(file_path) or os.path.islink(file_path):
+                    os.remove(file_path)
+                    deleted += 1
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {'deleted': deleted}
+
+    @app.post('/reset')
+    async def reset():
+        """Reset the shell state before the server is reused by another session."""
+        assert client is not None
+        await client.reset()
+        return {'status': 'ok'}
 
     @app.get('/alive')
     async def alive():
@@ -631,8 +1123,8 @@ if __name__ == '__main__':
     @app.get('/vscode/connection_token')
     async def get_vscode_connection_token():
         assert client is not None
-        if 'vscode' in client.plugins:
-            plugin: VSCodePlugin = client.plugins['vscode']  # type: ignore
+        plugin = await client.get_plugin('vscode')
+        if isinstance(plugin, VSCodePlugin):
             return {'token': plugin.vscode_connection_token}
         else:
             return {'token': None}
@@ -719,5 +1211,45 @@ if __name__ == '__main__':
             logger.error(f'Error listing files: {e}', exc_info=True)
             return []
 
+    @app.post('/list_tree')
+    async def list_tree(request: Request):
+        """List a directory and its subdirectories in a single call.
+
+        Listings are cached inside the sandbox and entries ignored by the
+        workspace .gitignore are filtered out, see `WorkspaceTree.list_tree`.
+        """
+        assert client is not None
+
+        request_dict = await request.json()
+        path = request_dict.get('path', None)
+        if path is None:
+            full_path = client.initial_cwd
+        elif os.path.isabs(path):
+            full_path = path
+        else:
+            full_path = os.path.join(client.initial_cwd, path)
+
+        tree = client.workspace_tree
+        try:
+            files = await call_sync_from_async(
+                tree.list_tree,
+                full_path,
+                request_dict.get('max_depth', None),
+                request_dict.get('exclude', None),
+            )
+        except Exception as e:
+            logger.error(f'Error listing file tree: {e}', exc_info=True)
+            files = []
+        return {'version': tree.version, 'files': files}
+
+    @app.get('/file_changes')
+    async def file_changes(since: int = 0, timeout: float = 30.0):
+        """Wait until directories of the workspace change after version `since`."""
+        assert client is not None
+        version, changed = await call_sync_from_async(
+            client.workspace_tree.wait_for_changes, since, min(timeout, 60.0)
+        )
+        return {'version': version, 'changed': changed}
+
     logger.debug(f'Starting action execution API on port {args.port}')
-    run(app, host='0.0.0.0', port=args.port)
+    run(app, host=args.host, port=args.port)
@@ -6,11 +6,13 @@ import os
 import random
 import string
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterator
 
 from requests.exceptions import ConnectionError
 
+from omninexus.core import tracing
 from omninexus.core.config import AppConfig, SandboxConfig
 from omninexus.core.exceptions import AgentRuntimeDisconnectedError
 from omninexus.core.logger import omninexus_logger as logger
@@ -107,6 +109,11 @@ class Runtime(FileEditRuntimeMixin):
 
         self.status_callback = status_callback
         self.attach_to_existing = attach_to_existing
+        # Set once the sandbox may differ from a freshly started one
+        self.modified = False
+        # Commands of named bash sessions (parallel delegates) run in a thread
+        # per session instead of waiting for the other actions
+        self._bash_session_executors: dict[str, ThreadPoolExecutor] = {}
 
         self.config = copy.deepcopy(config)
         atexit.register(self.close)
@@ -131,7 +138,36 @@ class Runtime(FileEditRuntimeMixin):
             self.add_env_vars(self.config.sandbox.runtime_startup_env_vars)
 
     def close(self) -> None:
-        pass
+        for executor in self._bash_session_executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._bash_session_executors.clear()
+
+    def attach_event_stream(
+        self, event_stream: EventStream, status_callback: Callable | None = None
+    ) -> None:
+        """Move an already connected runtime over to another session's event stream.
+
+        The runtime takes over the session id of the stream; the sandbox keeps
+        the name it was started under.
+        """
+        self.event_stream.unsubscribe(EventStreamSubscriber.RUNTIME, self.sid)
+        self.sid = event_stream.sid
+        self.event_stream = event_stream
+        self.event_stream.subscribe(
+            EventStreamSubscriber.RUNTIME, self.on_event, self.sid
+        )
+        self.status_callback = status_callback
+
+    def attach_config(self, config: AppConfig) -> None:
+        """Take over another session's configuration, e.g. its LLM, in an already connected runtime.
+
+        The sandbox options must be the ones the runtime was started with; the
+        workspace path found while connecting is kept.
+        """
+        workspace_mount_path_in_sandbox = self.config.workspace_mount_path_in_sandbox
+        self.config = copy.deepcopy(config)
+        self.config.workspace_mount_path_in_sandbox = workspace_mount_path_in_sandbox
+        self._init_draft_editor_llm()
 
     def log(self, level: str, message: str) -> None:
         message = f'[runtime {self.sid}] {message}'
@@ -150,6 +186,9 @@ class Runtime(FileEditRuntimeMixin):
     # ====================================================================
 
     def add_env_vars(self, env_vars: dict[str, str]) -> None:
+        if not env_vars:
+            # Nothing to do; also keeps a lazily started Jupyter plugin idle
+            return
         # Add env vars to the IPython shell (if Jupyter is used)
         if any(isinstance(plugin, JupyterRequirement) for plugin in self.plugins):
             code = 'import os\n'
@@ -176,17 +215,31 @@ class Runtime(FileEditRuntimeMixin):
             )
 
     def on_event(self, event: Event) -> None:
-        if isinstance(event, Action):
+        if isinstance(event, CmdRunAction) and event.bash_session:
+            executor = self._bash_session_executors.get(event.bash_session)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix=f'bash-{event.bash_session}'
+                )
+                self._bash_session_executors[event.bash_session] = executor
+            executor.submit(asyncio.run, self._handle_action(event))
+        elif isinstance(event, Action):
             asyncio.get_event_loop().run_until_complete(self._handle_action(event))
 
     async def _handle_action(self, event: Action) -> None:
         if event.timeout is None:
             event.timeout = self.config.sandbox.timeout
         assert event.timeout is not None
+        span = tracing.span('Runtime.run_action', action=type(event).__name__)
         try:
-            observation: Observation = await call_sync_from_async(
-                self.run_action, event
-            )
+            with span:
+                observation: Observation = await call_sync_from_async(
+                    self.run_action, event
+                )
+                span.set(
+                    observation=type(observation).__name__,
+                    content_length=len(getattr(observation, 'content', '') or ''),
+                )
         except Exception as e:
             err_id = ''
             if isinstance(e, ConnectionError) or isinstance(
@@ -323,6 +376,8 @@ class Runtime(FileEditRuntimeMixin):
             return UserRejectObservation(
                 'Action has been rejected by the user! Waiting for further user input.'
             )
+        if not isinstance(action, FileReadAction):
+            self.modified = True
         observation = getattr(self, action_type)(action)
         return observation
 
@@ -384,11 +439,70 @@ class Runtime(FileEditRuntimeMixin):
         """
         raise NotImplementedError('This method is not implemented in the base class.')
 
+    def list_tree(
+        self,
+        path: str | None = None,
+        max_depth: int | None = None,
+        exclude: list[str] | None = None,
+    ) -> dict:
+        """List a directory of the sandbox and its subdirectories in one call.
+
+        Entries ignored by the workspace .gitignore or named in `exclude` are
+        left out. Directories end with '/'.
+
+        Returns:
+            A dict with the tree `version` (see `wait_for_file_changes`) and
+            the `files` relative to `path`.
+        """
+        raise NotImplementedError('This runtime does not support listing file trees.')
+
+    def wait_for_file_changes(self, since: int, timeout: float = 30.0) -> dict:
+        """Block until the workspace tree changes after version `since`.
+
+        Returns:
+            A dict with the new `version` and the `changed` directories, which
+            is empty if `timeout` expired first.
+        """
+        raise NotImplementedError('This runtime does not support file change events.')
+
     @abstractmethod
     def copy_from(self, path: str) -> Path:
         """Zip all files in the sandbox and return a path in the local filesystem."""
         raise NotImplementedError('This method is not implemented in the base class.')
 
+    def sync_to(
+        self, host_src: str, sandbox_dest: str, delete: bool = False
+    ) -> dict[str, int]:
+        """Make `sandbox_dest` mirror the contents of the host directory `host_src`.
+
+        Only files whose content differs are transferred. With `delete`, files
+        that no longer exist on the host are removed from the sandbox.
+
+        Returns:
+            Counts of files considered, transferred and deleted, and bytes sent.
+        """
+        raise NotImplementedError('This runtime does not support incremental sync.')
+
+    def sync_from(
+        self, sandbox_src: str, host_dest: str, delete: bool = False
+    ) -> dict[str, int]:
+        """Make the host directory `host_dest` mirror `sandbox_src` in the sandbox."""
+        raise NotImplementedError('This runtime does not support incremental sync.')
+
+    def copy_from_stream(self, path: str) -> Iterator[bytes]:
+        """Zip all files in the sandbox and yield the archive chunk by chunk.
+
+        Runtimes that can stream archives directly should override this; the
+        default goes through a temporary file created by `copy_from`.
+        """
+        zip_file = self.copy_from(path)
+        try:
+            with open(zip_file, 'rb') as f:
+                while chunk := f.read(64 * 1024):
+                    yield chunk
+        finally:
+            zip_file.unlink()
+
     # ====================================================================
     # VSCode
     # ====================================================================
@@ -1,33 +1,84 @@
 import atexit
 import base64
+import hashlib
 import io
 import json
 import multiprocessing
-import time
-import uuid
+from collections import OrderedDict
 
 import browsergym.core  # noqa F401 (we register the openended task as a gym environment)
 import gymnasium as gym
-import html2text
 import numpy as np
 import tenacity
 from browsergym.utils.obs import flatten_dom_to_str
 from PIL import Image
 
-from omninexus.core.exceptions import BrowserInitException
+from omninexus.core.exceptions import (
+    BrowserInitException,
+    BrowserUnavailableException,
+)
 from omninexus.core.logger import omninexus_logger as logger
-from omninexus.utils.shutdown_listener import should_continue, should_exit
+from omninexus.runtime.browser.fetch import make_html_text_converter
+from omninexus.runtime.browser.ipc import (
+    BrowserChannel,
+    put_shared_bytes,
+    take_shared_bytes,
+)
+from omninexus.runtime.browser.observation_diff import apply_json_diff, diff_json
+from omninexus.utils.shutdown_listener import should_continue
 from omninexus.utils.tenacity_stop import stop_if_should_exit
 
 BROWSER_EVAL_GET_GOAL_ACTION = 'GET_EVAL_GOAL'
 BROWSER_EVAL_GET_REWARDS_ACTION = 'GET_EVAL_REWARDS'
 
+# 'full' sends every observation whole, 'diff' sends the DOM, AXTree and
+# element properties as patches against the previous step, 'slim' does the
+# same and only encodes a screenshot when the page or the visible part of it
+# (scroll position, viewport size) changed, or one is asked for
+BROWSER_OBSERVATION_PROFILES = ('full', 'diff', 'slim')
+BROWSER_SCREENSHOT_FORMATS = ('png', 'jpeg', 'webp')
+# Observation entries sent as patches outside of the 'full' profile
+DIFFED_OBSERVATION_KEYS = ('dom_object', 'axtree_object', 'extra_element_properties')
+# Number of page texts kept, keyed by the digest of the flattened DOM
+TEXT_CACHE_SIZE = 32
+# The browser process checks for shutdown signals this often while idle
+BROWSER_PROCESS_WAKEUP_SECONDS = 1.0
+
 
 class BrowserEnv:
-    def __init__(self, browsergym_eval_env: str | None = None):
+    """BrowserGym environment running in a separate process.
+
+    Args:
+        browsergym_eval_env: BrowserGym environment to evaluate on, if any.
+        observation_profile: One of BROWSER_OBSERVATION_PROFILES.
+        screenshot_format: One of BROWSER_SCREENSHOT_FORMATS.
+        screenshot_quality: Quality of JPEG and WebP screenshots (1-100).
+    """
+
+    def __init__(
+        self,
+        browsergym_eval_env: str | None = None,
+        observation_profile: str = 'full',
+        screenshot_format: str = 'png',
+        screenshot_quality: int = 75,
+    ):
+        if observation_profile not in BROWSER_OBSERVATION_PROFILES:
+            raise ValueError(
+                f'Unsupported browser observation profile: {observation_profile}. Supported profiles: {BROWSER_OBSERVATION_PROFILES}'
+            )
+        if screenshot_format not in BROWSER_SCREENSHOT_FORMATS:
+            raise ValueError(
+                f'Unsupported screenshot format: {screenshot_format}. Supported formats: {BROWSER_SCREENSHOT_FORMATS}'
+            )
         self.html_text_converter = self.get_html_text_converter()
         self.eval_mode = False
         self.eval_dir = ''
+        self.observation_profile = observation_profile
+        self.screenshot_format = screenshot_format
+        self.screenshot_quality = screenshot_quality
+        # Last full objects received, patches from the browser process apply to them
+        self._revision = 0
+        self._objects: dict[str, dict] = {}
 
         # EVAL only: browsergym_eval_env must be provided for evaluation
         self.browsergym_eval_env = browsergym_eval_env
@@ -36,20 +87,19 @@ class BrowserEnv:
         # Initialize browser environment process
         multiprocessing.set_start_method('spawn', force=True)
         self.browser_side, self.agent_side = multiprocessing.Pipe()
+        self.channel = BrowserChannel(self.agent_side, decode=self._decode_response)
 
         self.init_browser()
         atexit.register(self.close)
 
+    def __getstate__(self):
+        # The browser process gets a copy of this object; the channel stays here
+        state = self.__dict__.copy()
+        state.pop('channel', None)
+        return state
+
     def get_html_text_converter(self):
-        html_text_converter = html2text.HTML2Text()
-        # ignore links and images
-        html_text_converter.ignore_links = False
-        html_text_converter.ignore_images = True
-        # use alt text for images
-        html_text_converter.images_to_alt = True
-        # disable auto text wrapping
-        html_text_converter.body_width = 0
-        return html_text_converter
+        return make_html_text_converter()
 
     @tenacity.retry(
         wait=tenacity.wait_fixed(1),
@@ -64,6 +114,7 @@ class BrowserEnv:
         except Exception as e:
             logger.error(f'Failed to start browser process: {e}')
             raise
+        self.channel.start()
 
         if not self.check_alive():
             self.close()
@@ -101,54 +152,71 @@ class BrowserEnv:
         self.eval_goal = None
         self.eval_rewards: list[float] = []
         if self.eval_mode:
-            logger.debug(f"Browsing goal: {obs['goal']}")
+            logger.debug(f'Browsing goal: {obs["goal"]}')
             self.eval_goal = obs['goal']
 
+        # State of the last observation sent to the agent side
+        self._sent: dict = {'revision': 0, 'objects': {}}
+        self._text_cache: OrderedDict[str, str] = OrderedDict()
+        self._last_text: str | None = None
+        self._last_view: tuple | None = None
+
         logger.debug('Browser env started.')
         while should_continue():
             try:
-                if self.browser_side.poll(timeout=0.01):
-                    unique_request_id, action_data = self.browser_side.recv()
-
-                    # shutdown the browser environment
-                    if unique_request_id == 'SHUTDOWN':
-                        logger.debug('SHUTDOWN recv, shutting down browser env...')
-                        env.close()
-                        return
-                    elif unique_request_id == 'IS_ALIVE':
-                        self.browser_side.send(('ALIVE', None))
-                        continue
-
-                    # EVAL ONLY: Get evaluation info
-                    if action_data['action'] == BROWSER_EVAL_GET_GOAL_ACTION:
-                        self.browser_side.send(
-                            (unique_request_id, {'text_content': self.eval_goal})
-                        )
-                        continue
-                    elif action_data['action'] == BROWSER_EVAL_GET_REWARDS_ACTION:
-                        self.browser_side.send(
-                            (
-                                unique_request_id,
-                                {'text_content': json.dumps(self.eval_rewards)},
-                            )
+                # Block for requests, waking up now and then to notice a shutdown
+                if not self.browser_side.poll(timeout=BROWSER_PROCESS_WAKEUP_SECONDS):
+                    continue
+                request_id, kind, action_data = self.browser_side.recv()
+
+                # shutdown the browser environment
+                if kind == 'SHUTDOWN':
+                    logger.debug('SHUTDOWN recv, shutting down browser env...')
+                    env.close()
+                    return
+                elif kind == 'IS_ALIVE':
+                    self.browser_side.send((request_id, 'ALIVE'))
+                    continue
+                elif kind == 'RESET':
+                    # A new browser context, without the cookies, storage and
+                    # pages of earlier actions
+                    env.reset()
+                    self._sent = {'revision': 0, 'objects': {}}
+                    self._last_text = None
+                    self._last_view = None
+                    self.browser_side.send((request_id, 'RESET'))
+                    continue
+
+                # EVAL ONLY: Get evaluation info
+                if action_data['action'] == BROWSER_EVAL_GET_GOAL_ACTION:
+                    self.browser_side.send(
+                        (request_id, {'text_content': self.eval_goal})
+                    )
+                    continue
+                elif action_data['action'] == BROWSER_EVAL_GET_REWARDS_ACTION:
+                    self.browser_side.send(
+                        (
+                            request_id,
+                            {'text_content': json.dumps(self.eval_rewards)},
                         )
-                        continue
-
-                    action = action_data['action']
-                    obs, reward, terminated, truncated, info = env.step(action)
-
-                    # EVAL ONLY: Save the rewards into file for evaluation
-                    if self.eval_mode:
-                        self.eval_rewards.append(reward)
-
-                    # add text content of the page
-                    html_str = flatten_dom_to_str(obs['dom_object'])
-                    obs['text_content'] = self.html_text_converter.handle(html_str)
-                    # make observation serializable
-                    obs['screenshot'] = self.image_to_png_base64_url(obs['screenshot'])
-                    obs['active_page_index'] = obs['active_page_index'].item()
-                    obs['elapsed_time'] = obs['elapsed_time'].item()
-                    self.browser_side.send((unique_request_id, obs))
+                    )
+                    continue
+
+                action = action_data['action']
+                obs, reward, terminated, truncated, info = env.step(action)
+
+                # EVAL ONLY: Save the rewards into file for evaluation
+                if self.eval_mode:
+                    self.eval_rewards.append(reward)
+
+                slim = self.observation_profile == 'slim'
+                self._prepare_observation(
+                    obs,
+                    base_revision=action_data.get('base_revision', 0),
+                    screenshot=action_data.get('screenshot'),
+                    view=self._get_view(env) if slim else None,
+                )
+                self.browser_side.send((request_id, obs))
             except KeyboardInterrupt:
                 logger.debug('Browser env process interrupted by user.')
                 try:
@@ -157,32 +225,156 @@ class BrowserEnv:
                     pass
                 return
 
-    def step(self, action_str: str, timeout: float = 30) -> dict:
-        """Execute an action in the browser environment and return the observation."""
-        unique_request_id = str(uuid.uuid4())
-        self.agent_side.send((unique_request_id, {'action': action_str}))
-        start_time = time.time()
-        while True:
-            if should_exit() or time.time() - start_time > timeout:
-                raise TimeoutError('Browser environment took too long to respond.')
-            if self.agent_side.poll(timeout=0.01):
-                response_id, obs = self.agent_side.recv()
-                if response_id == unique_request_id:
-                    return obs
+    @staticmethod
+    def _get_view(env) -> tuple | None:
+        """The active page and its scroll position and viewport size (browser process)."""
+        try:
+            page = env.unwrapped.page
+            return (
+                page.url,
+                *page.evaluate(
+                    '() => [window.scrollX, window.scrollY, window.innerWidth, window.innerHeight]'
+                ),
+            )
+        except Exception:
+            return None
+
+    def _prepare_observation(
+        self,
+        obs: dict,
+        base_revision: int,
+        screenshot: bool | None,
+        view: tuple | None = None,
+    ) -> None:
+        """Make a BrowserGym observation serializable and slim it down (browser process).
+
+        `view` identifies what part of the page is visible; the 'slim' profile
+        skips the screenshot only when neither it nor the DOM changed.
+        """
+        previous = self._sent['objects']
+        dom_changed = previous.get('dom_object') != obs['dom_object']
+        view_changed = view is None or view != self._last_view
+        self._last_view = view
+
+        # add text content of the page, converted once per page revision
+        if dom_changed or self._last_text is None:
+            html_str = flatten_dom_to_str(obs['dom_object'])
+            digest = hashlib.md5(html_str.encode('utf-8', 'replace')).hexdigest()
+            text = self._text_cache.get(digest)
+            if text is None:
+                text = self.html_text_converter.handle(html_str)
+                self._text_cache[digest] = text
+                if len(self._text_cache) > TEXT_CACHE_SIZE:
+                    self._text_cache.popitem(last=False)
+            else:
+                self._text_cache.move_to_end(digest)
+            self._last_text = text
+        obs['text_content'] = self._last_text
+
+        # make observation serializable
+        if screenshot is None:
+            screenshot = (
+                self.observation_profile != 'slim' or dom_changed or view_changed
+            )
+        if screenshot:
+            # Encoded here, turned into base64 on the agent side
+            obs['screenshot'] = put_shared_bytes(
+                self.encode_image(
+                    obs['screenshot'], self.screenshot_format, self.screenshot_quality
+                )
+            )
+        else:
+            obs['screenshot'] = ''
+        obs['active_page_index'] = obs['active_page_index'].item()
+        obs['elapsed_time'] = obs['elapsed_time'].item()
+
+        if self.observation_profile == 'full':
+            self._sent['objects'] = {key: obs[key] for key in DIFFED_OBSERVATION_KEYS}
+            return
+        # Patches are only valid against the revision the agent side holds
+        can_diff = base_revision != 0 and base_revision == self._sent['revision']
+        patches = {}
+        objects = {}
+        for key in DIFFED_OBSERVATION_KEYS:
+            objects[key] = obs.pop(key)
+            if can_diff:
+                patches[key] = diff_json(previous[key], objects[key])
+            else:
+                patches[key] = ('r', objects[key])
+        self._sent = {'revision': self._sent['revision'] + 1, 'objects': objects}
+        obs['patches'] = patches
+        obs['revision'] = self._sent['revision']
+
+    def _decode_response(self, obs):
+        """Rebuild an observation sent by `_prepare_observation` (agent side).
+
+        Runs for every response in the order they were sent, so the objects
+        patches apply to are always the ones the browser process diffed against.
+        """
+        if not isinstance(obs, dict):
+            return obs
+        if isinstance(obs.get('screenshot'), dict):
+            obs['screenshot'] = self.image_bytes_to_base64_url(
+                take_shared_bytes(obs['screenshot']), self.screenshot_format
+            )
+        if 'patches' not in obs:
+            return obs
+        patches = obs.pop('patches')
+        for key, patch in patches.items():
+            obs[key] = apply_json_diff(self._objects.get(key), patch)
+        self._objects = {key: obs[key] for key in patches}
+        self._revision = obs.pop('revision')
+        return obs
+
+    def step(
+        self, action_str: str, timeout: float = 30, screenshot: bool | None = None
+    ) -> dict:
+        """Execute an action in the browser environment and return the observation.
+
+        Args:
+            action_str: The BrowserGym action to execute.
+            timeout: Seconds to wait for the observation.
+            screenshot: Whether to include a screenshot. None leaves it to the
+                observation profile.
+        """
+        return self.channel.request(
+            'STEP',
+            {
+                'action': action_str,
+                'base_revision': self._revision,
+                'screenshot': screenshot,
+            },
+            timeout=timeout,
+        )
+
+    def reset(self, timeout: float = 60) -> bool:
+        """Start over in a fresh browser context, e.g. before handing the env to someone else.
+
+        Returns:
+            Whether the browser process confirmed the reset.
+        """
+        try:
+            response = self.channel.request('RESET', timeout=timeout)
+        except (TimeoutError, BrowserUnavailableException) as e:
+            logger.debug(f'Failed to reset browser env: {e}')
+            return False
+        self._revision = 0
+        self._objects = {}
+        return response == 'RESET'
 
     def check_alive(self, timeout: float = 60):
-        self.agent_side.send(('IS_ALIVE', None))
-        if self.agent_side.poll(timeout=timeout):
-            response_id, _ = self.agent_side.recv()
-            if response_id == 'ALIVE':
-                return True
-            logger.debug(f'Browser env is not alive. Response ID: {response_id}')
+        try:
+            response = self.channel.request('IS_ALIVE', timeout=timeout)
+        except (TimeoutError, BrowserUnavailableException) as e:
+            logger.debug(f'Browser env is not alive: {e}')
+            return False
+        return response == 'ALIVE'
 
     def close(self):
         if not self.process.is_alive():
             return
         try:
-            self.agent_side.send(('SHUTDOWN', None))
+            self.channel.send('SHUTDOWN')
             self.process.join(5)  # Wait for the process to terminate
             if self.process.is_alive():
                 logger.error(
@@ -193,11 +385,49 @@ class BrowserEnv:
                 if self.process.is_alive():
                     self.process.kill()
                     self.process.join(5)  # Wait for the process to terminate
-            self.agent_side.close()
+            self.channel.close()
             self.browser_side.close()
+            self.agent_side.close()
         except Exception:
             logger.error('Encountered an error when closing browser env', exc_info=True)
 
+    @staticmethod
+    def encode_image(
+        image: np.ndarray | Image.Image, image_format: str = 'png', quality: int = 75
+    ) -> bytes:
+        """Encode a screenshot in the given format."""
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        if image.mode in ('RGBA', 'LA'):
+            image = image.convert('RGB')
+        buffered = io.BytesIO()
+        if image_format == 'png':
+            image.save(buffered, format='PNG')
+        else:
+            image.save(buffered, format=image_format.upper(), quality=quality)
+        return buffered.getvalue()
+
+    @staticmethod
+    def image_bytes_to_base64_url(data: bytes, image_format: str = 'png') -> str:
+        """Convert an encoded image to a base64 image url.
+
+        PNG screenshots have no data prefix, as before; JPEG and WebP ones
+        carry one so their type is known.
+        """
+        image_base64 = base64.b64encode(data).decode()
+        if image_format == 'png':
+            return image_base64
+        return f'data:image/{image_format};base64,{image_base64}'
+
+    @staticmethod
+    def image_to_base64_url(
+        image: np.ndarray | Image.Image, image_format: str = 'png', quality: int = 75
+    ) -> str:
+        """Encode a screenshot as a base64 image url in the given format."""
+        return BrowserEnv.image_bytes_to_base64_url(
+            BrowserEnv.encode_image(image, image_format, quality), image_format
+        )
+
     @staticmethod
     def image_to_png_base64_url(
         image: np.ndarray | Image.Image, add_data_prefix: bool = False
@@ -0,0 +1,300 @@
+"""Fetching web pages without a browser, through a shared HTTP cache.
+
+Responses are cached on disk keyed by URL and the request headers that
+change their content, so they are shared by every action execution server
+on the machine (and across sessions). Stale entries are revalidated with
+their ETag / Last-Modified, and the cache evicts the least recently used
+entries when it grows over its size limit.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+import html2text
+import requests
+
+from omninexus.core.logger import omninexus_logger as logger
+
+# Request headers that are part of the cache key
+VARY_HEADERS = ('accept', 'accept-language')
+# Pages whose text is shorter than this are probably rendered by JavaScript
+STATIC_PAGE_MIN_TEXT_CHARS = 200
+# Content types that are turned into text without a browser
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+TEXT_CONTENT_TYPES = ('text/plain', 'text/markdown', 'application/json')
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (compatible; OmniNexus)'
+# Read size when streaming a response body
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseTooLargeError(requests.RequestException):
+    """The response body is larger than the fetcher accepts."""
+
+
+def get_http_cache_dir() -> str:
+    cache_home = os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+    return os.getenv(
+        'OMNINEXUS_HTTP_CACHE_DIR', os.path.join(cache_home, 'omninexus', 'http')
+    )
+
+
+def make_html_text_converter() -> html2text.HTML2Text:
+    html_text_converter = html2text.HTML2Text()
+    # ignore links and images
+    html_text_converter.ignore_links = False
+    html_text_converter.ignore_images = True
+    # use alt text for images
+    html_text_converter.images_to_alt = True
+    # disable auto text wrapping
+    html_text_converter.body_width = 0
+    return html_text_converter
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    content_type: str
+    body: bytes
+    etag: str | None = None
+    last_modified: str | None = None
+    # Time until which the entry can be used without revalidating it
+    fresh_until: float = 0.0
+
+    @property
+    def encoding(self) -> str:
+        match = re.search(r'charset=([\w-]+)', self.content_type)
+        return match.group(1) if match else 'utf-8'
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding, errors='replace')
+
+
+def _fresh_until(headers: requests.structures.CaseInsensitiveDict) -> float:
+    cache_control = headers.get('Cache-Control', '').lower()
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return 0.0
+    match = re.search(r'max-age=(\d+)', cache_control)
+    if match:
+        return time.time() + int(match.group(1))
+    return 0.0
+
+
+class HttpCache:
+    """Size-bounded on-disk cache of HTTP responses, with LRU eviction.
+
+    Every entry is a `<key>.json` metadata file next to a `<key>.body` file.
+    Files are replaced atomically, so several processes can share the
+    directory.
+
+    Args:
+        directory: Where entries are stored. Defaults to `get_http_cache_dir()`.
+        max_bytes: Total size of the bodies kept before old entries are evicted.
+    """
+
+    def __init__(self, directory: str | None = None, max_bytes: int = 256 * 2**20):
+        self.directory = directory or get_http_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(url: str, headers: dict[str, str] | None = None) -> str:
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        vary = [f'{name}:{headers.get(name, "")}' for name in VARY_HEADERS]
+        return hashlib.sha256('\n'.join([url, *vary]).encode()).hexdigest()
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return f'{base}.json', f'{base}.body'
+
+    def get(self, key: str) -> CachedResponse | None:
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        # The modification time of the metadata file is the LRU clock
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return CachedResponse(body=body, **meta)
+
+    def put(self, key: str, response: CachedResponse) -> None:
+        if len(response.body) > self.max_bytes:
+            return
+        meta_path, body_path = self._paths(key)
+        meta = {
+            'url': response.url,
+            'status_code': response.status_code,
+            'content_type': response.content_type,
+            'etag': response.etag,
+            'last_modified': response.last_modified,
+            'fresh_until': response.fresh_until,
+        }
+        try:
+            self._write(body_path, response.body)
+            self._write(meta_path, json.dumps(meta).encode())
+        except OSError as e:
+            logger.debug(f'Could not write HTTP cache entry for {response.url}: {e}')
+            return
+        self._evict()
+
+    def touch(self, key: str, fresh_until: float) -> None:
+        """Mark an entry as revalidated."""
+        meta_path, _ = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            meta['fresh_until'] = fresh_until
+            self._write(meta_path, json.dumps(meta).encode())
+        except (OSError, ValueError):
+            pass
+
+    def _write(self, path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith('.json'):
+                        continue
+                    key = entry.name[: -len('.json')]
+                    try:
+                        last_used = entry.stat().st_mtime
+                        size = os.path.getsize(self._paths(key)[1])
+                    except OSError:
+                        continue
+                    entries.append((last_used, key, size))
+                    total += size
+            if total <= self.max_bytes:
+                return
+            for _, key, size in sorted(entries):
+                for path in self._paths(key):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+
+class WebFetcher:
+    """Fetches pages over plain HTTP, for pages that do not need a browser.
+
+    Args:
+        cache: Cache for the responses. None fetches every page anew.
+        timeout: Seconds to wait for the server.
+        max_bytes: Largest response body read; larger pages are left to the browser.
+    """
+
+    def __init__(
+        self,
+        cache: HttpCache | None = None,
+        timeout: float = 20,
+        max_bytes: int = 10 * 2**20,
+    ):
+        self.cache = cache
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = DEFAULT_USER_AGENT
+        self.html_text_converter = make_html_text_converter()
+        # html2text keeps state between calls
+        self._converter_lock = threading.Lock()
+
+    def fetch(self, url: str, headers: dict[str, str] | None = None) -> CachedResponse:
+        """GET `url`, answering from the cache or revalidating it where possible."""
+        key = HttpCache.key(url, headers) if self.cache is not None else ''
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None and cached.fresh_until > time.time():
+            return cached
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            if cached.etag:
+                request_headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                request_headers['If-Modified-Since'] = cached.last_modified
+        with self.session.get(
+            url, headers=request_headers, timeout=self.timeout, stream=True
+        ) as response:
+            if response.status_code == 304 and cached is not None:
+                fresh_until = _fresh_until(response.headers)
+                self.cache.touch(key, fresh_until)  # type: ignore[union-attr]
+                cached.fresh_until = fresh_until
+                return cached
+            body = self._read_body(response)
+
+        result = CachedResponse(
+            url=response.url,
+            status_code=response.status_code,
+            content_type=response.headers.get('Content-Type', ''),
+            body=body,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            fresh_until=_fresh_until(response.headers),
+        )
+        cacheable = 'no-store' not in response.headers.get('Cache-Control', '')
+        if self.cache is not None and response.status_code == 200 and cacheable:
+            self.cache.put(key, result)
+        return result
+
+    def _read_body(self, response: requests.Response) -> bytes:
+        """Read a streamed response body, up to `max_bytes`."""
+        content_length = response.headers.get('Content-Length', '')
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            raise ResponseTooLargeError(f'{response.url}: {content_length} bytes')
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ResponseTooLargeError(
+                    f'{response.url}: over {self.max_bytes} bytes'
+                )
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def fetch_text(self, url: str) -> tuple[str, str] | None:
+        """Fetch a static page and return its final URL and text content.
+
+        Returns None if the page needs a browser: errors, pages over
+        `max_bytes`, content that is neither HTML nor text, and HTML with too little text to be anything
+        but a shell for scripts.
+        """
+        try:
+            response = self.fetch(url)
+        except requests.RequestException as e:
+            logger.debug(f'Fetching {url} without a browser failed: {e}')
+            return None
+        if response.status_code != 200:
+            return None
+        content_type = response.content_type.split(';')[0].strip().lower()
+        if content_type in TEXT_CONTENT_TYPES:
+            return response.url, response.text
+        if content_type not in HTML_CONTENT_TYPES:
+            return None
+        with self._converter_lock:
+            text = self.html_text_converter.handle(response.text)
+        if len(text.strip()) < STATIC_PAGE_MIN_TEXT_CHARS:
+            return None
+        return response.url, text
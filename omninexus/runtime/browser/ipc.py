@@ -0,0 +1,156 @@
+"""Request/response channel between `BrowserEnv` and its browser process.
+
+Requests are `(request_id, kind, payload)` tuples, responses are
+`(request_id, payload)` tuples. On the agent side a single receiver thread
+blocks on the pipe and hands every response to the request waiting for it,
+so several requests can be outstanding at once and nothing spins while the
+browser is idle.
+
+Large binary payloads (screenshots) go through shared memory instead of the
+pipe; see `put_shared_bytes` and `take_shared_bytes`.
+"""
+
+import threading
+import uuid
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable
+
+from omninexus.core.exceptions import BrowserUnavailableException
+from omninexus.core.logger import omninexus_logger as logger
+from omninexus.utils.shutdown_listener import should_exit
+
+# Waiting requests wake up this often to check whether the process is exiting
+WAIT_SLICE_SECONDS = 1.0
+# Payloads smaller than this are sent through the pipe
+SHARED_MEMORY_MIN_BYTES = 64 * 1024
+
+
+def put_shared_bytes(data: bytes) -> dict:
+    """Wrap `data` for sending, in shared memory if it is large (browser process)."""
+    if len(data) < SHARED_MEMORY_MIN_BYTES:
+        return {'data': data}
+    shm = SharedMemory(create=True, size=len(data))
+    # The receiving side unlinks the block once it has read it, so this
+    # process must not clean it up again when it exits
+    resource_tracker.unregister(shm._name, 'shared_memory')  # type: ignore[attr-defined]
+    try:
+        shm.buf[: len(data)] = data
+        return {'shm': shm.name, 'size': len(data)}
+    finally:
+        shm.close()
+
+
+def take_shared_bytes(ref: dict) -> bytes:
+    """Read bytes wrapped by `put_shared_bytes`, freeing the shared memory (agent side)."""
+    if 'data' in ref:
+        return ref['data']
+    shm = SharedMemory(name=ref['shm'])
+    try:
+        return bytes(shm.buf[: ref['size']])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+class BrowserChannel:
+    """Agent side of the channel.
+
+    Args:
+        conn: The agent end of the pipe.
+        decode: Called in the receiver thread with every response payload, in
+            the order the browser process sent them, including responses
+            nobody waits for anymore. Its result is what `request` returns.
+    """
+
+    def __init__(
+        self, conn: Connection, decode: Callable[[Any], Any] | None = None
+    ) -> None:
+        self.conn = conn
+        self.decode = decode
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._receiver: threading.Thread | None = None
+        self._closed = False
+
+    def start(self) -> None:
+        if self._receiver is not None and self._receiver.is_alive():
+            return
+        self._closed = False
+        self._receiver = threading.Thread(
+            target=self._receive_loop, name='browser-channel', daemon=True
+        )
+        self._receiver.start()
+
+    def send(self, kind: str, payload: Any = None) -> str:
+        """Send a request without waiting for its response."""
+        request_id = str(uuid.uuid4())
+        with self._send_lock:
+            self.conn.send((request_id, kind, payload))
+        return request_id
+
+    def request(self, kind: str, payload: Any = None, timeout: float = 30) -> Any:
+        """Send a request and block until its response arrives.
+
+        Raises:
+            TimeoutError: If there is no response within `timeout` seconds or
+                the process is shutting down.
+            BrowserUnavailableException: If the browser process went away.
+        """
+        request_id = str(uuid.uuid4())
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise BrowserUnavailableException()
+            self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                self.conn.send((request_id, kind, payload))
+            remaining = timeout
+            while True:
+                try:
+                    return future.result(timeout=min(remaining, WAIT_SLICE_SECONDS))
+                except FutureTimeoutError:
+                    remaining -= WAIT_SLICE_SECONDS
+                    if remaining <= 0 or should_exit():
+                        raise TimeoutError(
+                            'Browser environment took too long to respond.'
+                        )
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.set_exception(BrowserUnavailableException())
+
+    def _receive_loop(self) -> None:
+        while True:
+            try:
+                request_id, payload = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            error: Exception | None = None
+            try:
+                result = self.decode(payload) if self.decode is not None else payload
+            except Exception as e:
+                logger.error(f'Failed to decode browser response: {e}', exc_info=True)
+                result, error = None, e
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                logger.debug(f'Dropping browser response {request_id}: nobody waits')
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        self.close()
@@ -0,0 +1,84 @@
+"""Structural diffs of JSON-like browser observation objects (DOM, AXTree).
+
+A patch is a tuple tagged by its first element:
+
+- ('r', value): replace the object with `value`
+- ('d', changed, removed): dict with sub-patches for `changed` keys and the
+  keys in `removed` deleted
+- ('e', changed): list of the same length with sub-patches for the indices
+  in `changed`
+- ('l', prefix, suffix, middle): list keeping its first `prefix` and last
+  `suffix` items, with `middle` in between
+
+`diff_json` returns None when both objects are equal.
+"""
+
+from typing import Any
+
+Patch = tuple
+
+
+def diff_json(old: Any, new: Any) -> Patch | None:
+    """Return a patch that turns `old` into `new`, or None if they are equal."""
+    if old == new:
+        return None
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = {}
+        for key, value in new.items():
+            if key not in old:
+                changed[key] = ('r', value)
+                continue
+            patch = diff_json(old[key], value)
+            if patch is not None:
+                changed[key] = patch
+        removed = [key for key in old if key not in new]
+        return ('d', changed, removed)
+    if isinstance(old, list) and isinstance(new, list):
+        if len(old) == len(new):
+            return (
+                'e',
+                {
+                    i: patch
+                    for i, (a, b) in enumerate(zip(old, new, strict=True))
+                    if (patch := diff_json(a, b)) is not None
+                },
+            )
+        max_common = min(len(old), len(new))
+        prefix = 0
+        while prefix < max_common and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            suffix < max_common - prefix
+            and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]
+        ):
+            suffix += 1
+        return ('l', prefix, suffix, new[prefix : len(new) - suffix])
+    return ('r', new)
+
+
+def apply_json_diff(old: Any, patch: Patch | None) -> Any:
+    """Apply a patch from `diff_json` to `old` and return the result.
+
+    `old` is not modified; unchanged parts are shared with the result.
+    """
+    if patch is None:
+        return old
+    kind = patch[0]
+    if kind == 'r':
+        return patch[1]
+    if kind == 'd':
+        _, changed, removed = patch
+        result = {key: value for key, value in old.items() if key not in removed}
+        for key, sub_patch in changed.items():
+            result[key] = apply_json_diff(old.get(key), sub_patch)
+        return result
+    if kind == 'e':
+        items = list(old)
+        for i, sub_patch in patch[1].items():
+            items[i] = apply_json_diff(old[i], sub_patch)
+        return items
+    if kind == 'l':
+        _, prefix, suffix, middle = patch
+        return old[:prefix] + list(middle) + old[len(old) - suffix :]
+    raise ValueError(f'Unknown patch type: {kind}')
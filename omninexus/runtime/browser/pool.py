@@ -0,0 +1,169 @@
+"""A pool of browser contexts for running independent browse actions in parallel.
+
+Every context is a `BrowserEnv` of its own, i.e. a separate browser process
+with its own cookies, storage and pages, so actions running side by side
+cannot see each other's state. Contexts are started on first use, handed
+out to one action at a time and shut down when they push the pool over its
+memory cap. A released context is reset in the background (new browser
+context, so no cookies, storage or pages carry over) before it is handed out
+again.
+"""
+
+import threading
+from typing import Callable
+
+import psutil
+
+from omninexus.core.logger import omninexus_logger as logger
+from omninexus.runtime.browser.browser_env import BrowserEnv
+
+
+def _process_tree_rss(pid: int) -> int:
+    """Resident memory of a process and all of its children, in bytes."""
+    try:
+        process = psutil.Process(pid)
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+    except psutil.Error:
+        return 0
+
+
+class BrowserPool:
+    """Hands out up to `size` browser contexts to concurrent callers.
+
+    `step` has the same signature as `BrowserEnv.step`, so the pool can be
+    passed to `browse` in place of a single browser.
+
+    Args:
+        size: Maximum number of contexts.
+        factory: Creates a new context.
+        max_memory_mb: Cap on the memory of all contexts together. No new
+            context is started while the pool is above it, and contexts
+            released while it is exceeded are shut down. None disables it.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        factory: Callable[[], BrowserEnv],
+        max_memory_mb: int | None = None,
+    ):
+        self.size = size
+        self.factory = factory
+        self.max_memory_mb = max_memory_mb
+        self._idle: list[BrowserEnv] = []
+        self._busy: set[BrowserEnv] = set()
+        self._resetting: set[BrowserEnv] = set()
+        self._starting = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _memory_mb(self, contexts) -> float:
+        return sum(_process_tree_rss(env.process.pid) for env in contexts) / 2**20
+
+    def _over_memory_cap(self) -> bool:
+        if self.max_memory_mb is None:
+            return False
+        contexts = [*self._idle, *self._busy, *self._resetting]
+        return self._memory_mb(contexts) >= self.max_memory_mb
+
+    def acquire(self, timeout: float | None = None) -> BrowserEnv:
+        """Take an idle context, starting one if there is room, or wait for one."""
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError('Browser pool is closed')
+                if self._idle:
+                    env = self._idle.pop()
+                    self._busy.add(env)
+                    return env
+                total = len(self._busy) + len(self._resetting) + self._starting
+                if total < self.size and (total == 0 or not self._over_memory_cap()):
+                    self._starting += 1
+                    break
+                if not self._condition.wait(timeout):
+                    raise TimeoutError('No browser context became available in time')
+
+        try:
+            env = self.factory()
+        except BaseException:
+            with self._condition:
+                self._starting -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._starting -= 1
+            self._busy.add(env)
+        logger.debug(f'Started browser context {len(self._busy)}/{self.size}')
+        return env
+
+    def release(self, env: BrowserEnv) -> None:
+        with self._condition:
+            self._busy.discard(env)
+            discard = (
+                self._closed or not env.process.is_alive() or self._over_memory_cap()
+            )
+            if not discard:
+                self._resetting.add(env)
+            self._condition.notify()
+        if discard:
+            logger.debug('Shutting down browser context')
+            env.close()
+            return
+        # The caller does not wait for the reset
+        threading.Thread(
+            target=self._reset, args=(env,), name='browser-pool-reset', daemon=True
+        ).start()
+
+    def _reset(self, env: BrowserEnv) -> None:
+        reset = env.reset()
+        with self._condition:
+            self._resetting.discard(env)
+            keep = reset and not self._closed
+            if keep:
+                self._idle.append(env)
+            self._condition.notify()
+        if not keep:
+            logger.debug('Shutting down browser context that failed to reset')
+            env.close()
+
+    def step(
+        self, action_str: str, timeout: float = 30, screenshot: bool | None = None
+    ) -> dict:
+        env = self.acquire(timeout)
+        try:
+            return env.step(action_str, timeout=timeout, screenshot=screenshot)
+        finally:
+            self.release(env)
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            contexts = [*self._idle, *self._busy, *self._resetting]
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'busy': len(self._busy),
+                'resetting': len(self._resetting),
+                'starting': self._starting,
+                'memory_mb': self._memory_mb(contexts),
+            }
+
+    def clear(self) -> None:
+        """Shut down the idle contexts; the busy ones are still reset when released."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for env in idle:
+            env.close()
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for env in idle:
+            env.close()
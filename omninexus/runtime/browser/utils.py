@@ -5,11 +5,41 @@ from omninexus.core.schema import ActionType
 from omninexus.events.action import BrowseInteractiveAction, BrowseURLAction
 from omninexus.events.observation import BrowserOutputObservation
 from omninexus.runtime.browser.browser_env import BrowserEnv
+from omninexus.runtime.browser.fetch import WebFetcher
+from omninexus.runtime.browser.pool import BrowserPool
+from omninexus.utils.async_utils import call_sync_from_async
 
 
 async def browse(
-    action: BrowseURLAction | BrowseInteractiveAction, browser: BrowserEnv | None
+    action: BrowseURLAction | BrowseInteractiveAction,
+    browser: BrowserEnv | BrowserPool | None,
+    fetcher: WebFetcher | None = None,
 ) -> BrowserOutputObservation:
+    """Run a browse action.
+
+    With a `fetcher`, BrowseURLActions for static pages are answered by a
+    plain (cached) HTTP request instead of the browser. That is only done
+    when `browser` is a pool (or missing): pooled contexts are reset after
+    every action, while the page a single browser navigates to is where
+    the following BrowseInteractiveActions continue.
+    """
+    if (
+        isinstance(action, BrowseURLAction)
+        and fetcher is not None
+        and not isinstance(browser, BrowserEnv)
+    ):
+        if action.url.startswith(('http://', 'https://')):
+            fetched = await call_sync_from_async(fetcher.fetch_text, action.url)
+            if fetched is not None:
+                url, text = fetched
+                return BrowserOutputObservation(
+                    content=text,
+                    url=url,
+                    screenshot='',
+                    open_pages_urls=[url],
+                    trigger_by_action=action.action,
+                )
+
     if browser is None:
         raise BrowserUnavailableException()
 
@@ -29,7 +59,7 @@ async def browse(
 
     try:
         # obs provided by BrowserGym: see https://github.com/ServiceNow/BrowserGym/blob/main/core/src/browsergym/core/env.py#L396
-        obs = browser.step(action_str)
+        obs = await call_sync_from_async(browser.step, action_str)
         return BrowserOutputObservation(
             content=obs['text_content'],  # text content of the page
             url=obs.get('url', ''),  # URL of the page
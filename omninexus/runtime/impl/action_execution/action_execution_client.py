@@ -1,18 +1,25 @@
+import json
 import os
 import tempfile
 import threading
+import time
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+from urllib.parse import urlparse
 from zipfile import ZipFile
 
 import requests
 
+from omninexus.core import tracing
 from omninexus.core.config import AppConfig
 from omninexus.core.exceptions import (
+    AgentRuntimeDisconnectedError,
+    AgentRuntimeError,
     AgentRuntimeTimeoutError,
 )
-from omninexus.events import EventStream
+from omninexus.events import EventSource, EventStream
 from omninexus.events.action import (
     ActionConfirmationStatus,
     BrowseInteractiveAction,
@@ -26,6 +33,7 @@ from omninexus.events.action import (
 from omninexus.events.action.action import Action
 from omninexus.events.observation import (
     ErrorObservation,
+    IPythonRunCellObservation,
     NullObservation,
     Observation,
     UserRejectObservation,
@@ -34,6 +42,18 @@ from omninexus.events.serialization import event_to_dict, observation_from_dict
 from omninexus.events.serialization.action import ACTION_TYPE_TO_CLASS
 from omninexus.runtime.base import Runtime
 from omninexus.runtime.plugins import PluginRequirement
+from omninexus.runtime.utils.archive import (
+    CHUNK_SIZE,
+    HashingIterator,
+    extract_archive,
+    iter_archive,
+)
+from omninexus.runtime.utils.file_manifest import (
+    FileHashCache,
+    build_manifest,
+    diff_manifests,
+    resolve_member,
+)
 from omninexus.runtime.utils.request import send_request
 
 
@@ -57,8 +77,11 @@ class ActionExecutionClient(Runtime):
     ):
         self.session = requests.Session()
         self.action_semaphore = threading.Semaphore(1)  # Ensure one action at a time
+        # Commands of named bash sessions only wait for their own session
+        self._bash_session_semaphores: dict[str, threading.Semaphore] = {}
         self._runtime_initialized: bool = False
         self._vscode_token: str | None = None  # initial dummy value
+        self._file_hash_cache = FileHashCache()
         super().__init__(
             config,
             event_stream,
@@ -93,7 +116,37 @@ class ActionExecutionClient(Runtime):
         Raises:
             AgentRuntimeError: If the request fails
         """
-        return send_request(self.session, method, url, **kwargs)
+        if not tracing.enabled():
+            return send_request(self.session, method, url, **kwargs)
+
+        path = urlparse(url).path
+        with tracing.span(
+            'ActionExecutionClient.request', method=method, path=path
+        ) as span:
+            kwargs['headers'] = {
+                **(kwargs.get('headers') or {}),
+                'traceparent': tracing.traceparent(),
+            }
+            start = time.time_ns()
+            response = send_request(self.session, method, url, **kwargs)
+            duration = time.time_ns() - start
+            span.set(
+                status=response.status_code,
+                response_bytes=response.headers.get('content-length'),
+            )
+            server_ms = tracing.parse_server_timing(
+                response.headers.get('Server-Timing')
+            ).get('app')
+            if server_ms is not None:
+                # the server only reports how long it took, so center that in the round trip
+                server_ns = int(server_ms * 1_000_000)
+                tracing.record(
+                    'action_execution_server',
+                    start + max(0, duration - server_ns) // 2,
+                    server_ns,
+                    path=path,
+                )
+            return response
 
     def check_if_alive(self) -> None:
         with self._send_action_server_request(
@@ -126,11 +179,65 @@ class ActionExecutionClient(Runtime):
         except requests.Timeout:
             raise TimeoutError('List files operation timed out')
 
+    def list_tree(
+        self,
+        path: str | None = None,
+        max_depth: int | None = None,
+        exclude: list[str] | None = None,
+    ) -> dict:
+        try:
+            data: dict[str, Any] = {'max_depth': max_depth, 'exclude': exclude}
+            if path is not None:
+                data['path'] = path
+
+            with self._send_action_server_request(
+                'POST',
+                f'{self._get_action_execution_server_host()}/list_tree',
+                json=data,
+                timeout=30,
+            ) as response:
+                response_json = response.json()
+                assert isinstance(response_json, dict)
+                return response_json
+        except requests.Timeout:
+            raise TimeoutError('List tree operation timed out')
+
+    def wait_for_file_changes(self, since: int, timeout: float = 30.0) -> dict:
+        with self._send_action_server_request(
+            'GET',
+            f'{self._get_action_execution_server_host()}/file_changes',
+            params={'since': since, 'timeout': timeout},
+            timeout=int(timeout) + 10,
+        ) as response:
+            response_json = response.json()
+            assert isinstance(response_json, dict)
+            return response_json
+
     def copy_from(self, path: str) -> Path:
         """Zip all files in the sandbox and return as a stream of bytes."""
 
+        temp_file = tempfile.NamedTemporaryFile(suffix='.zip', delete=False)
+        try:
+            with temp_file:
+                for chunk in self.copy_from_stream(path):
+                    temp_file.write(chunk)
+            # Verify the CRC-32 of every member before handing the archive out
+            with ZipFile(temp_file.name) as zipf:
+                corrupted = zipf.testzip()
+            if corrupted is not None:
+                raise RuntimeError(
+                    f'Corrupted file in archive downloaded from {path}: {corrupted}'
+                )
+        except BaseException:
+            os.unlink(temp_file.name)
+            raise
+        return Path(temp_file.name)
+
+    def copy_from_stream(self, path: str, format: str = 'zip') -> Iterator[bytes]:
+        """Stream an archive of `path` from the sandbox without storing it."""
+
         try:
-            params = {'path': path}
+            params = {'path': path, 'format': format}
             with self._send_action_server_request(
                 'GET',
                 f'{self._get_action_execution_server_host()}/download_files',
@@ -138,60 +245,174 @@ class ActionExecutionClient(Runtime):
                 stream=True,
                 timeout=30,
             ) as response:
-                temp_file = tempfile.NamedTemporaryFile(delete=False)
-                for chunk in response.iter_content(chunk_size=8192):
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
                     if chunk:  # filter out keep-alive new chunks
-                        temp_file.write(chunk)
-                return Path(temp_file.name)
+                        yield chunk
         except requests.Timeout:
             raise TimeoutError('Copy operation timed out')
 
     def copy_to(
         self, host_src: str, sandbox_dest: str, recursive: bool = False
     ) -> None:
+        self.modified = True
         if not os.path.exists(host_src):
             raise FileNotFoundError(f'Source file {host_src} does not exist')
 
         try:
             if recursive:
-                with tempfile.NamedTemporaryFile(
-                    suffix='.zip', delete=False
-                ) as temp_zip:
-                    temp_zip_path = temp_zip.name
-
-                with ZipFile(temp_zip_path, 'w') as zipf:
-                    for root, _, files in os.walk(host_src):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(
-                                file_path, os.path.dirname(host_src)
-                            )
-                            zipf.write(file_path, arcname)
-
-                upload_data = {'file': open(temp_zip_path, 'rb')}
-            else:
-                upload_data = {'file': open(host_src, 'rb')}
+                self._copy_dir_to(host_src, sandbox_dest)
+                return
 
             params = {'destination': sandbox_dest, 'recursive': str(recursive).lower()}
 
-            with self._send_action_server_request(
-                'POST',
-                f'{self._get_action_execution_server_host()}/upload_file',
-                files=upload_data,
-                params=params,
-                timeout=300,
-            ) as response:
-                self.log(
-                    'debug',
-                    f'Copy completed: host:{host_src} -> runtime:{sandbox_dest}. Response: {response.text}',
-                )
+            with open(host_src, 'rb') as upload_file:
+                with self._send_action_server_request(
+                    'POST',
+                    f'{self._get_action_execution_server_host()}/upload_file',
+                    files={'file': upload_file},
+                    params=params,
+                    timeout=300,
+                ) as response:
+                    self.log(
+                        'debug',
+                        f'Copy completed: host:{host_src} -> runtime:{sandbox_dest}. Response: {response.text}',
+                    )
         finally:
-            if recursive:
-                os.unlink(temp_zip_path)
             self.log(
                 'debug', f'Copy completed: host:{host_src} -> runtime:{sandbox_dest}'
             )
 
+    def _copy_dir_to(self, host_src: str, sandbox_dest: str) -> None:
+        """Stream a directory into the sandbox as an archive built on the fly."""
+        self._upload_archive(
+            host_src, sandbox_dest, arcname_base=os.path.dirname(host_src)
+        )
+
+    def _upload_archive(
+        self,
+        host_src: str,
+        sandbox_dest: str,
+        arcname_base: str,
+        members: list[str] | None = None,
+    ) -> int:
+        archive_format = self.config.sandbox.copy_archive_format
+        body = HashingIterator(
+            iter_archive(
+                host_src,
+                archive_format,
+                arcname_base=arcname_base,
+                members=members,
+            )
+        )
+        params = {'destination': sandbox_dest, 'format': archive_format}
+        with self._send_action_server_request(
+            'POST',
+            f'{self._get_action_execution_server_host()}/upload_archive',
+            data=iter(body),
+            params=params,
+            timeout=300,
+        ) as response:
+            response_json = response.json()
+        if response_json['sha256'] != body.hexdigest():
+            raise RuntimeError(
+                f'Checksum mismatch while copying {host_src} to {sandbox_dest}: '
+                f'sent {body.size} bytes ({body.hexdigest()}), '
+                f'runtime received {response_json["size"]} bytes ({response_json["sha256"]})'
+            )
+        self.log(
+            'debug',
+            f'Streamed {body.size} bytes of {archive_format}: host:{host_src} -> runtime:{sandbox_dest}',
+        )
+        return body.size
+
+    def _get_remote_manifest(self, path: str) -> dict[str, dict]:
+        with self._send_action_server_request(
+            'POST',
+            f'{self._get_action_execution_server_host()}/file_manifest',
+            json={'path': path},
+            timeout=300,
+        ) as response:
+            return response.json()['files']
+
+    def sync_to(
+        self, host_src: str, sandbox_dest: str, delete: bool = False
+    ) -> dict[str, int]:
+        self.modified = True
+        if not os.path.isdir(host_src):
+            raise FileNotFoundError(f'Source directory {host_src} does not exist')
+
+        local_manifest = build_manifest(host_src, self._file_hash_cache)
+        remote_manifest = self._get_remote_manifest(sandbox_dest)
+        changed, removed = diff_manifests(local_manifest, remote_manifest)
+
+        transferred_bytes = 0
+        if changed:
+            transferred_bytes = self._upload_archive(
+                host_src, sandbox_dest, arcname_base=host_src, members=changed
+            )
+        deleted = 0
+        if delete and removed:
+            with self._send_action_server_request(
+                'POST',
+                f'{self._get_action_execution_server_host()}/delete_files',
+                json={'path': sandbox_dest, 'files': removed},
+                timeout=60,
+            ) as response:
+                deleted = response.json()['deleted']
+
+        stats = {
+            'files': len(local_manifest),
+            'transferred': len(changed),
+            'deleted': deleted,
+            'bytes': transferred_bytes,
+        }
+        self.log('debug', f'Synced host:{host_src} -> runtime:{sandbox_dest}: {stats}')
+        return stats
+
+    def sync_from(
+        self, sandbox_src: str, host_dest: str, delete: bool = False
+    ) -> dict[str, int]:
+        remote_manifest = self._get_remote_manifest(sandbox_src)
+        local_manifest = build_manifest(host_dest, self._file_hash_cache)
+        changed, removed = diff_manifests(remote_manifest, local_manifest)
+
+        transferred_bytes = 0
+        if changed:
+            archive_format = self.config.sandbox.copy_archive_format
+            os.makedirs(host_dest, exist_ok=True)
+            with tempfile.NamedTemporaryFile(suffix=f'.{archive_format}') as archive:
+                with self._send_action_server_request(
+                    'POST',
+                    f'{self._get_action_execution_server_host()}/download_archive',
+                    json={
+                        'path': sandbox_src,
+                        'format': archive_format,
+                        'files': changed,
+                    },
+                    stream=True,
+                    timeout=300,
+                ) as response:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        transferred_bytes += len(chunk)
+                        archive.write(chunk)
+                archive.flush()
+                extract_archive(archive.name, host_dest, archive_format)
+
+        deleted = 0
+        if delete:
+            for member in removed:
+                os.remove(resolve_member(host_dest, member))
+                deleted += 1
+
+        stats = {
+            'files': len(remote_manifest),
+            'transferred': len(changed),
+            'deleted': deleted,
+            'bytes': transferred_bytes,
+        }
+        self.log('debug', f'Synced runtime:{sandbox_src} -> host:{host_dest}: {stats}')
+        return stats
+
     def get_vscode_token(self) -> str:
         if self.vscode_enabled and self._runtime_initialized:
             if self._vscode_token is not None:  # cached value
@@ -218,7 +439,7 @@ class ActionExecutionClient(Runtime):
         if action.timeout is None:
             action.timeout = self.config.sandbox.timeout
 
-        with self.action_semaphore:
+        with self._action_semaphore(action):
             if not action.runnable:
                 return NullObservation('')
             if (
@@ -245,22 +466,97 @@ class ActionExecutionClient(Runtime):
 
             assert action.timeout is not None
 
-            try:
-                with self._send_action_server_request(
-                    'POST',
-                    f'{self._get_action_execution_server_host()}/execute_action',
-                    json={'action': event_to_dict(action)},
-                    # wait a few more seconds to get the timeout error from client side
-                    timeout=action.timeout + 5,
-                ) as response:
-                    output = response.json()
-                    obs = observation_from_dict(output)
-                    obs._cause = action.id  # type: ignore[attr-defined]
-            except requests.Timeout:
-                raise AgentRuntimeTimeoutError(
-                    f'Runtime failed to return execute_action before the requested timeout of {action.timeout}s'
-                )
-            return obs
+            if (
+                isinstance(action, IPythonRunCellAction)
+                and self.config.sandbox.stream_ipython_output
+                and action.id != -1
+            ):
+                return self._execute_action_streaming(action)
+
+            return self._execute_action(action)
+
+    def _action_semaphore(self, action: Action) -> threading.Semaphore:
+        if not isinstance(action, CmdRunAction) or not action.bash_session:
+            return self.action_semaphore
+        return self._bash_session_semaphores.setdefault(
+            action.bash_session, threading.Semaphore(1)
+        )
+
+    def _execute_action(self, action: Action) -> Observation:
+        assert action.timeout is not None
+        try:
+            with self._send_action_server_request(
+                'POST',
+                f'{self._get_action_execution_server_host()}/execute_action',
+                json={'action': event_to_dict(action)},
+                # wait a few more seconds to get the timeout error from client side
+                timeout=action.timeout + 5,
+            ) as response:
+                output = response.json()
+                obs = observation_from_dict(output)
+                obs._cause = action.id  # type: ignore[attr-defined]
+        except requests.Timeout:
+            raise AgentRuntimeTimeoutError(
+                f'Runtime failed to return execute_action before the requested timeout of {action.timeout}s'
+            )
+        return obs
+
+    def browse_parallel(self, actions: list[BrowseURLAction]) -> list[Observation]:
+        """Run several BrowseURLActions at once, returning their observations in order.
+
+        They run side by side in the sandbox's browser pool
+        (`sandbox.browser_pool_size`), without waiting for other actions.
+        Without a pool the server runs them one after the other.
+        """
+        for action in actions:
+            if action.timeout is None:
+                action.timeout = self.config.sandbox.timeout
+        workers = min(len(actions), max(self.config.sandbox.browser_pool_size, 1))
+        if workers <= 1:
+            return [self.send_action_for_execution(action) for action in actions]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(tracing.bind(self._execute_action), actions))
+
+    def _execute_action_streaming(self, action: IPythonRunCellAction) -> Observation:
+        """Run an IPython cell, adding its output to the event stream as it arrives.
+
+        Partial output is added as `IPythonRunCellObservation`s with
+        `partial=True`; the returned observation holds the complete output.
+        """
+        assert action.timeout is not None
+        source = action.source or EventSource.AGENT
+        try:
+            with self._send_action_server_request(
+                'POST',
+                f'{self._get_action_execution_server_host()}/execute_action_stream',
+                json={'action': event_to_dict(action)},
+                stream=True,
+                # wait a few more seconds to get the timeout error from client side
+                timeout=action.timeout + 5,
+            ) as response:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    message = json.loads(line)
+                    if 'partial' in message:
+                        partial = IPythonRunCellObservation(
+                            content=message['partial'], code=action.code, partial=True
+                        )
+                        partial._cause = action.id  # type: ignore[attr-defined]
+                        self.event_stream.add_event(partial, source)  # type: ignore[arg-type]
+                    elif 'observation' in message:
+                        obs = observation_from_dict(message['observation'])
+                        obs._cause = action.id  # type: ignore[attr-defined]
+                        return obs
+                    elif 'error' in message:
+                        raise AgentRuntimeError(message['error'])
+        except requests.Timeout:
+            raise AgentRuntimeTimeoutError(
+                f'Runtime failed to return execute_action_stream before the requested timeout of {action.timeout}s'
+            )
+        raise AgentRuntimeDisconnectedError(
+            'Runtime closed the output stream before returning an observation'
+        )
 
     def run(self, action: CmdRunAction) -> Observation:
         return self.send_action_for_execution(action)
@@ -281,4 +577,5 @@ class ActionExecutionClient(Runtime):
         return self.send_action_for_execution(action)
 
     def close(self) -> None:
+        super().close()
         self.session.close()
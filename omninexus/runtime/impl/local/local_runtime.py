@@ -0,0 +1,346 @@
+import atexit
+import getpass
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Callable
+
+import requests
+import tenacity
+
+import omninexus
+from omninexus.core.config import AppConfig
+from omninexus.core.exceptions import AgentRuntimeDisconnectedError
+from omninexus.core.logger import DEBUG
+from omninexus.core.logger import omninexus_logger as logger
+from omninexus.events import EventStream
+from omninexus.runtime.impl.action_execution.action_execution_client import (
+    ActionExecutionClient,
+)
+from omninexus.runtime.plugins import PluginRequirement
+from omninexus.runtime.utils import find_available_tcp_port
+from omninexus.runtime.utils.command import get_action_execution_server_startup_command
+from omninexus.utils.async_utils import call_sync_from_async
+from omninexus.utils.tenacity_stop import stop_if_should_exit
+
+EXECUTION_SERVER_PORT_RANGE = (30000, 39999)
+# Plugins that depend on the layout of the runtime image (/omninexus/...)
+IMAGE_ONLY_PLUGINS = ('jupyter', 'vscode')
+RUNTIME_IMAGE_PREFIX = '/omninexus/micromamba'
+USER_NAMESPACE_PREFIX = [
+    'unshare',
+    '--user',
+    '--map-current-user',
+    '--pid',
+    '--fork',
+    '--kill-child',
+]
+
+
+@dataclass
+class _LocalServer:
+    """An action execution server running as a subprocess of this process."""
+
+    process: subprocess.Popen
+    port: int
+    api_key: str
+    workspace_dir: str
+    owns_workspace: bool
+    log_path: str
+    key: tuple
+
+    def is_running(self) -> bool:
+        return self.process.poll() is None
+
+    def stop(self) -> None:
+        if self.is_running():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.owns_workspace:
+            shutil.rmtree(self.workspace_dir, ignore_errors=True)
+        try:
+            os.remove(self.log_path)
+        except OSError:
+            pass
+
+
+# Idle servers left behind by closed runtimes, keyed by their launch options
+_warm_servers: dict[tuple, list[_LocalServer]] = {}
+_warm_servers_lock = threading.Lock()
+_atexit_registered = False
+
+
+def stop_all_warm_servers():
+    with _warm_servers_lock:
+        servers = [server for pool in _warm_servers.values() for server in pool]
+        _warm_servers.clear()
+    for server in servers:
+        server.stop()
+
+
+def _clear_directory(path: str) -> None:
+    for entry in os.scandir(path):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+class LocalRuntime(ActionExecutionClient):
+    """This runtime runs the action execution server as a local subprocess, without Docker.
+
+    Actions are executed directly on the host as the current user, so it is
+    meant for CI machines and single-tenant hosts. When `workspace_base` is
+    not set, every server gets its own temporary workspace directory.
+
+    When the runtime is closed, its server is kept running (up to
+    `sandbox.local_runtime_max_warm_servers` of them) and handed to the next
+    runtime started with the same options, which then only has to wait for
+    `/alive`. Before a server is parked, its bash session and Jupyter kernel
+    are restarted, so environment variables, the working directory and the
+    history of the previous session do not carry over, and its temporary
+    workspace is emptied.
+
+    Args:
+        config (AppConfig): The application configuration.
+        event_stream (EventStream): The event stream to subscribe to.
+        sid (str, optional): The session ID. Defaults to 'default'.
+        plugins (list[PluginRequirement] | None, optional): List of plugin requirements. Defaults to None.
+        env_vars (dict[str, str] | None, optional): Environment variables to set. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        config: AppConfig,
+        event_stream: EventStream,
+        sid: str = 'default',
+        plugins: list[PluginRequirement] | None = None,
+        env_vars: dict[str, str] | None = None,
+        status_callback: Callable | None = None,
+        attach_to_existing: bool = False,
+        headless_mode: bool = True,
+    ):
+        global _atexit_registered
+        if not _atexit_registered:
+            _atexit_registered = True
+            atexit.register(stop_all_warm_servers)
+
+        self.config = config
+        self._runtime_initialized: bool = False
+        self.status_callback = status_callback
+        self.server: _LocalServer | None = None
+        self.api_url = ''
+
+        super().__init__(
+            config,
+            event_stream,
+            sid,
+            plugins,
+            env_vars,
+            status_callback,
+            attach_to_existing,
+            headless_mode,
+        )
+
+        if not os.path.isdir(RUNTIME_IMAGE_PREFIX):
+            unsupported = [p.name for p in self.plugins if p.name in IMAGE_ONLY_PLUGINS]
+            if unsupported:
+                self.log(
+                    'warning',
+                    f'Plugins {unsupported} require the runtime image and are disabled in the local runtime.',
+                )
+            self.plugins = [p for p in self.plugins if p.name not in IMAGE_ONLY_PLUGINS]
+            self._vscode_enabled = False
+
+    def _get_action_execution_server_host(self):
+        return self.api_url
+
+    def _server_command(self, port: int) -> list[str]:
+        command = get_action_execution_server_startup_command(
+            server_port=port,
+            plugins=self.plugins,
+            app_config=self.config,
+            python_prefix=[],
+            use_nice_for_root=False,
+            python_executable=sys.executable,
+            username=getpass.getuser(),
+            host='127.0.0.1',
+        )
+        if self.config.sandbox.local_runtime_use_user_namespace:
+            command = USER_NAMESPACE_PREFIX + command
+        return command
+
+    def _server_key(self) -> tuple:
+        # A warm server is reused only if it was started with the same options: the
+        # whole command line, except for its port and working directory, which for
+        # a temporary workspace differs from server to server
+        command = self._server_command(port=0)
+        command[command.index('--working-dir') + 1] = str(self.config.workspace_base)
+        return tuple(command)
+
+    async def connect(self):
+        self.send_status_message('STATUS$STARTING_RUNTIME')
+        key = self._server_key()
+        self.server = _take_warm_server(key)
+        if self.server is not None:
+            self.log('info', f'Reusing warm local runtime on port {self.server.port}')
+        else:
+            self.server = await call_sync_from_async(self._start_server, key)
+        self.api_url = f'{self.config.sandbox.local_runtime_url}:{self.server.port}'
+        self.session.headers.update({'X-Session-API-Key': self.server.api_key})
+        self.config.workspace_mount_path_in_sandbox = self.server.workspace_dir
+
+        self.log('info', f'Waiting for client to become ready at {self.api_url}...')
+        self.send_status_message('STATUS$WAITING_FOR_CLIENT')
+        await call_sync_from_async(self._wait_until_alive)
+        self.log('info', 'Runtime is ready.')
+
+        await call_sync_from_async(self.setup_initial_env)
+        self.log(
+            'debug',
+            f'Local runtime initialized with plugins: {[plugin.name for plugin in self.plugins]}',
+        )
+        self.send_status_message(' ')
+        self._runtime_initialized = True
+
+    def _start_server(self, key: tuple) -> _LocalServer:
+        self.send_status_message('STATUS$PREPARING_CONTAINER')
+        workspace_base = self.config.workspace_base
+        owns_workspace = workspace_base is None
+        if workspace_base is None:
+            workspace_dir = tempfile.mkdtemp(prefix='omninexus-workspace-')
+        else:
+            workspace_dir = os.path.abspath(workspace_base)
+            os.makedirs(workspace_dir, exist_ok=True)
+        self.config.workspace_mount_path_in_sandbox = workspace_dir
+
+        port = find_available_tcp_port(*EXECUTION_SERVER_PORT_RANGE)
+        api_key = uuid.uuid4().hex
+        if self.config.sandbox.local_runtime_use_user_namespace:
+            if shutil.which('unshare') is None:
+                raise RuntimeError(
+                    'local_runtime_use_user_namespace requires `unshare` (util-linux) to be installed'
+                )
+        command = self._server_command(port)
+
+        # Make the omninexus package importable regardless of the current directory
+        project_root = os.path.dirname(os.path.dirname(omninexus.__file__))
+        environment = dict(os.environ)
+        environment['PYTHONPATH'] = os.pathsep.join(
+            p for p in [project_root, environment.get('PYTHONPATH')] if p
+        )
+        environment['PYTHONUNBUFFERED'] = '1'
+        environment['SESSION_API_KEY'] = api_key
+        if self.config.debug or DEBUG:
+            environment['DEBUG'] = 'true'
+
+        log_fd, log_path = tempfile.mkstemp(
+            prefix='omninexus-local-runtime-', suffix='.log'
+        )
+        self.log('debug', f'Starting local action execution server: {command}')
+        with os.fdopen(log_fd, 'wb') as log_file:
+            process = subprocess.Popen(
+                command,
+                cwd=workspace_dir,
+                env=environment,
+                stdin=subprocess.DEVNULL,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        self.log('debug', f'Local runtime started (pid {process.pid}, log {log_path})')
+        return _LocalServer(
+            process=process,
+            port=port,
+            api_key=api_key,
+            workspace_dir=workspace_dir,
+            owns_workspace=owns_workspace,
+            log_path=log_path,
+            key=key,
+        )
+
+    def _read_server_log(self, max_chars: int = 4000) -> str:
+        if self.server is None:
+            return ''
+        try:
+            with open(self.server.log_path, 'r', errors='replace') as f:
+                return f.read()[-max_chars:]
+        except OSError:
+            return ''
+
+    @tenacity.retry(
+        stop=tenacity.stop_after_delay(120) | stop_if_should_exit(),
+        retry=tenacity.retry_if_exception_type(
+            (ConnectionError, requests.exceptions.ConnectionError)
+        ),
+        reraise=True,
+        # The server is on the same host, so poll often
+        wait=tenacity.wait_fixed(0.05),
+    )
+    def _wait_until_alive(self):
+        if self.server is None or not self.server.is_running():
+            raise AgentRuntimeDisconnectedError(
+                f'Local runtime server has exited. Output:\n{self._read_server_log()}'
+            )
+        self.check_if_alive()
+
+    def _reset_server(self) -> bool:
+        try:
+            with self._send_action_server_request(
+                'POST', f'{self.api_url}/reset', timeout=60
+            ):
+                return True
+        except Exception as e:
+            self.log('warning', f'Failed to reset local runtime for reuse: {e}')
+            return False
+
+    def close(self):
+        """Closes the LocalRuntime, keeping its server warm for reuse if possible."""
+        server, self.server = self.server, None
+        keep_warm = (
+            server is not None
+            and self.config.sandbox.keep_runtime_alive
+            and self._runtime_initialized
+            and server.is_running()
+            and self._reset_server()
+        )
+        super().close()
+        if server is None:
+            return
+        if keep_warm and _release_warm_server(server, self.config.sandbox):
+            return
+        server.stop()
+
+
+def _take_warm_server(key: tuple) -> _LocalServer | None:
+    with _warm_servers_lock:
+        pool = _warm_servers.get(key, [])
+        while pool:
+            server = pool.pop()
+            if server.is_running():
+                return server
+            server.stop()
+    return None
+
+
+def _release_warm_server(server: _LocalServer, sandbox_config) -> bool:
+    with _warm_servers_lock:
+        num_warm = sum(len(pool) for pool in _warm_servers.values())
+        if num_warm >= sandbox_config.local_runtime_max_warm_servers:
+            return False
+        if server.owns_workspace:
+            _clear_directory(server.workspace_dir)
+        _warm_servers.setdefault(server.key, []).append(server)
+    logger.debug(f'Kept local runtime on port {server.port} warm for reuse')
+    return True
@@ -58,6 +58,9 @@ class RemoteRuntime(ActionExecutionClient):
                 'Please set the API key in the config (config.toml) or as an environment variable (SANDBOX_API_KEY).'
             )
         self.session.headers.update({'X-API-Key': self.config.sandbox.api_key})
+        # The remote session keeps this id even if the runtime is later
+        # attached to another session (see Runtime.attach_event_stream)
+        self.remote_session_id = sid
 
         if self.config.workspace_base is not None:
             self.log(
@@ -128,7 +131,7 @@ class RemoteRuntime(ActionExecutionClient):
         try:
             with self._send_runtime_api_request(
                 'GET',
-                f'{self.config.sandbox.remote_runtime_api_url}/sessions/{self.sid}',
+                f'{self.config.sandbox.remote_runtime_api_url}/sessions/{self.remote_session_id}',
             ) as response:
                 data = response.json()
                 status = data.get('status')
@@ -208,7 +211,7 @@ class RemoteRuntime(ActionExecutionClient):
             'environment': {'DEBUG': 'true'}
             if self.config.debug or os.environ.get('DEBUG', 'false').lower() == 'true'
             else {},
-            'session_id': self.sid,
+            'session_id': self.remote_session_id,
             'resource_factor': self.config.sandbox.remote_runtime_resource_factor,
         }
 
@@ -286,7 +289,7 @@ class RemoteRuntime(ActionExecutionClient):
         self.log('debug', f'Waiting for runtime to be alive at url: {self.runtime_url}')
         with self._send_runtime_api_request(
             'GET',
-            f'{self.config.sandbox.remote_runtime_api_url}/sessions/{self.sid}',
+            f'{self.config.sandbox.remote_runtime_api_url}/sessions/{self.remote_session_id}',
         ) as runtime_info_response:
             runtime_data = runtime_info_response.json()
         assert 'runtime_id' in runtime_data
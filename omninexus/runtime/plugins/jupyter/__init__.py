@@ -1,11 +1,19 @@
 import subprocess
 import time
 from dataclasses import dataclass
+from typing import Callable
 
 from omninexus.core.logger import omninexus_logger as logger
 from omninexus.events.action import Action, IPythonRunCellAction
 from omninexus.events.observation import IPythonRunCellObservation
-from omninexus.runtime.plugins.jupyter.execute_server import JupyterKernel
+from omninexus.runtime.plugins.jupyter.execute_server import (
+    IMAGE_INLINE_MAX_CHARS,
+    JupyterKernel,
+)
+from omninexus.runtime.plugins.jupyter.kernel_manager import (
+    JUPYTER_CLIENT_AVAILABLE,
+    DirectJupyterKernel,
+)
 from omninexus.runtime.plugins.requirement import Plugin, PluginRequirement
 from omninexus.runtime.utils import find_available_tcp_port
 from omninexus.utils.shutdown_listener import should_continue
@@ -16,10 +24,62 @@ class JupyterRequirement(PluginRequirement):
     name: str = 'jupyter'
 
 
+JUPYTER_KERNEL_MODES = ('direct', 'gateway')
+
+
 class JupyterPlugin(Plugin):
+    """Runs IPython cells in a Jupyter kernel.
+
+    Args:
+        kernel_mode: 'direct' talks to a kernel started by a kernel manager in
+            this process over ZMQ. 'gateway' starts a Jupyter kernel gateway
+            and talks to it over HTTP and a WebSocket. Direct mode falls back
+            to the gateway if the kernel cannot be started.
+    """
+
     name: str = 'jupyter'
+    kernel: JupyterKernel | DirectJupyterKernel
+
+    def __init__(self, kernel_mode: str = 'gateway'):
+        if kernel_mode not in JUPYTER_KERNEL_MODES:
+            raise ValueError(
+                f'Unsupported Jupyter kernel mode: {kernel_mode}. Supported modes: {JUPYTER_KERNEL_MODES}'
+            )
+        self.kernel_mode = kernel_mode
 
     async def initialize(self, username: str, kernel_id: str = 'omninexus-default'):
+        start = time.time()
+        if self.kernel_mode == 'direct' and JUPYTER_CLIENT_AVAILABLE:
+            try:
+                await self._initialize_direct(username)
+            except Exception as e:
+                logger.warning(
+                    f'Failed to start Jupyter kernel directly, falling back to the kernel gateway: {e}'
+                )
+                self.kernel_mode = 'gateway'
+        else:
+            self.kernel_mode = 'gateway'
+        if self.kernel_mode == 'gateway':
+            await self._initialize_gateway(username, kernel_id)
+        self.startup_seconds = time.time() - start
+        logger.debug(
+            f'Jupyter plugin ({self.kernel_mode} mode) started in {self.startup_seconds:.2f}s'
+        )
+
+    async def _initialize_direct(self, username: str):
+        kernel = DirectJupyterKernel(username)
+        try:
+            await kernel.initialize()
+        except Exception:
+            await kernel.shutdown_async()
+            raise
+        self.kernel = kernel
+        _obs = await self.run(
+            IPythonRunCellAction(code='import sys; print(sys.executable)')
+        )
+        self.python_interpreter_path = _obs.content.strip()
+
+    async def _initialize_gateway(self, username: str, kernel_id: str):
         self.kernel_gateway_port = find_available_tcp_port(40000, 49999)
         self.kernel_id = kernel_id
         self.gateway_process = subprocess.Popen(
@@ -56,7 +116,9 @@ class JupyterPlugin(Plugin):
         )
         self.python_interpreter_path = _obs.content.strip()
 
-    async def _run(self, action: Action) -> IPythonRunCellObservation:
+    async def _run(
+        self, action: Action, on_output: Callable[[str], None] | None = None
+    ) -> IPythonRunCellObservation:
         """Internal method to run a code cell in the jupyter kernel."""
         if not isinstance(action, IPythonRunCellAction):
             raise ValueError(
@@ -70,12 +132,30 @@ class JupyterPlugin(Plugin):
 
         if not self.kernel.initialized:
             await self.kernel.initialize()
-        output = await self.kernel.execute(action.code, timeout=action.timeout)
+        output = await self.kernel.execute(
+            action.code,
+            timeout=action.timeout,
+            on_output=on_output,
+            # Streamed output is sent piece by piece, so keep large images out
+            # of it; the final observation still has them
+            max_inline_image_chars=(
+                IMAGE_INLINE_MAX_CHARS if on_output is not None else None
+            ),
+        )
         return IPythonRunCellObservation(
             content=output,
             code=action.code,
         )
 
-    async def run(self, action: Action) -> IPythonRunCellObservation:
-        obs = await self._run(action)
+    async def run(
+        self, action: Action, on_output: Callable[[str], None] | None = None
+    ) -> IPythonRunCellObservation:
+        """Run a code cell, calling `on_output` with each piece of output as it arrives."""
+        obs = await self._run(action, on_output)
         return obs
+
+    async def shutdown(self):
+        if hasattr(self, 'kernel'):
+            await self.kernel.shutdown_async()
+        if hasattr(self, 'gateway_process'):
+            self.gateway_process.terminate()
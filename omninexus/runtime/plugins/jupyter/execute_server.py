@@ -4,6 +4,7 @@ import asyncio
 import logging
 import os
 import re
+from typing import Callable
 from uuid import uuid4
 
 import tornado
@@ -49,6 +50,55 @@ def strip_ansi(o: str) -> str:
     return stripped
 
 
+# Base64 images longer than this are left out of streamed output
+IMAGE_INLINE_MAX_CHARS = 256 * 1024
+STREAMED_IMAGE_PLACEHOLDER = '\n[image shown when the cell finishes]\n'
+
+
+def append_output(
+    msg_type: str,
+    content: dict,
+    outputs: list[str],
+    max_inline_image_chars: int | None = None,
+) -> str | None:
+    """Append the output carried by a kernel message, if any, to `outputs`.
+
+    Args:
+        msg_type: The type of the kernel message.
+        content: The content of the kernel message.
+        outputs: The outputs collected so far.
+        max_inline_image_chars: Images whose base64 encoding is longer than
+            this are replaced by a placeholder in the returned text. They are
+            always inlined in `outputs`. None returns every image.
+
+    Returns:
+        The text that was appended, for streaming, or None if the message
+        carried no output.
+    """
+    if msg_type == 'error':
+        text = '\n'.join(content['traceback'])
+    elif msg_type == 'stream':
+        text = content['text']
+    elif msg_type in ['execute_result', 'display_data']:
+        text = content['data']['text/plain']
+        if 'image/png' in content['data']:
+            image = content['data']['image/png']
+            # use markdone to display image (in case of large image)
+            image_text = f'\n![image](data:image/png;base64,{image})\n'
+            outputs.extend([text, image_text])
+            if (
+                max_inline_image_chars is not None
+                and len(image) > max_inline_image_chars
+            ):
+                # The final observation carries the image; streamed pieces stay small
+                image_text = STREAMED_IMAGE_PLACEHOLDER
+            return text + image_text
+    else:
+        return None
+    outputs.append(text)
+    return text
+
+
 class JupyterKernel:
     def __init__(self, url_suffix, convid, lang='python'):
         self.base_url = f'http://{url_suffix}'
@@ -138,7 +188,18 @@ class JupyterKernel:
         stop=stop_after_attempt(3),
         wait=wait_fixed(2),
     )
-    async def execute(self, code, timeout=120):
+    async def execute(
+        self,
+        code,
+        timeout=120,
+        on_output: Callable[[str], None] | None = None,
+        max_inline_image_chars: int | None = None,
+    ):
+        """Run `code` and return its output.
+
+        `on_output` is called with every piece of output as soon as the kernel
+        produces it, `max_inline_image_chars` is passed on to `append_output`.
+        """
         if not self.ws:
             await self._connect()
 
@@ -170,7 +231,7 @@ class JupyterKernel:
         )
         logging.info(f'Executed code in jupyter kernel:\n{res}')
 
-        outputs = []
+        outputs: list[str] = []
 
         async def wait_for_messages():
             execution_done = False
@@ -189,21 +250,15 @@ class JupyterKernel:
                         f"MSG TYPE: {msg_type.upper()} DONE:{execution_done}\nCONTENT: {msg['content']}"
                     )
 
-                if msg_type == 'error':
-                    traceback = '\n'.join(msg['content']['traceback'])
-                    outputs.append(traceback)
+                if msg_type == 'execute_reply':
                     execution_done = True
-                elif msg_type == 'stream':
-                    outputs.append(msg['content']['text'])
-                elif msg_type in ['execute_result', 'display_data']:
-                    outputs.append(msg['content']['data']['text/plain'])
-                    if 'image/png' in msg['content']['data']:
-                        # use markdone to display image (in case of large image)
-                        outputs.append(
-                            f"\n![image](data:image/png;base64,{msg['content']['data']['image/png']})\n"
-                        )
-
-                elif msg_type == 'execute_reply':
+                    continue
+                text = append_output(
+                    msg_type, msg['content'], outputs, max_inline_image_chars
+                )
+                if text is not None and on_output is not None:
+                    on_output(strip_ansi(text))
+                if msg_type == 'error':
                     execution_done = True
             return execution_done
 
@@ -0,0 +1,192 @@
+"""Direct ZMQ connection to an IPython kernel started by the action execution server.
+
+Instead of starting ``jupyter kernelgateway`` and talking to it over HTTP and
+a WebSocket, the kernel is launched with a jupyter_client kernel manager and
+messages go straight to its ZMQ channels.
+"""
+
+import os
+import queue
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable
+from uuid import uuid4
+
+import omninexus
+from omninexus.core.logger import omninexus_logger as logger
+from omninexus.runtime.plugins.jupyter.execute_server import append_output, strip_ansi
+
+try:
+    from jupyter_client.asynchronous import AsyncKernelClient
+    from jupyter_client.manager import AsyncKernelManager
+
+    JUPYTER_CLIENT_AVAILABLE = True
+except ImportError:
+    JUPYTER_CLIENT_AVAILABLE = False
+
+KERNEL_READY_TIMEOUT = 60
+# Environment variables the kernel inherits from the action execution server.
+# Anything else, e.g. the session API key, stays out of reach of the user's
+# code, like with the kernel gateway that is started through `su -`.
+KERNEL_ENV_VARS = (
+    'PATH',
+    'HOME',
+    'USER',
+    'LANG',
+    'LC_ALL',
+    'TZ',
+    'TMPDIR',
+    'VIRTUAL_ENV',
+    'MAMBA_ROOT_PREFIX',
+    'POETRY_VIRTUALENVS_PATH',
+)
+# Number of per-cell overhead samples kept for the averages
+MAX_OVERHEAD_SAMPLES = 100
+
+
+if JUPYTER_CLIENT_AVAILABLE:
+
+    class _UserKernelManager(AsyncKernelManager):
+        """Kernel manager that launches the kernel as another user."""
+
+        run_as: str | None = None
+
+        def format_kernel_cmd(self, extra_arguments=None):
+            cmd = super().format_kernel_cmd(extra_arguments)
+            if self.run_as is None:
+                return cmd
+            # The connection file is written by now; the kernel user must read it
+            shutil.chown(self.connection_file, user=self.run_as)
+            return ['sudo', '-E', '-H', '-u', self.run_as, '--', *cmd]
+
+
+class DirectJupyterKernel:
+    """IPython kernel driven over ZMQ, with the same interface as `JupyterKernel`."""
+
+    def __init__(self, username: str, kernel_name: str = 'python3'):
+        if not JUPYTER_CLIENT_AVAILABLE:
+            raise ImportError(
+                'The direct kernel mode requires jupyter_client. Please install it using pip install jupyter_client'
+            )
+        self.username = username
+        self.kernel_name = kernel_name
+        self.km: 'AsyncKernelManager | None' = None
+        self.kc: 'AsyncKernelClient | None' = None
+        self.initialized = False
+        self.startup_seconds: float | None = None
+        self._overheads: list[float] = []
+        self._connection_dir: str | None = None
+
+    async def initialize(self):
+        start = time.time()
+        km = _UserKernelManager(kernel_name=self.kernel_name)
+        if os.getuid() == 0 and self.username != 'root':
+            km.run_as = self.username
+        # The default runtime directory may not be readable by the kernel user
+        self._connection_dir = tempfile.mkdtemp(prefix='omninexus-kernel-')
+        os.chmod(self._connection_dir, 0o755)
+        km.connection_file = os.path.join(
+            self._connection_dir, f'kernel-{uuid4().hex}.json'
+        )
+
+        env = {key: os.environ[key] for key in KERNEL_ENV_VARS if key in os.environ}
+        # Same import path as the kernel gateway, so AgentSkills can be imported
+        project_root = os.path.dirname(os.path.dirname(omninexus.__file__))
+        env['PYTHONPATH'] = os.pathsep.join(
+            p for p in [project_root, os.environ.get('PYTHONPATH')] if p
+        )
+        await km.start_kernel(env=env)
+        self.km = km
+        kc = km.client()
+        kc.start_channels()
+        self.kc = kc
+        await kc.wait_for_ready(timeout=KERNEL_READY_TIMEOUT)
+        self.startup_seconds = time.time() - start
+        logger.debug(f'Jupyter kernel started in {self.startup_seconds:.2f}s')
+
+        await self.execute(r'%colors nocolor')
+        self.initialized = True
+
+    @property
+    def cell_overhead_avg(self) -> float | None:
+        """Average time per cell spent outside of the kernel's own execution."""
+        if not self._overheads:
+            return None
+        return sum(self._overheads) / len(self._overheads)
+
+    def _record_overhead(self, wall_seconds: float, busy_at, reply_at) -> None:
+        if not isinstance(busy_at, datetime) or not isinstance(reply_at, datetime):
+            return
+        kernel_seconds = (reply_at - busy_at).total_seconds()
+        self._overheads.append(max(wall_seconds - kernel_seconds, 0.0))
+        if len(self._overheads) > MAX_OVERHEAD_SAMPLES:
+            self._overheads.pop(0)
+
+    async def execute(
+        self,
+        code: str,
+        timeout: int | None = 120,
+        on_output: Callable[[str], None] | None = None,
+        max_inline_image_chars: int | None = None,
+    ) -> str:
+        assert self.kc is not None and self.km is not None
+        start = time.time()
+        msg_id = self.kc.execute(
+            code, silent=False, store_history=False, allow_stdin=False
+        )
+        outputs: list[str] = []
+        busy_at = None
+        # Like the kernel gateway, no timeout waits for as long as the cell runs
+        deadline = start + timeout if timeout is not None else None
+        while True:
+            remaining = deadline - time.time() if deadline is not None else None
+            try:
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                msg = await self.kc.get_iopub_msg(timeout=remaining)
+            except queue.Empty:
+                await self.km.interrupt_kernel()
+                return f'[Execution timed out ({timeout} seconds).]'
+            if msg['parent_header'].get('msg_id') != msg_id:
+                continue
+            msg_type = msg['msg_type']
+            content = msg['content']
+            if msg_type == 'status':
+                if content['execution_state'] == 'busy':
+                    busy_at = msg['header'].get('date')
+                elif content['execution_state'] == 'idle':
+                    break
+            else:
+                text = append_output(msg_type, content, outputs, max_inline_image_chars)
+                if text is not None and on_output is not None:
+                    on_output(strip_ansi(text))
+
+        reply_at = None
+        try:
+            while True:
+                reply = await self.kc.get_shell_msg(timeout=5)
+                if reply['parent_header'].get('msg_id') == msg_id:
+                    reply_at = reply['header'].get('date')
+                    break
+        except queue.Empty:
+            pass
+        self._record_overhead(time.time() - start, busy_at, reply_at)
+
+        if not outputs:
+            ret = '[Code executed successfully with no output]'
+        else:
+            ret = ''.join(outputs)
+        return strip_ansi(ret)
+
+    async def shutdown_async(self):
+        if self.kc is not None:
+            self.kc.stop_channels()
+            self.kc = None
+        if self.km is not None:
+            await self.km.shutdown_kernel(now=True)
+            self.km = None
+        if self._connection_dir is not None:
+            shutil.rmtree(self._connection_dir, ignore_errors=True)
+            self._connection_dir = None
@@ -0,0 +1,288 @@
+"""A pool of pre-started runtimes handed out to new sessions.
+
+Starting a runtime means starting its sandbox, waiting for the action
+execution server, initializing plugins and setting up the environment. The
+pool does this ahead of time for every (runtime, image, plugins)
+combination that sessions have asked for, so a new session only has to take
+over a runtime that is already connected.
+"""
+
+import asyncio
+import copy
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, fields
+from typing import Callable
+from uuid import uuid4
+
+from omninexus.core.config import AppConfig
+from omninexus.core.logger import omninexus_logger as logger
+from omninexus.events.stream import EventStream
+from omninexus.runtime import get_runtime_cls
+from omninexus.runtime.base import Runtime
+from omninexus.runtime.impl.action_execution.action_execution_client import (
+    ActionExecutionClient,
+)
+from omninexus.runtime.plugins import PluginRequirement
+from omninexus.storage.memory import InMemoryFileStore
+from omninexus.utils.async_utils import call_sync_from_async
+
+# Number of time-to-ready samples kept for the metrics
+MAX_TIMING_SAMPLES = 200
+# Sandbox options that do not change the runtimes themselves
+POOL_INDEPENDENT_SANDBOX_OPTIONS = ('runtime_pool_size',)
+
+
+@dataclass
+class _PoolEntry:
+    runtime_name: str
+    config: AppConfig
+    plugins: list[PluginRequirement]
+    ready: deque = field(default_factory=deque)
+    starting: int = 0
+
+
+def _pool_key(
+    runtime_name: str, config: AppConfig, plugins: list[PluginRequirement]
+) -> tuple:
+    # Every sandbox option, including the ones set per session from the user
+    # settings (e.g. remote_runtime_resource_factor), must match
+    sandbox = tuple(
+        (f.name, repr(getattr(config.sandbox, f.name)))
+        for f in fields(config.sandbox)
+        if f.name not in POOL_INDEPENDENT_SANDBOX_OPTIONS
+    )
+    return (
+        runtime_name,
+        sandbox,
+        config.workspace_base,
+        config.workspace_mount_path_in_sandbox,
+        tuple(sorted(plugin.name for plugin in plugins)),
+    )
+
+
+def _pool_config(config: AppConfig) -> AppConfig:
+    """A copy of `config` for runtimes that belong to no session, without its LLM credentials."""
+    config = copy.deepcopy(config)
+    config.llms = {}
+    return config
+
+
+class RuntimePool:
+    """Keeps `size` connected runtimes ready per runtime configuration.
+
+    Args:
+        size: Number of idle runtimes kept for each configuration.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries: dict[tuple, _PoolEntry] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._recycled = 0
+        self._discarded = 0
+        self._warm_ready_times: deque[float] = deque(maxlen=MAX_TIMING_SAMPLES)
+        self._cold_ready_times: deque[float] = deque(maxlen=MAX_TIMING_SAMPLES)
+        self._tasks: set[asyncio.Task] = set()
+        self._closed = False
+
+    def prewarm(
+        self, runtime_name: str, config: AppConfig, plugins: list[PluginRequirement]
+    ) -> None:
+        """Start filling the pool for a configuration before any session asks for it."""
+        key = _pool_key(runtime_name, config, plugins)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = _PoolEntry(
+                    runtime_name, _pool_config(config), list(plugins)
+                )
+        self._schedule_fill(key)
+
+    async def acquire(
+        self,
+        runtime_name: str,
+        config: AppConfig,
+        plugins: list[PluginRequirement],
+        event_stream: EventStream,
+        status_callback: Callable | None = None,
+    ) -> Runtime | None:
+        """Take a ready runtime matching the configuration, if there is one.
+
+        The pool is refilled in the background either way, so that the next
+        session with the same configuration finds a runtime waiting.
+
+        Returns:
+            A connected runtime attached to `event_stream`, or None if the
+            caller has to start a runtime itself.
+        """
+        key = _pool_key(runtime_name, config, plugins)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _PoolEntry(runtime_name, _pool_config(config), list(plugins))
+                self._entries[key] = entry
+            runtime = entry.ready.popleft() if entry.ready else None
+            if runtime is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        self._schedule_fill(key)
+        if runtime is None:
+            return None
+        runtime.attach_config(config)
+        runtime.attach_event_stream(event_stream, status_callback)
+        logger.debug(f'Assigned pooled runtime {runtime.sid}')
+        return runtime
+
+    def release(
+        self,
+        runtime: Runtime,
+        runtime_name: str,
+        config: AppConfig,
+        plugins: list[PluginRequirement],
+        dirty: bool = False,
+    ) -> None:
+        """Hand a runtime back when its session closes.
+
+        `runtime_name`, `config` and `plugins` are the ones the session
+        acquired or created the runtime with. Runtimes that ran actions,
+        received files or were otherwise changed for their session (`dirty`)
+        are closed, as are runtimes that are no longer alive. Others go back
+        into the pool if there is room.
+        """
+        key = _pool_key(runtime_name, config, plugins)
+        with self._lock:
+            entry = self._entries.get(key)
+            recycle = (
+                not self._closed
+                and not dirty
+                and not runtime.modified
+                and entry is not None
+                and len(entry.ready) + entry.starting < self.size
+            )
+        if recycle and self._is_alive(runtime):
+            runtime.attach_config(_pool_config(config))
+            runtime.attach_event_stream(self._placeholder_stream(_new_pool_sid()))
+            with self._lock:
+                entry.ready.append(runtime)  # type: ignore[union-attr]
+                self._recycled += 1
+            logger.debug(f'Recycled runtime {runtime.sid} into the pool')
+            return
+        with self._lock:
+            self._discarded += 1
+        runtime.close()
+
+    def record_ready_time(self, seconds: float, hit: bool) -> None:
+        """Record how long a session waited for its runtime."""
+        with self._lock:
+            if hit:
+                self._warm_ready_times.append(seconds)
+            else:
+                self._cold_ready_times.append(seconds)
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            requests = self._hits + self._misses
+            return {
+                'size': self.size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / requests if requests else 0.0,
+                'recycled': self._recycled,
+                'discarded': self._discarded,
+                'ready': sum(len(entry.ready) for entry in self._entries.values()),
+                'starting': sum(entry.starting for entry in self._entries.values()),
+                'time_to_ready_warm': _summarize(self._warm_ready_times),
+                'time_to_ready_cold': _summarize(self._cold_ready_times),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            runtimes = [
+                runtime for entry in self._entries.values() for runtime in entry.ready
+            ]
+            for entry in self._entries.values():
+                entry.ready.clear()
+        for task in list(self._tasks):
+            task.cancel()
+        for runtime in runtimes:
+            runtime.close()
+
+    # ================================
+    # Filling
+    # ================================
+
+    @staticmethod
+    def _placeholder_stream(sid: str) -> EventStream:
+        # Idle runtimes need a stream to subscribe to; nothing is ever added to it
+        return EventStream(sid, InMemoryFileStore({}))
+
+    @staticmethod
+    def _is_alive(runtime: Runtime) -> bool:
+        if not isinstance(runtime, ActionExecutionClient):
+            return False
+        try:
+            runtime.check_if_alive()
+            return True
+        except Exception:
+            return False
+
+    def _schedule_fill(self, key: tuple) -> None:
+        with self._lock:
+            entry = self._entries[key]
+            missing = self.size - len(entry.ready) - entry.starting
+            if self._closed or missing <= 0:
+                return
+            entry.starting += missing
+        for _ in range(missing):
+            task = asyncio.create_task(self._start_runtime(key, entry))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _start_runtime(self, key: tuple, entry: _PoolEntry) -> None:
+        sid = _new_pool_sid()
+        runtime: Runtime | None = None
+        try:
+            runtime_cls: type[Runtime] = get_runtime_cls(entry.runtime_name)
+            runtime = runtime_cls(
+                config=_pool_config(entry.config),
+                event_stream=self._placeholder_stream(sid),
+                sid=sid,
+                plugins=entry.plugins,
+                headless_mode=False,
+            )
+            start = time.time()
+            await runtime.connect()
+            logger.debug(f'Pooled runtime {sid} ready in {time.time() - start:.1f}s')
+        except Exception as e:
+            logger.warning(f'Failed to start pooled runtime {sid}: {e}')
+            if runtime is not None:
+                await call_sync_from_async(runtime.close)
+            runtime = None
+        finally:
+            with self._lock:
+                entry.starting -= 1
+                if runtime is not None and not self._closed:
+                    entry.ready.append(runtime)
+                    runtime = None
+        if runtime is not None:
+            await call_sync_from_async(runtime.close)
+
+
+def _new_pool_sid() -> str:
+    # Idle runtimes take over the session id once assigned to a session
+    return f'pool-{uuid4().hex[:12]}'
+
+
+def _summarize(samples: deque) -> dict:
+    if not samples:
+        return {'count': 0, 'avg': None, 'max': None}
+    return {
+        'count': len(samples),
+        'avg': sum(samples) / len(samples),
+        'max': max(samples),
+    }
@@ -0,0 +1,220 @@
+"""Streaming archive generation and extraction for runtime file transfers.
+
+Archives are produced chunk by chunk through a bounded queue, so building a
+zip or tar of a large directory tree uses constant memory regardless of its
+size. Supported formats are ``zip``, ``tar`` and ``tar.zst`` (the latter
+requires the optional ``zstandard`` package).
+"""
+
+import hashlib
+import os
+import queue
+import tarfile
+import threading
+from typing import BinaryIO, Iterable, Iterator
+from zipfile import ZipFile
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+ARCHIVE_FORMATS = ('zip', 'tar', 'tar.zst')
+CHUNK_SIZE = 64 * 1024
+# Maximum number of chunks buffered between the producer thread and consumer
+MAX_PENDING_CHUNKS = 16
+
+ARCHIVE_MEDIA_TYPES = {
+    'zip': 'application/zip',
+    'tar': 'application/x-tar',
+    'tar.zst': 'application/zstd',
+}
+
+
+def check_archive_format(fmt: str) -> None:
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(
+            f'Unsupported archive format: {fmt}. Supported formats: {ARCHIVE_FORMATS}'
+        )
+    if fmt == 'tar.zst' and not ZSTD_AVAILABLE:
+        raise ValueError(
+            'tar.zst archives require the zstandard package. Please install it using pip install zstandard'
+        )
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _QueueWriter:
+    """Write-only file object that hands written data over to a consumer."""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event):
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._pending: list[bytes] = []
+        self._pending_size = 0
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._pending.append(data)
+        self._pending_size += len(data)
+        self._position += len(data)
+        if self._pending_size >= CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        chunk = b''.join(self._pending)
+        self._pending.clear()
+        self._pending_size = 0
+        while True:
+            if self._cancelled.is_set():
+                raise _Cancelled()
+            try:
+                self._chunks.put(chunk, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+def _iter_files(root: str, arcname_base: str) -> Iterator[tuple[str, str]]:
+    if os.path.isfile(root):
+        yield root, os.path.relpath(root, arcname_base)
+        return
+    for dirpath, _, files in os.walk(root):
+        for file in files:
+            file_path = os.path.join(dirpath, file)
+            yield file_path, os.path.relpath(file_path, arcname_base)
+
+
+def _iter_members(
+    root: str, arcname_base: str, members: Iterable[str]
+) -> Iterator[tuple[str, str]]:
+    for member in members:
+        file_path = os.path.join(root, member)
+        yield file_path, os.path.relpath(file_path, arcname_base)
+
+
+def _write_archive(
+    files: Iterable[tuple[str, str]], fmt: str, fileobj: _QueueWriter
+) -> None:
+    if fmt == 'zip':
+        with ZipFile(fileobj, 'w') as zipf:  # type: ignore[call-overload]
+            for file_path, arcname in files:
+                zipf.write(file_path, arcname)
+    else:
+        target: BinaryIO = fileobj  # type: ignore[assignment]
+        compressor = None
+        if fmt == 'tar.zst':
+            compressor = zstandard.ZstdCompressor().stream_writer(target, closefd=False)
+            target = compressor  # type: ignore[assignment]
+        with tarfile.open(fileobj=target, mode='w|') as tar:
+            for file_path, arcname in files:
+                tar.add(file_path, arcname=arcname, recursive=False)
+        if compressor is not None:
+            compressor.close()
+    fileobj.flush()
+
+
+def iter_archive(
+    root: str,
+    fmt: str = 'zip',
+    arcname_base: str | None = None,
+    members: Iterable[str] | None = None,
+) -> Iterator[bytes]:
+    """Yield an archive of `root` chunk by chunk.
+
+    Args:
+        root: The file or directory to archive.
+        fmt: One of ``ARCHIVE_FORMATS``.
+        arcname_base: Directory the archive member names are relative to.
+            Defaults to `root` itself, i.e. the archive holds its contents.
+        members: Only archive these files, given relative to `root`.
+    """
+    check_archive_format(fmt)
+    if arcname_base is None:
+        arcname_base = root if os.path.isdir(root) else os.path.dirname(root)
+    if members is None:
+        files = _iter_files(root, arcname_base)
+    else:
+        files = _iter_members(root, arcname_base, members)
+
+    chunks: queue.Queue = queue.Queue(maxsize=MAX_PENDING_CHUNKS)
+    cancelled = threading.Event()
+    done = object()
+    errors: list[BaseException] = []
+
+    def produce():
+        try:
+            _write_archive(
+                files,
+                fmt,
+                _QueueWriter(chunks, cancelled),
+            )
+        except _Cancelled:
+            return
+        except BaseException as e:
+            errors.append(e)
+        while not cancelled.is_set():
+            try:
+                chunks.put(done, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is done:
+                break
+            yield chunk
+        if errors:
+            raise errors[0]
+    finally:
+        # Stop the producer if the consumer goes away before the end
+        cancelled.set()
+        producer.join()
+
+
+class HashingIterator:
+    """Pass chunks through while computing their SHA-256 digest and total size."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = chunks
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._chunks:
+            self._hash.update(chunk)
+            self.size += len(chunk)
+            yield chunk
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def extract_archive(archive_path: str, dest: str, fmt: str) -> None:
+    """Extract an archive file into `dest` without loading it into memory."""
+    check_archive_format(fmt)
+    if fmt == 'zip':
+        with ZipFile(archive_path) as zipf:
+            zipf.extractall(dest)
+        return
+    with open(archive_path, 'rb') as raw:
+        source: BinaryIO = raw
+        if fmt == 'tar.zst':
+            source = zstandard.ZstdDecompressor().stream_reader(raw)  # type: ignore[assignment]
+        with tarfile.open(fileobj=source, mode='r|') as tar:
+            tar.extractall(dest, filter='data')
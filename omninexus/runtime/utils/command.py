@@ -17,6 +17,9 @@ def get_action_execution_server_startup_command(
     app_config: AppConfig,
     python_prefix: list[str] = DEFAULT_PYTHON_PREFIX,
     use_nice_for_root: bool = True,
+    python_executable: str = 'python',
+    username: str | None = None,
+    host: str | None = None,
 ):
     sandbox_config = app_config.sandbox
 
@@ -32,11 +35,60 @@ def get_action_execution_server_startup_command(
             '--browsergym-eval-env'
         ] + sandbox_config.browsergym_eval_env.split(' ')
 
-    is_root = not app_config.run_as_omninexus
+    browser_args = []
+    if (
+        sandbox_config.browser_observation_profile != 'full'
+        or sandbox_config.browser_screenshot_format != 'png'
+    ):
+        browser_args = [
+            '--browser-observation-profile',
+            sandbox_config.browser_observation_profile,
+            '--browser-screenshot-format',
+            sandbox_config.browser_screenshot_format,
+            '--browser-screenshot-quality',
+            str(sandbox_config.browser_screenshot_quality),
+        ]
+
+    if sandbox_config.browser_pool_size > 0:
+        browser_args += ['--browser-pool-size', str(sandbox_config.browser_pool_size)]
+        if sandbox_config.browser_pool_max_memory_mb is not None:
+            browser_args += [
+                '--browser-pool-max-memory-mb',
+                str(sandbox_config.browser_pool_max_memory_mb),
+            ]
+
+    if sandbox_config.browse_fetch_mode != 'browser':
+        browser_args += [
+            '--browse-fetch-mode',
+            sandbox_config.browse_fetch_mode,
+            '--http-cache-max-mb',
+            str(sandbox_config.http_cache_max_mb),
+        ]
+
+    file_read_args = []
+    if sandbox_config.file_read_max_bytes is not None:
+        file_read_args = [
+            '--file-read-max-bytes',
+            str(sandbox_config.file_read_max_bytes),
+        ]
+
+    jupyter_args = []
+    if any(plugin.name == 'jupyter' for plugin in plugins or []):
+        jupyter_args = ['--jupyter-kernel-mode', sandbox_config.jupyter_kernel_mode]
+    if sandbox_config.lazy_plugins:
+        plugin_args.append('--lazy-plugins')
+
+    if username is None:
+        username = 'omninexus' if app_config.run_as_omninexus else 'root'
+    is_root = username == 'root'
+
+    host_args = []
+    if host is not None:
+        host_args = ['--host', host]
 
     base_cmd = [
         *python_prefix,
-        'python',
+        python_executable,
         '-u',
         '-m',
         'omninexus.runtime.action_execution_server',
@@ -45,10 +97,14 @@ def get_action_execution_server_startup_command(
         app_config.workspace_mount_path_in_sandbox,
         *plugin_args,
         '--username',
-        'omninexus' if app_config.run_as_omninexus else 'root',
+        username,
         '--user-id',
         str(sandbox_config.user_id),
         *browsergym_args,
+        *browser_args,
+        *file_read_args,
+        *host_args,
+        *jupyter_args,
     ]
 
     if is_root and use_nice_for_root:
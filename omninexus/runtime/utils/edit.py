@@ -90,6 +90,31 @@ class FileEditRuntimeInterface(ABC):
     def read(self, action: FileReadAction) -> Observation:
         pass
 
+    def read_whole_file(self, path: str) -> Observation:
+        """Read a whole file, following `next_start` if reads are capped.
+
+        Callers that write the content back must not work on a read cut short by
+        `sandbox.file_read_max_bytes`, so this pages through the rest of the file.
+        """
+        obs = self.read(FileReadAction(path=path))
+        if not isinstance(obs, FileReadObservation) or obs.next_start is None:
+            return obs
+        parts = [obs.content]
+        while isinstance(obs, FileReadObservation) and obs.next_start is not None:
+            if not obs.content.endswith('\n'):
+                # a single line is longer than the cap, its tail can not be read
+                return ErrorObservation(
+                    f'File {path} has a line longer than the read limit of '
+                    f'{self.config.sandbox.file_read_max_bytes} bytes.'
+                )
+            obs = self.read(FileReadAction(path=path, start=obs.next_start))
+            if isinstance(obs, FileReadObservation):
+                parts.append(obs.content)
+        if not isinstance(obs, FileReadObservation):
+            return obs
+        obs.content = ''.join(parts)
+        return obs
+
     @abstractmethod
     def write(self, action: FileWriteAction) -> Observation:
         pass
@@ -106,7 +131,9 @@ class FileEditRuntimeMixin(FileEditRuntimeInterface):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._init_draft_editor_llm()
 
+    def _init_draft_editor_llm(self) -> None:
         llm_config = self.config.get_llm_config()
 
         if llm_config.draft_editor is None:
@@ -217,7 +244,7 @@ class FileEditRuntimeMixin(FileEditRuntimeInterface):
                 )
             )
 
-        obs = self.read(FileReadAction(path=action.path))
+        obs = self.read_whole_file(action.path)
         if (
             isinstance(obs, ErrorObservation)
             and 'File not found'.lower() in obs.content.lower()
@@ -242,6 +269,8 @@ class FileEditRuntimeMixin(FileEditRuntimeInterface):
                 old_content='',
                 new_content=action.content,
             )
+        if isinstance(obs, ErrorObservation):
+            return obs
         if not isinstance(obs, FileReadObservation):
             raise ValueError(
                 f'Expected FileReadObservation, got {type(obs)}: {str(obs)}'
@@ -356,7 +385,15 @@ class FileEditRuntimeMixin(FileEditRuntimeInterface):
                 error_obs.llm_metrics = self.draft_editor_llm.metrics
                 return error_obs
 
-        obs = self.write(FileWriteAction(path=action.path, content=updated_content))
+        # Only send the edited range so the runtime can splice it in place
+        obs = self.write(
+            FileWriteAction(
+                path=action.path,
+                content=_edited_content,
+                start=start_idx,
+                end=end_idx,
+            )
+        )
         ret_obs = FileEditObservation(
             content=diff,
             path=action.path,
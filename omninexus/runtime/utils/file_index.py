@@ -0,0 +1,331 @@
+"""Line-offset indexes for ranged reads and writes of (potentially very large) files.
+
+The action execution server used to call ``readlines()`` on the whole file for
+every read and partial write, even when only a handful of lines were involved.
+The helpers in this module build an index of line start offsets once per file
+version and use it to seek straight to the requested range.
+"""
+
+import base64
+import mmap
+import os
+import re
+import stat as stat_module
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+# Line terminators recognized by text-mode `readlines()` (universal newlines)
+LINE_END = re.compile(rb'\r\n|\r|\n')
+READ_CHUNK_SIZE = 1024 * 1024
+# Must be a multiple of 3 so that base64 chunks can be concatenated
+# without intermediate padding.
+BASE64_CHUNK_SIZE = 3 * 256 * 1024
+
+
+@dataclass
+class LineIndex:
+    """Start offsets of every line of a file, plus the stat used to build it."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+    offsets: array
+
+    @property
+    def num_lines(self) -> int:
+        return len(self.offsets)
+
+    def line_start(self, line: int) -> int:
+        """Byte offset where `line` starts (or the file size past the last line)."""
+        if line >= len(self.offsets):
+            return self.size
+        return self.offsets[line]
+
+    def line_at(self, offset: int) -> int:
+        """Index of the line containing byte `offset`."""
+        return max(bisect_right(self.offsets, offset) - 1, 0)
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return (
+            self.size == stat.st_size
+            and self.mtime_ns == stat.st_mtime_ns
+            and self.inode == stat.st_ino
+        )
+
+
+def _scan_offsets(buffer, size: int, base: int = 0) -> array:
+    offsets = array('q')
+    if size == 0:
+        return offsets
+    offsets.append(base)
+    for match in LINE_END.finditer(buffer):
+        if match.end() < size:
+            offsets.append(base + match.end())
+    return offsets
+
+
+def build_line_index(path: str) -> LineIndex:
+    """Scan `path` once and record where each line starts.
+
+    Lines end with ``\\n``, ``\\r\\n`` or a bare ``\\r``, matching the lines
+    returned by ``readlines()`` on a file opened in text mode.
+    """
+    with open(path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        size = stat.st_size
+        offsets = array('q')
+        if size > 0:
+            # scanned as a whole, so a \r\n is never split between two chunks
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offsets = _scan_offsets(mm, size)
+    return LineIndex(
+        path=path,
+        size=size,
+        mtime_ns=stat.st_mtime_ns,
+        inode=stat.st_ino,
+        offsets=offsets,
+    )
+
+
+class LineIndexCache:
+    """LRU cache of `LineIndex` objects, invalidated when a file's stat changes."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, LineIndex] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, path: str) -> LineIndex:
+        stat = os.stat(path)
+        with self._lock:
+            index = self._entries.get(path)
+            if index is not None and index.matches(stat):
+                self._entries.move_to_end(path)
+                return index
+        index = build_line_index(path)
+        self.put(index)
+        return index
+
+    def put(self, index: LineIndex) -> None:
+        with self._lock:
+            self._entries[index.path] = index
+            self._entries.move_to_end(index.path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def normalize_line_range(num_lines: int, start: int = 0, end: int = -1):
+    """Translate a (start, end) request into a concrete [begin, stop) line range.
+
+    This mirrors the slicing rules of `read_lines`.
+    """
+    start = max(start, 0)
+    start = min(start, num_lines)
+    end = -1 if end == -1 else max(end, 0)
+    end = min(end, num_lines)
+    if end == -1:
+        return start, num_lines
+    begin = max(0, min(start, num_lines - 2))
+    end = max(begin + 1, end)
+    return begin, min(end, num_lines)
+
+
+def _decode_text(data: bytes) -> str:
+    # Match the universal newline translation of files opened in text mode
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def read_line_range(
+    path: str,
+    start: int = 0,
+    end: int = -1,
+    max_bytes: int | None = None,
+    cache: LineIndexCache | None = None,
+) -> tuple[str, int | None]:
+    """Read lines [start, end) of a text file without loading the whole file.
+
+    Args:
+        path: The file to read.
+        start: The first line to read (0-indexed).
+        end: The line to stop at (exclusive), -1 for the end of the file.
+        max_bytes: Upper bound on the number of bytes returned. When the
+            requested range is larger, it is cut at a line boundary.
+        cache: Optional cache to reuse line indexes across calls.
+
+    Returns:
+        The decoded content and the line to continue reading from if the range
+        was cut short by `max_bytes`, otherwise None.
+    """
+    stat = os.stat(path)
+    if stat.st_size == 0 or not stat_module.S_ISREG(stat.st_mode):
+        # procfs and sysfs files, FIFOs etc. have no size to index
+        return _read_line_range_streaming(path, start, end, max_bytes)
+    index = cache.get(path) if cache is not None else build_line_index(path)
+    begin, stop = normalize_line_range(index.num_lines, start, end)
+    begin_offset = index.line_start(begin)
+    stop_offset = index.line_start(stop)
+
+    next_start = None
+    if max_bytes is not None and stop_offset - begin_offset > max_bytes:
+        cut = index.line_at(begin_offset + max_bytes)
+        if cut > begin:
+            stop_offset = index.line_start(cut)
+            next_start = cut
+        else:
+            # A single line is larger than the cap: return its head so that
+            # the caller always makes progress.
+            stop_offset = begin_offset + max_bytes
+            next_start = begin + 1
+
+    with open(path, 'rb') as file:
+        file.seek(begin_offset)
+        data = file.read(stop_offset - begin_offset)
+    if next_start is not None and stop_offset < index.line_start(next_start):
+        # The head of an oversized line may end inside a multi-byte character
+        return data.decode('utf-8', errors='ignore'), next_start
+    return _decode_text(data), next_start
+
+
+def _read_line_range_streaming(
+    path: str, start: int, end: int, max_bytes: int | None
+) -> tuple[str, int | None]:
+    """`read_line_range` for files that can only be read from start to end."""
+    with open(path, encoding='utf-8') as file:
+        lines = file.readlines()
+    begin, stop = normalize_line_range(len(lines), start, end)
+    if max_bytes is None:
+        return ''.join(lines[begin:stop]), None
+    parts: list[str] = []
+    size = 0
+    for line in range(begin, stop):
+        data = lines[line].encode('utf-8')
+        if size + len(data) > max_bytes:
+            if line == begin:
+                head = data[:max_bytes].decode('utf-8', errors='ignore')
+                return head, begin + 1
+            return ''.join(parts), line
+        parts.append(lines[line])
+        size += len(data)
+    return ''.join(parts), None
+
+
+def encode_file_base64(path: str, chunk_size: int = BASE64_CHUNK_SIZE) -> str:
+    """Base64-encode a file chunk by chunk instead of reading it in one go."""
+    parts = []
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            parts.append(base64.b64encode(chunk).decode('ascii'))
+    return ''.join(parts)
+
+
+def _shift_tail(file, offset: int, size: int, shift: int) -> None:
+    """Move the bytes in [offset, size) by `shift` bytes, one chunk at a time."""
+    if shift > 0:
+        # Growing: copy from the end backwards so nothing is overwritten early
+        pos = size
+        while pos > offset:
+            chunk_start = max(offset, pos - READ_CHUNK_SIZE)
+            file.seek(chunk_start)
+            chunk = file.read(pos - chunk_start)
+            file.seek(chunk_start + shift)
+            file.write(chunk)
+            pos = chunk_start
+    elif shift < 0:
+        pos = offset
+        while pos < size:
+            file.seek(pos)
+            chunk = file.read(min(READ_CHUNK_SIZE, size - pos))
+            file.seek(pos + shift)
+            file.write(chunk)
+            pos += len(chunk)
+        file.truncate(size + shift)
+
+
+def splice_lines(
+    path: str,
+    to_insert: list[str],
+    start: int,
+    end: int,
+    cache: LineIndexCache | None = None,
+) -> None:
+    """Replace lines [start, end) of an existing file in place.
+
+    Produces the same result as rewriting the file with `insert_lines`, but
+    only the replaced range and the bytes after it are touched, so edits near
+    the end of a large file (or edits that keep the range length unchanged)
+    cost proportional to the edit rather than to the file. The cached line
+    index is patched instead of being rebuilt.
+
+    Args:
+        path: The file to modify. It must exist.
+        to_insert: The new lines, without trailing newlines.
+        start: The first line to replace (0-indexed).
+        end: The line after the last one to replace, -1 for the end of the file.
+        cache: Optional cache holding the line index of `path`.
+    """
+    if start < 0 or (end != -1 and end < start):
+        raise ValueError(f'Invalid line range: [{start}:{end}]')
+    index = cache.get(path) if cache is not None else build_line_index(path)
+    size = index.size
+    start_offset = index.line_start(start)
+    end_offset = size if end == -1 else index.line_start(end)
+    data = ''.join(line + '\n' for line in to_insert).encode('utf-8')
+    shift = len(data) - (end_offset - start_offset)
+    new_size = size + shift
+
+    with open(path, 'r+b') as file:
+        if end == -1:
+            file.truncate(start_offset)
+        else:
+            _shift_tail(file, end_offset, size, shift)
+        file.seek(start_offset)
+        file.write(data)
+        file.flush()
+        previous_byte = b'\n'
+        if start_offset > 0:
+            file.seek(start_offset - 1)
+            previous_byte = file.read(1)
+        stat = os.fstat(file.fileno())
+
+    if cache is None:
+        return
+    if previous_byte == b'\r':
+        # the \r may now be the first half of a \r\n, rescan on the next use
+        cache.invalidate(path)
+        return
+    preceded_by_newline = previous_byte == b'\n'
+
+    # Lines before the splice keep their offsets, lines after it are shifted
+    offsets = index.offsets[: bisect_left(index.offsets, start_offset)]
+    if start_offset < new_size and preceded_by_newline:
+        offsets.append(start_offset)
+    offsets.extend(_scan_offsets(data, len(data), start_offset)[1:])
+    if data and start_offset + len(data) < new_size:
+        offsets.append(start_offset + len(data))
+    if end != -1:
+        tail = index.offsets[bisect_right(index.offsets, end_offset) :]
+        offsets.extend(array('q', (offset + shift for offset in tail)))
+    cache.put(
+        LineIndex(
+            path=path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            inode=stat.st_ino,
+            offsets=offsets,
+        )
+    )
@@ -0,0 +1,107 @@
+"""File manifests used to sync directory trees incrementally.
+
+A manifest maps every file below a root directory (by relative path) to its
+size, modification time and SHA-256 digest. Comparing the manifests of the
+host and sandbox copies of a tree tells which files actually need to be
+transferred, so repeated syncs of mostly-unchanged repositories only move
+the changed files.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from threading import Lock
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class FileHashCache:
+    """Remembers file digests until the file's size, mtime or inode changes."""
+
+    def __init__(self, max_entries: int = 200_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[int, int, int, str]] = OrderedDict()
+        self._lock = Lock()
+
+    def sha256(self, path: str, stat: os.stat_result | None = None) -> str:
+        if stat is None:
+            stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:3] == key:
+                self._entries.move_to_end(path)
+                return entry[3]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+
+        with self._lock:
+            self._entries[path] = (*key, sha256)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return sha256
+
+
+def build_manifest(root: str, cache: FileHashCache | None = None) -> dict[str, dict]:
+    """Describe every regular file below `root`.
+
+    Returns:
+        A dict mapping paths relative to `root` (with '/' separators) to
+        ``{'size': int, 'mtime': float, 'sha256': str}``. Missing roots give
+        an empty manifest.
+    """
+    if cache is None:
+        cache = FileHashCache()
+    manifest: dict[str, dict] = {}
+    if not os.path.isdir(root):
+        return manifest
+    for dirpath, _, files in os.walk(root):
+        for file in files:
+            file_path = os.path.join(dirpath, file)
+            try:
+                stat = os.stat(file_path)
+                sha256 = cache.sha256(file_path, stat)
+            except (FileNotFoundError, PermissionError, IsADirectoryError):
+                # Vanished or unreadable while walking, or a dangling symlink
+                continue
+            rel_path = os.path.relpath(file_path, root).replace(os.sep, '/')
+            manifest[rel_path] = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'sha256': sha256,
+            }
+    return manifest
+
+
+def resolve_member(root: str, member: str) -> str:
+    """Join a manifest path onto `root`, refusing paths that escape it."""
+    root = os.path.normpath(root)
+    path = os.path.normpath(os.path.join(root, member))
+    if os.path.isabs(member) or os.path.commonpath([root, path]) != root:
+        raise ValueError(f'Path escapes {root}: {member}')
+    return path
+
+
+def diff_manifests(
+    source: dict[str, dict], target: dict[str, dict]
+) -> tuple[list[str], list[str]]:
+    """Compare two manifests.
+
+    Returns:
+        The paths that must be copied from source to target (new or with
+        different content), and the paths only present in target.
+    """
+    changed = sorted(
+        path
+        for path, entry in source.items()
+        if path not in target
+        or target[path]['size'] != entry['size']
+        or target[path]['sha256'] != entry['sha256']
+    )
+    removed = sorted(path for path in target if path not in source)
+    return changed, removed
@@ -7,6 +7,7 @@ from omninexus.events.observation import (
     FileWriteObservation,
     Observation,
 )
+from omninexus.runtime.utils.file_index import normalize_line_range
 
 
 def resolve_path(
@@ -52,20 +53,10 @@ def resolve_path(
 
 
 def read_lines(all_lines: list[str], start=0, end=-1):
-    start = max(start, 0)
-    start = min(start, len(all_lines))
-    end = -1 if end == -1 else max(end, 0)
-    end = min(end, len(all_lines))
-    if end == -1:
-        if start == 0:
-            return all_lines
-        else:
-            return all_lines[start:]
-    else:
-        num_lines = len(all_lines)
-        begin = max(0, min(start, num_lines - 2))
-        end = -1 if end > num_lines else max(begin + 1, end)
-        return all_lines[begin:end]
+    begin, stop = normalize_line_range(len(all_lines), start, end)
+    if begin == 0 and stop == len(all_lines):
+        return all_lines
+    return all_lines[begin:stop]
 
 
 async def read_file(
@@ -1,4 +1,5 @@
 import json
+from collections.abc import Iterator
 from typing import Any
 
 import requests
@@ -28,17 +29,26 @@ def is_retryable_error(exception):
     )
 
 
-@retry(
-    retry=retry_if_exception(is_retryable_error),
-    stop=stop_after_attempt(3) | stop_if_should_exit(),
-    wait=wait_exponential(multiplier=1, min=4, max=60),
-)
 def send_request(
     session: requests.Session,
     method: str,
     url: str,
     timeout: int = 10,
     **kwargs: Any,
+) -> requests.Response:
+    # A streamed body is consumed by the first attempt and can't be sent again,
+    # so such requests are not retried.
+    if isinstance(kwargs.get('data'), Iterator):
+        return _send_request(session, method, url, timeout, **kwargs)
+    return _send_request_with_retries(session, method, url, timeout, **kwargs)
+
+
+def _send_request(
+    session: requests.Session,
+    method: str,
+    url: str,
+    timeout: int = 10,
+    **kwargs: Any,
 ) -> requests.Response:
     response = session.request(method, url, timeout=timeout, **kwargs)
     try:
@@ -56,3 +66,10 @@ def send_request(
             detail=_json.get('detail') if _json is not None else None,
         ) from e
     return response
+
+
+_send_request_with_retries = retry(
+    retry=retry_if_exception(is_retryable_error),
+    stop=stop_after_attempt(3) | stop_if_should_exit(),
+    wait=wait_exponential(multiplier=1, min=4, max=60),
+)(_send_request)
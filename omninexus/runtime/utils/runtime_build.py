@@ -9,7 +9,6 @@ from pathlib import Path
 from typing import List
 
 import docker
-from dirhash import dirhash
 from jinja2 import Environment, FileSystemLoader
 
 try:
@@ -24,6 +23,7 @@ from omninexus import __version__ as oh_version
 from omninexus.core.exceptions import AgentRuntimeBuildError
 from omninexus.core.logger import omninexus_logger as logger
 from omninexus.runtime.builder import DockerRuntimeBuilder, RuntimeBuilder
+from omninexus.runtime.utils.source_hash import PersistentHashCache, hash_directory
 
 
 class BuildFromImageType(Enum):
@@ -166,6 +166,25 @@ def build_runtime_image(
     return result
 
 
+def get_runtime_image_tags(base_image: str) -> tuple[str, str, str, str]:
+    """Resolves the tags a runtime image built from `base_image` would get.
+
+    Parameters:
+    - base_image (str): The name of the base Docker image
+
+    Returns:
+    - tuple[str, str, str, str]: The runtime image repo, and the source, lock and versioned tags
+    """
+    runtime_image_repo, _ = get_runtime_image_repo_and_tag(base_image)
+    lock_tag = f'oh_v{oh_version}_{get_hash_for_lock_files(base_image)}'
+    versioned_tag = (
+        # truncate the base image to 96 characters to fit in the tag max length (128 characters)
+        f'oh_v{oh_version}_{get_tag_for_versioned_image(base_image)}'
+    )
+    source_tag = f'{lock_tag}_{get_hash_for_source_files()}'
+    return runtime_image_repo, source_tag, lock_tag, versioned_tag
+
+
 def build_runtime_image_in_folder(
     base_image: str,
     runtime_builder: RuntimeBuilder,
@@ -176,14 +195,10 @@ def build_runtime_image_in_folder(
     platform: str | None = None,
     extra_build_args: List[str] | None = None,
 ) -> str:
-    runtime_image_repo, _ = get_runtime_image_repo_and_tag(base_image)
-    lock_tag = f'oh_v{oh_version}_{get_hash_for_lock_files(base_image)}'
-    versioned_tag = (
-        # truncate the base image to 96 characters to fit in the tag max length (128 characters)
-        f'oh_v{oh_version}_{get_tag_for_versioned_image(base_image)}'
+    runtime_image_repo, source_tag, lock_tag, versioned_tag = get_runtime_image_tags(
+        base_image
     )
     versioned_image_name = f'{runtime_image_repo}:{versioned_tag}'
-    source_tag = f'{lock_tag}_{get_hash_for_source_files()}'
     hash_image_name = f'{runtime_image_repo}:{source_tag}'
 
     logger.info(f'Building image: {hash_image_name}')
@@ -308,20 +323,51 @@ def truncate_hash(hash: str) -> str:
     return ''.join(result)
 
 
-def get_hash_for_lock_files(base_image: str):
+_hash_cache: PersistentHashCache | None = None
+
+
+def _get_hash_cache() -> PersistentHashCache:
+    global _hash_cache
+    if _hash_cache is None:
+        _hash_cache = PersistentHashCache()
+    return _hash_cache
+
+
+def _get_lock_files() -> list[Path]:
     omninexus_source_dir = Path(omninexus.__file__).parent
-    md5 = hashlib.md5()
-    md5.update(base_image.encode())
+    lock_files = []
     for file in ['pyproject.toml', 'poetry.lock']:
         src = Path(omninexus_source_dir, file)
         if not src.exists():
             src = Path(omninexus_source_dir.parent, file)
+        lock_files.append(src)
+    return lock_files
+
+
+def get_hash_for_lock_files(base_image: str):
+    # The result only changes when one of the lock files does, so it is
+    # cached under the size, mtime and inode of both files.
+    lock_files = _get_lock_files()
+    cache = _get_hash_cache()
+    cache_key = []
+    for src in lock_files:
+        stat = src.stat()
+        cache_key.append([str(src), stat.st_size, stat.st_mtime_ns, stat.st_ino])
+    cached = cache.get_value(f'lock:{base_image}', cache_key)
+    if cached is not None:
+        return cached
+
+    md5 = hashlib.md5()
+    md5.update(base_image.encode())
+    for src in lock_files:
         with open(src, 'rb') as f:
             for chunk in iter(lambda: f.read(4096), b''):
                 md5.update(chunk)
     # We get away with truncation because we want something that is unique
     # rather than something that is cryptographically secure
     result = truncate_hash(md5.hexdigest())
+    cache.set_value(f'lock:{base_image}', cache_key, result)
+    cache.save()
     return result
 
 
@@ -331,15 +377,18 @@ def get_tag_for_versioned_image(base_image: str):
 
 def get_hash_for_source_files():
     omninexus_source_dir = Path(omninexus.__file__).parent
-    dir_hash = dirhash(
-        omninexus_source_dir,
-        'md5',
+    cache = _get_hash_cache()
+    dir_hash = hash_directory(
+        str(omninexus_source_dir),
+        cache,
         ignore=[
             '.*/',  # hidden directories
             '__pycache__/',
             '*.pyc',
         ],
     )
+    cache.prune(str(omninexus_source_dir))
+    cache.save()
     # We get away with truncation because we want something that is unique
     # rather than something that is cryptographically secure
     result = truncate_hash(dir_hash)
@@ -385,9 +434,22 @@ if __name__ == '__main__':
     parser.add_argument('--build_folder', type=str, default=None)
     parser.add_argument('--force_rebuild', action='store_true', default=False)
     parser.add_argument('--platform', type=str, default=None)
+    parser.add_argument(
+        '--print_tags',
+        action='store_true',
+        default=False,
+        help='Print the resolved runtime image names and exit without building',
+    )
     args = parser.parse_args()
 
-    if args.build_folder is not None:
+    if args.print_tags:
+        runtime_image_repo, source_tag, lock_tag, versioned_tag = (
+            get_runtime_image_tags(args.base_image)
+        )
+        print(f'source: {runtime_image_repo}:{source_tag}')
+        print(f'lock: {runtime_image_repo}:{lock_tag}')
+        print(f'versioned: {runtime_image_repo}:{versioned_tag}')
+    elif args.build_folder is not None:
         # If a build_folder is provided, we do not actually build the Docker image. We copy the necessary source code
         # and create a Dockerfile dynamically and place it in the build_folder only. This allows the Docker image to
         # then be created using the Dockerfile (most likely using the containers/build.sh script)
@@ -0,0 +1,181 @@
+"""Persistent content hashes used to tag runtime images.
+
+File digests are stored on disk keyed by (path, size, mtime, inode), so a
+file is only read again after it changed. Directory digests are rolled up
+Merkle-style from the digests of their entries, which makes hashing an
+unchanged source tree a matter of stat calls.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from fnmatch import fnmatch
+from threading import Lock
+
+from omninexus.core.logger import omninexus_logger as logger
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Bump when the layout of the cache file or the digest scheme changes
+CACHE_VERSION = 1
+
+
+def get_hash_cache_path() -> str:
+    cache_home = os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+    return os.getenv(
+        'OH_RUNTIME_HASH_CACHE',
+        os.path.join(cache_home, 'omninexus', 'runtime_hashes.json'),
+    )
+
+
+class PersistentHashCache:
+    """MD5 digests of files and arbitrary values, persisted as JSON.
+
+    Args:
+        path: The cache file. Missing or unreadable files give an empty cache.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or get_hash_cache_path()
+        self._files: dict[str, list] = {}
+        self._values: dict[str, list] = {}
+        # Files looked up since the cache was loaded
+        self._used: set[str] = set()
+        self._dirty = False
+        self._lock = Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+            return
+        self._files = data.get('files', {})
+        self._values = data.get('values', {})
+
+    def save(self) -> None:
+        """Write the cache back to disk if it changed. Failures are not fatal."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                'version': CACHE_VERSION,
+                'files': self._files,
+                'values': self._values,
+            }
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.debug(f'Could not save runtime hash cache to {self.path}: {e}')
+
+    def file_md5(self, path: str, stat: os.stat_result | None = None) -> str:
+        path = os.path.abspath(path)
+        if stat is None:
+            stat = os.stat(path)
+        key = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+        with self._lock:
+            self._used.add(path)
+            entry = self._files.get(path)
+            if entry is not None and entry[:3] == key:
+                return entry[3]
+
+        md5 = hashlib.md5()
+        with open(path, 'rb') as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                md5.update(chunk)
+        digest = md5.hexdigest()
+
+        with self._lock:
+            self._files[path] = [*key, digest]
+            self._dirty = True
+        return digest
+
+    def prune(self, root: str) -> None:
+        """Forget files that are gone, so the cache does not grow forever.
+
+        Files below `root` that were not hashed since the cache was loaded
+        (deleted, renamed or now ignored) are dropped, as are files elsewhere
+        that no longer exist.
+        """
+        root = os.path.join(os.path.abspath(root), '')
+        with self._lock:
+            stale = [
+                path
+                for path in self._files
+                if (
+                    path not in self._used
+                    if path.startswith(root)
+                    else not os.path.exists(path)
+                )
+            ]
+            for path in stale:
+                del self._files[path]
+            if stale:
+                self._dirty = True
+
+    def get_value(self, name: str, key: list) -> str | None:
+        """Return the value stored under `name` if it was stored with `key`."""
+        with self._lock:
+            entry = self._values.get(name)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        return None
+
+    def set_value(self, name: str, key: list, value: str) -> None:
+        with self._lock:
+            self._values[name] = [key, value]
+            self._dirty = True
+
+
+def _is_ignored(name: str, is_dir: bool, ignore: list[str]) -> bool:
+    for pattern in ignore:
+        if pattern.endswith('/'):
+            if is_dir and fnmatch(name, pattern[:-1]):
+                return True
+        elif not is_dir and fnmatch(name, pattern):
+            return True
+    return False
+
+
+def hash_directory(
+    root: str, cache: PersistentHashCache, ignore: list[str] | None = None
+) -> str:
+    """Merkle-style MD5 digest of the directory tree at `root`.
+
+    Each directory digest covers the sorted names, types and digests of its
+    entries, so the result only depends on file names and contents.
+
+    Args:
+        root: The directory to hash.
+        cache: Cache holding the digests of unchanged files.
+        ignore: Patterns matched against entry names. Patterns ending with
+            '/' only match directories (e.g. '__pycache__/'), others only
+            match files (e.g. '*.pyc').
+    """
+    ignore = ignore or []
+    md5 = hashlib.md5()
+    with os.scandir(root) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+            if _is_ignored(entry.name, is_dir, ignore):
+                continue
+            if is_dir:
+                digest = hash_directory(entry.path, cache, ignore)
+            else:
+                digest = cache.file_md5(entry.path, entry.stat())
+        except FileNotFoundError:
+            # Dangling symlink or removed while walking
+            continue
+        md5.update(f'{"d" if is_dir else "f"} {entry.name} {digest}\n'.encode())
+    return md5.hexdigest()
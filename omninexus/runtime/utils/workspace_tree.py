@@ -0,0 +1,293 @@
+"""Cached, gitignore-aware view of the workspace file tree inside the sandbox.
+
+Directory listings are cached and revalidated with a single stat of the
+directory, the workspace .gitignore is compiled once per version, and a
+background watcher (inotify on Linux, polling elsewhere) records which
+directories changed so clients can wait for changes instead of re-listing.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+from pathspec import PathSpec
+from pathspec.patterns import GitWildMatchPattern
+
+from omninexus.core.logger import omninexus_logger as logger
+
+# inotify(7) constants
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Number of change records kept for clients catching up
+MAX_CHANGE_RECORDS = 1000
+
+
+@dataclass
+class _DirListing:
+    mtime_ns: int
+    directories: list[str]
+    files: list[str]
+
+
+class _InotifyWatcher:
+    """Minimal ctypes binding of inotify(7), watching directories for changes."""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError('libc not found')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._paths: dict[int, str] = {}
+        self._watches: dict[str, int] = {}
+
+    def add(self, path: str) -> None:
+        if path in self._watches:
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            return
+        self._paths[wd] = path
+        self._watches[path] = wd
+
+    def read(self, timeout: float) -> list[tuple[str, str]]:
+        """Wait up to `timeout` seconds and return (directory, name) events."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b'\0')
+            offset += length
+            path = self._paths.get(wd)
+            if path is None:
+                continue
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+                self._watches.pop(path, None)
+                continue
+            events.append((path, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class WorkspaceTree:
+    """Cached listing of the workspace rooted at `root`.
+
+    Args:
+        root: The workspace directory. Gitignore rules are read from its
+            .gitignore and matched against paths relative to it.
+        poll_interval: Seconds between checks when inotify is unavailable.
+        use_inotify: Set to False to force the polling watcher.
+    """
+
+    def __init__(self, root: str, poll_interval: float = 2.0, use_inotify=True):
+        self.root = os.path.abspath(root)
+        self.poll_interval = poll_interval
+        self._listings: dict[str, _DirListing] = {}
+        self._gitignore: tuple[int, PathSpec] | None = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._version = 0
+        self._changes: deque[tuple[int, str]] = deque(maxlen=MAX_CHANGE_RECORDS)
+        self._stop = threading.Event()
+
+        self._inotify: _InotifyWatcher | None = None
+        if use_inotify:
+            try:
+                self._inotify = _InotifyWatcher()
+            except (OSError, AttributeError) as e:
+                logger.debug(f'inotify unavailable, polling for file changes: {e}')
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    # ================================
+    # Listing
+    # ================================
+
+    def _list_dir(self, path: str) -> _DirListing:
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            listing = self._listings.get(path)
+        if listing is not None and listing.mtime_ns == mtime_ns:
+            return listing
+
+        directories = []
+        files = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        directories.append(entry.name)
+                    else:
+                        files.append(entry.name)
+                except OSError:
+                    continue
+        directories.sort(key=lambda s: s.lower())
+        files.sort(key=lambda s: s.lower())
+        listing = _DirListing(mtime_ns, directories, files)
+        with self._lock:
+            self._listings[path] = listing
+        if self._inotify is not None:
+            self._inotify.add(path)
+        return listing
+
+    def _gitignore_spec(self) -> PathSpec | None:
+        gitignore_path = os.path.join(self.root, '.gitignore')
+        try:
+            mtime_ns = os.stat(gitignore_path).st_mtime_ns
+        except OSError:
+            return None
+        if self._gitignore is not None and self._gitignore[0] == mtime_ns:
+            return self._gitignore[1]
+        with open(gitignore_path, 'r', encoding='utf-8', errors='ignore') as f:
+            spec = PathSpec.from_lines(GitWildMatchPattern, f.read().splitlines())
+        self._gitignore = (mtime_ns, spec)
+        return spec
+
+    def list_tree(
+        self,
+        path: str,
+        max_depth: int | None = None,
+        exclude: list[str] | None = None,
+    ) -> list[str]:
+        """List `path` and, up to `max_depth` levels deep, its subdirectories.
+
+        Entries are relative to `path`, directories end with '/' and come
+        before files at each level, each directory being followed by its own
+        entries. Entries matching the workspace .gitignore or named in
+        `exclude` (e.g. '.git/', 'node_modules/') are left out.
+        """
+        path = os.path.abspath(path)
+        if not os.path.isdir(path):
+            return []
+        spec = self._gitignore_spec()
+        excluded = set(exclude or [])
+        entries: list[str] = []
+
+        def ignored(full_path: str, name: str, is_dir: bool) -> bool:
+            if (name + '/' if is_dir else name) in excluded:
+                return True
+            if spec is None:
+                return False
+            try:
+                rel_path = os.path.relpath(full_path, self.root)
+            except ValueError:
+                return False
+            if rel_path.startswith('..'):
+                return False
+            return spec.match_file(rel_path + '/' if is_dir else rel_path)
+
+        def walk(dir_path: str, prefix: str, depth: int) -> None:
+            try:
+                listing = self._list_dir(dir_path)
+            except OSError:
+                return
+            for name in listing.directories:
+                full_path = os.path.join(dir_path, name)
+                if ignored(full_path, name, True):
+                    continue
+                entries.append(f'{prefix}{name}/')
+                if max_depth is None or depth < max_depth:
+                    walk(full_path, f'{prefix}{name}/', depth + 1)
+            for name in listing.files:
+                if ignored(os.path.join(dir_path, name), name, False):
+                    continue
+                entries.append(f'{prefix}{name}')
+
+        walk(path, '', 1)
+        return entries
+
+    # ================================
+    # Change notifications
+    # ================================
+
+    def _record_change(self, path: str) -> None:
+        with self._changed:
+            self._listings.pop(path, None)
+            self._version += 1
+            self._changes.append((self._version, path))
+            self._changed.notify_all()
+
+    def wait_for_changes(
+        self, since: int, timeout: float = 30.0
+    ) -> tuple[int, list[str]]:
+        """Block until the tree changes after version `since`, or until `timeout`.
+
+        Returns:
+            The current version and the directories that changed since
+            `since`. If `since` is too old to be answered from the change
+            records, the workspace root is reported as changed.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._version > since, timeout=timeout)
+            if self._version <= since:
+                return self._version, []
+            if not self._changes or self._changes[0][0] > since + 1:
+                return self._version, [self.root]
+            changed = sorted(
+                {path for version, path in self._changes if version > since}
+            )
+            return self._version, changed
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self._inotify is not None:
+                    for directory, _ in self._inotify.read(timeout=1.0):
+                        self._record_change(directory)
+                else:
+                    self._stop.wait(self.poll_interval)
+                    self._poll()
+            except Exception as e:
+                logger.warning(f'Error watching workspace tree: {e}')
+                self._stop.wait(self.poll_interval)
+
+    def _poll(self) -> None:
+        with self._lock:
+            listings = list(self._listings.items())
+        for path, listing in listings:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime_ns = -1
+            if mtime_ns != listing.mtime_ns:
+                self._record_change(path)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._watcher.join(timeout=5)
+        if self._inotify is not None:
+            self._inotify.close()
@@ -57,6 +57,14 @@ async def health():
     return 'OK'
 
 
+@app.get('/api/runtime-pool')
+async def runtime_pool_metrics():
+    """Hit rate and time-to-ready of the runtime pool, if it is enabled."""
+    if session_manager.runtime_pool is None:
+        return {'enabled': False}
+    return {'enabled': True, **session_manager.runtime_pool.get_metrics()}
+
+
 app.include_router(public_api_router)
 app.include_router(files_api_router)
 app.include_router(security_api_router)
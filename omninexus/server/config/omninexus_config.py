@@ -15,11 +15,15 @@ class OmninexusConfig(OmninexusConfigInterface):
     attach_conversation_middleware_path = (
         'omninexus.server.middleware.AttachConversationMiddleware'
     )
-    settings_store_class: str = (
-        'omninexus.storage.settings.file_settings_store.FileSettingsStore'
+    # The SQLite stores are omninexus.storage.settings.sqlite_settings_store.SQLiteSettingsStore
+    # and omninexus.storage.conversation.sqlite_conversation_store.SQLiteConversationStore
+    settings_store_class: str = os.environ.get(
+        'OMNINEXUS_SETTINGS_STORE_CLS',
+        'omninexus.storage.settings.file_settings_store.FileSettingsStore',
     )
-    conversation_store_class: str = (
-        'omninexus.storage.conversation.file_conversation_store.FileConversationStore'
+    conversation_store_class: str = os.environ.get(
+        'OMNINEXUS_CONVERSATION_STORE_CLS',
+        'omninexus.storage.conversation.file_conversation_store.FileConversationStore',
     )
 
     def verify_config(self):
@@ -1,3 +1,5 @@
+import asyncio
+import zlib
 from urllib.parse import parse_qs
 
 import jwt
@@ -5,19 +7,33 @@ from socketio.exceptions import ConnectionRefusedError
 
 from omninexus.core.logger import omninexus_logger as logger
 from omninexus.core.schema.agent import AgentState
+from omninexus.core.utils import json
 from omninexus.events.action import (
     NullAction,
 )
+from omninexus.events.event import Event
 from omninexus.events.observation import (
     NullObservation,
 )
 from omninexus.events.observation.agent import AgentStateChangedObservation
 from omninexus.events.serialization import event_to_dict
-from omninexus.events.stream import AsyncEventStreamWrapper
+from omninexus.events.stream import AsyncEventStreamWrapper, EventStream
 from omninexus.server.routes.settings import ConversationStoreImpl, SettingsStoreImpl
+from omninexus.server.session.outbound import encode_batch, live_event_hold
+from omninexus.server.session.session import ROOM_KEY
 from omninexus.server.shared import config, omninexus_config, session_manager, sio
 from omninexus.server.types import AppMode
 
+# Events read per replay batch
+REPLAY_BATCH_SIZE = 200
+# Replay frames a client may have unacknowledged
+REPLAY_WINDOW = 4
+# Seconds to wait for a client to acknowledge a replay frame
+REPLAY_ACK_TIMEOUT = 30
+
+# Batched replays still running, by connection
+_replay_tasks: dict[str, asyncio.Task] = {}
+
 
 @sio.event
 async def connect(connection_id: str, environ, auth):
@@ -43,8 +59,12 @@ async def connect(connection_id: str, environ, auth):
         logger.info(f'User {user_id} is connecting to conversation {conversation_id}')
 
         conversation_store = await ConversationStoreImpl.get_instance(config, user_id)
-        metadata = await conversation_store.get_metadata(conversation_id)
-        if metadata.github_user_id != user_id:
+        try:
+            metadata = await conversation_store.get_metadata(conversation_id)
+        except FileNotFoundError:
+            # Stores scoped to the user do not find other users' conversations
+            metadata = None
+        if metadata is None or metadata.github_user_id != user_id:
             logger.error(
                 f'User {user_id} is not allowed to join conversation {conversation_id}'
             )
@@ -60,29 +80,143 @@ async def connect(connection_id: str, environ, auth):
             'Settings not found', {'msg_id': 'CONFIGURATION$SETTINGS_NOT_FOUND'}
         )
 
-    event_stream = await session_manager.join_conversation(
-        conversation_id, connection_id, settings, user_id
+    # Live messages wait for the replay, which starts before the room is joined
+    room = ROOM_KEY.format(sid=conversation_id)
+    live_event_hold.hold(room, connection_id)
+    try:
+        event_stream = await session_manager.join_conversation(
+            conversation_id, connection_id, settings, user_id
+        )
+    except BaseException:
+        live_event_hold.release(room, connection_id)
+        raise
+
+    batched = query_params.get('replay_batches', ['0'])[0] == '1'
+    if not batched:
+        await _replay_events(connection_id, event_stream, latest_event_id + 1, False)
+        return
+    # Frames are acknowledged, which the client only does once connected,
+    # i.e. after this handler returned
+    task = asyncio.create_task(
+        _replay_events(connection_id, event_stream, latest_event_id + 1, True)
     )
+    _replay_tasks[connection_id] = task
+    task.add_done_callback(lambda _: _replay_tasks.pop(connection_id, None))
 
-    agent_state_changed = None
-    async_stream = AsyncEventStreamWrapper(event_stream, latest_event_id + 1)
-    async for event in async_stream:
-        if isinstance(
-            event,
-            (
-                NullAction,
-                NullObservation,
-            ),
-        ):
+
+def _filter_replayed_events(
+    events: list[Event], agent_state_changed: list[AgentStateChangedObservation]
+) -> list[dict]:
+    """Serialize the events a reconnecting client needs to see.
+
+    Only the last agent state change matters, it is kept in
+    `agent_state_changed` (shared between batches) and sent at the end.
+    """
+    result = []
+    for event in events:
+        if isinstance(event, (NullAction, NullObservation)):
             continue
         elif isinstance(event, AgentStateChangedObservation):
             if event.agent_state == AgentState.INIT:
-                await sio.emit('oh_event', event_to_dict(event), to=connection_id)
-            agent_state_changed = event
+                result.append(event_to_dict(event))
+            agent_state_changed[:] = [event]
         else:
-            await sio.emit('oh_event', event_to_dict(event), to=connection_id)
-    if agent_state_changed:
-        await sio.emit('oh_event', event_to_dict(agent_state_changed), to=connection_id)
+            result.append(event_to_dict(event))
+    return result
+
+
+async def _replay_events(
+    connection_id: str, event_stream: EventStream, start_id: int, batched: bool
+) -> None:
+    """Send the events from `start_id` on to a (re)connecting client.
+
+    Events are read and serialized in a worker thread. Clients that ask for
+    `replay_batches` get them as zlib-compressed JSON frames
+    (`oh_event_batch`) carrying the id of their last event as cursor, and
+    acknowledge every frame; at most REPLAY_WINDOW frames are in flight per
+    connection. Other clients get one `oh_event` per event.
+
+    Live messages held for the connection during the replay are sent after
+    it, so they cannot interleave with it or be overridden by its final
+    agent state.
+    """
+    room = ROOM_KEY.format(sid=event_stream.sid)
+    cursor = start_id - 1
+    try:
+        cursor = await _send_replay(connection_id, event_stream, start_id, batched)
+    finally:
+        try:
+            await _send_held_messages(connection_id, room, cursor, batched)
+        finally:
+            live_event_hold.release(room, connection_id)
+
+
+async def _send_held_messages(
+    connection_id: str, room: str, cursor: int, batched: bool
+) -> None:
+    # The connection stays held while sending, so newer messages queue up
+    # behind these instead of overtaking them
+    while messages := live_event_hold.take(room, connection_id, cursor):
+        if batched:
+            await sio.emit(
+                'oh_event_batch', encode_batch(messages, False), to=connection_id
+            )
+            continue
+        for message in messages:
+            await sio.emit('oh_event', message, to=connection_id)
+
+
+async def _send_replay(
+    connection_id: str, event_stream: EventStream, start_id: int, batched: bool
+) -> int:
+    """Replay the stored events, returning the id of the last one read."""
+    agent_state_changed: list[AgentStateChangedObservation] = []
+    async_stream = AsyncEventStreamWrapper(
+        event_stream, start_id, batch_size=REPLAY_BATCH_SIZE
+    )
+    cursor = start_id - 1
+
+    if not batched:
+
+        def filter_batch(batch: list[Event]) -> tuple[list[dict], int]:
+            return _filter_replayed_events(batch, agent_state_changed), batch[-1].id
+
+        async for events, cursor in async_stream.batches(filter_batch):
+            for event_dict in events:
+                await sio.emit('oh_event', event_dict, to=connection_id)
+        if agent_state_changed:
+            await sio.emit(
+                'oh_event', event_to_dict(agent_state_changed[0]), to=connection_id
+            )
+        return cursor
+
+    def make_frame(batch: list[Event]) -> tuple[bytes, int]:
+        events = _filter_replayed_events(batch, agent_state_changed)
+        return zlib.compress(json.dumps(events).encode()), batch[-1].id
+
+    window = asyncio.Semaphore(REPLAY_WINDOW)
+
+    async def send_frame(data: bytes, cursor: int, done: bool) -> bool:
+        try:
+            await asyncio.wait_for(window.acquire(), REPLAY_ACK_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f'Client {connection_id} stopped acknowledging the replay')
+            return False
+        await sio.emit(
+            'oh_event_batch',
+            {'data': data, 'cursor': cursor, 'done': done},
+            to=connection_id,
+            callback=lambda *_: window.release(),
+        )
+        return True
+
+    async for data, cursor in async_stream.batches(make_frame):
+        if not await send_frame(data, cursor, done=False):
+            return cursor
+    # The last stored state change goes last, newer ones are held until now
+    final_events = [event_to_dict(event) for event in agent_state_changed]
+    await send_frame(zlib.compress(json.dumps(final_events).encode()), cursor, True)
+    return cursor
 
 
 @sio.event
@@ -93,4 +227,11 @@ async def oh_action(connection_id: str, data: dict):
 @sio.event
 async def disconnect(connection_id: str):
     logger.info(f'sio:disconnect:{connection_id}')
+    sid = session_manager.local_connection_id_to_session_id.get(connection_id)
+    if sid is not None:
+        # The replay task may have been cancelled before it started
+        live_event_hold.release(ROOM_KEY.format(sid=sid), connection_id)
+    replay_task = _replay_tasks.pop(connection_id, None)
+    if replay_task is not None:
+        replay_task.cancel()
     await session_manager.disconnect_from_session(connection_id)
@@ -1,17 +1,21 @@
+import asyncio
+import itertools
+import json
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     HTTPException,
     Request,
     UploadFile,
     status,
 )
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pathspec import PathSpec
 from pathspec.patterns import GitWildMatchPattern
+from sse_starlette.sse import EventSourceResponse
 
 from omninexus.core.exceptions import AgentRuntimeUnavailableError
 from omninexus.core.logger import omninexus_logger as logger
@@ -35,6 +39,13 @@ from omninexus.utils.async_utils import call_sync_from_async
 
 app = APIRouter(prefix='/api/conversations/{conversation_id}')
 
+# Seconds each long-poll for workspace changes waits inside the sandbox
+FILE_CHANGES_POLL_TIMEOUT = 25
+# Long-polls hold a thread for up to FILE_CHANGES_POLL_TIMEOUT seconds, so they
+# get their own threads rather than taking the default executor's ones, which
+# serve every other route
+FILE_CHANGES_EXECUTOR = ThreadPoolExecutor(thread_name_prefix='file-changes')
+
 
 @app.get('/list-files')
 async def list_files(request: Request, conversation_id: str, path: str | None = None):
@@ -65,6 +76,26 @@ async def list_files(request: Request, conversation_id: str, path: str | None =
         )
 
     runtime: Runtime = request.state.conversation.runtime
+    try:
+        # A single call to the sandbox, which filters with the cached
+        # .gitignore rules itself
+        tree = await call_sync_from_async(runtime.list_tree, path, 1, FILES_TO_IGNORE)
+    except NotImplementedError:
+        return await _list_files_uncached(runtime, path)
+    except AgentRuntimeUnavailableError as e:
+        logger.error(f'Error listing files: {e}', exc_info=True)
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={'error': f'Error listing files: {e}'},
+        )
+    file_list = tree['files']
+    if path:
+        file_list = [os.path.join(path, f) for f in file_list]
+    return file_list
+
+
+async def _list_files_uncached(runtime: Runtime, path: str | None):
+    """List files for runtimes that cannot list cached file trees."""
     try:
         file_list = await call_sync_from_async(runtime.list_files, path)
     except AgentRuntimeUnavailableError as e:
@@ -104,6 +135,100 @@ async def list_files(request: Request, conversation_id: str, path: str | None =
     return file_list
 
 
+@app.get('/file-tree')
+async def file_tree(
+    request: Request,
+    conversation_id: str,
+    path: str | None = None,
+    max_depth: int | None = None,
+):
+    """List a directory of the workspace and all its subdirectories at once.
+
+    To get the whole workspace tree:
+    ```sh
+    curl http://localhost:3000/api/conversations/{conversation_id}/file-tree
+    ```
+
+    Args:
+        path (str, optional): The directory to list. Defaults to the workspace root.
+        max_depth (int, optional): How many levels to descend. Defaults to no limit.
+
+    Returns:
+        dict: The tree `version`, to be passed to `/file-changes`, and the
+            `files` below `path`, gitignored entries excluded.
+    """
+    if not request.state.conversation.runtime:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={'error': 'Runtime not yet initialized'},
+        )
+
+    runtime: Runtime = request.state.conversation.runtime
+    try:
+        tree = await call_sync_from_async(
+            runtime.list_tree, path, max_depth, FILES_TO_IGNORE
+        )
+    except NotImplementedError:
+        return JSONResponse(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            content={'error': 'File trees are not supported by this runtime'},
+        )
+    except AgentRuntimeUnavailableError as e:
+        logger.error(f'Error listing file tree: {e}', exc_info=True)
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={'error': f'Error listing file tree: {e}'},
+        )
+    if path:
+        tree['files'] = [os.path.join(path, f) for f in tree['files']]
+    return tree
+
+
+@app.get('/file-changes')
+async def file_changes(request: Request, conversation_id: str, since: int = 0):
+    """Push workspace changes to the client as server-sent events.
+
+    Each `change` event carries the new tree `version` and the directories
+    that changed (relative to the workspace), so the client only re-lists
+    those directories instead of polling `/list-files`.
+    """
+    if not request.state.conversation.runtime:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={'error': 'Runtime not yet initialized'},
+        )
+
+    runtime: Runtime = request.state.conversation.runtime
+    workspace = runtime.config.workspace_mount_path_in_sandbox
+
+    async def event_generator():
+        version = since
+        while not await request.is_disconnected():
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    FILE_CHANGES_EXECUTOR,
+                    runtime.wait_for_file_changes,
+                    version,
+                    FILE_CHANGES_POLL_TIMEOUT,
+                )
+            except NotImplementedError:
+                return
+            except Exception as e:
+                logger.warning(f'Error waiting for file changes: {e}')
+                await asyncio.sleep(FILE_CHANGES_POLL_TIMEOUT)
+                continue
+            if result['version'] == version:
+                continue
+            version = result['version']
+            changed = [os.path.relpath(d, workspace) for d in result['changed']]
+            yield {
+                'event': 'change',
+                'data': json.dumps({'version': version, 'changed': changed}),
+            }
+
+    return EventSourceResponse(event_generator())
+
+
 @app.get('/select-file')
 async def select_file(file: str, request: Request):
     """Retrieve the content of a specified file.
@@ -127,9 +252,9 @@ async def select_file(file: str, request: Request):
     runtime: Runtime = request.state.conversation.runtime
 
     file = os.path.join(runtime.config.workspace_mount_path_in_sandbox, file)
-    read_action = FileReadAction(file)
     try:
-        observation = await call_sync_from_async(runtime.run_action, read_action)
+        # the editor saves what it shows, so it must get the whole file
+        observation = await call_sync_from_async(runtime.read_whole_file, file)
     except AgentRuntimeUnavailableError as e:
         logger.error(f'Error opening file {file}: {e}', exc_info=True)
         return JSONResponse(
@@ -311,31 +436,28 @@ async def save_file(request: Request):
 
 
 @app.get('/zip-directory')
-async def zip_current_workspace(
-    request: Request, conversation_id: str, background_tasks: BackgroundTasks
-):
+async def zip_current_workspace(request: Request, conversation_id: str):
     try:
         logger.debug('Zipping workspace')
         runtime: Runtime = request.state.conversation.runtime
         path = runtime.config.workspace_mount_path_in_sandbox
+        zip_stream = runtime.copy_from_stream(path)
         try:
-            zip_file = await call_sync_from_async(runtime.copy_from, path)
+            # Pull the first chunk here so runtime errors surface before the
+            # response headers are sent
+            first_chunk = await call_sync_from_async(next, zip_stream, b'')
         except AgentRuntimeUnavailableError as e:
             logger.error(f'Error zipping workspace: {e}', exc_info=True)
             return JSONResponse(
                 status_code=500,
                 content={'error': f'Error zipping workspace: {e}'},
             )
-        response = FileResponse(
-            path=zip_file,
-            filename='workspace.zip',
+
+        return StreamingResponse(
+            content=itertools.chain([first_chunk], zip_stream),
             media_type='application/x-zip-compressed',
+            headers={'Content-Disposition': 'attachment; filename=workspace.zip'},
         )
-
-        # This will execute after the response is sent (So the file is not deleted before being sent)
-        background_tasks.add_task(zip_file.unlink)
-
-        return response
     except Exception as e:
         logger.error(f'Error zipping workspace: {e}', exc_info=True)
         raise HTTPException(
@@ -1,4 +1,5 @@
 import asyncio
+import time
 from typing import Callable, Optional
 
 from omninexus.controller import AgentController
@@ -14,6 +15,8 @@ from omninexus.events.stream import EventStream
 from omninexus.microagent import BaseMicroAgent
 from omninexus.runtime import get_runtime_cls
 from omninexus.runtime.base import Runtime
+from omninexus.runtime.plugins import PluginRequirement
+from omninexus.runtime.pool import RuntimePool
 from omninexus.security import SecurityAnalyzer, options
 from omninexus.storage.files import FileStore
 from omninexus.utils.async_utils import call_async_from_sync, call_sync_from_async
@@ -35,6 +38,7 @@ class AgentSession:
     file_store: FileStore
     controller: AgentController | None = None
     runtime: Runtime | None = None
+    runtime_pool: RuntimePool | None = None
     security_analyzer: SecurityAnalyzer | None = None
     _initializing: bool = False
     _closed: bool = False
@@ -45,18 +49,23 @@ class AgentSession:
         sid: str,
         file_store: FileStore,
         status_callback: Optional[Callable] = None,
+        runtime_pool: RuntimePool | None = None,
     ):
         """Initializes a new instance of the Session class
 
         Parameters:
         - sid: The session ID
         - file_store: Instance of the FileStore
+        - runtime_pool: Optional pool to take a ready runtime from
         """
 
         self.sid = sid
         self.event_stream = EventStream(sid, file_store)
         self.file_store = file_store
         self._status_callback = status_callback
+        self.runtime_pool = runtime_pool
+        self._runtime_args: tuple[str, AppConfig, list[PluginRequirement]] | None = None
+        self._runtime_dirty = False
 
     async def start(
         self,
@@ -138,7 +147,17 @@ class AgentSession:
             end_state.save_to_session(self.sid, self.file_store)
             await self.controller.close()
         if self.runtime is not None:
-            self.runtime.close()
+            if self.runtime_pool is not None and self._runtime_args is not None:
+                runtime_name, config, plugins = self._runtime_args
+                self.runtime_pool.release(
+                    self.runtime,
+                    runtime_name,
+                    config,
+                    plugins,
+                    dirty=self._runtime_dirty,
+                )
+            else:
+                self.runtime.close()
         if self.security_analyzer is not None:
             await self.security_analyzer.close()
 
@@ -179,7 +198,7 @@ class AgentSession:
             raise RuntimeError('Runtime already created')
 
         logger.debug(f'Initializing runtime `{runtime_name}` now...')
-        runtime_cls = get_runtime_cls(runtime_name)
+        start_time = time.time()
         env_vars = (
             {
                 'GITHUB_TOKEN': github_token,
@@ -187,30 +206,50 @@ class AgentSession:
             if github_token
             else None
         )
-        self.runtime = runtime_cls(
-            config=config,
-            event_stream=self.event_stream,
-            sid=self.sid,
-            plugins=agent.sandbox_plugins,
-            status_callback=self._status_callback,
-            headless_mode=False,
-            env_vars=env_vars,
-        )
+        # Session-specific setup must not leak into runtimes reused by others
+        self._runtime_dirty = env_vars is not None or bool(selected_repository)
+        self._runtime_args = (runtime_name, config, agent.sandbox_plugins)
+
+        if self.runtime_pool is not None:
+            self.runtime = await self.runtime_pool.acquire(
+                runtime_name,
+                config,
+                agent.sandbox_plugins,
+                self.event_stream,
+                status_callback=self._status_callback,
+            )
+        pool_hit = self.runtime is not None
+        if self.runtime is not None:
+            if env_vars:
+                await call_sync_from_async(self.runtime.add_env_vars, env_vars)
+        else:
+            runtime_cls = get_runtime_cls(runtime_name)
+            self.runtime = runtime_cls(
+                config=config,
+                event_stream=self.event_stream,
+                sid=self.sid,
+                plugins=agent.sandbox_plugins,
+                status_callback=self._status_callback,
+                headless_mode=False,
+                env_vars=env_vars,
+            )
 
-        # FIXME: this sleep is a terrible hack.
-        # This is to give the websocket a second to connect, so that
-        # the status messages make it through to the frontend.
-        # We should find a better way to plumb status messages through.
-        await asyncio.sleep(1)
-        try:
-            await self.runtime.connect()
-        except AgentRuntimeUnavailableError as e:
-            logger.error(f'Runtime initialization failed: {e}', exc_info=True)
-            if self._status_callback:
-                self._status_callback(
-                    'error', 'STATUS$ERROR_RUNTIME_DISCONNECTED', str(e)
-                )
-            return
+            # FIXME: this sleep is a terrible hack.
+            # This is to give the websocket a second to connect, so that
+            # the status messages make it through to the frontend.
+            # We should find a better way to plumb status messages through.
+            await asyncio.sleep(1)
+            try:
+                await self.runtime.connect()
+            except AgentRuntimeUnavailableError as e:
+                logger.error(f'Runtime initialization failed: {e}', exc_info=True)
+                if self._status_callback:
+                    self._status_callback(
+                        'error', 'STATUS$ERROR_RUNTIME_DISCONNECTED', str(e)
+                    )
+                return
+        if self.runtime_pool is not None:
+            self.runtime_pool.record_ready_time(time.time() - start_time, pool_hit)
 
         if selected_repository:
             await call_sync_from_async(
@@ -6,10 +6,12 @@ from uuid import uuid4
 
 import socketio
 
+from omninexus.controller.agent import Agent
 from omninexus.core.config import AppConfig
 from omninexus.core.exceptions import AgentRuntimeUnavailableError
 from omninexus.core.logger import omninexus_logger as logger
 from omninexus.events.stream import EventStream, session_exists
+from omninexus.runtime.pool import RuntimePool
 from omninexus.server.session.conversation import Conversation
 from omninexus.server.session.session import ROOM_KEY, Session
 from omninexus.server.settings import Settings
@@ -55,12 +57,22 @@ class SessionManager:
     _has_remote_connections_flags: dict[str, asyncio.Event] = field(
         default_factory=dict
     )
+    runtime_pool: RuntimePool | None = None
 
     async def __aenter__(self):
         redis_client = self._get_redis_client()
         if redis_client:
             self._redis_listen_task = asyncio.create_task(self._redis_subscribe())
         self._cleanup_task = asyncio.create_task(self._cleanup_detached_conversations())
+        if self.config.sandbox.runtime_pool_size > 0:
+            self.runtime_pool = RuntimePool(self.config.sandbox.runtime_pool_size)
+            try:
+                agent_cls = Agent.get_cls(self.config.default_agent)
+                self.runtime_pool.prewarm(
+                    self.config.runtime, self.config, agent_cls.sandbox_plugins
+                )
+            except Exception as e:
+                logger.warning(f'Could not prewarm the runtime pool: {e}')
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
@@ -70,6 +82,9 @@ class SessionManager:
         if self._cleanup_task:
             self._cleanup_task.cancel()
             self._cleanup_task = None
+        if self.runtime_pool:
+            await call_sync_from_async(self.runtime_pool.close)
+            self.runtime_pool = None
 
     def _get_redis_client(self):
         redis_client = getattr(self.sio.manager, 'redis', None)
@@ -352,7 +367,11 @@ class SessionManager:
         if not await self.is_agent_loop_running(sid):
             logger.info(f'start_agent_loop:{sid}')
             session = Session(
-                sid=sid, file_store=self.file_store, config=self.config, sio=self.sio
+                sid=sid,
+                file_store=self.file_store,
+                config=self.config,
+                sio=self.sio,
+                runtime_pool=self.runtime_pool,
             )
             self._local_agent_loops_by_sid[sid] = session
             asyncio.create_task(session.initialize_agent(settings))
@@ -0,0 +1,189 @@
+"""Outbound queue that coalesces the messages of a session into batch frames.
+
+Messages sent within a short window of each other are emitted together as
+one `oh_event_batch` frame instead of one `oh_event` per message. Status
+messages still waiting in the queue are dropped when a newer one arrives,
+since the client only ever shows the latest; errors are always delivered.
+With a window of 0 and batches of one message, the queue only serializes
+the emits, so messages leave in the order they were put.
+
+`LiveEventHold` keeps the live messages of a room away from connections
+whose replay is still running.
+"""
+
+import asyncio
+import zlib
+from typing import Awaitable, Callable
+
+from omninexus.core.logger import omninexus_logger as logger
+from omninexus.core.utils import json
+
+
+def is_superseded_status(message: dict) -> bool:
+    """Whether a later status message makes `message` obsolete."""
+    return bool(message.get('status_update')) and message.get('type') != 'error'
+
+
+def encode_batch(messages: list[dict], compress: bool) -> dict:
+    """Build an `oh_event_batch` frame.
+
+    Compressed frames carry zlib-compressed JSON in `data`, like replay
+    frames; uncompressed ones carry the messages as a list in `events`.
+    """
+    if compress:
+        return {'data': zlib.compress(json.dumps(messages).encode())}
+    return {'events': messages}
+
+
+def decode_batch(event_name: str, payload: dict) -> list[dict]:
+    """The messages of a frame built by `OutboundQueue`."""
+    if event_name != 'oh_event_batch':
+        return [payload]
+    if 'events' in payload:
+        return payload['events']
+    return json.loads(zlib.decompress(payload['data']))
+
+
+class LiveEventHold:
+    """Live messages held back from connections that are replaying events.
+
+    A (re)connecting client joins the room of its conversation before the
+    replay has read the stored events, so live messages would otherwise
+    reach it in between replay frames, and be followed by the stale agent
+    state the replay ends with. While a connection is held, room frames
+    skip it and their messages are kept for it; `take` hands them over once
+    the replay is done, without those the replay already covered.
+
+    Only messages of sessions running in this process are held. Must be
+    used from the event loop.
+    """
+
+    def __init__(self):
+        # Held messages by room and connection
+        self._held: dict[str, dict[str, list[dict]]] = {}
+
+    def hold(self, room: str, connection_id: str) -> None:
+        self._held.setdefault(room, {})[connection_id] = []
+
+    def add_frame(self, room: str, event_name: str, payload: dict) -> list[str]:
+        """Keep the messages of a room frame, returning the held connections."""
+        connections = self._held.get(room)
+        if not connections:
+            return []
+        messages = decode_batch(event_name, payload)
+        for held in connections.values():
+            held.extend(messages)
+        return list(connections)
+
+    def take(self, room: str, connection_id: str, cursor: int) -> list[dict]:
+        """Remove and return the messages held for a connection.
+
+        Events up to `cursor`, the last one the replay read, are left out.
+        """
+        held = self._held.get(room, {}).get(connection_id)
+        if not held:
+            return []
+        messages = [
+            message
+            for message in held
+            if not isinstance(message.get('id'), int) or message['id'] > cursor
+        ]
+        held.clear()
+        return messages
+
+    def release(self, room: str, connection_id: str) -> None:
+        connections = self._held.get(room, {})
+        connections.pop(connection_id, None)
+        if not connections:
+            self._held.pop(room, None)
+
+
+live_event_hold = LiveEventHold()
+
+
+async def emit_to_room(sio, room: str, event_name: str, payload: dict) -> None:
+    """Emit a frame to a room, holding it for connections that are replaying."""
+    held = live_event_hold.add_frame(room, event_name, payload)
+    await sio.emit(event_name, payload, to=room, skip_sid=held or None)
+
+
+class OutboundQueue:
+    """Per-room queue of messages waiting to be emitted.
+
+    Must be used from the event loop it was created on.
+
+    Args:
+        emit: Sends one frame: called with the event name and its payload.
+        window: Seconds to wait for more messages after the first one.
+        max_batch: Number of messages that triggers a flush before the window ends.
+        compress: Whether to compress the batch frames.
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[str, dict], Awaitable[None]],
+        window: float = 0.02,
+        max_batch: int = 100,
+        compress: bool = False,
+    ):
+        self.emit = emit
+        self.window = window
+        self.max_batch = max_batch
+        self.compress = compress
+        self._pending: list[dict] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flushing: asyncio.Task | None = None
+        self.dropped_status_messages = 0
+
+    def put(self, message: dict) -> None:
+        if message.get('status_update'):
+            before = len(self._pending)
+            self._pending = [m for m in self._pending if not is_superseded_status(m)]
+            self.dropped_status_messages += before - len(self._pending)
+        self._pending.append(message)
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush(0)
+        elif self._flush_handle is None:
+            self._schedule_flush(self.window)
+
+    def _schedule_flush(self, delay: float) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._flush_handle = loop.call_later(delay, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._flush_handle = None
+        if self._flushing is not None and not self._flushing.done():
+            # The running flush picks up what has been queued meanwhile
+            return
+        self._flushing = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> None:
+        """Emit everything queued, in order, as few frames as possible.
+
+        A frame that fails to send is dropped; the messages after it are
+        still sent.
+        """
+        while self._pending:
+            batch = self._pending[: self.max_batch]
+            del self._pending[: self.max_batch]
+            try:
+                if len(batch) == 1:
+                    await self.emit('oh_event', batch[0])
+                else:
+                    await self.emit(
+                        'oh_event_batch', encode_batch(batch, self.compress)
+                    )
+            except Exception:
+                logger.error(
+                    f'Error sending a frame of {len(batch)} messages, '
+                    f'{len(self._pending)} still queued',
+                    exc_info=True,
+                )
+
+    def close(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending.clear()
@@ -1,5 +1,6 @@
 import asyncio
 import time
+from concurrent.futures import Future
 from copy import deepcopy
 
 import socketio
@@ -20,8 +21,10 @@ from omninexus.events.observation.error import ErrorObservation
 from omninexus.events.serialization import event_from_dict, event_to_dict
 from omninexus.events.stream import EventStreamSubscriber
 from omninexus.llm.llm import LLM
+from omninexus.runtime.pool import RuntimePool
 from omninexus.server.session.agent_session import AgentSession
 from omninexus.server.session.conversation_init_data import ConversationInitData
+from omninexus.server.session.outbound import OutboundQueue, emit_to_room
 from omninexus.server.settings import Settings
 from omninexus.storage.files import FileStore
 
@@ -46,13 +49,17 @@ class Session:
         file_store: FileStore,
         sio: socketio.AsyncServer | None,
         user_id: int | None = None,
+        runtime_pool: RuntimePool | None = None,
     ):
         self.sid = sid
         self.sio = sio
         self.last_active_ts = int(time.time())
         self.file_store = file_store
         self.agent_session = AgentSession(
-            sid, file_store, status_callback=self.queue_status_message
+            sid,
+            file_store,
+            status_callback=self.queue_status_message,
+            runtime_pool=runtime_pool,
         )
         self.agent_session.event_stream.subscribe(
             EventStreamSubscriber.SERVER, self.on_event, self.sid
@@ -61,9 +68,21 @@ class Session:
         self.config = deepcopy(config)
         self.loop = asyncio.get_event_loop()
         self.user_id = user_id
+        # Emits outgoing messages in order, coalesced into batch frames if
+        # enabled, otherwise one frame per message
+        if self.config.socket_batch_window_ms > 0:
+            self.outbound = OutboundQueue(
+                self._emit,
+                window=self.config.socket_batch_window_ms / 1000,
+                max_batch=self.config.socket_batch_max_events,
+                compress=self.config.socket_batch_compression,
+            )
+        else:
+            self.outbound = OutboundQueue(self._emit, window=0, max_batch=1)
 
     def close(self):
         self.is_alive = False
+        self.outbound.close()
         self.agent_session.close()
 
     async def initialize_agent(
@@ -123,7 +142,21 @@ class Session:
             return
 
     def on_event(self, event: Event):
-        asyncio.get_event_loop().run_until_complete(self._on_event(event))
+        # Hand the event over to the server loop instead of blocking this thread.
+        # The coroutines start in the order of the events and put their
+        # messages into the outbound queue before awaiting anything, which
+        # keeps that order on the wire. The queue is not bounded: a slow
+        # client makes it grow instead of slowing down the agent.
+        future = asyncio.run_coroutine_threadsafe(self._on_event(event), self.loop)
+        future.add_done_callback(self._log_event_error)
+
+    def _log_event_error(self, future: Future) -> None:
+        if future.cancelled() or future.exception() is None:
+            return
+        logger.error(
+            f'Error handling event for session {self.sid}',
+            exc_info=future.exception(),
+        )
 
     async def _on_event(self, event: Event):
         """Callback function for events that mainly come from the agent.
@@ -174,23 +207,26 @@ class Session:
 
     async def send(self, data: dict[str, object]):
         if asyncio.get_running_loop() != self.loop:
-            self.loop.create_task(self._send(data))
+            self.loop.call_soon_threadsafe(self._enqueue, data)
             return
-        await self._send(data)
+        self._enqueue(data)
+
+    def _enqueue(self, data: dict[str, object]) -> None:
+        if self.is_alive:
+            self.outbound.put(data)
 
-    async def _send(self, data: dict[str, object]) -> bool:
+    async def _emit(self, event_name: str, data: dict) -> None:
         try:
             if not self.is_alive:
-                return False
+                return
             if self.sio:
-                await self.sio.emit('oh_event', data, to=ROOM_KEY.format(sid=self.sid))
-            await asyncio.sleep(0.001)  # This flushes the data to the client
+                await emit_to_room(
+                    self.sio, ROOM_KEY.format(sid=self.sid), event_name, data
+                )
             self.last_active_ts = int(time.time())
-            return True
         except RuntimeError:
             logger.error('Error sending', stack_info=True, exc_info=True)
             self.is_alive = False
-            return False
 
     async def send_error(self, message: str):
         """Sends an error message to the client."""
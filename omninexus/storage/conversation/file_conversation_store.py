@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import bisect
+import json
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -18,11 +21,22 @@ from omninexus.storage.locations import (
     CONVERSATION_BASE_DIR,
     get_conversation_metadata_filename,
 )
-from omninexus.utils.async_utils import call_sync_from_async
-from omninexus.utils.search_utils import offset_to_page_id, page_id_to_offset
+from omninexus.utils.async_utils import call_sync_from_async, wait_all
+from omninexus.utils.search_utils import (
+    cursor_to_page_id,
+    page_id_to_cursor,
+    page_id_to_offset,
+)
 
 conversation_metadata_type_adapter = TypeAdapter(ConversationMetadata)
 
+# Sorted (created_at, conversation_id) pairs of all conversations in a store
+CONVERSATION_INDEX_FILENAME = '.index.json'
+CONVERSATION_INDEX_VERSION = 1
+IndexEntry = tuple[str, str]
+# Serializes the read-modify-write cycles on the index files of this process
+_index_lock = threading.Lock()
+
 
 @dataclass
 class FileConversationStore(ConversationStore):
@@ -31,7 +45,11 @@ class FileConversationStore(ConversationStore):
     async def save_metadata(self, metadata: ConversationMetadata):
         json_str = conversation_metadata_type_adapter.dump_json(metadata)
         path = self.get_conversation_metadata_filename(metadata.conversation_id)
+        is_new = not await self.exists(metadata.conversation_id)
         await call_sync_from_async(self.file_store.write, path, json_str)
+        # The sort key never changes, so only new conversations touch the index
+        if is_new:
+            await call_sync_from_async(self._update_index, _index_entry(metadata), None)
 
     async def get_metadata(self, conversation_id: str) -> ConversationMetadata:
         path = self.get_conversation_metadata_filename(conversation_id)
@@ -44,6 +62,7 @@ class FileConversationStore(ConversationStore):
             Path(self.get_conversation_metadata_filename(conversation_id)).parent
         )
         await call_sync_from_async(self.file_store.delete, path)
+        await call_sync_from_async(self._update_index, None, conversation_id)
 
     async def exists(self, conversation_id: str) -> bool:
         path = self.get_conversation_metadata_filename(conversation_id)
@@ -58,33 +77,128 @@ class FileConversationStore(ConversationStore):
         page_id: str | None = None,
         limit: int = 20,
     ) -> ConversationMetadataResultSet:
-        conversations: list[ConversationMetadata] = []
+        """Return one page of conversations, newest first.
+
+        Only the index and the metadata of the conversations on the page are
+        read. Stores without an index get one built by a full scan first.
+        """
+        entries = await call_sync_from_async(self._read_index)
+        if entries is None:
+            entries = await self.rebuild_index()
+        # Entries are sorted oldest first; a page ends right before its cursor
+        end = _page_id_to_index_position(page_id, entries)
+        start = max(end - limit, 0)
+        page = entries[start:end][::-1]
+        results = await wait_all(
+            self._get_metadata_or_none(conversation_id) for _, conversation_id in page
+        )
+        conversations = [result for result in results if result is not None]
+        next_page_id = cursor_to_page_id(entries[start]) if start > 0 else None
+        return ConversationMetadataResultSet(conversations, next_page_id)
+
+    async def rebuild_index(self) -> list[IndexEntry]:
+        """Rebuild the index from the metadata files, e.g. for a store written
+        before the index existed or by another process. Returns the entries."""
+        scanned = {}
+        for conversation_id in await call_sync_from_async(self._list_conversation_ids):
+            metadata = await self._get_metadata_or_none(conversation_id)
+            if metadata is not None:
+                scanned[conversation_id] = _index_entry(metadata)
+        entries = await call_sync_from_async(self._write_rebuilt_index, scanned)
+        logger.info(
+            f'Indexed {len(entries)} conversations in '
+            f'{self.get_conversation_metadata_dir()}'
+        )
+        return entries
+
+    def _list_conversation_ids(self) -> list[str]:
         metadata_dir = self.get_conversation_metadata_dir()
         try:
-            conversation_ids = [
-                path.split('/')[-2]
-                for path in self.file_store.list(metadata_dir)
-                if not path.startswith(f'{metadata_dir}/.')
-            ]
+            paths = self.file_store.list(metadata_dir)
         except FileNotFoundError:
-            return ConversationMetadataResultSet([])
-        num_conversations = len(conversation_ids)
-        start = page_id_to_offset(page_id)
-        end = min(limit + start, num_conversations)
-        conversations = []
-        for conversation_id in conversation_ids:
-            try:
-                conversations.append(await self.get_metadata(conversation_id))
-            except Exception:
-                logger.warning(
-                    f'Error loading conversation: {conversation_id}',
-                    exc_info=True,
-                    stack_info=True,
-                )
-        conversations.sort(key=_sort_key, reverse=True)
-        conversations = conversations[start:end]
-        next_page_id = offset_to_page_id(end, end < num_conversations)
-        return ConversationMetadataResultSet(conversations, next_page_id)
+            return []
+        return [
+            path.split('/')[-2]
+            for path in paths
+            if not path.startswith(f'{metadata_dir}/.')
+        ]
+
+    def _write_rebuilt_index(self, scanned: dict[str, IndexEntry]) -> list[IndexEntry]:
+        # Conversations saved or deleted during the scan left the index alone,
+        # as there was none yet, so the listing is repeated under the lock;
+        # changes made after it find the new index and update it themselves
+        with _index_lock:
+            entries = []
+            for conversation_id in self._list_conversation_ids():
+                entry = scanned.get(conversation_id)
+                if entry is None:
+                    try:
+                        path = self.get_conversation_metadata_filename(conversation_id)
+                        metadata = conversation_metadata_type_adapter.validate_json(
+                            self.file_store.read(path)
+                        )
+                    except Exception:
+                        logger.warning(
+                            f'Error loading conversation: {conversation_id}',
+                            exc_info=True,
+                        )
+                        continue
+                    entry = _index_entry(metadata)
+                entries.append(entry)
+            entries.sort()
+            self._write_index(entries)
+        return entries
+
+    async def _get_metadata_or_none(
+        self, conversation_id: str
+    ) -> ConversationMetadata | None:
+        try:
+            return await self.get_metadata(conversation_id)
+        except Exception:
+            logger.warning(
+                f'Error loading conversation: {conversation_id}',
+                exc_info=True,
+                stack_info=True,
+            )
+            return None
+
+    def get_conversation_index_filename(self) -> str:
+        return f'{self.get_conversation_metadata_dir()}/{CONVERSATION_INDEX_FILENAME}'
+
+    def _read_index(self) -> list[IndexEntry] | None:
+        try:
+            data = json.loads(
+                self.file_store.read(self.get_conversation_index_filename())
+            )
+        except (FileNotFoundError, ValueError):
+            return None
+        if data.get('version') != CONVERSATION_INDEX_VERSION:
+            return None
+        return [
+            (created_at, conversation_id)
+            for created_at, conversation_id in data['entries']
+        ]
+
+    def _write_index(self, entries: list[IndexEntry]) -> None:
+        self.file_store.write(
+            self.get_conversation_index_filename(),
+            json.dumps({'version': CONVERSATION_INDEX_VERSION, 'entries': entries}),
+        )
+
+    def _update_index(
+        self, add: IndexEntry | None, remove_conversation_id: str | None
+    ) -> None:
+        with _index_lock:
+            entries = self._read_index()
+            if entries is None:
+                # Built on the next search, from the metadata written by then
+                return
+            if remove_conversation_id is not None:
+                entries = [e for e in entries if e[1] != remove_conversation_id]
+            if add is not None:
+                entries = [e for e in entries if e[1] != add[1]]
+                bisect.insort(entries, add)
+            self._write_index(entries)
 
     def get_conversation_metadata_dir(self) -> str:
         return CONVERSATION_BASE_DIR
@@ -105,3 +219,18 @@ def _sort_key(conversation: ConversationMetadata) -> str:
     if created_at:
         return created_at.isoformat()  # YYYY-MM-DDTHH:MM:SS for sorting
     return ''
+
+
+def _index_entry(conversation: ConversationMetadata) -> IndexEntry:
+    return _sort_key(conversation), conversation.conversation_id
+
+
+def _page_id_to_index_position(page_id: str | None, entries: list[IndexEntry]) -> int:
+    """Position in `entries` right after the last one on the requested page."""
+    if not page_id:
+        return len(entries)
+    cursor = page_id_to_cursor(page_id)
+    if isinstance(cursor, int):
+        # Offset from before the index existed
+        return max(len(entries) - page_id_to_offset(page_id), 0)
+    return bisect.bisect_left(entries, cursor)
@@ -0,0 +1,35 @@
+"""Rebuild the conversation index of a file-based conversation store.
+
+Usage:
+    python -m omninexus.storage.conversation.rebuild_index [--config-file config.toml]
+"""
+
+import argparse
+import asyncio
+
+from omninexus.core.config import load_app_config
+from omninexus.storage.conversation.file_conversation_store import (
+    FileConversationStore,
+)
+
+
+async def rebuild_index(config_file: str) -> int:
+    config = load_app_config(config_file=config_file)
+    conversation_store = await FileConversationStore.get_instance(config, None)
+    entries = await conversation_store.rebuild_index()
+    return len(entries)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Rebuild the index used to list conversations.'
+    )
+    parser.add_argument(
+        '--config-file',
+        type=str,
+        default='config.toml',
+        help='Path to the config file with the file store settings.',
+    )
+    args = parser.parse_args()
+    count = asyncio.run(rebuild_index(args.config_file))
+    print(f'Indexed {count} conversations')
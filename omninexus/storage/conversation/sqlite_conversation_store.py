@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+
+from omninexus.core.config.app_config import AppConfig
+from omninexus.storage.conversation.conversation_store import ConversationStore
+from omninexus.storage.data_models.conversation_metadata import ConversationMetadata
+from omninexus.storage.data_models.conversation_metadata_result_set import (
+    ConversationMetadataResultSet,
+)
+from omninexus.storage.sqlite import (
+    SQLiteConnectionPool,
+    get_sqlite_path,
+    get_sqlite_pool,
+    user_key,
+)
+from omninexus.utils.async_utils import call_sync_from_async
+from omninexus.utils.search_utils import (
+    cursor_to_page_id,
+    page_id_to_cursor,
+    page_id_to_offset,
+)
+
+CONVERSATION_COLUMNS = (
+    'conversation_id',
+    'github_user_id',
+    'selected_repository',
+    'title',
+    'last_updated_at',
+    'created_at',
+)
+
+
+def _to_row(metadata: ConversationMetadata) -> tuple:
+    return (
+        metadata.conversation_id,
+        metadata.github_user_id,
+        metadata.selected_repository,
+        metadata.title,
+        metadata.last_updated_at.isoformat() if metadata.last_updated_at else None,
+        metadata.created_at.isoformat() if metadata.created_at else '',
+    )
+
+
+def _from_row(row: sqlite3.Row) -> ConversationMetadata:
+    return ConversationMetadata(
+        conversation_id=row['conversation_id'],
+        github_user_id=row['github_user_id'],
+        selected_repository=row['selected_repository'],
+        title=row['title'],
+        last_updated_at=(
+            datetime.fromisoformat(row['last_updated_at'])
+            if row['last_updated_at']
+            else None
+        ),
+        created_at=datetime.fromisoformat(row['created_at']),
+    )
+
+
+@dataclass
+class SQLiteConversationStore(ConversationStore):
+    """Conversation metadata in a table indexed by (user, creation time), so a
+    page of search results is one indexed range query.
+
+    Every operation is scoped to the user of the store: conversations of
+    other users are neither found nor deleted.
+    """
+
+    pool: SQLiteConnectionPool
+    user_id: int | None = None
+
+    def save_metadata_batch(self, conversations: list[ConversationMetadata]) -> None:
+        placeholders = ', '.join('?' * (len(CONVERSATION_COLUMNS) + 1))
+        with self.pool.connection() as conn:
+            conn.executemany(
+                f'INSERT OR REPLACE INTO conversations '
+                f'(user_id, {", ".join(CONVERSATION_COLUMNS)}) VALUES ({placeholders})',
+                [
+                    (user_key(self.user_id), *_to_row(metadata))
+                    for metadata in conversations
+                ],
+            )
+
+    async def save_metadata(self, metadata: ConversationMetadata):
+        await call_sync_from_async(self.save_metadata_batch, [metadata])
+
+    def _get_metadata(self, conversation_id: str) -> ConversationMetadata:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                f'SELECT {", ".join(CONVERSATION_COLUMNS)} FROM conversations '
+                'WHERE conversation_id = ? AND user_id = ?',
+                (conversation_id, user_key(self.user_id)),
+            ).fetchone()
+        if row is None:
+            raise FileNotFoundError(conversation_id)
+        return _from_row(row)
+
+    async def get_metadata(self, conversation_id: str) -> ConversationMetadata:
+        return await call_sync_from_async(self._get_metadata, conversation_id)
+
+    def _delete_metadata(self, conversation_id: str) -> None:
+        with self.pool.connection() as conn:
+            conn.execute(
+                'DELETE FROM conversations WHERE conversation_id = ? AND user_id = ?',
+                (conversation_id, user_key(self.user_id)),
+            )
+
+    async def delete_metadata(self, conversation_id: str) -> None:
+        await call_sync_from_async(self._delete_metadata, conversation_id)
+
+    def _exists(self, conversation_id: str) -> bool:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                'SELECT 1 FROM conversations WHERE conversation_id = ? AND user_id = ?',
+                (conversation_id, user_key(self.user_id)),
+            ).fetchone()
+        return row is not None
+
+    async def exists(self, conversation_id: str) -> bool:
+        return await call_sync_from_async(self._exists, conversation_id)
+
+    def _search(self, page_id: str | None, limit: int) -> ConversationMetadataResultSet:
+        query = (
+            f'SELECT {", ".join(CONVERSATION_COLUMNS)} FROM conversations '
+            'WHERE user_id = ?'
+        )
+        params: list = [user_key(self.user_id)]
+        offset = 0
+        if page_id:
+            cursor = page_id_to_cursor(page_id)
+            if isinstance(cursor, int):
+                offset = page_id_to_offset(page_id)
+            else:
+                query += ' AND (created_at, conversation_id) < (?, ?)'
+                params.extend(cursor)
+        # One more row than needed tells whether there is a next page
+        query += ' ORDER BY created_at DESC, conversation_id DESC LIMIT ? OFFSET ?'
+        params.extend([limit + 1, offset])
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        conversations = [_from_row(row) for row in rows[:limit]]
+        next_page_id = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_page_id = cursor_to_page_id(
+                [last['created_at'], last['conversation_id']]
+            )
+        return ConversationMetadataResultSet(conversations, next_page_id)
+
+    async def search(
+        self,
+        page_id: str | None = None,
+        limit: int = 20,
+    ) -> ConversationMetadataResultSet:
+        return await call_sync_from_async(self._search, page_id, limit)
+
+    @classmethod
+    async def get_instance(
+        cls, config: AppConfig, user_id: int | None
+    ) -> SQLiteConversationStore:
+        pool = await call_sync_from_async(get_sqlite_pool, get_sqlite_path(config))
+        return SQLiteConversationStore(pool, user_id)
@@ -10,6 +10,10 @@ class FileStore:
     def read(self, path: str) -> str:
         pass
 
+    def read_bytes(self, path: str) -> bytes:
+        # stores that can hold binary contents read them back unchanged
+        return self.read(path).encode('utf-8')
+
     @abstractmethod
     def list(self, path: str) -> list[str]:
         pass
@@ -33,6 +33,14 @@ class GoogleCloudFileStore(FileStore):
         except NotFound as err:
             raise FileNotFoundError(err)
 
+    def read_bytes(self, path: str) -> bytes:
+        blob = self.bucket.blob(path)
+        try:
+            with blob.open('rb') as f:
+                return f.read()
+        except NotFound as err:
+            raise FileNotFoundError(err)
+
     def list(self, path: str) -> List[str]:
         if not path or path == '/':
             path = ''
@@ -7,20 +7,29 @@ IN_MEMORY_FILES: dict = {}
 
 
 class InMemoryFileStore(FileStore):
-    files: dict[str, str]
+    files: dict[str, str | bytes]
 
-    def __init__(self, files: dict[str, str] = IN_MEMORY_FILES):
+    def __init__(self, files: dict[str, str | bytes] = IN_MEMORY_FILES):
         self.files = files
 
     def write(self, path: str, contents: str | bytes) -> None:
-        if isinstance(contents, bytes):
-            contents = contents.decode('utf-8')
         self.files[path] = contents
 
     def read(self, path: str) -> str:
         if path not in self.files:
             raise FileNotFoundError(path)
-        return self.files[path]
+        contents = self.files[path]
+        if isinstance(contents, bytes):
+            return contents.decode('utf-8')
+        return contents
+
+    def read_bytes(self, path: str) -> bytes:
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        contents = self.files[path]
+        if isinstance(contents, str):
+            return contents.encode('utf-8')
+        return contents
 
     def list(self, path: str) -> list[str]:
         files = []
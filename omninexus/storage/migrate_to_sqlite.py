@@ -0,0 +1,97 @@
+"""Copy the settings and conversation metadata of the file stores into SQLite.
+
+Usage:
+    python -m omninexus.storage.migrate_to_sqlite [--config-file config.toml]
+
+The file stores are left untouched, so the migration can be repeated; rows
+already in the database are overwritten. Conversations are stored under the
+GitHub user id in their metadata, the id the routes look them up by. The
+file settings are shared by all users and go to user 0 (no GitHub login)
+unless another user is given. Afterwards select the SQLite stores
+with OMNINEXUS_SETTINGS_STORE_CLS and OMNINEXUS_CONVERSATION_STORE_CLS.
+"""
+
+import argparse
+import asyncio
+
+from omninexus.core.config import load_app_config
+from omninexus.core.logger import omninexus_logger as logger
+from omninexus.storage.conversation.file_conversation_store import (
+    FileConversationStore,
+)
+from omninexus.storage.conversation.sqlite_conversation_store import (
+    SQLiteConversationStore,
+)
+from omninexus.storage.data_models.conversation_metadata import ConversationMetadata
+from omninexus.storage.settings.file_settings_store import FileSettingsStore
+from omninexus.storage.settings.sqlite_settings_store import SQLiteSettingsStore
+from omninexus.utils.async_utils import call_sync_from_async
+
+# Conversations written per transaction
+MIGRATION_BATCH_SIZE = 500
+
+
+async def migrate_to_sqlite(
+    config_file: str, settings_user_id: int | None = None
+) -> tuple[bool, int]:
+    """Returns whether settings were migrated and the number of conversations."""
+    config = load_app_config(config_file=config_file)
+
+    settings = await (await FileSettingsStore.get_instance(config, None)).load()
+    if settings is not None:
+        sqlite_settings_store = await SQLiteSettingsStore.get_instance(
+            config, settings_user_id
+        )
+        await sqlite_settings_store.store(settings)
+
+    file_conversation_store = await FileConversationStore.get_instance(config, None)
+    entries = await file_conversation_store.rebuild_index()
+    batches: dict[int | None, list[ConversationMetadata]] = {}
+    count = 0
+
+    async def save(user_id: int | None) -> None:
+        nonlocal count
+        store = await SQLiteConversationStore.get_instance(config, user_id)
+        batch = batches.pop(user_id)
+        await call_sync_from_async(store.save_metadata_batch, batch)
+        count += len(batch)
+
+    for _, conversation_id in entries:
+        try:
+            metadata = await file_conversation_store.get_metadata(conversation_id)
+        except Exception:
+            logger.warning(f'Skipping conversation {conversation_id}', exc_info=True)
+            continue
+        batch = batches.setdefault(metadata.github_user_id, [])
+        batch.append(metadata)
+        if len(batch) >= MIGRATION_BATCH_SIZE:
+            await save(metadata.github_user_id)
+    for user_id in list(batches):
+        await save(user_id)
+    return settings is not None, count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Migrate settings and conversation metadata from files to SQLite.'
+    )
+    parser.add_argument(
+        '--config-file',
+        type=str,
+        default='config.toml',
+        help='Path to the config file with the file store and SQLite settings.',
+    )
+    parser.add_argument(
+        '--settings-user-id',
+        type=int,
+        default=None,
+        help='GitHub user id to store the settings under (default: no login).',
+    )
+    args = parser.parse_args()
+    migrated_settings, count = asyncio.run(
+        migrate_to_sqlite(args.config_file, args.settings_user_id)
+    )
+    print(
+        f'Migrated {count} conversations'
+        + (' and the settings' if migrated_settings else '')
+    )
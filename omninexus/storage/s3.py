@@ -29,6 +29,13 @@ class S3FileStore(FileStore):
         except Exception as e:
             raise FileNotFoundError(f'Failed to read from S3 at path {path}: {e}')
 
+    def read_bytes(self, path: str) -> bytes:
+        assert self.bucket is not None, 'AWS_S3_BUCKET is not set'
+        try:
+            return self.client.get_object(self.bucket, path).data
+        except Exception as e:
+            raise FileNotFoundError(f'Failed to read from S3 at path {path}: {e}')
+
     def list(self, path: str) -> list[str]:
         if path and path != '/' and not path.endswith('/'):
             path += '/'
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+
+from omninexus.core.config.app_config import AppConfig
+from omninexus.server.settings import Settings
+from omninexus.storage.settings.settings_store import SettingsStore
+from omninexus.storage.sqlite import (
+    SQLiteConnectionPool,
+    get_sqlite_path,
+    get_sqlite_pool,
+    user_key,
+)
+from omninexus.utils.async_utils import call_sync_from_async
+
+
+@dataclass
+class SQLiteSettingsStore(SettingsStore):
+    pool: SQLiteConnectionPool
+    user_id: int | None = None
+
+    @property
+    def _key(self) -> str:
+        return str(user_key(self.user_id))
+
+    def _load(self) -> Settings | None:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                'SELECT data FROM settings WHERE user_id = ?', (self._key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return Settings(**json.loads(row['data']))
+
+    def _store(self, settings: Settings) -> None:
+        with self.pool.connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO settings (user_id, data) VALUES (?, ?)',
+                (self._key, json.dumps(settings.__dict__)),
+            )
+
+    async def load(self) -> Settings | None:
+        return await call_sync_from_async(self._load)
+
+    async def store(self, settings: Settings):
+        await call_sync_from_async(self._store, settings)
+
+    @classmethod
+    async def get_instance(
+        cls, config: AppConfig, user_id: int | None
+    ) -> SQLiteSettingsStore:
+        pool = await call_sync_from_async(get_sqlite_pool, get_sqlite_path(config))
+        return SQLiteSettingsStore(pool, user_id)
@@ -0,0 +1,133 @@
+"""Embedded SQLite database for the SQLite settings and conversation stores.
+
+The database runs in WAL mode, so readers never wait for the writer.
+Connections are pooled per database file and shared by every store
+instance in the process. Store instances are created per request.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from omninexus.core.config.app_config import AppConfig
+
+SQLITE_DB_FILENAME = 'omninexus.db'
+SQLITE_POOL_SIZE = 8
+# Seconds a writer waits for another writer before failing
+SQLITE_BUSY_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    conversation_id TEXT PRIMARY KEY,
+    user_id INTEGER,
+    github_user_id INTEGER,
+    selected_repository TEXT,
+    title TEXT,
+    last_updated_at TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_by_user_created_at
+    ON conversations (user_id, created_at DESC, conversation_id DESC);
+"""
+
+
+def user_key(user_id: int | None) -> int:
+    """The user id rows are stored under.
+
+    The routes identify the user with `get_user_id`, which is 0 without a
+    GitHub login, while the socket handler passes None; both are user 0.
+    """
+    return user_id or 0
+
+
+def get_sqlite_path(config: AppConfig) -> str:
+    if config.sqlite_store_path:
+        return config.sqlite_store_path
+    return os.path.join(config.file_store_path, SQLITE_DB_FILENAME)
+
+
+class SQLiteConnectionPool:
+    """A fixed number of connections to one database, handed out one at a time.
+
+    Args:
+        path: Path of the database file, created if missing.
+        size: Maximum number of open connections.
+    """
+
+    def __init__(self, path: str, size: int = SQLITE_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """A connection for one transaction: committed on exit, rolled back on error."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
+_pools: dict[str, SQLiteConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_sqlite_pool(path: str) -> SQLiteConnectionPool:
+    """The shared connection pool of the database at `path`."""
+    path = os.path.abspath(path)
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = SQLiteConnectionPool(path)
+            _pools[path] = pool
+        return pool
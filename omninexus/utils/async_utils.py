@@ -1,4 +1,5 @@
 import asyncio
+import contextvars
 from concurrent import futures
 from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Coroutine, Iterable, List
@@ -14,7 +15,9 @@ async def call_sync_from_async(fn: Callable, *args, **kwargs):
     returned by this function is not cancellable
     """
     loop = asyncio.get_event_loop()
-    coro = loop.run_in_executor(None, lambda: fn(*args, **kwargs))
+    # like asyncio.to_thread, keep context variables such as the current trace span
+    context = contextvars.copy_context()
+    coro = loop.run_in_executor(None, lambda: context.run(fn, *args, **kwargs))
     result = await coro
     return result
 
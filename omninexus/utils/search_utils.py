@@ -1,4 +1,5 @@
 import base64
+import json
 
 
 def offset_to_page_id(offset: int, has_next: bool) -> str | None:
@@ -13,3 +14,14 @@ def page_id_to_offset(page_id: str | None) -> int:
         return 0
     offset = int(base64.b64decode(page_id).decode())
     return offset
+
+
+def cursor_to_page_id(cursor: list | tuple) -> str:
+    """Encode the sort key of the last item on a page as the id of the next page."""
+    return base64.b64encode(json.dumps(list(cursor)).encode()).decode()
+
+
+def page_id_to_cursor(page_id: str) -> tuple | int:
+    """Decode a page id from `cursor_to_page_id`. Offset page ids decode to an int."""
+    cursor = json.loads(base64.b64decode(page_id).decode())
+    return cursor if isinstance(cursor, int) else tuple(cursor)
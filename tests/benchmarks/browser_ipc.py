@@ -0,0 +1,144 @@
+"""Benchmark of the IPC between BrowserEnv and its browser process.
+
+Reports the CPU both processes burn while idle and the latency of requests.
+By default it drives a real BrowserEnv (Playwright's Chromium must be
+installed) and times `noop()` steps, which include a screenshot. With
+--channel it measures the BrowserChannel alone, against a process that
+answers like the browser process does, with screenshot-sized payloads:
+
+    python tests/benchmarks/browser_ipc.py
+    python tests/benchmarks/browser_ipc.py --channel --requests 2000
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+
+from omninexus.runtime.browser.browser_env import (
+    BROWSER_PROCESS_WAKEUP_SECONDS,
+    BrowserEnv,
+)
+from omninexus.runtime.browser.ipc import (
+    BrowserChannel,
+    put_shared_bytes,
+    take_shared_bytes,
+)
+
+
+def _cpu_seconds(pid: int) -> float:
+    """User and system CPU time of a process, from /proc (Linux only)."""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def _echo_process(conn, payload_bytes: int) -> None:
+    # Same waiting scheme as BrowserEnv.browser_process
+    data = b'x' * payload_bytes
+    while True:
+        if not conn.poll(timeout=BROWSER_PROCESS_WAKEUP_SECONDS):
+            continue
+        request_id, kind, _ = conn.recv()
+        if kind == 'SHUTDOWN':
+            return
+        conn.send((request_id, {'screenshot': put_shared_bytes(data)}))
+
+
+def _percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p = lambda q: samples[min(int(q * len(samples)), len(samples) - 1)] * 1000  # noqa: E731
+    return (
+        f'mean {statistics.mean(samples) * 1000:.2f}ms  p50 {p(0.5):.2f}ms  '
+        f'p95 {p(0.95):.2f}ms  p99 {p(0.99):.2f}ms  max {samples[-1] * 1000:.2f}ms'
+    )
+
+
+def _measure_idle(pid: int, seconds: float) -> None:
+    agent_start, browser_start = time.process_time(), _cpu_seconds(pid)
+    time.sleep(seconds)
+    agent = time.process_time() - agent_start
+    browser = _cpu_seconds(pid) - browser_start
+    print(
+        f'idle CPU over {seconds:.0f}s: agent {agent / seconds:.2%}, '
+        f'browser process {browser / seconds:.2%}'
+    )
+
+
+def _measure_requests(request, requests: int, concurrency: int) -> None:
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def worker(count: int) -> None:
+        for _ in range(count):
+            start = time.perf_counter()
+            request()
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [
+        threading.Thread(target=worker, args=(requests // concurrency,))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(
+        f'{len(latencies)} requests, {concurrency} concurrent: '
+        f'{len(latencies) / elapsed:.0f}/s, {_percentiles(latencies)}'
+    )
+
+
+def bench_channel(args) -> None:
+    agent_side, browser_side = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=_echo_process, args=(browser_side, args.payload_kb * 1024)
+    )
+    process.start()
+    channel = BrowserChannel(agent_side)
+    channel.start()
+    try:
+        _measure_idle(process.pid, args.idle)
+
+        def request():
+            take_shared_bytes(channel.request('STEP')['screenshot'])
+
+        for concurrency in (1, args.concurrency):
+            _measure_requests(request, args.requests, concurrency)
+    finally:
+        channel.send('SHUTDOWN')
+        process.join(5)
+        channel.close()
+
+
+def bench_browser(args) -> None:
+    env = BrowserEnv()
+    try:
+        _measure_idle(env.process.pid, args.idle)
+        _measure_requests(lambda: env.step('noop()'), args.requests, 1)
+    finally:
+        env.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--channel', action='store_true', help='Benchmark the channel only'
+    )
+    parser.add_argument('--idle', type=float, default=10, help='Idle seconds')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument(
+        '--payload-kb', type=int, default=1024, help='Screenshot size (--channel)'
+    )
+    args = parser.parse_args()
+    if args.channel:
+        bench_channel(args)
+    else:
+        bench_browser(args)
@@ -0,0 +1,108 @@
+"""Benchmark of filtering delegate events from the history, by nesting depth.
+
+Delegates started by delegates nest their action/observation pairs. The
+range-based filter the controller used before collected one range per pair
+and then scanned the history again for each of them, so its cost grew with
+depth times length. `AgentController._filter_delegate_events` makes a
+single pass. The history has `depth` nested delegations, each with a few
+messages of its own, and, with `--unmatched`, as many delegate actions
+that never got their observation, as after a crash:
+
+    python tests/benchmarks/delegate_filter.py
+    python tests/benchmarks/delegate_filter.py --depths 100 1000 10000 --unmatched
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+
+from omninexus.controller.agent_controller import AgentController
+from omninexus.events.action import AgentDelegateAction, MessageAction
+from omninexus.events.event import Event
+from omninexus.events.observation import AgentDelegateObservation
+
+_controller = SimpleNamespace(log=lambda *args, **kwargs: None)
+
+
+def _history(depth: int, messages: int, unmatched: bool) -> list[Event]:
+    events: list[Event] = []
+    for level in range(depth):
+        events.append(AgentDelegateAction(agent=f'agent {level}', inputs={}))
+        events += [MessageAction(content=f'{level}.{i}') for i in range(messages)]
+    if not unmatched:
+        for level in range(depth):
+            events.append(AgentDelegateObservation(content=str(level), outputs={}))
+    events.append(MessageAction(content='after'))
+    for i, event in enumerate(events):
+        event._id = i  # type: ignore[attr-defined]
+    return events
+
+
+def _range_filter(events: list[Event]) -> list[Event]:
+    """The filter before the single pass: a scan of the history per pair."""
+    delegate_ranges: list[tuple[int, int]] = []
+    delegate_action_ids: list[int] = []
+    for event in events:
+        if isinstance(event, AgentDelegateAction):
+            delegate_action_ids.append(event.id)
+        elif isinstance(event, AgentDelegateObservation) and delegate_action_ids:
+            delegate_ranges.append((delegate_action_ids.pop(), event.id))
+    if not delegate_ranges:
+        return events
+    filtered_events: list[Event] = []
+    current_idx = 0
+    for start_id, end_id in sorted(delegate_ranges):
+        filtered_events.extend(
+            event for event in events[current_idx:] if event.id < start_id
+        )
+        filtered_events.extend(
+            event for event in events if event.id in (start_id, end_id)
+        )
+        current_idx = next(
+            (i for i, e in enumerate(events) if e.id > end_id), len(events)
+        )
+    filtered_events.extend(events[current_idx:])
+    return filtered_events
+
+
+def _single_pass_filter(events: list[Event]) -> list[Event]:
+    return list(AgentController._filter_delegate_events(_controller, events))  # type: ignore[arg-type]
+
+
+def _best(fn, events: list[Event], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(events)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depths', type=int, nargs='+', default=[10, 100, 1000, 2000])
+    parser.add_argument('--messages', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--unmatched', action='store_true')
+    args = parser.parse_args()
+
+    print(
+        f'{args.messages} messages per delegation, '
+        f'{"unmatched" if args.unmatched else "matched"} actions, '
+        f'best of {args.repeat}'
+    )
+    for depth in args.depths:
+        events = _history(depth, args.messages, args.unmatched)
+        single_pass = _best(_single_pass_filter, events, args.repeat)
+        ranges = _best(_range_filter, events, args.repeat)
+        print(
+            f'depth {depth:6d}  {len(events):7d} events  '
+            f'single pass {single_pass * 1000:8.2f}ms '
+            f'({single_pass / len(events) * 1e9:6.0f}ns/event)  '
+            f'ranges {ranges * 1000:10.2f}ms '
+            f'({ranges / len(events) * 1e9:8.0f}ns/event)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark of the Jupyter kernel modes: direct ZMQ kernel vs kernel gateway.
+
+Starts a kernel in each mode, as the Jupyter plugin does without the `su`
+and micromamba wrapping of the sandbox, and runs the same cells in both.
+Startup is measured until the first cell can run: for the gateway, from
+starting `jupyter kernelgateway` until its kernel answered over the
+WebSocket; for the direct mode, until the kernel manager's kernel answered
+over ZMQ. Per-cell times are wall times seen by the caller, for cells that
+do (almost) nothing, so they are mostly overhead. Requires ipykernel,
+jupyter_client and jupyter_kernel_gateway, as installed in the sandbox:
+
+    python tests/benchmarks/jupyter_kernel.py
+    python tests/benchmarks/jupyter_kernel.py --cells 500 --code 'x = 1'
+"""
+
+import argparse
+import asyncio
+import getpass
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from omninexus.runtime.plugins.jupyter.execute_server import JupyterKernel
+from omninexus.runtime.plugins.jupyter.kernel_manager import DirectJupyterKernel
+from omninexus.runtime.utils import find_available_tcp_port
+
+GATEWAY_READY_TIMEOUT = 60
+
+
+def _wait_for_gateway(port: int, process: subprocess.Popen) -> None:
+    deadline = time.time() + GATEWAY_READY_TIMEOUT
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError('The kernel gateway exited while starting')
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/api', timeout=1):
+                return
+        except OSError:
+            if time.time() > deadline:
+                raise TimeoutError('The kernel gateway did not start')
+            time.sleep(0.05)
+
+
+async def _run_cells(kernel, code: str, cells: int) -> list[float]:
+    times = []
+    for _ in range(cells):
+        start = time.perf_counter()
+        await kernel.execute(code)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+async def _gateway(code: str, cells: int) -> tuple[float, list[float]]:
+    port = find_available_tcp_port(40000, 49999)
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            '-m',
+            'jupyter',
+            'kernelgateway',
+            '--KernelGatewayApp.ip=127.0.0.1',
+            f'--KernelGatewayApp.port={port}',
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    kernel = JupyterKernel(f'127.0.0.1:{port}', 'benchmark')
+    try:
+        await asyncio.to_thread(_wait_for_gateway, port, process)
+        await kernel.initialize()
+        startup = time.perf_counter() - start
+        return startup, await _run_cells(kernel, code, cells)
+    finally:
+        await kernel.shutdown_async()
+        process.terminate()
+        process.wait()
+
+
+async def _direct(code: str, cells: int) -> tuple[float, list[float], float | None]:
+    kernel = DirectJupyterKernel(getpass.getuser())
+    start = time.perf_counter()
+    try:
+        await kernel.initialize()
+        startup = time.perf_counter() - start
+        times = await _run_cells(kernel, code, cells)
+        return startup, times, kernel.cell_overhead_avg
+    finally:
+        await kernel.shutdown_async()
+
+
+def _report(name: str, startup: float, times: list[float]) -> None:
+    times = sorted(times)
+    print(
+        f'{name:8s} startup {startup:6.2f}s  '
+        f'cell mean {statistics.mean(times) * 1000:7.2f}ms  '
+        f'median {statistics.median(times) * 1000:7.2f}ms  '
+        f'p95 {times[int(len(times) * 0.95)] * 1000:7.2f}ms'
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cells', type=int, default=200)
+    parser.add_argument('--code', default='pass')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{args.rounds} kernels per mode, {args.cells} cells of {args.code!r} each')
+    gateway_startups, gateway_times = [], []
+    direct_startups, direct_times, overheads = [], [], []
+    for _ in range(args.rounds):
+        startup, times = await _gateway(args.code, args.cells)
+        gateway_startups.append(startup)
+        gateway_times += times
+        startup, times, overhead = await _direct(args.code, args.cells)
+        direct_startups.append(startup)
+        direct_times += times
+        if overhead is not None:
+            overheads.append(overhead)
+
+    _report('gateway', statistics.median(gateway_startups), gateway_times)
+    _report('direct', statistics.median(direct_startups), direct_times)
+    if overheads:
+        print(
+            f'direct   overhead outside the kernel {statistics.mean(overheads) * 1000:.2f}ms/cell'
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+"""Benchmark of syncing a large repository into the sandbox: full copies vs manifests.
+
+Both sides of the sync are local directories, and the archive goes through
+a temporary file, as it does between `copy_to`/`sync_to` and the action
+execution server. After an initial copy, a few files are changed, added and
+removed before every round, and the tree is brought up to date once with a
+full archive of it (what `copy_to` does) and once with a manifest-based sync
+(what `sync_to` does, with the hash caches of both sides kept warm):
+
+    python tests/benchmarks/repo_sync.py
+    python tests/benchmarks/repo_sync.py --files 50000 --file-size 8192 --changed 20
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from omninexus.runtime.utils.archive import extract_archive, iter_archive
+from omninexus.runtime.utils.file_manifest import (
+    FileHashCache,
+    build_manifest,
+    diff_manifests,
+    resolve_member,
+)
+
+
+def _write_tree(root: str, files: int, file_size: int, rnd: random.Random) -> None:
+    for i in range(files):
+        path = os.path.join(root, f'pkg{i % 100}', f'mod{i // 100}', f'file{i}.py')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(rnd.randbytes(file_size))
+
+
+def _transfer(src: str, dest: str, fmt: str, members: list[str] | None = None) -> int:
+    """Archive `src` (or some of its files) into a temporary file and extract it into `dest`."""
+    size = 0
+    with tempfile.NamedTemporaryFile(suffix=f'.{fmt}') as archive:
+        for chunk in iter_archive(src, fmt, arcname_base=src, members=members):
+            size += len(chunk)
+            archive.write(chunk)
+        archive.flush()
+        extract_archive(archive.name, dest, fmt)
+    return size
+
+
+def _mutate(root: str, count: int, file_size: int, rnd: random.Random) -> None:
+    paths = sorted(
+        os.path.join(dirpath, file)
+        for dirpath, _, files in os.walk(root)
+        for file in files
+    )
+    for path in rnd.sample(paths, count):
+        with open(path, 'wb') as f:
+            f.write(rnd.randbytes(file_size))
+    for path in rnd.sample(paths, count // 2):
+        if os.path.exists(path):
+            os.remove(path)
+    for i in range(count // 2):
+        with open(os.path.join(root, 'pkg0', f'new{rnd.random()}.py'), 'wb') as f:
+            f.write(rnd.randbytes(file_size))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--file-size', type=int, default=4096)
+    parser.add_argument('--changed', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--format', default='tar', choices=['zip', 'tar', 'tar.zst'])
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'host')
+        full_dest = os.path.join(tmp, 'sandbox-full')
+        sync_dest = os.path.join(tmp, 'sandbox-sync')
+        os.makedirs(src)
+        _write_tree(src, args.files, args.file_size, rnd)
+        print(
+            f'{args.files} files of {args.file_size} bytes, '
+            f'{args.changed} changed per round, {args.format} archives'
+        )
+
+        start = time.perf_counter()
+        _transfer(src, sync_dest, args.format)
+        initial = time.perf_counter() - start
+        host_cache, sandbox_cache = FileHashCache(), FileHashCache()
+        start = time.perf_counter()
+        build_manifest(src, host_cache)
+        build_manifest(sync_dest, sandbox_cache)
+        cold = time.perf_counter() - start
+        print(f'initial copy {initial:.2f}s, first manifests (cold caches) {cold:.2f}s')
+
+        full_times, full_bytes, sync_times, sync_bytes = [], [], [], []
+        for _ in range(args.rounds):
+            _mutate(src, args.changed, args.file_size, rnd)
+
+            start = time.perf_counter()
+            shutil.rmtree(full_dest, ignore_errors=True)
+            full_bytes.append(_transfer(src, full_dest, args.format))
+            full_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            changed, removed = diff_manifests(
+                build_manifest(src, host_cache),
+                build_manifest(sync_dest, sandbox_cache),
+            )
+            size = 0
+            if changed:
+                size = _transfer(src, sync_dest, args.format, members=changed)
+            for member in removed:
+                os.remove(resolve_member(sync_dest, member))
+            sync_times.append(time.perf_counter() - start)
+            sync_bytes.append(size)
+
+        assert build_manifest(src).keys() == build_manifest(sync_dest).keys()
+        for name, times, sizes in [
+            ('full archive', full_times, full_bytes),
+            ('manifest sync', sync_times, sync_bytes),
+        ]:
+            print(
+                f'{name:14s} mean {statistics.mean(times) * 1000:8.1f}ms  '
+                f'max {max(times) * 1000:8.1f}ms  '
+                f'{statistics.mean(sizes) / 1e6:8.2f}MB transferred per sync'
+            )
+
+
+if __name__ == '__main__':
+    main()
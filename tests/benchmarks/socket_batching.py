@@ -0,0 +1,118 @@
+"""Benchmark of the outbound socket queue: throughput and delivery latency.
+
+A Socket.IO server on localhost sends events to a connected client through
+an `OutboundQueue`, the way a Session does, once per configuration:
+one frame per event, batched, and batched with compression. Events are put
+in bursts, like the observations of a busy agent, and carry the time they
+were queued, so the client measures the latency of every event:
+
+    python tests/benchmarks/socket_batching.py
+    python tests/benchmarks/socket_batching.py --events 20000 --burst 50 --window-ms 20
+"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import time
+
+import socketio
+import uvicorn
+
+from omninexus.server.session.outbound import OutboundQueue, decode_batch
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p = lambda q: samples[min(int(q * len(samples)), len(samples) - 1)] * 1000  # noqa: E731
+    return (
+        f'mean {statistics.mean(samples) * 1000:.2f}ms  p50 {p(0.5):.2f}ms  '
+        f'p95 {p(0.95):.2f}ms  p99 {p(0.99):.2f}ms  max {samples[-1] * 1000:.2f}ms'
+    )
+
+
+async def _run(
+    name: str,
+    args: argparse.Namespace,
+    window: float,
+    max_batch: int,
+    compress: bool,
+) -> None:
+    sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(
+            socketio.ASGIApp(sio), host='127.0.0.1', port=port, log_level='error'
+        )
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    connected = asyncio.Event()
+    sio.on('connect', lambda sid, environ: connected.set())
+
+    client = socketio.AsyncClient()
+    latencies: list[float] = []
+    frames = 0
+    done = asyncio.Event()
+
+    def on_frame(event_name: str, payload: dict) -> None:
+        nonlocal frames
+        now = time.time()
+        frames += 1
+        for message in decode_batch(event_name, payload):
+            latencies.append(now - message['queued_at'])
+        if len(latencies) >= args.events:
+            done.set()
+
+    client.on('oh_event', lambda payload: on_frame('oh_event', payload))
+    client.on('oh_event_batch', lambda payload: on_frame('oh_event_batch', payload))
+    await client.connect(f'http://127.0.0.1:{port}', transports=['websocket'])
+    await connected.wait()
+
+    async def emit(event_name: str, payload: dict) -> None:
+        await sio.emit(event_name, payload)
+
+    queue = OutboundQueue(emit, window=window, max_batch=max_batch, compress=compress)
+    content = 'x' * args.event_bytes
+    start = time.time()
+    for i in range(args.events):
+        queue.put({'id': i, 'content': content, 'queued_at': time.time()})
+        if (i + 1) % args.burst == 0:
+            await asyncio.sleep(args.burst_interval_ms / 1000)
+    await done.wait()
+    elapsed = time.time() - start
+
+    print(
+        f'{name:<20} {args.events / elapsed:9.0f} events/s  {frames:6d} frames  '
+        f'{_percentiles(latencies)}'
+    )
+    queue.close()
+    await client.disconnect()
+    server.should_exit = True
+    await server_task
+
+
+async def main(args: argparse.Namespace) -> None:
+    window = args.window_ms / 1000
+    await _run('one frame per event', args, 0, 1, False)
+    await _run('batched', args, window, args.max_batch, False)
+    await _run('batched, compressed', args, window, args.max_batch, True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--event-bytes', type=int, default=1000)
+    parser.add_argument('--burst', type=int, default=20, help='Events put at once')
+    parser.add_argument('--burst-interval-ms', type=float, default=5)
+    parser.add_argument('--window-ms', type=float, default=20)
+    parser.add_argument('--max-batch', type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
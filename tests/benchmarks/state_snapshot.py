@@ -0,0 +1,124 @@
+"""Benchmark of saving and restoring the agent state: pickled files vs snapshots.
+
+The legacy format pickles the whole state, with metrics and states pickled
+as their instance attributes, and writes it base64 encoded to
+agent_state.pkl on every save. Snapshots write a compressed base once and
+then only the fields that changed. Both use an in-memory file store; the
+state has many costs and latencies, like a long session, and condenser
+metadata in its extra data:
+
+    python tests/benchmarks/state_snapshot.py
+    python tests/benchmarks/state_snapshot.py --costs 100000 --extra 10000
+"""
+
+import argparse
+import base64
+import pickle
+import time
+from typing import Callable
+
+from omninexus.controller.state.state import State
+from omninexus.llm.metrics import Metrics
+from omninexus.storage.memory import InMemoryFileStore
+
+
+def _make_state(costs: int, extra: int) -> State:
+    state = State(max_iterations=costs)
+    for i in range(costs):
+        state.metrics.add_cost(0.001)
+        state.metrics.add_response_latency(1.5, f'response-{i}')
+    state.local_metrics.merge(state.metrics)
+    state.extra_data['condenser_meta'] = [
+        {'summary': f'summary of events {i}-{i + 10}', 'start_id': i, 'end_id': i + 10}
+        for i in range(extra)
+    ]
+    return state
+
+
+def _legacy_pickle(state: State) -> str:
+    # What State and Metrics pickled to before they defined __getstate__
+    metrics_getstate, state_getstate = Metrics.__getstate__, State.__getstate__
+    Metrics.__getstate__ = lambda self: self.__dict__.copy()  # type: ignore[method-assign]
+    State.__getstate__ = lambda self: {**self.__dict__, 'history': []}  # type: ignore[method-assign]
+    try:
+        return base64.b64encode(pickle.dumps(state)).decode('utf-8')
+    finally:
+        Metrics.__getstate__ = metrics_getstate  # type: ignore[method-assign]
+        State.__getstate__ = state_getstate  # type: ignore[method-assign]
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _size(file_store: InMemoryFileStore) -> int:
+    return sum(len(contents) for contents in file_store.files.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--costs', type=int, default=20000)
+    parser.add_argument('--extra', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    state = _make_state(args.costs, args.extra)
+    print(
+        f'{args.costs} costs and latencies, {args.extra} condenser entries, '
+        f'best of {args.repeat}'
+    )
+
+    legacy_store = InMemoryFileStore({})
+    path = 'sessions/legacy/agent_state.pkl'
+
+    def legacy_save() -> None:
+        legacy_store.write(path, _legacy_pickle(state))
+
+    legacy_save_time = _best(legacy_save, args.repeat)
+    legacy_restore_time = _best(
+        lambda: State.restore_from_session('legacy', legacy_store), args.repeat
+    )
+    print(
+        f'pickled file   save {legacy_save_time * 1000:8.1f}ms  '
+        f'{_size(legacy_store) / 1e3:9.1f}KB  '
+        f'restore {legacy_restore_time * 1000:8.1f}ms'
+    )
+
+    def full_save() -> None:
+        snapshot_store = InMemoryFileStore({})
+        state._snapshot = None
+        state.save_to_session('snapshot', snapshot_store)
+
+    full_save_time = _best(full_save, args.repeat)
+    snapshot_store = InMemoryFileStore({})
+    state._snapshot = None
+    state.save_to_session('snapshot', snapshot_store)
+    base_size = _size(snapshot_store)
+
+    def delta_save() -> None:
+        state.iteration += 1
+        state.save_to_session('snapshot', snapshot_store)
+
+    delta_save_time = _best(delta_save, args.repeat)
+    delta_size = (_size(snapshot_store) - base_size) / args.repeat
+    restore_time = _best(
+        lambda: State.restore_from_session('snapshot', snapshot_store), args.repeat
+    )
+    print(
+        f'snapshot base  save {full_save_time * 1000:8.1f}ms  '
+        f'{base_size / 1e3:9.1f}KB  '
+        f'restore {restore_time * 1000:8.1f}ms (with {args.repeat} deltas)'
+    )
+    print(
+        f'snapshot delta save {delta_save_time * 1000:8.1f}ms  '
+        f'{delta_size / 1e3:9.3f}KB  (iteration changed)'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Benchmark of the stuck check per agent step: history scan vs incremental detector.
+
+The controller checks whether the agent is stuck after every step. Before
+`_HistoryWindow`, every check filtered the whole history again (and, in
+interactive mode, searched it for the last user message), so its cost grew
+with the session. The incremental detector only looks at the events added
+since the previous check. One event is added per step, with a user message
+now and then, and both checks run after each step; the costs are reported
+for the steps around a few history lengths:
+
+    python tests/benchmarks/stuck_detector.py
+    python tests/benchmarks/stuck_detector.py --events 50000 --interactive
+"""
+
+import argparse
+import random
+import time
+
+from omninexus.controller.state.state import State
+from omninexus.controller.stuck import StuckDetector
+from omninexus.events.action import CmdRunAction, MessageAction
+from omninexus.events.action.action import Action
+from omninexus.events.action.empty import NullAction
+from omninexus.events.event import Event, EventSource
+from omninexus.events.observation import CmdOutputObservation
+from omninexus.events.observation.empty import NullObservation
+from omninexus.events.observation.observation import Observation
+
+# Steps measured around every checkpoint
+WINDOW = 100
+
+
+def _scanning_is_stuck(
+    detector: StuckDetector, history: list[Event], headless_mode: bool
+) -> bool:
+    """The stuck check before `_HistoryWindow`, rebuilding the filtered history."""
+    if not headless_mode:
+        last_user_msg_idx = -1
+        for i, event in enumerate(reversed(history)):
+            if isinstance(event, MessageAction) and event.source == EventSource.USER:
+                last_user_msg_idx = len(history) - i - 1
+                break
+        history = history[last_user_msg_idx + 1 :]
+    filtered = [
+        event
+        for event in history
+        if not (
+            (isinstance(event, MessageAction) and event.source == EventSource.USER)
+            or isinstance(event, (NullAction, NullObservation))
+        )
+    ]
+    if len(filtered) < 3:
+        return False
+    actions = [event for event in reversed(filtered) if isinstance(event, Action)]
+    observations = [
+        event for event in reversed(filtered) if isinstance(event, Observation)
+    ]
+    if detector._is_stuck_repeating_action_observation(actions[:4], observations[:4]):
+        return True
+    if detector._is_stuck_repeating_action_error(actions[:4], observations[:4]):
+        return True
+    messages = [
+        (i, event)
+        for i, event in enumerate(filtered)
+        if isinstance(event, MessageAction) and event.source == EventSource.AGENT
+    ][-3:]
+    if len(messages) == 3 and all(messages[0][1] == m[1] for m in messages):
+        between = filtered[messages[0][0] + 1 : messages[-1][0]]
+        if not any(isinstance(event, Observation) for event in between):
+            return True
+    if len(filtered) < 6 or len(actions) < 6 or len(observations) < 6:
+        return False
+    eq = detector._eq_no_pid
+    return all(
+        eq(events[j], events[j + 2]) and eq(events[j], events[j + 4])
+        for events in (actions[:6], observations[:6])
+        for j in (0, 1)
+    )
+
+
+def _event(i: int, rnd: random.Random) -> Event:
+    if i % 500 == 499:
+        event: Event = MessageAction(content=f'user message {i}')
+        event._source = EventSource.USER  # type: ignore[attr-defined]
+        return event
+    if i % 50 == 49:
+        return NullObservation('')
+    # Distinct commands and outputs, so that the agent is never stuck
+    if i % 2 == 0:
+        return CmdRunAction(command=f'echo {rnd.random()}')
+    return CmdOutputObservation(content=str(rnd.random()), command='echo')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument(
+        '--interactive',
+        action='store_true',
+        help='check like an interactive session (headless_mode=False)',
+    )
+    args = parser.parse_args()
+    headless_mode = not args.interactive
+
+    rnd = random.Random(0)
+    history: list[Event] = []
+    state = State()
+    state.history = history
+    detector = StuckDetector(state)
+    checkpoints = {args.events * fraction // 10 for fraction in (1, 2, 5, 10)}
+    scan_total = incremental_total = 0.0
+    scan_window = incremental_window = 0.0
+    print(
+        f'{args.events} events, headless_mode={headless_mode}, '
+        f'per-step cost averaged over {WINDOW} steps'
+    )
+    for i in range(args.events):
+        history.append(_event(i, rnd))
+
+        start = time.perf_counter()
+        incremental = detector.is_stuck(headless_mode)
+        incremental_time = time.perf_counter() - start
+        start = time.perf_counter()
+        scanned = _scanning_is_stuck(detector, history, headless_mode)
+        scan_time = time.perf_counter() - start
+        assert not incremental and not scanned
+
+        scan_total += scan_time
+        incremental_total += incremental_time
+        if any(0 <= checkpoint - 1 - i < WINDOW for checkpoint in checkpoints):
+            scan_window += scan_time
+            incremental_window += incremental_time
+        if i + 1 in checkpoints:
+            print(
+                f'{i + 1:7d} events  '
+                f'scan {scan_window / WINDOW * 1e6:9.1f}us/step  '
+                f'incremental {incremental_window / WINDOW * 1e6:7.1f}us/step'
+            )
+            scan_window = incremental_window = 0.0
+    print(
+        f'all steps         scan {scan_total:9.2f}s       '
+        f'incremental {incremental_total:7.2f}s'
+    )
+
+
+if __name__ == '__main__':
+    main()
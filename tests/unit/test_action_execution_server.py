@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import pytest
+
+from omninexus.events.observation import CmdOutputObservation
+from omninexus.runtime import action_execution_server as server
+from omninexus.runtime.plugins import Plugin
+
+# Seconds each fake step takes, long enough to tell parallel from sequential
+STEP = 0.3
+
+
+class _FakeBrowserEnv:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def reset(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+class _FakeBashSession:
+    """Takes STEP seconds per command, recording when each one ran."""
+
+    runs: list[tuple[float, float]] = []
+
+    def __init__(self, work_dir: str, username: str | None = None):
+        self.cwd = work_dir
+
+    def initialize(self) -> None:
+        pass
+
+    def execute(self, action) -> CmdOutputObservation:
+        start = time.time()
+        time.sleep(STEP)
+        _FakeBashSession.runs.append((start, time.time()))
+        return CmdOutputObservation(
+            content='', command_id=-1, command=action.command, exit_code=0
+        )
+
+    def close(self) -> None:
+        pass
+
+
+class _SlowPlugin(Plugin):
+    def __init__(self, name: str):
+        self.name = name
+        self.starts: list[tuple[float, float]] = []
+
+    async def initialize(self, username: str):
+        start = time.time()
+        await asyncio.sleep(STEP)
+        self.starts.append((start, time.time()))
+
+    async def run(self, action):
+        raise NotImplementedError
+
+
+@pytest.fixture
+def make_executor(monkeypatch, tmp_path):
+    monkeypatch.setattr(server, 'BrowserEnv', _FakeBrowserEnv)
+    monkeypatch.setattr(server, 'BashSession', _FakeBashSession)
+    monkeypatch.setattr(
+        server, 'init_user_and_working_directory', lambda **kwargs: None
+    )
+    _FakeBashSession.runs = []
+
+    def make_executor(plugins: list[Plugin], lazy_plugins: bool):
+        return server.ActionExecutor(
+            plugins,
+            work_dir=str(tmp_path),
+            username='omninexus',
+            user_id=1000,
+            browsergym_eval_env=None,
+            lazy_plugins=lazy_plugins,
+        )
+
+    return make_executor
+
+
+def test_plugins_start_while_the_bash_init_commands_run(make_executor):
+    plugins = [_SlowPlugin('jupyter'), _SlowPlugin('agent_skills')]
+    executor = make_executor(plugins, lazy_plugins=False)
+    asyncio.run(executor.ainit())
+
+    (command,) = _FakeBashSession.runs
+    for plugin in plugins:
+        (start,) = plugin.starts
+        assert start[0] < command[1] and command[0] < start[1]
+    assert executor.startup_seconds['total'] < 2 * STEP
+
+
+def test_deferred_plugins_start_once_on_first_use(make_executor):
+    jupyter, agent_skills = _SlowPlugin('jupyter'), _SlowPlugin('agent_skills')
+    executor = make_executor([jupyter, agent_skills], lazy_plugins=True)
+
+    async def run():
+        await executor.ainit()
+        assert list(executor.plugins) == ['agent_skills']
+        assert executor.get_plugin_status()['jupyter']['status'] == 'deferred'
+
+        started = await asyncio.gather(
+            *(executor.get_plugin('jupyter') for _ in range(3))
+        )
+        assert started == [jupyter] * 3
+        assert await executor.get_plugin('vscode') is None
+
+    asyncio.run(run())
+    assert len(jupyter.starts) == 1
+    assert executor.get_plugin_status()['jupyter']['status'] == 'ready'
+
+
+def test_server_info_reports_startup_timings(make_executor):
+    executor = make_executor(
+        [_SlowPlugin('jupyter'), _SlowPlugin('agent_skills')], lazy_plugins=True
+    )
+    asyncio.run(executor.ainit())
+
+    timings = executor.startup_seconds
+    assert set(timings) == {'bash', 'plugin:agent_skills', 'total'}
+    assert timings['plugin:agent_skills'] >= STEP
+    assert timings['total'] >= max(timings['bash'], timings['plugin:agent_skills'])
+    assert executor.get_plugin_status() == {
+        'jupyter': {'status': 'deferred', 'startup_seconds': None},
+        'agent_skills': {
+            'status': 'ready',
+            'startup_seconds': timings['plugin:agent_skills'],
+        },
+    }
@@ -0,0 +1,71 @@
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from omninexus.runtime.browser import browser_env
+from omninexus.runtime.browser.browser_env import BrowserEnv
+from omninexus.runtime.browser.ipc import take_shared_bytes
+from omninexus.runtime.browser.observation_diff import apply_json_diff, diff_json
+
+
+@pytest.mark.parametrize(
+    'old, new',
+    [
+        ({'a': 1, 'b': [1, 2]}, {'a': 1, 'b': [1, 3], 'c': None}),
+        ([1, 2, 3, 4], [1, 5, 4]),
+        ([{'x': 1}], [{'x': 2}]),
+        ({'a': 1}, [1]),
+    ],
+)
+def test_diff_round_trips(old, new):
+    assert apply_json_diff(old, diff_json(old, new)) == new
+
+
+def _slim_env():
+    env = object.__new__(BrowserEnv)
+    env.observation_profile = 'slim'
+    env.screenshot_format = 'png'
+    env.screenshot_quality = 75
+    env.html_text_converter = env.get_html_text_converter()
+    env._sent = {'revision': 0, 'objects': {}}
+    env._text_cache = OrderedDict()
+    env._last_text = None
+    env._last_view = None
+    return env
+
+
+def _observation():
+    return {
+        'dom_object': {'strings': ['page'], 'documents': []},
+        'axtree_object': {'nodes': []},
+        'extra_element_properties': {},
+        'screenshot': np.zeros((4, 4, 3), dtype=np.uint8),
+        'active_page_index': np.int64(0),
+        'elapsed_time': np.float64(0),
+    }
+
+
+def _has_screenshot(env, view, screenshot=None):
+    obs = _observation()
+    env._prepare_observation(obs, base_revision=0, screenshot=screenshot, view=view)
+    if obs['screenshot']:
+        take_shared_bytes(obs['screenshot'])
+        return True
+    return False
+
+
+def test_slim_profile_skips_screenshot_of_unchanged_view(monkeypatch):
+    monkeypatch.setattr(browser_env, 'flatten_dom_to_str', lambda dom: '<p>page</p>')
+    env = _slim_env()
+    view = ('http://example.com', 0, 0, 1280, 720)
+
+    assert _has_screenshot(env, view)
+    assert not _has_screenshot(env, view)
+    assert _has_screenshot(env, view, screenshot=True)
+    # Scrolled, then resized: same DOM, different pixels
+    assert _has_screenshot(env, ('http://example.com', 0, 500, 1280, 720))
+    assert _has_screenshot(env, ('http://example.com', 0, 500, 800, 600))
+    assert not _has_screenshot(env, ('http://example.com', 0, 500, 800, 600))
+    # Unknown view
+    assert _has_screenshot(env, None)
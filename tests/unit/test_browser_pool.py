@@ -0,0 +1,116 @@
+import http.server
+import os
+import threading
+import time
+
+import pytest
+
+from omninexus.runtime.browser.browser_env import BrowserEnv
+from omninexus.runtime.browser.pool import BrowserPool
+
+
+def _chromium_installed() -> bool:
+    try:
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as playwright:
+            return os.path.exists(playwright.chromium.executable_path)
+    except Exception:
+        return False
+
+
+pytestmark = pytest.mark.skipif(
+    not _chromium_installed(), reason='Playwright Chromium is not installed'
+)
+
+PAGES = {
+    '/set': (
+        '<html><body>set<script>'
+        "localStorage.setItem('item', 'stored');"
+        '</script></body></html>'
+    ),
+    '/show': (
+        '<html><body><script>'
+        "document.body.textContent = 'cookie=[' + document.cookie + '] item=['"
+        " + localStorage.getItem('item') + ']';"
+        '</script></body></html>'
+    ),
+    '/slow': '<html><body>slow</body></html>',
+}
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/slow':
+            time.sleep(1)
+        body = PAGES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        if self.path == '/set':
+            self.send_header('Set-Cookie', 'session=secret; Path=/')
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def _wait_idle(pool: BrowserPool, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while pool.get_stats()['resetting'] and time.time() < deadline:
+        time.sleep(0.1)
+
+
+def test_released_context_does_not_leak_cookies_or_storage(server_url):
+    pool = BrowserPool(1, BrowserEnv)
+    try:
+        obs = pool.step(f'goto("{server_url}/set")')
+        assert 'set' in obs['text_content']
+        _wait_idle(pool)
+
+        obs = pool.step(f'goto("{server_url}/show")')
+        assert 'cookie=[] item=[null]' in obs['text_content']
+        assert pool.get_stats()['idle'] + pool.get_stats()['resetting'] == 1
+    finally:
+        pool.close()
+
+
+def test_contexts_run_actions_in_parallel(server_url):
+    pool = BrowserPool(2, BrowserEnv)
+    try:
+        # Start both contexts before timing
+        envs = [pool.acquire(), pool.acquire()]
+        for env in envs:
+            pool.release(env)
+        _wait_idle(pool)
+
+        results: list[dict] = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(pool.step(f'goto("{server_url}/slow")'))
+            )
+            for _ in range(2)
+        ]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert time.time() - start < 2
+        assert all('slow' in obs['text_content'] for obs in results)
+    finally:
+        pool.close()
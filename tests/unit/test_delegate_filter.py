@@ -0,0 +1,102 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from omninexus.controller.agent_controller import AgentController
+from omninexus.events.action import (
+    AgentDelegateAction,
+    AgentDelegateParallelAction,
+    MessageAction,
+)
+from omninexus.events.event import Event
+from omninexus.events.observation import AgentDelegateObservation
+
+_controller = SimpleNamespace(log=lambda *args, **kwargs: None)
+
+
+def _filter(events: list[Event]) -> list[Event]:
+    return list(AgentController._filter_delegate_events(_controller, events))  # type: ignore[arg-type]
+
+
+def _rescanning_filter(events: list[Event]) -> list[Event]:
+    """Reference: re-scans the events after every unmatched delegate action."""
+    result: list[Event] = []
+    remaining = events
+    while True:
+        pending: list[Event] = []
+        depth = 0
+        for event in remaining:
+            if isinstance(event, (AgentDelegateAction, AgentDelegateParallelAction)):
+                depth += 1
+                pending.append(event)
+            elif isinstance(event, AgentDelegateObservation) and depth == 0:
+                result.append(event)
+            elif isinstance(event, AgentDelegateObservation):
+                depth -= 1
+                if depth == 0:
+                    result += [pending[0], event]
+                    pending = []
+                else:
+                    pending.append(event)
+            elif depth == 0:
+                result.append(event)
+            else:
+                pending.append(event)
+        if not pending:
+            return result
+        result.append(pending[0])
+        remaining = pending[1:]
+
+
+def _events(spec: str) -> list[Event]:
+    """`A` delegate action, `P` parallel delegate action, `O` observation, `m` message."""
+    events: list[Event] = []
+    for i, kind in enumerate(spec):
+        if kind == 'A':
+            events.append(AgentDelegateAction(agent=f'agent {i}', inputs={}))
+        elif kind == 'P':
+            events.append(AgentDelegateParallelAction(delegates=[]))
+        elif kind == 'O':
+            events.append(AgentDelegateObservation(content=str(i), outputs={}))
+        else:
+            events.append(MessageAction(content=str(i)))
+    return events
+
+
+@pytest.mark.parametrize(
+    'spec, kept',
+    [
+        # nested pairs: only the outermost pair is kept
+        ('mAmAmOmOm', [0, 1, 7, 8]),
+        # unmatched action: kept, with the events after it
+        ('mAmm', [0, 1, 2, 3]),
+        # unmatched outer action around a matched pair
+        ('AmAmOm', [0, 1, 2, 4, 5]),
+        # observation without an action
+        ('mOm', [0, 1, 2]),
+        # parallel delegation with the observations of its delegates
+        ('mPAmOAmOOm', [0, 1, 8, 9]),
+        # consecutive parallel ranges
+        ('PmOPmOm', [0, 2, 3, 5, 6]),
+        # unmatched actions nested in an unmatched action
+        ('AAmAmOAm', [0, 1, 2, 3, 5, 6, 7]),
+    ],
+)
+def test_delegate_ranges(spec, kept):
+    events = _events(spec)
+    assert _filter(events) == [events[i] for i in kept]
+
+
+def test_matches_the_rescanning_filter():
+    rnd = random.Random(0)
+    for _ in range(2000):
+        spec = ''.join(rnd.choice('AAPOOmm') for _ in range(rnd.randrange(20)))
+        events = _events(spec)
+        assert _filter(events) == _rescanning_filter(events), spec
+
+
+def test_many_unmatched_actions():
+    # Quadratic for a filter that re-scans after every unmatched action
+    events = _events('Am' * 20000)
+    assert _filter(events) == events
@@ -0,0 +1,151 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from omninexus.storage import get_file_store
+from omninexus.storage.conversation.file_conversation_store import (
+    FileConversationStore,
+)
+from omninexus.storage.conversation.rebuild_index import rebuild_index
+from omninexus.storage.data_models.conversation_metadata import ConversationMetadata
+from omninexus.utils.search_utils import offset_to_page_id
+
+_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FileConversationStore(get_file_store('local', str(tmp_path / 'files')))
+
+
+def _metadata(i: int) -> ConversationMetadata:
+    return ConversationMetadata(
+        f'conversation-{i}', 0, None, created_at=_START + timedelta(minutes=i)
+    )
+
+
+def _ids(store: FileConversationStore) -> list[str]:
+    entries = store._read_index()
+    assert entries is not None
+    return [conversation_id for _, conversation_id in entries]
+
+
+async def _all_pages(store: FileConversationStore, limit: int) -> list[list[str]]:
+    pages = []
+    page_id = None
+    while True:
+        result = await store.search(page_id, limit)
+        pages.append([c.conversation_id for c in result.results])
+        page_id = result.next_page_id
+        if page_id is None:
+            return pages
+
+
+def test_saves_and_deletes_update_the_index(store):
+    async def run():
+        await store.rebuild_index()
+        for i in (2, 0, 1):
+            await store.save_metadata(_metadata(i))
+        assert _ids(store) == ['conversation-0', 'conversation-1', 'conversation-2']
+        # Saving an existing conversation again does not add it twice
+        await store.save_metadata(_metadata(1))
+        await store.delete_metadata('conversation-0')
+        assert _ids(store) == ['conversation-1', 'conversation-2']
+
+    asyncio.run(run())
+
+
+def test_pages_follow_the_cursor(store):
+    async def run():
+        for i in range(5):
+            await store.save_metadata(_metadata(i))
+        assert await _all_pages(store, 2) == [
+            ['conversation-4', 'conversation-3'],
+            ['conversation-2', 'conversation-1'],
+            ['conversation-0'],
+        ]
+        # Conversations added between pages do not shift the later pages
+        first = await store.search(limit=2)
+        await store.save_metadata(_metadata(5))
+        second = await store.search(first.next_page_id, 2)
+        assert [c.conversation_id for c in second.results] == [
+            'conversation-2',
+            'conversation-1',
+        ]
+
+    asyncio.run(run())
+
+
+def test_offset_page_ids_still_work(store):
+    async def run():
+        for i in range(5):
+            await store.save_metadata(_metadata(i))
+        result = await store.search(offset_to_page_id(2, True), 2)
+        assert [c.conversation_id for c in result.results] == [
+            'conversation-2',
+            'conversation-1',
+        ]
+        assert result.next_page_id is not None
+        result = await store.search(offset_to_page_id(10, True), 2)
+        assert result.results == [] and result.next_page_id is None
+
+    asyncio.run(run())
+
+
+def test_first_search_builds_the_index(store):
+    async def run():
+        for i in range(3):
+            await store.save_metadata(_metadata(i))
+        store.file_store.delete(store.get_conversation_index_filename())
+        assert store._read_index() is None
+
+        assert await _all_pages(store, 10) == [
+            ['conversation-2', 'conversation-1', 'conversation-0']
+        ]
+        assert _ids(store) == ['conversation-0', 'conversation-1', 'conversation-2']
+
+    asyncio.run(run())
+
+
+def test_changes_during_the_first_build_are_indexed(store, monkeypatch):
+    async def run():
+        for i in range(3):
+            await store.save_metadata(_metadata(i))
+        store.file_store.delete(store.get_conversation_index_filename())
+        get_metadata_or_none = store._get_metadata_or_none
+        changed = False
+
+        async def change_during_scan(conversation_id):
+            nonlocal changed
+            if not changed:
+                changed = True
+                # No index yet, so neither change updates one
+                await store.save_metadata(_metadata(3))
+                await store.delete_metadata('conversation-1')
+            return await get_metadata_or_none(conversation_id)
+
+        monkeypatch.setattr(store, '_get_metadata_or_none', change_during_scan)
+        await store.rebuild_index()
+        assert _ids(store) == ['conversation-0', 'conversation-2', 'conversation-3']
+
+    asyncio.run(run())
+
+
+def test_rebuild_command(tmp_path):
+    files = tmp_path / 'files'
+    config_file = tmp_path / 'config.toml'
+    config_file.write_text(
+        f'[core]\nfile_store = "local"\nfile_store_path = "{files}"\n'
+    )
+    store = FileConversationStore(get_file_store('local', str(files)))
+
+    async def save():
+        for i in range(3):
+            await store.save_metadata(_metadata(i))
+
+    asyncio.run(save())
+    store.file_store.delete(store.get_conversation_index_filename())
+
+    assert asyncio.run(rebuild_index(str(config_file))) == 3
+    assert _ids(store) == ['conversation-0', 'conversation-1', 'conversation-2']
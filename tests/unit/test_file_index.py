@@ -0,0 +1,95 @@
+import os
+import random
+import threading
+
+import pytest
+
+from omninexus.runtime.utils.file_index import (
+    LineIndexCache,
+    build_line_index,
+    normalize_line_range,
+    read_line_range,
+    splice_lines,
+)
+
+
+def _readlines(path):
+    with open(path, encoding='utf-8') as file:
+        return file.readlines()
+
+
+@pytest.mark.parametrize(
+    'data',
+    [b'', b'a', b'a\nb\n', b'a\r\nb\r\n', b'a\rb\rc', b'a\r\r\nb\n\rc', b'\n\n\r'],
+)
+def test_lines_match_text_mode_readlines(tmp_path, data):
+    path = tmp_path / 'file.txt'
+    path.write_bytes(data)
+    lines = _readlines(path)
+
+    assert build_line_index(str(path)).num_lines == len(lines)
+    for start in range(len(lines) + 1):
+        for end in [-1, *range(len(lines) + 2)]:
+            begin, stop = normalize_line_range(len(lines), start, end)
+            content, next_start = read_line_range(str(path), start, end)
+            assert content == ''.join(lines[begin:stop])
+            assert next_start is None
+
+
+def test_capped_read_pages_through_the_file(tmp_path):
+    path = tmp_path / 'file.txt'
+    path.write_text(''.join(f'line {i}\n' for i in range(1000)))
+
+    parts = []
+    start: int | None = 0
+    while start is not None:
+        content, start = read_line_range(str(path), start, -1, max_bytes=100)
+        assert len(content.encode()) <= 100
+        parts.append(content)
+    assert ''.join(parts) == path.read_text()
+
+
+def test_splice_keeps_the_cached_index_exact(tmp_path):
+    rnd = random.Random(0)
+    path = tmp_path / 'file.txt'
+    cache = LineIndexCache()
+    for _ in range(200):
+        path.write_bytes(
+            ''.join(rnd.choice(['a', '\n', '\r', '\r\n']) for _ in range(20)).encode()
+        )
+        num_lines = cache.get(str(path)).num_lines
+        if num_lines == 0:
+            continue
+        start = rnd.randrange(num_lines)
+        end = rnd.choice([-1, rnd.randint(start, num_lines)])
+        to_insert = [rnd.choice(['x', '', 'y\r']) for _ in range(rnd.randint(0, 3))]
+        splice_lines(str(path), to_insert, start, end, cache)
+
+        assert list(cache.get(str(path)).offsets) == list(
+            build_line_index(str(path)).offsets
+        )
+
+
+def test_files_without_a_size_are_read_in_full():
+    with open('/proc/self/status', encoding='utf-8') as file:
+        lines = file.readlines()
+    content, next_start = read_line_range('/proc/self/status', 0, 3)
+    assert content == ''.join(lines[:3])
+    assert next_start is None
+    # the first line is longer than the cap: its head, then the next line
+    content, next_start = read_line_range('/proc/self/status', 0, -1, max_bytes=4)
+    assert content == lines[0][:4] and next_start == 1
+
+
+def test_fifo_is_read_as_a_stream(tmp_path):
+    path = tmp_path / 'fifo'
+    os.mkfifo(path)
+
+    def write():
+        with open(path, 'w') as file:
+            file.write('a\nb\nc\n')
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    assert read_line_range(str(path), 1, -1) == ('b\nc\n', None)
+    writer.join()
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import tempfile
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import pytest
+
+from omninexus.runtime.impl.action_execution.action_execution_client import (
+    ActionExecutionClient,
+)
+from omninexus.runtime.utils.archive import extract_archive, iter_archive
+from omninexus.runtime.utils.file_manifest import (
+    FileHashCache,
+    build_manifest,
+    diff_manifests,
+    resolve_member,
+)
+
+
+def _write_tree(root, files):
+    for path, content in files.items():
+        file_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as f:
+            f.write(content)
+
+
+def _read_tree(root):
+    tree = {}
+    for dirpath, _, files in os.walk(root):
+        for file in files:
+            file_path = os.path.join(dirpath, file)
+            with open(file_path) as f:
+                tree[os.path.relpath(file_path, root)] = f.read()
+    return tree
+
+
+def test_build_manifest(tmp_path):
+    _write_tree(tmp_path, {'a.txt': 'a', 'dir/b.txt': 'bb'})
+
+    manifest = build_manifest(str(tmp_path))
+
+    assert sorted(manifest) == ['a.txt', 'dir/b.txt']
+    assert manifest['dir/b.txt']['size'] == 2
+    assert manifest['dir/b.txt']['sha256'] == hashlib.sha256(b'bb').hexdigest()
+    assert build_manifest(str(tmp_path / 'missing')) == {}
+
+
+def test_hash_cache_follows_changes(tmp_path):
+    path = tmp_path / 'file.txt'
+    path.write_text('old')
+    cache = FileHashCache()
+    assert cache.sha256(str(path)) == hashlib.sha256(b'old').hexdigest()
+
+    path.write_text('new content')
+    assert cache.sha256(str(path)) == hashlib.sha256(b'new content').hexdigest()
+
+
+def test_hash_cache_is_bounded(tmp_path):
+    cache = FileHashCache(max_entries=2)
+    for i in range(5):
+        path = tmp_path / f'{i}.txt'
+        path.write_text(str(i))
+        cache.sha256(str(path))
+    assert len(cache._entries) == 2
+
+
+def test_diff_manifests():
+    entry = {'size': 1, 'mtime': 0.0, 'sha256': 'x'}
+    source = {
+        'same': entry,
+        'new': entry,
+        'edited': {**entry, 'sha256': 'y'},
+        'touched': {**entry, 'mtime': 1.0},
+    }
+    target = {'same': entry, 'edited': entry, 'touched': entry, 'stale': entry}
+
+    changed, removed = diff_manifests(source, target)
+
+    assert changed == ['edited', 'new']
+    assert removed == ['stale']
+
+
+@pytest.mark.parametrize('member', ['../x', '/etc/passwd', 'a/../../x'])
+def test_resolve_member_refuses_escapes(tmp_path, member):
+    with pytest.raises(ValueError):
+        resolve_member(str(tmp_path), member)
+
+
+class _Response:
+    def __init__(self, json=None, chunks=()):
+        self._json = json
+        self._chunks = chunks
+
+    def json(self):
+        return self._json
+
+    def iter_content(self, chunk_size):
+        return iter(self._chunks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def _sandbox_request(method, url, json=None, data=None, params=None, **kwargs):
+    """Serves the sync endpoints of the action execution server locally."""
+    path = urlparse(url).path
+    if path == '/file_manifest':
+        return _Response({'files': build_manifest(json['path'])})
+    if path == '/upload_archive':
+        body = b''.join(data)
+        with tempfile.NamedTemporaryFile() as archive:
+            archive.write(body)
+            archive.flush()
+            extract_archive(archive.name, params['destination'], params['format'])
+        return _Response(
+            {'size': len(body), 'sha256': hashlib.sha256(body).hexdigest()}
+        )
+    if path == '/download_archive':
+        chunks = list(iter_archive(json['path'], json['format'], members=json['files']))
+        return _Response(chunks=chunks)
+    if path == '/delete_files':
+        for member in json['files']:
+            os.remove(resolve_member(json['path'], member))
+        return _Response({'deleted': len(json['files'])})
+    raise AssertionError(f'Unexpected request {method} {url}')
+
+
+class _LocalClient(ActionExecutionClient):
+    def __init__(self, archive_format):
+        self.sid = 'test'
+        self.config = SimpleNamespace(
+            sandbox=SimpleNamespace(copy_archive_format=archive_format)
+        )
+        self._file_hash_cache = FileHashCache()
+
+    def _get_action_execution_server_host(self):
+        return 'http://sandbox'
+
+    def _send_action_server_request(self, method, url, **kwargs):
+        return _sandbox_request(method, url, **kwargs)
+
+    async def connect(self):
+        pass
+
+
+@pytest.fixture(params=['zip', 'tar'])
+def client(request):
+    return _LocalClient(request.param)
+
+
+def test_sync_to_sends_only_changes(tmp_path, client):
+    host, sandbox = tmp_path / 'host', tmp_path / 'sandbox'
+    _write_tree(host, {'same.txt': 'same', 'edited.txt': 'new', 'd/new.txt': 'n'})
+    _write_tree(sandbox, {'same.txt': 'same', 'edited.txt': 'old', 'stale.txt': 's'})
+
+    stats = client.sync_to(str(host), str(sandbox))
+
+    assert stats['transferred'] == 2
+    assert stats['deleted'] == 0
+    assert _read_tree(sandbox) == {**_read_tree(host), 'stale.txt': 's'}
+
+    stats = client.sync_to(str(host), str(sandbox), delete=True)
+
+    assert stats['transferred'] == 0
+    assert stats['deleted'] == 1
+    assert _read_tree(sandbox) == _read_tree(host)
+
+
+def test_sync_from_sends_only_changes(tmp_path, client):
+    sandbox, host = tmp_path / 'sandbox', tmp_path / 'host'
+    _write_tree(sandbox, {'same.txt': 'same', 'edited.txt': 'new', 'd/new.txt': 'n'})
+    _write_tree(host, {'same.txt': 'same', 'edited.txt': 'old', 'stale.txt': 's'})
+
+    stats = client.sync_from(str(sandbox), str(host), delete=True)
+
+    assert stats['transferred'] == 2
+    assert stats['deleted'] == 1
+    assert _read_tree(host) == _read_tree(sandbox)
+    assert client.sync_from(str(sandbox), str(host))['transferred'] == 0
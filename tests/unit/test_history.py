@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from omninexus.controller.state.history import History
+from omninexus.events.action import MessageAction
+from omninexus.events.event import Event, EventSource
+from omninexus.events.stream import EventStream
+from omninexus.memory.condenser import NoOpCondenser, RecentEventsCondenser
+from omninexus.storage.memory import InMemoryFileStore
+
+
+class _CountingStream(EventStream):
+    def __init__(self):
+        super().__init__('history', InMemoryFileStore())
+        self.reads = 0
+
+    def get_event(self, id: int) -> Event:
+        self.reads += 1
+        return super().get_event(id)
+
+
+@pytest.fixture
+def event_stream():
+    event_stream = _CountingStream()
+    yield event_stream
+    event_stream.close()
+
+
+def _add_events(event_stream: EventStream, count: int) -> list[Event]:
+    events = []
+    for i in range(count):
+        event = MessageAction(content=f'message {i}')
+        event_stream.add_event(event, EventSource.AGENT)
+        events.append(event)
+    return events
+
+
+def test_history_matches_a_list(event_stream):
+    rnd = random.Random(0)
+    events = _add_events(event_stream, 100)
+    history = History(event_stream, events[:50], window=4, cache_size=3)
+    expected = events[:50]
+    for event in events[50:]:
+        history.append(event)
+        expected.append(event)
+        start = rnd.randrange(len(expected))
+        assert history[start:] == expected[start:]
+        assert history[rnd.randrange(len(expected))] in expected
+    assert list(history) == expected
+    assert event_stream.reads > 0
+
+
+def test_window_none_keeps_every_event_in_memory(event_stream):
+    events = _add_events(event_stream, 50)
+    history = History(event_stream, events, window=None)
+    for _ in range(3):
+        assert NoOpCondenser().condense(history) == events
+    assert event_stream.reads == 0
+
+
+def test_tail_condensers_only_read_recent_events(event_stream):
+    events = _add_events(event_stream, 50)
+    history = History(event_stream, events, window=10)
+    condenser = RecentEventsCondenser(keep_first=1, max_events=5)
+    assert condenser.reads_history_tail
+    assert condenser.condense(history) == [events[0], *events[-4:]]
+    assert event_stream.reads == 1
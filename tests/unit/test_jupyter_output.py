@@ -0,0 +1,31 @@
+from omninexus.runtime.plugins.jupyter.execute_server import (
+    STREAMED_IMAGE_PLACEHOLDER,
+    append_output,
+)
+
+
+def _display(image):
+    return {'data': {'text/plain': '<Figure>', 'image/png': image}}
+
+
+def test_small_images_are_streamed_inline():
+    outputs: list[str] = []
+    text = append_output('display_data', _display('abc'), outputs, 10)
+
+    assert text == ''.join(outputs)
+    assert 'data:image/png;base64,abc' in text
+
+
+def test_large_images_are_only_in_the_final_output():
+    outputs: list[str] = []
+    text = append_output('display_data', _display('a' * 100), outputs, 10)
+
+    assert text == '<Figure>' + STREAMED_IMAGE_PLACEHOLDER
+    assert f'data:image/png;base64,{"a" * 100}' in ''.join(outputs)
+
+
+def test_messages_without_output():
+    outputs: list[str] = []
+    assert append_output('status', {'execution_state': 'idle'}, outputs) is None
+    assert append_output('stream', {'text': 'hi\n'}, outputs) == 'hi\n'
+    assert outputs == ['hi\n']
@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+from omninexus.core.config import AppConfig
+from omninexus.runtime.impl.local.local_runtime import LocalRuntime
+from omninexus.runtime.plugins import JupyterRequirement
+
+
+def _server_key(config: AppConfig) -> tuple:
+    runtime = SimpleNamespace(config=config, plugins=[JupyterRequirement()])
+    runtime._server_command = lambda port: LocalRuntime._server_command(runtime, port)  # type: ignore[attr-defined]
+    return LocalRuntime._server_key(runtime)  # type: ignore[arg-type]
+
+
+def test_warm_servers_are_keyed_by_every_startup_option():
+    key = _server_key(AppConfig())
+
+    config = AppConfig()
+    # a temporary workspace differs from server to server
+    config.workspace_mount_path_in_sandbox = '/tmp/omninexus-workspace-1'
+    assert _server_key(config) == key
+
+    for option, value in [
+        ('browser_pool_size', 2),
+        ('browser_observation_profile', 'text'),
+        ('browse_fetch_mode', 'auto'),
+        ('jupyter_kernel_mode', 'direct'),
+        ('lazy_plugins', not AppConfig().sandbox.lazy_plugins),
+        ('user_id', 4242),
+    ]:
+        config = AppConfig()
+        setattr(config.sandbox, option, value)
+        assert _server_key(config) != key, option
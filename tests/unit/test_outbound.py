@@ -0,0 +1,43 @@
+import asyncio
+
+from omninexus.server.session.outbound import OutboundQueue, decode_batch
+
+
+def test_failed_frame_does_not_drop_the_rest():
+    sent: list[dict] = []
+
+    async def emit(event_name: str, payload: dict) -> None:
+        messages = decode_batch(event_name, payload)
+        if any(message['id'] == 1 for message in messages):
+            raise ValueError('connection lost')
+        sent.extend(messages)
+
+    async def run():
+        queue = OutboundQueue(emit, window=0, max_batch=1)
+        for i in range(4):
+            queue.put({'id': i})
+        await queue.flush()
+
+    asyncio.run(run())
+    assert [message['id'] for message in sent] == [0, 2, 3]
+
+
+def test_unbatched_queue_keeps_the_order_of_slow_emits():
+    sent: list[int] = []
+
+    async def emit(event_name: str, payload: dict) -> None:
+        assert event_name == 'oh_event'
+        # Later messages would overtake this one if emits ran concurrently
+        await asyncio.sleep(0.01 if payload['id'] % 2 == 0 else 0)
+        sent.append(payload['id'])
+
+    async def run():
+        queue = OutboundQueue(emit, window=0, max_batch=1)
+        for i in range(10):
+            queue.put({'id': i})
+            await asyncio.sleep(0)
+        while len(sent) < 10:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert sent == list(range(10))
@@ -0,0 +1,231 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from omninexus.controller.agent import Agent
+from omninexus.controller.agent_controller import AgentController
+from omninexus.controller.parallel_delegation import (
+    ParallelDelegation,
+    ScopedEventStream,
+)
+from omninexus.core.config import AgentConfig, AppConfig, LLMConfig
+from omninexus.core.schema import AgentState
+from omninexus.events.action import (
+    AgentDelegateParallelAction,
+    AgentFinishAction,
+    CmdRunAction,
+    MessageAction,
+)
+from omninexus.events.event import Event, EventSource
+from omninexus.events.observation import (
+    AgentDelegateObservation,
+    CmdOutputObservation,
+)
+from omninexus.events.stream import EventStream, EventStreamSubscriber
+from omninexus.llm.llm import LLM
+from omninexus.llm.metrics import Metrics
+from omninexus.runtime.impl.action_execution.action_execution_client import (
+    ActionExecutionClient,
+)
+from omninexus.storage.memory import InMemoryFileStore
+
+
+class _FinishingAgent(Agent):
+    def step(self, state):
+        return AgentFinishAction(outputs={'done': True})
+
+
+class _AskingAgent(Agent):
+    def step(self, state):
+        return MessageAction(content='Which file?', wait_for_response=True)
+
+
+for _agent_cls in (_FinishingAgent, _AskingAgent):
+    if _agent_cls.__name__ not in Agent._registry:
+        Agent.register(_agent_cls.__name__, _agent_cls)
+
+
+@pytest.fixture
+def event_stream():
+    event_stream = EventStream('parallel', InMemoryFileStore())
+    yield event_stream
+    event_stream.close()
+
+
+def _wait_for(condition, timeout: float = 10) -> None:
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_scoped_streams_only_pass_on_their_own_events(event_stream):
+    views = [ScopedEventStream(event_stream, f'delegate-{i}') for i in range(2)]
+    received: list[list[Event]] = [[], []]
+    for i, view in enumerate(views):
+        view.subscribe(
+            EventStreamSubscriber.AGENT_CONTROLLER, received[i].append, f'view-{i}'
+        )
+
+    actions = [CmdRunAction(command=f'echo {i}') for i in range(2)]
+    for view, action in zip(views, actions, strict=True):
+        view.add_event(action, EventSource.AGENT)
+    # the runtime answers on the shared stream
+    for action in reversed(actions):
+        observation = CmdOutputObservation(
+            content='', command_id=-1, command=action.command
+        )
+        observation._cause = action.id  # type: ignore[attr-defined]
+        event_stream.add_event(observation, EventSource.ENVIRONMENT)
+    event_stream.add_event(MessageAction(content='to everyone'), EventSource.USER)
+
+    _wait_for(lambda: all(len(events) == 2 for events in received))
+    time.sleep(0.1)
+    for i, view in enumerate(views):
+        assert actions[i].bash_session == f'delegate-{i}'
+        assert received[i][0] is actions[i]
+        assert [event.cause for event in received[i][1:]] == [actions[i].id]  # type: ignore[attr-defined]
+        assert [event.id for event in view.get_events()] == [
+            event.id for event in received[i]
+        ]
+
+
+def test_nested_views_keep_the_innermost_session(event_stream):
+    outer = ScopedEventStream(event_stream, 'outer')
+    inner = ScopedEventStream(outer, 'inner')  # type: ignore[arg-type]
+    action = CmdRunAction(command='ls')
+    inner.add_event(action, EventSource.AGENT)
+    assert action.bash_session == 'inner'
+    assert outer.owns(action) and inner.owns(action)
+
+
+class _BlockingRuntime(ActionExecutionClient):
+    """Runs commands only once `barrier.parties` of them are running at the same time."""
+
+    def __init__(self, *args, barrier: threading.Barrier, **kwargs):
+        self.barrier = barrier
+        super().__init__(*args, **kwargs)
+
+    def _get_action_execution_server_host(self) -> str:
+        return 'http://localhost:0'
+
+    async def connect(self) -> None:
+        pass
+
+    def _execute_action(self, action):
+        self.barrier.wait()
+        return CmdOutputObservation(content='', command_id=-1, command=action.command)
+
+
+def test_runtime_runs_bash_sessions_side_by_side(event_stream):
+    runtime = _BlockingRuntime(
+        AppConfig(), event_stream, sid='runtime', barrier=threading.Barrier(2, 10)
+    )
+    try:
+        for i in range(2):
+            action = CmdRunAction(command=f'sleep {i}', bash_session=f'delegate-{i}')
+            event_stream.add_event(action, EventSource.AGENT)
+        _wait_for(
+            lambda: sum(
+                isinstance(event, CmdOutputObservation)
+                for event in event_stream.get_events()
+            )
+            == 2,
+            timeout=15,
+        )
+        assert not runtime.barrier.broken
+    finally:
+        runtime.close()
+
+
+def _delegate(iteration: int, cost: float) -> SimpleNamespace:
+    metrics = Metrics()
+    metrics.add_cost(cost)
+    return SimpleNamespace(
+        state=SimpleNamespace(iteration=iteration, local_metrics=metrics),
+        agent=SimpleNamespace(llm=SimpleNamespace(metrics=metrics)),
+    )
+
+
+def test_delegates_share_the_budgets():
+    parent = SimpleNamespace(state=SimpleNamespace(metrics=Metrics()))
+    parent.state.metrics.add_cost(1.0)
+    delegation = ParallelDelegation(parent, start_iteration=10)  # type: ignore[arg-type]
+    delegates = [_delegate(13, 0.5), _delegate(12, 0.25)]
+    delegation.delegates = delegates  # type: ignore[assignment]
+
+    assert delegation.total_iteration() == 15
+    assert delegation.accumulated_cost() == 1.75
+    # once merged, a delegate's cost is only counted in the shared metrics
+    delegation.merge_metrics(delegates[0])  # type: ignore[arg-type]
+    assert parent.state.metrics.accumulated_cost == 1.5
+    assert delegation.accumulated_cost() == 1.75
+
+    assert not delegation.mark_finished(delegates[0])  # type: ignore[arg-type]
+    assert delegation.mark_finished(delegates[1])  # type: ignore[arg-type]
+    assert not delegation.mark_finished(delegates[1])  # type: ignore[arg-type]
+
+
+def test_concurrent_merges_are_not_lost():
+    parent = SimpleNamespace(state=SimpleNamespace(metrics=Metrics()))
+    delegation = ParallelDelegation(parent, start_iteration=0)  # type: ignore[arg-type]
+    delegates = [_delegate(0, 0.5) for _ in range(8)]
+
+    def merge(delegate):
+        for _ in range(200):
+            delegation.merge_metrics(delegate)
+
+    threads = [threading.Thread(target=merge, args=(d,)) for d in delegates]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert parent.state.metrics.accumulated_cost == 8 * 200 * 0.5
+    assert len(parent.state.metrics.costs) == 8 * 200
+
+
+def test_delegate_waiting_for_input_hands_control_back(event_stream):
+    llm_config = LLMConfig(model='gpt-4o')
+
+    async def run():
+        parent = AgentController(
+            agent=_FinishingAgent(LLM(config=llm_config), AgentConfig()),
+            event_stream=event_stream,
+            max_iterations=10,
+            sid='parent',
+            headless_mode=True,
+        )
+        await parent.set_agent_state_to(AgentState.RUNNING)
+        await parent.start_parallel_delegation(
+            AgentDelegateParallelAction(
+                delegates=[
+                    {'agent': '_AskingAgent', 'inputs': {'task': 'ask'}},
+                    {'agent': '_FinishingAgent', 'inputs': {'task': 'finish'}},
+                ]
+            )
+        )
+        await asyncio.to_thread(
+            _wait_for,
+            lambda: any(
+                isinstance(event, AgentDelegateObservation)
+                for event in event_stream.get_events()
+            ),
+        )
+        assert parent.parallel_delegation is None
+        await parent.close()
+
+    asyncio.run(run())
+    (observation,) = [
+        event
+        for event in event_stream.get_events()
+        if isinstance(event, AgentDelegateObservation)
+    ]
+    assert [
+        (result['agent'], result['state']) for result in observation.outputs['results']
+    ] == [
+        ('_AskingAgent', AgentState.AWAITING_USER_INPUT.value),
+        ('_FinishingAgent', AgentState.FINISHED.value),
+    ]
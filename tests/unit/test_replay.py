@@ -0,0 +1,157 @@
+import asyncio
+import random
+
+import pytest
+
+from omninexus.core.schema.agent import AgentState
+from omninexus.events.action import MessageAction
+from omninexus.events.event import EventSource
+from omninexus.events.observation.agent import AgentStateChangedObservation
+from omninexus.events.serialization import event_to_dict
+from omninexus.events.stream import EventStream
+from omninexus.server import listen_socket
+from omninexus.server.session.outbound import (
+    decode_batch,
+    emit_to_room,
+    live_event_hold,
+)
+from omninexus.server.session.session import ROOM_KEY
+from omninexus.storage.memory import InMemoryFileStore
+
+
+class _FakeServer:
+    """Delivers emits to in-memory clients, acknowledging every frame.
+
+    Only the clients in `batched` understand `oh_event_batch` frames.
+    """
+
+    def __init__(self):
+        self.rooms: dict[str, set[str]] = {}
+        self.received: dict[str, list[dict]] = {}
+        self.batched: set[str] = set()
+
+    async def enter_room(self, connection_id: str, room: str) -> None:
+        self.rooms.setdefault(room, set()).add(connection_id)
+
+    async def emit(self, event, data, to, skip_sid=None, callback=None):
+        skipped = set(skip_sid or [])
+        connections = self.rooms.get(to, {to})
+        for connection_id in connections - skipped:
+            if event == 'oh_event_batch':
+                assert connection_id in self.batched, f'{connection_id} got a batch'
+            self.received.setdefault(connection_id, []).extend(
+                decode_batch(event, data)
+            )
+        await asyncio.sleep(0)
+        if callback is not None:
+            callback()
+
+
+async def _produce(event_stream: EventStream, server: _FakeServer, count: int):
+    """Add events like a running agent, emitting each one live like a Session."""
+    room = ROOM_KEY.format(sid=event_stream.sid)
+    states = [AgentState.RUNNING, AgentState.AWAITING_USER_INPUT]
+    for i in range(count):
+        if i % 10 == 0:
+            event = AgentStateChangedObservation('', states[i // 10 % 2])
+            event_stream.add_event(event, EventSource.ENVIRONMENT)
+        else:
+            event = MessageAction(content=f'message {i}')
+            event_stream.add_event(event, EventSource.AGENT)
+        await emit_to_room(server, room, 'oh_event', event_to_dict(event))
+        await asyncio.sleep(0.001)
+
+
+async def _reconnect(
+    event_stream: EventStream,
+    server: _FakeServer,
+    connection_id: str,
+    start_ids: dict[str, int],
+    batched: bool,
+):
+    await asyncio.sleep(random.random() * 0.2)
+    # The client has seen some of the events stored so far
+    start_id = start_ids[connection_id] = random.randint(0, event_stream._cur_id)
+    room = ROOM_KEY.format(sid=event_stream.sid)
+    if batched:
+        server.batched.add(connection_id)
+    live_event_hold.hold(room, connection_id)
+    await server.enter_room(connection_id, room)
+    await listen_socket._replay_events(connection_id, event_stream, start_id, batched)
+
+
+@pytest.mark.parametrize('batched', [False, True])
+def test_concurrent_reconnects_see_events_in_order(monkeypatch, batched):
+    random.seed(0)
+    server = _FakeServer()
+    monkeypatch.setattr(listen_socket, 'sio', server)
+    monkeypatch.setattr(listen_socket, 'REPLAY_BATCH_SIZE', 7)
+    event_stream = EventStream('conversation', InMemoryFileStore())
+    start_ids: dict[str, int] = {}
+
+    async def run():
+        producer = asyncio.create_task(_produce(event_stream, server, 300))
+        await asyncio.gather(
+            *(
+                _reconnect(event_stream, server, f'connection-{i}', start_ids, batched)
+                for i in range(100)
+            )
+        )
+        await producer
+
+    try:
+        asyncio.run(run())
+    finally:
+        event_stream.close()
+
+    events = list(event_stream.get_events())
+    last_state = [e for e in events if isinstance(e, AgentStateChangedObservation)][-1]
+    for connection_id, start_id in start_ids.items():
+        received = server.received[connection_id]
+        messages = [
+            m for m in received if m.get('observation') != 'agent_state_changed'
+        ]
+        expected = [
+            e.id
+            for e in events
+            if e.id >= start_id and not isinstance(e, AgentStateChangedObservation)
+        ]
+        # Every message once, in order, whether replayed or live
+        assert [m['id'] for m in messages] == expected
+        # The newest agent state is the one the client ends up in
+        states = [m for m in received if m.get('observation') == 'agent_state_changed']
+        assert states[-1]['id'] == last_state.id
+    assert not live_event_hold._held
+
+
+def test_unbatched_client_gets_held_events_one_by_one(monkeypatch):
+    server = _FakeServer()
+    monkeypatch.setattr(listen_socket, 'sio', server)
+    event_stream = EventStream('unbatched', InMemoryFileStore({}))
+    room = ROOM_KEY.format(sid=event_stream.sid)
+    for i in range(3):
+        event_stream.add_event(MessageAction(content=f'stored {i}'), EventSource.USER)
+    send_replay = listen_socket._send_replay
+
+    async def send_replay_with_live_events(*args):
+        cursor = await send_replay(*args)
+        # Events added after the replay read the stream are held for the client
+        for i in range(3):
+            event = MessageAction(content=f'live {i}')
+            event_stream.add_event(event, EventSource.AGENT)
+            await emit_to_room(server, room, 'oh_event', event_to_dict(event))
+        return cursor
+
+    monkeypatch.setattr(listen_socket, '_send_replay', send_replay_with_live_events)
+
+    async def run():
+        live_event_hold.hold(room, 'client')
+        await server.enter_room('client', room)
+        await listen_socket._replay_events('client', event_stream, 0, False)
+
+    try:
+        asyncio.run(run())
+    finally:
+        event_stream.close()
+    assert [m['id'] for m in server.received['client']] == list(range(6))
+    assert not live_event_hold._held
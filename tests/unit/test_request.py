@@ -0,0 +1,32 @@
+from unittest import mock
+
+import pytest
+import requests
+
+from omninexus.runtime.utils.request import send_request
+
+
+def _response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b'{}'
+    return response
+
+
+def test_streamed_body_is_not_retried():
+    session = mock.Mock(spec=requests.Session)
+    session.request.return_value = _response(429)
+
+    with pytest.raises(requests.HTTPError):
+        send_request(session, 'POST', 'http://runtime/upload', data=iter([b'a']))
+    assert session.request.call_count == 1
+
+
+def test_replayable_body_is_retried():
+    session = mock.Mock(spec=requests.Session)
+    session.request.side_effect = [_response(429), _response(200)]
+
+    with mock.patch('time.sleep'):
+        response = send_request(session, 'POST', 'http://runtime/upload', data=b'a')
+    assert response.status_code == 200
+    assert session.request.call_count == 2
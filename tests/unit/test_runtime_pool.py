@@ -0,0 +1,79 @@
+import asyncio
+
+from omninexus.core.config import AppConfig, LLMConfig
+from omninexus.events.stream import EventStream
+from omninexus.runtime import pool as pool_module
+from omninexus.runtime.impl.action_execution.action_execution_client import (
+    ActionExecutionClient,
+)
+from omninexus.runtime.pool import RuntimePool
+from omninexus.storage.memory import InMemoryFileStore
+
+
+class _FakeRuntime(ActionExecutionClient):
+    started: list['_FakeRuntime'] = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _FakeRuntime.started.append(self)
+
+    def _get_action_execution_server_host(self) -> str:
+        return 'http://localhost:0'
+
+    async def connect(self) -> None:
+        pass
+
+    def check_if_alive(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _config(api_key: str) -> AppConfig:
+    config = AppConfig()
+    config.set_llm_config(LLMConfig(model='gpt-4o', api_key=api_key))
+    return config
+
+
+def _api_keys(runtime) -> set[str | None]:
+    return {
+        runtime.config.get_llm_config().api_key,
+        runtime.draft_editor_llm.config.api_key,
+    }
+
+
+def test_sessions_sharing_a_pool_get_their_own_llm(monkeypatch):
+    monkeypatch.setattr(pool_module, 'get_runtime_cls', lambda name: _FakeRuntime)
+    _FakeRuntime.started = []
+
+    async def run():
+        pool = RuntimePool(size=1)
+        config_a, config_b = _config('key-a'), _config('key-b')
+        streams = [EventStream(sid, InMemoryFileStore()) for sid in ('a', 'b')]
+        try:
+            assert await pool.acquire('fake', config_a, [], streams[0]) is None
+            while not pool.get_metrics()['ready']:
+                await asyncio.sleep(0.01)
+            runtime_b = await pool.acquire('fake', config_b, [], streams[1])
+            assert runtime_b is not None
+            assert _api_keys(runtime_b) == {'key-b'}
+            # runtimes waiting in the pool hold no session's credentials
+            assert all(
+                _api_keys(runtime).isdisjoint({'key-a', 'key-b'})
+                for runtime in _FakeRuntime.started
+                if runtime is not runtime_b
+            )
+
+            while not pool.get_metrics()['ready']:
+                await asyncio.sleep(0.01)
+            runtime_a = await pool.acquire('fake', config_a, [], streams[0])
+            assert runtime_a is not None and runtime_a is not runtime_b
+            assert _api_keys(runtime_a) == {'key-a'}
+            assert _api_keys(runtime_b) == {'key-b'}
+        finally:
+            pool.close()
+            for stream in streams:
+                stream.close()
+
+    asyncio.run(run())
@@ -0,0 +1,44 @@
+from omninexus.runtime.utils.source_hash import PersistentHashCache, hash_directory
+
+
+def _write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def test_hash_depends_on_names_and_contents(tmp_path):
+    cache = PersistentHashCache(str(tmp_path / 'cache.json'))
+    root = tmp_path / 'src'
+    _write(root / 'a.py', 'a')
+    _write(root / 'pkg' / 'b.py', 'b')
+    _write(root / 'pkg' / 'b.pyc', 'ignored')
+    ignore = ['*.pyc']
+    digest = hash_directory(str(root), cache, ignore)
+
+    _write(root / 'pkg' / 'b.pyc', 'changed')
+    assert hash_directory(str(root), cache, ignore) == digest
+    _write(root / 'pkg' / 'b.py', 'changed')
+    assert hash_directory(str(root), cache, ignore) != digest
+
+
+def test_cache_is_reused_and_pruned(tmp_path):
+    cache_path = str(tmp_path / 'cache.json')
+    root = tmp_path / 'src'
+    elsewhere = tmp_path / 'other' / 'c.py'
+    _write(root / 'a.py', 'a')
+    _write(root / 'b.py', 'b')
+    _write(elsewhere, 'c')
+    cache = PersistentHashCache(cache_path)
+    digest = hash_directory(str(root), cache)
+    cache.file_md5(str(elsewhere))
+    cache.save()
+
+    (root / 'b.py').unlink()
+    elsewhere.unlink()
+    cache = PersistentHashCache(cache_path)
+    assert len(cache._files) == 3
+    assert hash_directory(str(root), cache) != digest
+    cache.prune(str(root))
+    cache.save()
+
+    assert list(PersistentHashCache(cache_path)._files) == [str(root / 'a.py')]
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from omninexus.core.config import load_app_config
+from omninexus.server.settings import Settings
+from omninexus.storage.conversation.file_conversation_store import (
+    FileConversationStore,
+)
+from omninexus.storage.conversation.sqlite_conversation_store import (
+    SQLiteConversationStore,
+)
+from omninexus.storage.data_models.conversation_metadata import ConversationMetadata
+from omninexus.storage.migrate_to_sqlite import migrate_to_sqlite
+from omninexus.storage.settings.file_settings_store import FileSettingsStore
+from omninexus.storage.settings.sqlite_settings_store import SQLiteSettingsStore
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / 'config.toml'
+    path.write_text(
+        '[core]\n'
+        'file_store = "local"\n'
+        f'file_store_path = "{tmp_path / "files"}"\n'
+        f'sqlite_store_path = "{tmp_path / "omninexus.db"}"\n'
+    )
+    return str(path)
+
+
+def test_migration_stores_rows_under_the_route_user_ids(config_file):
+    async def run():
+        config = load_app_config(config_file=config_file)
+        await (await FileSettingsStore.get_instance(config, None)).store(
+            Settings(language='en')
+        )
+        file_conversations = await FileConversationStore.get_instance(config, None)
+        for conversation_id, github_user_id in [('a', 0), ('b', 42), ('c', 42)]:
+            await file_conversations.save_metadata(
+                ConversationMetadata(conversation_id, github_user_id, None)
+            )
+
+        assert await migrate_to_sqlite(config_file) == (True, 3)
+
+        # Without a GitHub login the routes use 0 and the socket None
+        for user_id in (0, None):
+            settings = await (
+                await SQLiteSettingsStore.get_instance(config, user_id)
+            ).load()
+            assert settings is not None and settings.language == 'en'
+            store = await SQLiteConversationStore.get_instance(config, user_id)
+            result = await store.search()
+            assert [c.conversation_id for c in result.results] == ['a']
+
+        store = await SQLiteConversationStore.get_instance(config, 42)
+        result = await store.search()
+        assert sorted(c.conversation_id for c in result.results) == ['b', 'c']
+        assert (await store.get_metadata('b')).github_user_id == 42
+
+    asyncio.run(run())
+
+
+def test_conversation_store_is_scoped_to_its_user(config_file):
+    async def run():
+        config = load_app_config(config_file=config_file)
+        owner = await SQLiteConversationStore.get_instance(config, 1)
+        other = await SQLiteConversationStore.get_instance(config, 2)
+        await owner.save_metadata(ConversationMetadata('a', 1, None))
+
+        assert not await other.exists('a')
+        with pytest.raises(FileNotFoundError):
+            await other.get_metadata('a')
+        await other.delete_metadata('a')
+        assert await owner.exists('a')
+
+        await owner.delete_metadata('a')
+        assert not await owner.exists('a')
+
+    asyncio.run(run())
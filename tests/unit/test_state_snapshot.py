@@ -0,0 +1,158 @@
+import base64
+import pickle
+
+import pytest
+
+from omninexus.controller.state import snapshot
+from omninexus.controller.state.snapshot import (
+    DELTA,
+    FULL,
+    MAGIC,
+    decode_snapshot,
+    encode_snapshot,
+    get_base_path,
+    get_delta_path,
+)
+from omninexus.controller.state.state import State
+from omninexus.core.schema import AgentState
+from omninexus.events.action import MessageAction
+from omninexus.llm.metrics import Metrics
+from omninexus.storage.memory import InMemoryFileStore
+
+
+def _snapshot_files(file_store: InMemoryFileStore) -> list[str]:
+    return sorted(file_store.list(snapshot.get_snapshot_dir('sid')))
+
+
+def test_snapshot_format_round_trips():
+    data = encode_snapshot(DELTA, 'base', 3, {'iteration': pickle.dumps(7)})
+    assert data.startswith(MAGIC)
+    kind, payload = decode_snapshot(data)
+    assert kind == DELTA
+    assert payload == {
+        'base_id': 'base',
+        'seq': 3,
+        'fields': {'iteration': pickle.dumps(7)},
+    }
+
+    with pytest.raises(ValueError, match='Not an agent state snapshot'):
+        decode_snapshot(b'not a snapshot')
+    newer = data[: len(MAGIC)] + bytes([snapshot.SNAPSHOT_VERSION + 1]) + data[5:]
+    with pytest.raises(ValueError, match='Unsupported'):
+        decode_snapshot(newer)
+
+
+def test_saves_after_the_first_only_write_the_changed_fields():
+    file_store = InMemoryFileStore({})
+    state = State(max_iterations=10)
+    state.history = [MessageAction(content='not saved')]
+    state.save_to_session('sid', file_store)
+    assert _snapshot_files(file_store) == [get_base_path('sid')]
+
+    # nothing changed, nothing written
+    state.save_to_session('sid', file_store)
+    assert _snapshot_files(file_store) == [get_base_path('sid')]
+
+    state.iteration = 1
+    state.save_to_session('sid', file_store)
+    state.iteration = 2
+    state.outputs = {'done': True}
+    state.save_to_session('sid', file_store)
+    assert _snapshot_files(file_store) == [
+        get_base_path('sid'),
+        get_delta_path('sid', 1),
+        get_delta_path('sid', 2),
+    ]
+    kind, payload = decode_snapshot(file_store.read_bytes(get_delta_path('sid', 2)))
+    assert kind == DELTA and sorted(payload['fields']) == ['iteration', 'outputs']
+
+    restored = State.restore_from_session('sid', file_store)
+    assert restored.iteration == 2
+    assert restored.outputs == {'done': True}
+    assert restored.max_iterations == 10
+    assert restored.history == []
+    assert restored.agent_state == AgentState.LOADING
+
+    # the restored state carries on with the same chain
+    restored.iteration = 3
+    restored.save_to_session('sid', file_store)
+    assert get_delta_path('sid', 3) in _snapshot_files(file_store)
+    assert State.restore_from_session('sid', file_store).iteration == 3
+
+
+def test_restore_stops_at_a_missing_delta():
+    file_store = InMemoryFileStore({})
+    state = State()
+    state.save_to_session('sid', file_store)
+    for iteration in (1, 2, 3):
+        state.iteration = iteration
+        state.save_to_session('sid', file_store)
+    file_store.delete(get_delta_path('sid', 2))
+
+    assert State.restore_from_session('sid', file_store).iteration == 1
+
+
+def test_deltas_are_compacted_into_a_new_base(monkeypatch):
+    monkeypatch.setattr(snapshot, 'MAX_DELTAS', 3)
+    file_store = InMemoryFileStore({})
+    state = State()
+    state.save_to_session('sid', file_store)
+    base_id = decode_snapshot(file_store.read_bytes(get_base_path('sid')))[1]['base_id']
+    for iteration in range(1, 5):
+        state.iteration = iteration
+        state.save_to_session('sid', file_store)
+
+    assert _snapshot_files(file_store) == [get_base_path('sid')]
+    kind, payload = decode_snapshot(file_store.read_bytes(get_base_path('sid')))
+    assert kind == FULL and payload['base_id'] != base_id
+    assert State.restore_from_session('sid', file_store).iteration == 4
+
+
+def test_deltas_larger_than_the_base_are_compacted():
+    file_store = InMemoryFileStore({})
+    state = State()
+    state.save_to_session('sid', file_store)
+    state.extra_data = {'blob': bytes(range(256)) * 64}
+    state.save_to_session('sid', file_store)
+    assert get_delta_path('sid', 1) in _snapshot_files(file_store)
+
+    state.iteration = 1
+    state.save_to_session('sid', file_store)
+    assert _snapshot_files(file_store) == [get_base_path('sid')]
+
+
+def test_restores_legacy_pickled_state(monkeypatch):
+    file_store = InMemoryFileStore({})
+    state = State(iteration=5, agent_state=AgentState.PAUSED)
+    state.metrics.add_cost(0.5)
+    # states and metrics pickled by earlier versions hold their instance attributes
+    with monkeypatch.context() as m:
+        m.setattr(Metrics, '__getstate__', lambda self: self.__dict__.copy())
+        m.setattr(State, '__getstate__', lambda self: self.__dict__.copy())
+        pickled = pickle.dumps(state)
+    file_store.write(
+        'sessions/sid/agent_state.pkl', base64.b64encode(pickled).decode('utf-8')
+    )
+
+    restored = State.restore_from_session('sid', file_store)
+    assert restored.iteration == 5
+    assert restored.resume_state == AgentState.PAUSED
+    assert restored.metrics.accumulated_cost == 0.5
+    assert [cost.cost for cost in restored.metrics.costs] == [0.5]
+
+
+def test_metrics_pickle_compactly():
+    metrics = Metrics(model_name='gpt-4o')
+    metrics.add_cost(0.25)
+    metrics.add_cost(0.5)
+    metrics.add_response_latency(1.5, 'response-1')
+
+    state = metrics.__getstate__()
+    assert state['costs'][0][:2] == ('gpt-4o', 0.25)
+    assert state['response_latencies'] == [('gpt-4o', 1.5, 'response-1')]
+
+    restored = pickle.loads(pickle.dumps(metrics))
+    assert restored.get() == metrics.get()
+    assert restored.model_name == 'gpt-4o'
+    restored.add_cost(0.25)
+    assert restored.accumulated_cost == 1.0
@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+from omninexus.controller.state.state import State
+from omninexus.controller.stuck import StuckDetector
+from omninexus.events.action import CmdRunAction, IPythonRunCellAction, MessageAction
+from omninexus.events.action.action import Action
+from omninexus.events.action.empty import NullAction
+from omninexus.events.event import Event, EventSource
+from omninexus.events.observation import (
+    CmdOutputObservation,
+    IPythonRunCellObservation,
+)
+from omninexus.events.observation.empty import NullObservation
+from omninexus.events.observation.error import ErrorObservation
+from omninexus.events.observation.observation import Observation
+
+SYNTAX_ERROR = (
+    'Cell In[1], line 1\n    x = "\n    ^\nline\nline\n'
+    'SyntaxError: incomplete input\n'
+    '[Jupyter current working directory: /workspace]\n'
+    '[Jupyter Python interpreter: /usr/bin/python]'
+)
+
+
+def _scanning_is_stuck(
+    detector: StuckDetector, history: list[Event], headless_mode: bool
+) -> bool:
+    """The stuck check as it was before `_HistoryWindow`: a scan of the history."""
+    if not headless_mode:
+        last_user_msg_idx = -1
+        for i, event in enumerate(reversed(history)):
+            if isinstance(event, MessageAction) and event.source == EventSource.USER:
+                last_user_msg_idx = len(history) - i - 1
+                break
+        history = history[last_user_msg_idx + 1 :]
+    filtered = [
+        event
+        for event in history
+        if not (
+            (isinstance(event, MessageAction) and event.source == EventSource.USER)
+            or isinstance(event, (NullAction, NullObservation))
+        )
+    ]
+    if len(filtered) < 3:
+        return False
+
+    def last(kind: type, n: int) -> list[Event]:
+        return [event for event in reversed(filtered) if isinstance(event, kind)][:n]
+
+    actions, observations = last(Action, 4), last(Observation, 4)
+    if detector._is_stuck_repeating_action_observation(actions, observations):
+        return True
+    if detector._is_stuck_repeating_action_error(actions, observations):
+        return True
+
+    messages = [
+        (i, event)
+        for i, event in enumerate(filtered)
+        if isinstance(event, MessageAction) and event.source == EventSource.AGENT
+    ][-3:]
+    if len(messages) == 3 and all(messages[0][1] == m[1] for m in messages):
+        between = filtered[messages[0][0] + 1 : messages[-1][0]]
+        if not any(isinstance(event, Observation) for event in between):
+            return True
+
+    if len(filtered) < 6:
+        return False
+    actions, observations = last(Action, 6), last(Observation, 6)
+    if len(actions) == 6 and len(observations) == 6:
+        eq = detector._eq_no_pid
+        return all(
+            eq(events[j], events[j + 2]) and eq(events[j], events[j + 4])
+            for events in (actions, observations)
+            for j in (0, 1)
+        )
+    return False
+
+
+def _random_event(rnd: random.Random) -> Event:
+    command = rnd.choice(['ls', 'pwd'])
+    kind = rnd.randrange(10)
+    if kind == 0:
+        event: Event = MessageAction(content=rnd.choice(['hi', 'again']))
+        event._source = rnd.choice([EventSource.USER, EventSource.AGENT])  # type: ignore[attr-defined]
+        return event
+    if kind == 1:
+        return rnd.choice([NullAction(), NullObservation('')])
+    if kind == 2:
+        return ErrorObservation(rnd.choice(['error', 'other error']))
+    if kind == 3:
+        return IPythonRunCellAction(code=rnd.choice(['x = "', 'print(1)']))
+    if kind == 4:
+        return IPythonRunCellObservation(content=SYNTAX_ERROR, code='x = "')
+    if kind in (5, 6):
+        return CmdRunAction(command=command)
+    return CmdOutputObservation(content=rnd.choice(['a', 'b']), command=command)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_incremental_detector_matches_the_history_scan(seed):
+    rnd = random.Random(seed)
+    state = State()
+    detector = StuckDetector(state)
+    history: list[Event] = []
+    state.history = history
+    for _ in range(300):
+        if rnd.random() < 0.02:
+            # Replaced or truncated history
+            history = history[rnd.randrange(len(history) + 1) :]
+            state.history = history
+        # Runs of the same events make the loops the checks look for
+        event = _random_event(rnd)
+        for _ in range(rnd.choice([1, 1, 2, 4])):
+            history.append(event)
+        for headless_mode in (True, False):
+            assert detector.is_stuck(headless_mode) == _scanning_is_stuck(
+                detector, history, headless_mode
+            )
@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+from omninexus.core import tracing
+from omninexus.events.action import MessageAction
+from omninexus.events.event import EventSource
+from omninexus.events.stream import EventStream, EventStreamSubscriber
+from omninexus.storage.memory import InMemoryFileStore
+
+_SPAN = textwrap.dedent(
+    """
+    import sys
+    from omninexus.core import tracing
+    with tracing.span(sys.argv[1]):
+        pass
+    """
+)
+
+
+def _span_names(path) -> list[str]:
+    with open(path) as f:
+        return [event['name'] for event in json.load(f)]
+
+
+def test_child_processes_write_their_own_trace_files(tmp_path):
+    path = tmp_path / 'trace.json'
+    parent = _SPAN + textwrap.dedent(
+        f"""
+        import subprocess
+        subprocess.run([sys.executable, '-c', {_SPAN!r}, 'child'], check=True)
+        """
+    )
+    env = {**os.environ, 'OMNINEXUS_TRACE_FILE': str(path)}
+    env.pop(tracing.TRACE_FILE_PID, None)
+    subprocess.run([sys.executable, '-c', parent, 'parent'], env=env, check=True)
+
+    assert _span_names(path) == ['parent']
+    (child_path,) = [p for p in tmp_path.iterdir() if p != path]
+    assert child_path.name.startswith('trace.') and child_path.suffix == '.json'
+    assert _span_names(child_path) == ['child']
+
+
+def test_events_drop_their_span_once_dispatched(tmp_path):
+    event_stream = EventStream('tracing', InMemoryFileStore())
+    received = []
+    event_stream.subscribe(
+        EventStreamSubscriber.TEST, lambda event: received.append(event), 'test'
+    )
+    tracing.enable(str(tmp_path / 'trace.json'))
+    try:
+        event = MessageAction(content='hi')
+        with tracing.span('add'):
+            event_stream.add_event(event, EventSource.USER)
+        deadline = time.time() + 10
+        while not received or hasattr(event, '_trace_span'):
+            assert time.time() < deadline, 'timed out'
+            time.sleep(0.01)
+    finally:
+        tracing.disable()
+        event_stream.close()
+    assert received == [event]
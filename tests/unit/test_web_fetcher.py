@@ -0,0 +1,97 @@
+import asyncio
+import http.server
+import threading
+
+import pytest
+
+from omninexus.events.action import BrowseURLAction
+from omninexus.runtime.browser.browser_env import BrowserEnv
+from omninexus.runtime.browser.fetch import HttpCache, WebFetcher
+from omninexus.runtime.browser.utils import browse
+
+ARTICLE = '<html><body><h1>Article</h1><p>' + 'static text ' * 50 + '</p></body></html>'
+PAGES = {
+    '/article': ARTICLE,
+    '/app': '<html><body><div id="root"></div><script src="app.js"></script></body></html>',
+    '/big': '<html><body>' + 'x' * 4096 + '</body></html>',
+}
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    requests: list[str] = []
+
+    def do_GET(self):
+        type(self).requests.append(self.path)
+        body = PAGES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    _Handler.requests = []
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+class _RecordingBrowser(BrowserEnv):
+    """A BrowserEnv that records the actions instead of starting a browser."""
+
+    def __init__(self):
+        self.actions: list[str] = []
+
+    def step(self, action_str, timeout=30, screenshot=None):
+        self.actions.append(action_str)
+        return {'text_content': 'from the browser', 'url': 'about:blank'}
+
+
+def test_static_page_is_fetched_and_revalidated(tmp_path, server_url):
+    fetcher = WebFetcher(HttpCache(str(tmp_path)))
+
+    url, text = fetcher.fetch_text(f'{server_url}/article')
+    assert url == f'{server_url}/article'
+    assert 'static text' in text
+
+    # The cached entry is stale (no max-age), so it is revalidated with its ETag
+    assert fetcher.fetch_text(f'{server_url}/article') == (url, text)
+    assert _Handler.requests == ['/article', '/article']
+
+
+def test_script_shells_and_oversized_pages_need_the_browser(server_url):
+    fetcher = WebFetcher(max_bytes=1024)
+
+    assert fetcher.fetch_text(f'{server_url}/app') is None
+    assert fetcher.fetch_text(f'{server_url}/big') is None
+    assert fetcher.fetch_text(f'{server_url}/missing') is None
+
+
+def test_browse_skips_the_browser_only_without_a_single_browser(server_url):
+    fetcher = WebFetcher()
+    action = BrowseURLAction(url=f'{server_url}/article')
+
+    obs = asyncio.run(browse(action, None, fetcher))
+    assert 'static text' in obs.content
+
+    # The page of the single browser is where interactive browsing continues
+    browser = _RecordingBrowser()
+    obs = asyncio.run(browse(action, browser, fetcher))
+    assert obs.content == 'from the browser'
+    assert browser.actions == [f'goto("{server_url}/article")']